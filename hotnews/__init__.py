@@ -7,7 +7,14 @@ Hotnews - 热点新闻聚合与分析工具
   hotnews                  # 安装后执行
 """
 
-from hotnews.context import AppContext
-
 __version__ = "4.0.1"
 __all__ = ["AppContext", "__version__"]
+
+
+def __getattr__(name):
+    # 延迟导入：解析子进程等只需要子模块的场景不必加载整个应用
+    if name == "AppContext":
+        from hotnews.context import AppContext
+
+        return AppContext
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -402,14 +402,17 @@ class NewsAnalyzer:
 
             # 使用 NotificationDispatcher 发送到所有渠道
             dispatcher = self.ctx.create_notification_dispatcher()
-            results = dispatcher.dispatch_all(
-                report_data=report_data,
-                report_type=report_type,
-                update_info=update_info_to_send,
-                proxy_url=self.proxy_url,
-                mode=mode,
-                html_file_path=html_file_path,
-            )
+            try:
+                results = dispatcher.dispatch_all(
+                    report_data=report_data,
+                    report_type=report_type,
+                    update_info=update_info_to_send,
+                    proxy_url=self.proxy_url,
+                    mode=mode,
+                    html_file_path=html_file_path,
+                )
+            finally:
+                dispatcher.close()
 
             if not results:
                 print("未配置任何通知渠道，跳过通知发送")
@@ -574,6 +577,9 @@ class NewsAnalyzer:
         if self.storage_manager.save_news_data(news_data):
             print(f"数据已保存到存储后端: {self.storage_manager.backend_name}")
 
+        # 增量故事聚类（跨平台 / RSS 归并同一事件）
+        self._cluster_stories(news_data)
+
         # 保存 TXT 快照（如果启用）
         txt_file = self.storage_manager.save_txt_snapshot(news_data)
         if txt_file:
@@ -586,6 +592,21 @@ class NewsAnalyzer:
 
         return results, id_to_name, failed_ids
 
+    def _cluster_stories(self, news_data) -> None:
+        """对本次抓取结果和新入库的 RSS 条目做增量故事聚类"""
+        try:
+            from hotnews.core.story_cluster import cluster_news_data, cluster_new_rss_entries
+
+            conn = get_online_db_conn(Path(os.getcwd()))
+            news_stats = cluster_news_data(conn, news_data)
+            rss_stats = cluster_new_rss_entries(conn)
+            print(
+                f"故事聚类完成：热榜新增 {news_stats['new']} 条，RSS 新增 {rss_stats['new']} 条，"
+                f"新故事 {news_stats['new_clusters'] + rss_stats['new_clusters']} 个"
+            )
+        except Exception as e:
+            print(f"故事聚类失败: {e}")
+
     def _execute_mode_strategy(
         self, mode_strategy: Dict, results: Dict, id_to_name: Dict, failed_ids: List
     ) -> Optional[str]:
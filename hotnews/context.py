@@ -144,6 +144,11 @@ class AppContext:
                     "secret_access_key": remote_config.get("SECRET_ACCESS_KEY", ""),
                     "endpoint_url": remote_config.get("ENDPOINT_URL", ""),
                     "region": remote_config.get("REGION", ""),
+                    "transfer_workers": remote_config.get("TRANSFER_WORKERS", 4),
+                    "multipart_threshold_mb": remote_config.get("MULTIPART_THRESHOLD_MB", 8),
+                    "delta_upload": remote_config.get("DELTA_UPLOAD", False),
+                    "async_upload": remote_config.get("ASYNC_UPLOAD"),
+                    "upload_flush_timeout": remote_config.get("UPLOAD_FLUSH_TIMEOUT", 120),
                 },
                 local_retention_days=local_config.get("RETENTION_DAYS", 0),
                 remote_retention_days=remote_config.get("RETENTION_DAYS", 0),
@@ -93,6 +93,7 @@ def _load_notification_config(config_data: Dict) -> Dict:
         "BATCH_SEND_INTERVAL": notification.get("batch_send_interval", 1.0),
         "FEISHU_MESSAGE_SEPARATOR": notification.get("feishu_message_separator", "---"),
         "MAX_ACCOUNTS_PER_CHANNEL": _get_env_int("MAX_ACCOUNTS_PER_CHANNEL") or notification.get("max_accounts_per_channel", 3),
+        "DISPATCH_MAX_WORKERS": _get_env_int("NOTIFICATION_DISPATCH_WORKERS") or notification.get("dispatch_max_workers", 8),
     }
 
 
@@ -136,6 +137,8 @@ def _load_storage_config(config_data: Dict) -> Dict:
     txt_enabled_env = _get_env_bool("STORAGE_TXT_ENABLED")
     html_enabled_env = _get_env_bool("STORAGE_HTML_ENABLED")
     pull_enabled_env = _get_env_bool("PULL_ENABLED")
+    delta_upload_env = _get_env_bool("S3_DELTA_UPLOAD")
+    async_upload_env = _get_env_bool("S3_ASYNC_UPLOAD")
 
     return {
         "BACKEND": _get_env_str("STORAGE_BACKEND") or storage.get("backend", "auto"),
@@ -155,6 +158,11 @@ def _load_storage_config(config_data: Dict) -> Dict:
             "SECRET_ACCESS_KEY": _get_env_str("S3_SECRET_ACCESS_KEY") or remote.get("secret_access_key", ""),
             "REGION": _get_env_str("S3_REGION") or remote.get("region", ""),
             "RETENTION_DAYS": _get_env_int("REMOTE_RETENTION_DAYS") or remote.get("retention_days", 0),
+            "TRANSFER_WORKERS": _get_env_int("S3_TRANSFER_WORKERS") or remote.get("transfer_workers", 4),
+            "MULTIPART_THRESHOLD_MB": _get_env_int("S3_MULTIPART_THRESHOLD_MB") or remote.get("multipart_threshold_mb", 8),
+            "DELTA_UPLOAD": delta_upload_env if delta_upload_env is not None else remote.get("delta_upload", False),
+            "ASYNC_UPLOAD": async_upload_env if async_upload_env is not None else remote.get("async_upload", "auto"),
+            "UPLOAD_FLUSH_TIMEOUT": _get_env_int("S3_UPLOAD_FLUSH_TIMEOUT") or remote.get("upload_flush_timeout", 120),
         },
         "PULL": {
             "ENABLED": pull_enabled_env if pull_enabled_env is not None else pull.get("enabled", False),
@@ -0,0 +1,539 @@
+# coding=utf-8
+"""
+故事聚类模块
+
+同一事件会以多条 news_items（各热榜平台）和 rss_entries（各订阅源）的形式出现。
+本模块在每次抓取 / 每批 RSS 入库后增量运行，为每条内容分配 cluster_id：
+
+- 标题签名：字符 / 单词二元组 shingle + MinHash
+- 候选召回：LSH 分桶（仅在时间窗口内的条目中查找）
+- 归并规则：URL 完全相同直接归并；否则 MinHash 估计的 Jaccard 相似度 >= 阈值
+
+聚类结果保存在 online.db 的 story_clusters / story_cluster_members 两张表中，
+story_clusters 冗余保存代表条目与 item_count / platform_count，
+因此“每个故事取一条代表”和“跨平台热度”都只是一次索引查询。
+
+超出时间窗口的成员与故事由 hotnews.web.db_retention 分批删除（成员行带 512 字节签名，不清理会无限增长）。
+"""
+
+import os
+import random
+import re
+import sqlite3
+import time
+import unicodedata
+import zlib
+from array import array
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from hotnews.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# MinHash 参数：64 个置换，16 个 band × 4 行，LSH 召回阈值约为 (1/16)^(1/4) ≈ 0.5
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(20240601)
+_PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randint(1, _MERSENNE_PRIME - 1), _rng.randint(0, _MERSENNE_PRIME - 1))
+    for _ in range(NUM_PERM)
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+ITEM_TYPE_NEWS = "news"
+ITEM_TYPE_RSS = "rss"
+
+_STATE_RSS_WATERMARK = "rss_last_entry_id"
+
+
+def _cluster_window_hours() -> int:
+    try:
+        v = int(os.environ.get("HOTNEWS_STORY_CLUSTER_WINDOW_HOURS", "48"))
+    except Exception:
+        v = 48
+    return int(max(1, min(24 * 14, v)))
+
+
+def story_cluster_window_seconds() -> int:
+    """聚类时间窗口（秒）；窗口之外的成员与故事不再参与匹配，由 online.db 保留任务清理"""
+    return _cluster_window_hours() * 3600
+
+
+def _cluster_threshold() -> float:
+    try:
+        v = float(os.environ.get("HOTNEWS_STORY_CLUSTER_THRESHOLD", "0.5"))
+    except Exception:
+        v = 0.5
+    return float(max(0.1, min(1.0, v)))
+
+
+def normalize_title(title: str) -> str:
+    """标题归一化：NFKC + 小写"""
+    return unicodedata.normalize("NFKC", title or "").lower().strip()
+
+
+def title_shingles(title: str) -> Set[str]:
+    """
+    生成标题 shingle 集合
+
+    CJK 按单字、拉丁文按单词切分为 token，再取相邻 token 二元组。
+    只有一个 token 时退化为单 token。
+    """
+    tokens = _TOKEN_RE.findall(normalize_title(title))
+    if not tokens:
+        return set()
+    if len(tokens) == 1:
+        return {tokens[0]}
+    return {tokens[i] + "\x1f" + tokens[i + 1] for i in range(len(tokens) - 1)}
+
+
+def minhash_signature(shingles: Iterable[str]) -> array:
+    """计算 MinHash 签名（NUM_PERM 个 uint32）"""
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    sig = array("I", [_MAX_HASH] * NUM_PERM)
+    if not hashes:
+        return sig
+    for i, (a, b) in enumerate(_PERMUTATIONS):
+        sig[i] = min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+    return sig
+
+
+def estimate_similarity(sig_a: array, sig_b: array) -> float:
+    """由两条 MinHash 签名估计 Jaccard 相似度"""
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / float(NUM_PERM)
+
+
+def _band_keys(sig: array) -> List[Tuple[int, bytes]]:
+    return [
+        (b, sig[b * LSH_ROWS:(b + 1) * LSH_ROWS].tobytes())
+        for b in range(LSH_BANDS)
+    ]
+
+
+def normalize_url(url: str) -> str:
+    """URL 归一化（去掉协议、www、查询串中的跟踪参数与末尾斜杠）"""
+    u = (url or "").strip()
+    if not u:
+        return ""
+    try:
+        parsed = urlparse(u)
+    except Exception:
+        return u
+    host = (parsed.netloc or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = (parsed.path or "").rstrip("/")
+    query = "&".join(
+        p for p in (parsed.query or "").split("&")
+        if p and not p.lower().startswith(("utm_", "spm=", "from="))
+    )
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def news_item_key(platform_id: str, url: str, title: str) -> str:
+    """热榜条目的成员键（与 news_items 的 URL + platform_id 去重口径一致）"""
+    if url:
+        return f"{platform_id}|{url}"
+    return f"{platform_id}|t:{title}"
+
+
+def rss_item_key(source_id: str, dedup_key: str) -> str:
+    """RSS 条目的成员键（与 rss_entries 的 UNIQUE(source_id, dedup_key) 一致）"""
+    return f"{source_id}|{dedup_key}"
+
+
+@dataclass
+class StoryItem:
+    """参与聚类的单条内容"""
+
+    item_type: str          # 'news' | 'rss'
+    item_key: str
+    platform_id: str        # 热榜平台 ID，RSS 为 rss-{source_id}
+    title: str
+    url: str = ""
+    rank: int = 0           # 热榜排名，RSS 为 0
+    seen_at: int = 0        # Unix 时间戳
+
+
+class StoryClusterer:
+    """
+    增量故事聚类器
+
+    内存中维护时间窗口内成员的 LSH 索引与 URL 索引，
+    每次运行前只从数据库增量加载新成员（按自增 id），
+    因此抓取进程与 Web 进程各自运行时也能看到对方写入的成员。
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        window_hours: Optional[int] = None,
+        threshold: Optional[float] = None,
+    ):
+        self.conn = conn
+        self.window_seconds = int(window_hours or _cluster_window_hours()) * 3600
+        self.threshold = float(threshold if threshold is not None else _cluster_threshold())
+
+        self._lock = Lock()
+        self._loaded_max_id = 0
+        # member_id -> (cluster_id, seen_at, signature)
+        self._members: Dict[int, Tuple[int, int, array]] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[int]] = {}
+        self._url_index: Dict[str, Tuple[int, int]] = {}  # norm_url -> (cluster_id, seen_at)
+
+    # ---------- 内存索引 ----------
+
+    def _index_member(self, member_id: int, cluster_id: int, seen_at: int, sig: array, url: str) -> None:
+        self._members[member_id] = (cluster_id, seen_at, sig)
+        for key in _band_keys(sig):
+            self._buckets.setdefault(key, set()).add(member_id)
+        nu = normalize_url(url)
+        if nu:
+            self._url_index[nu] = (cluster_id, seen_at)
+        if member_id > self._loaded_max_id:
+            self._loaded_max_id = member_id
+
+    def _prune(self, now_ts: int) -> None:
+        cutoff = now_ts - self.window_seconds
+        expired = [mid for mid, (_, seen_at, _) in self._members.items() if seen_at < cutoff]
+        for mid in expired:
+            _, _, sig = self._members.pop(mid)
+            for key in _band_keys(sig):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(mid)
+                    if not bucket:
+                        del self._buckets[key]
+        if expired:
+            self._url_index = {u: v for u, v in self._url_index.items() if v[1] >= cutoff}
+
+    def _sync_from_db(self, now_ts: int) -> None:
+        cutoff = now_ts - self.window_seconds
+        cur = self.conn.execute(
+            """
+            SELECT id, cluster_id, seen_at, signature, url
+            FROM story_cluster_members
+            WHERE id > ? AND seen_at >= ?
+            ORDER BY id
+            """,
+            (self._loaded_max_id, cutoff),
+        )
+        for member_id, cluster_id, seen_at, sig_blob, url in cur.fetchall():
+            sig = array("I")
+            sig.frombytes(sig_blob)
+            if len(sig) != NUM_PERM:
+                continue
+            self._index_member(int(member_id), int(cluster_id), int(seen_at), sig, url or "")
+        self._prune(now_ts)
+
+    def _find_cluster(self, sig: array, url: str, has_shingles: bool) -> Optional[int]:
+        nu = normalize_url(url)
+        if nu and nu in self._url_index:
+            return self._url_index[nu][0]
+        if not has_shingles:
+            return None
+
+        candidates: Set[int] = set()
+        for key in _band_keys(sig):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates.update(bucket)
+
+        best_cluster: Optional[int] = None
+        best_sim = 0.0
+        for mid in candidates:
+            cluster_id, _, other = self._members[mid]
+            sim = estimate_similarity(sig, other)
+            if sim >= self.threshold and sim > best_sim:
+                best_sim = sim
+                best_cluster = cluster_id
+        return best_cluster
+
+    # ---------- 聚类 ----------
+
+    def assign(self, items: List[StoryItem], now_ts: Optional[int] = None) -> Dict[str, int]:
+        """
+        为一批内容分配 cluster_id 并写入数据库
+
+        已聚类的条目只刷新 seen_at / rank；新条目按 URL → LSH 候选顺序归并，
+        找不到相似故事时新建 cluster。
+
+        Returns:
+            统计信息 {"new": 新成员数, "touched": 刷新成员数, "new_clusters": 新建故事数}
+        """
+        now_ts = int(now_ts or time.time())
+        stats = {"new": 0, "touched": 0, "new_clusters": 0}
+        if not items:
+            return stats
+
+        with self._lock:
+            self._sync_from_db(now_ts)
+            conn = self.conn
+            touched_clusters: Set[int] = set()
+
+            for item in items:
+                if not item.title or not item.item_key:
+                    continue
+                seen_at = int(item.seen_at or now_ts)
+
+                row = conn.execute(
+                    "SELECT id, cluster_id FROM story_cluster_members WHERE item_type = ? AND item_key = ?",
+                    (item.item_type, item.item_key),
+                ).fetchone()
+                if row:
+                    member_id, cluster_id = int(row[0]), int(row[1])
+                    conn.execute(
+                        "UPDATE story_cluster_members SET seen_at = MAX(seen_at, ?), rank = ? WHERE id = ?",
+                        (seen_at, int(item.rank or 0), member_id),
+                    )
+                    cached = self._members.get(member_id)
+                    if cached is not None and cached[1] < seen_at:
+                        self._members[member_id] = (cached[0], seen_at, cached[2])
+                    touched_clusters.add(cluster_id)
+                    stats["touched"] += 1
+                    continue
+
+                shingles = title_shingles(item.title)
+                sig = minhash_signature(shingles)
+                cluster_id = self._find_cluster(sig, item.url, bool(shingles))
+
+                if cluster_id is None:
+                    cur = conn.execute(
+                        """
+                        INSERT INTO story_clusters
+                        (rep_item_type, rep_item_key, rep_platform_id, rep_title, rep_url, rep_rank,
+                         item_count, platform_count, first_seen_at, last_seen_at)
+                        VALUES (?, ?, ?, ?, ?, ?, 1, 1, ?, ?)
+                        """,
+                        (item.item_type, item.item_key, item.platform_id, item.title, item.url or "",
+                         int(item.rank or 0), seen_at, seen_at),
+                    )
+                    cluster_id = int(cur.lastrowid)
+                    stats["new_clusters"] += 1
+                else:
+                    self._maybe_promote_representative(cluster_id, item)
+
+                cur = conn.execute(
+                    """
+                    INSERT INTO story_cluster_members
+                    (item_type, item_key, cluster_id, platform_id, title, url, rank, signature, seen_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (item.item_type, item.item_key, cluster_id, item.platform_id, item.title,
+                     item.url or "", int(item.rank or 0), sig.tobytes(), seen_at),
+                )
+                self._index_member(int(cur.lastrowid), cluster_id, seen_at, sig, item.url)
+                touched_clusters.add(cluster_id)
+                stats["new"] += 1
+
+            self._refresh_aggregates(touched_clusters)
+            conn.commit()
+
+        return stats
+
+    def _maybe_promote_representative(self, cluster_id: int, item: StoryItem) -> None:
+        """热榜条目优先作为代表，其次取排名更靠前的条目"""
+        if item.item_type != ITEM_TYPE_NEWS or not item.rank:
+            return
+        self.conn.execute(
+            """
+            UPDATE story_clusters SET
+                rep_item_type = ?, rep_item_key = ?, rep_platform_id = ?,
+                rep_title = ?, rep_url = ?, rep_rank = ?
+            WHERE id = ? AND (rep_item_type != ? OR rep_rank <= 0 OR rep_rank > ?)
+            """,
+            (item.item_type, item.item_key, item.platform_id, item.title, item.url or "",
+             int(item.rank), cluster_id, ITEM_TYPE_NEWS, int(item.rank)),
+        )
+
+    def _refresh_aggregates(self, cluster_ids: Set[int]) -> None:
+        for cluster_id in cluster_ids:
+            self.conn.execute(
+                """
+                UPDATE story_clusters SET
+                    item_count = (SELECT COUNT(*) FROM story_cluster_members WHERE cluster_id = ?),
+                    platform_count = (SELECT COUNT(DISTINCT platform_id) FROM story_cluster_members WHERE cluster_id = ?),
+                    last_seen_at = (SELECT MAX(seen_at) FROM story_cluster_members WHERE cluster_id = ?)
+                WHERE id = ?
+                """,
+                (cluster_id, cluster_id, cluster_id, cluster_id),
+            )
+
+
+_clusterers: Dict[int, StoryClusterer] = {}
+_clusterers_lock = Lock()
+
+
+def get_story_clusterer(conn: sqlite3.Connection) -> StoryClusterer:
+    """获取与连接绑定的聚类器单例（内存索引跨调用复用）"""
+    with _clusterers_lock:
+        clusterer = _clusterers.get(id(conn))
+        if clusterer is None or clusterer.conn is not conn:
+            clusterer = StoryClusterer(conn)
+            _clusterers[id(conn)] = clusterer
+        return clusterer
+
+
+def cluster_news_data(conn: sqlite3.Connection, news_data: Any, now_ts: Optional[int] = None) -> Dict[str, int]:
+    """
+    对一次热榜抓取结果（NewsData）做增量聚类
+
+    Args:
+        conn: online.db 连接
+        news_data: hotnews.storage.NewsData
+        now_ts: 抓取时间戳，默认当前时间
+    """
+    now_ts = int(now_ts or time.time())
+    items: List[StoryItem] = []
+    for source_id, news_list in (getattr(news_data, "items", None) or {}).items():
+        for n in news_list:
+            items.append(StoryItem(
+                item_type=ITEM_TYPE_NEWS,
+                item_key=news_item_key(source_id, n.url, n.title),
+                platform_id=source_id,
+                title=n.title,
+                url=n.url or "",
+                rank=int(n.rank or 0),
+                seen_at=now_ts,
+            ))
+    return get_story_clusterer(conn).assign(items, now_ts=now_ts)
+
+
+def cluster_new_rss_entries(conn: sqlite3.Connection, batch_size: int = 2000) -> Dict[str, int]:
+    """
+    对上次运行之后新写入的 rss_entries 做增量聚类
+
+    使用 story_cluster_state 中记录的 rss_entries.id 水位线，RSS 调度器每批入库后调用即可。
+    首次运行只处理时间窗口内的条目。
+    """
+    clusterer = get_story_clusterer(conn)
+    now_ts = int(time.time())
+    totals = {"new": 0, "touched": 0, "new_clusters": 0}
+
+    row = conn.execute(
+        "SELECT value FROM story_cluster_state WHERE key = ?", (_STATE_RSS_WATERMARK,)
+    ).fetchone()
+    try:
+        last_id = int(row[0]) if row else 0
+    except Exception:
+        last_id = 0
+    min_created_at = now_ts - clusterer.window_seconds
+
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, source_id, dedup_key, url, title, created_at
+            FROM rss_entries
+            WHERE id > ? AND created_at >= ?
+            ORDER BY id ASC
+            LIMIT ?
+            """,
+            (last_id, min_created_at, int(batch_size)),
+        ).fetchall()
+        if not rows:
+            break
+
+        items = [
+            StoryItem(
+                item_type=ITEM_TYPE_RSS,
+                item_key=rss_item_key(str(r[1]), str(r[2])),
+                platform_id=f"rss-{r[1]}",
+                title=str(r[4] or ""),
+                url=str(r[3] or ""),
+                seen_at=int(r[5] or now_ts),
+            )
+            for r in rows
+        ]
+        stats = clusterer.assign(items, now_ts=now_ts)
+        for k in totals:
+            totals[k] += stats.get(k, 0)
+
+        last_id = int(rows[-1][0])
+        conn.execute(
+            "INSERT OR REPLACE INTO story_cluster_state (key, value) VALUES (?, ?)",
+            (_STATE_RSS_WATERMARK, str(last_id)),
+        )
+        conn.commit()
+
+        if len(rows) < batch_size:
+            break
+
+    return totals
+
+
+def get_story_representatives(
+    conn: sqlite3.Connection,
+    since_ts: Optional[int] = None,
+    limit: int = 100,
+    min_platforms: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    获取每个故事的一条代表条目（按跨平台热度排序）
+
+    Args:
+        conn: online.db 连接
+        since_ts: 只返回该时间之后仍有更新的故事，默认使用聚类时间窗口
+        limit: 返回数量上限
+        min_platforms: 最少覆盖的平台数
+
+    Returns:
+        [{cluster_id, title, url, platform_id, item_type, item_count, platform_count,
+          first_seen_at, last_seen_at}, ...]
+    """
+    if since_ts is None:
+        since_ts = int(time.time()) - _cluster_window_hours() * 3600
+    cur = conn.execute(
+        """
+        SELECT id, rep_title, rep_url, rep_platform_id, rep_item_type,
+               item_count, platform_count, first_seen_at, last_seen_at
+        FROM story_clusters
+        WHERE last_seen_at >= ? AND platform_count >= ?
+        ORDER BY platform_count DESC, item_count DESC, last_seen_at DESC
+        LIMIT ?
+        """,
+        (int(since_ts), int(max(1, min_platforms)), int(max(1, limit))),
+    )
+    return [
+        {
+            "cluster_id": int(r[0]),
+            "title": r[1],
+            "url": r[2],
+            "platform_id": r[3],
+            "item_type": r[4],
+            "item_count": int(r[5] or 0),
+            "platform_count": int(r[6] or 0),
+            "first_seen_at": int(r[7] or 0),
+            "last_seen_at": int(r[8] or 0),
+        }
+        for r in cur.fetchall()
+    ]
+
+
+def get_cluster_ids(conn: sqlite3.Connection, item_type: str, item_keys: List[str]) -> Dict[str, int]:
+    """批量查询条目所属的 cluster_id（用于下游按故事去重）"""
+    result: Dict[str, int] = {}
+    keys = [k for k in item_keys if k]
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(
+            f"""
+            SELECT item_key, cluster_id FROM story_cluster_members
+            WHERE item_type = ? AND item_key IN ({placeholders})
+            """,
+            [item_type, *chunk],
+        )
+        for key, cluster_id in cur.fetchall():
+            result[str(key)] = int(cluster_id)
+    return result
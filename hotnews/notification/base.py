@@ -28,11 +28,14 @@ class BaseNotificationSender(ABC):
         batch_interval: float = 1.0,
         split_content_func: Callable = None,
         proxy_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
     ):
         self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
         self.batch_interval = batch_interval
         self.split_content_func = split_content_func
         self.proxy_url = proxy_url
+        # 复用的 HTTP 会话（连接池），未提供时每次请求单独建立连接
+        self.session = session
         self.logger = self._get_logger()
 
     def _get_logger(self):
@@ -152,7 +155,9 @@ class BaseNotificationSender(ABC):
         headers = self._get_headers()
 
         try:
-            response = requests.post(url, headers=headers, json=payload, proxies=proxies, timeout=30)
+            response = (self.session or requests).post(
+                url, headers=headers, json=payload, proxies=proxies, timeout=30
+            )
 
             if response.status_code == 200:
                 success, error = self._check_response(response)
@@ -189,8 +194,9 @@ class WebhookSender(BaseNotificationSender):
         batch_interval: float = 1.0,
         split_content_func: Callable = None,
         proxy_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
     ):
-        super().__init__(batch_size, batch_interval, split_content_func, proxy_url)
+        super().__init__(batch_size, batch_interval, split_content_func, proxy_url, session)
         self.webhook_url = webhook_url
 
     def _build_url(self, **kwargs) -> str:
@@ -266,8 +272,9 @@ class WeComSender(WebhookSender):
         batch_interval: float = 1.0,
         split_content_func: Callable = None,
         proxy_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
     ):
-        super().__init__(webhook_url, batch_size, batch_interval, split_content_func, proxy_url)
+        super().__init__(webhook_url, batch_size, batch_interval, split_content_func, proxy_url, session)
         self.msg_type = msg_type.lower()
         self.header_type = "wework_text" if self.msg_type == "text" else "wework"
         self.BATCH_HEADER_TYPE = self.header_type
@@ -320,8 +327,9 @@ class TelegramSender(BaseNotificationSender):
         batch_interval: float = 1.0,
         split_content_func: Callable = None,
         proxy_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
     ):
-        super().__init__(batch_size, batch_interval, split_content_func, proxy_url)
+        super().__init__(batch_size, batch_interval, split_content_func, proxy_url, session)
         self.bot_token = bot_token
         self.chat_id = chat_id
 
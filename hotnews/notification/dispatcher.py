@@ -5,12 +5,23 @@
 提供统一的通知分发接口。
 支持所有通知渠道的多账号配置，使用 `;` 分隔多个账号。
 
+各渠道、各账号并发发送，同一账号内的批次仍按顺序发送；渠道与账号两层线程池共用一个
+信号量，同时在发送中的账号数不超过 DISPATCH_MAX_WORKERS；
+每个渠道账号复用独立的 HTTP 会话（连接池），发送结束后输出各渠道耗时。
+
 使用示例:
     dispatcher = NotificationDispatcher(config, get_time_func, split_content_func)
     results = dispatcher.dispatch_all(report_data, report_type, ...)
 """
 
-from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
 
 from hotnews.core.config import (
     get_account_at_index,
@@ -57,6 +68,85 @@ class NotificationDispatcher:
         self.get_time_func = get_time_func
         self.split_content_func = split_content_func
         self.max_accounts = config.get("MAX_ACCOUNTS_PER_CHANNEL", 3)
+        # 并发发送的最大线程数（1 表示按渠道顺序发送）
+        self.max_workers = max(1, int(config.get("DISPATCH_MAX_WORKERS", 8) or 1))
+        # 实际发送的并发上限：只由账号级任务占用，渠道级线程只负责等待，避免嵌套线程池放大并发
+        self._send_slots = threading.BoundedSemaphore(self.max_workers)
+
+        # 每个渠道账号一个 HTTP 会话，批次之间复用连接
+        self._sessions: Dict[str, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+
+        # 最近一次 dispatch_all 的耗时（秒），key 为渠道名或 "渠道名/账号标签"
+        self.last_latencies: Dict[str, float] = {}
+        self._latency_lock = threading.Lock()
+
+    def _get_session(self, key: str) -> requests.Session:
+        """获取（或创建）指定渠道账号的 HTTP 会话"""
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def close(self) -> None:
+        """关闭所有复用的 HTTP 会话"""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def _record_latency(self, key: str, seconds: float) -> None:
+        with self._latency_lock:
+            self.last_latencies[key] = round(seconds, 3)
+
+    def _run_concurrently(
+        self,
+        jobs: List[Tuple[str, Callable[[], bool]]],
+        hold_slot: bool = True,
+    ) -> List[bool]:
+        """
+        并发执行一组发送任务并记录各自耗时，结果顺序与 jobs 一致
+
+        Args:
+            jobs: [(耗时统计 key, 发送函数)]
+            hold_slot: 任务执行期间是否占用发送信号量（账号级任务为 True；
+                渠道级任务内部还会再分发账号任务，必须为 False，否则会互相等待）
+
+        Returns:
+            List[bool]: 每个任务的发送结果（异常视为失败）
+        """
+
+        def _timed(key: str, func: Callable[[], bool]) -> bool:
+            started = time.time()
+            try:
+                if hold_slot:
+                    with self._send_slots:
+                        return bool(func())
+                return bool(func())
+            except Exception as e:
+                print(f"{key} 发送异常：{e}")
+                return False
+            finally:
+                self._record_latency(key, time.time() - started)
+
+        if len(jobs) <= 1 or self.max_workers <= 1:
+            return [_timed(key, func) for key, func in jobs]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(jobs)),
+            thread_name_prefix="hotnews-notify",
+        ) as executor:
+            futures = [executor.submit(_timed, key, func) for key, func in jobs]
+            return [f.result() for f in futures]
 
     def dispatch_all(
         self,
@@ -81,49 +171,50 @@ class NotificationDispatcher:
         Returns:
             Dict[str, bool]: 每个渠道的发送结果，key 为渠道名，value 为是否成功
         """
-        results = {}
+        # (渠道名, 发送函数)，渠道之间并发执行
+        channels: List[Tuple[str, Callable[[], bool]]] = []
 
         # 飞书
         if self.config.get("FEISHU_WEBHOOK_URL"):
-            results["feishu"] = self._send_feishu(
+            channels.append(("feishu", lambda: self._send_feishu(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # 钉钉
         if self.config.get("DINGTALK_WEBHOOK_URL"):
-            results["dingtalk"] = self._send_dingtalk(
+            channels.append(("dingtalk", lambda: self._send_dingtalk(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # 企业微信
         if self.config.get("WEWORK_WEBHOOK_URL"):
-            results["wework"] = self._send_wework(
+            channels.append(("wework", lambda: self._send_wework(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # Telegram（需要配对验证）
         if self.config.get("TELEGRAM_BOT_TOKEN") and self.config.get("TELEGRAM_CHAT_ID"):
-            results["telegram"] = self._send_telegram(
+            channels.append(("telegram", lambda: self._send_telegram(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # ntfy（需要配对验证）
         if self.config.get("NTFY_SERVER_URL") and self.config.get("NTFY_TOPIC"):
-            results["ntfy"] = self._send_ntfy(
+            channels.append(("ntfy", lambda: self._send_ntfy(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # Bark
         if self.config.get("BARK_URL"):
-            results["bark"] = self._send_bark(
+            channels.append(("bark", lambda: self._send_bark(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # Slack
         if self.config.get("SLACK_WEBHOOK_URL"):
-            results["slack"] = self._send_slack(
+            channels.append(("slack", lambda: self._send_slack(
                 report_data, report_type, update_info, proxy_url, mode
-            )
+            )))
 
         # 邮件（保持原有逻辑，已支持多收件人）
         if (
@@ -131,7 +222,21 @@ class NotificationDispatcher:
             and self.config.get("EMAIL_PASSWORD")
             and self.config.get("EMAIL_TO")
         ):
-            results["email"] = self._send_email(report_type, html_file_path)
+            channels.append(("email", lambda: self._send_email(report_type, html_file_path)))
+
+        if not channels:
+            return {}
+
+        with self._latency_lock:
+            self.last_latencies = {}
+        started = time.time()
+        outcomes = self._run_concurrently(channels, hold_slot=False)
+        results = {name: ok for (name, _), ok in zip(channels, outcomes)}
+
+        timings = "，".join(
+            f"{name} {self.last_latencies.get(name, 0.0):.2f}s" for name, _ in channels
+        )
+        print(f"通知发送耗时：{timings}（总计 {time.time() - started:.2f}s）")
 
         return results
 
@@ -148,7 +253,7 @@ class NotificationDispatcher:
         Args:
             channel_name: 渠道名称（用于日志和账号数量限制提示）
             config_value: 配置值（可能包含多个账号，用 ; 分隔）
-            send_func: 发送函数，签名为 (account, account_label=..., **kwargs) -> bool
+            send_func: 发送函数，签名为 (account, account_label=..., session=..., **kwargs) -> bool
             **kwargs: 传递给发送函数的其他参数
 
         Returns:
@@ -159,14 +264,16 @@ class NotificationDispatcher:
             return False
 
         accounts = limit_accounts(accounts, self.max_accounts, channel_name)
-        results = []
+        jobs = []
 
         for i, account in enumerate(accounts):
             if account:
                 account_label = f"账号{i+1}" if len(accounts) > 1 else ""
-                result = send_func(account, account_label=account_label, **kwargs)
-                results.append(result)
+                session = self._get_session(f"{channel_name}/{i}")
+                send = partial(send_func, account, account_label=account_label, session=session, **kwargs)
+                jobs.append((f"{channel_name}{account_label}", send))
 
+        results = self._run_concurrently(jobs)
         return any(results) if results else False
 
     def _send_feishu(
@@ -181,7 +288,7 @@ class NotificationDispatcher:
         return self._send_to_multi_accounts(
             channel_name="飞书",
             config_value=self.config["FEISHU_WEBHOOK_URL"],
-            send_func=lambda url, account_label: send_to_feishu(
+            send_func=lambda url, account_label, session: send_to_feishu(
                 webhook_url=url,
                 report_data=report_data,
                 report_type=report_type,
@@ -192,6 +299,7 @@ class NotificationDispatcher:
                 batch_size=self.config.get("FEISHU_BATCH_SIZE", 29000),
                 batch_interval=self.config.get("BATCH_SEND_INTERVAL", 1.0),
                 split_content_func=self.split_content_func,
+                session=session,
                 get_time_func=self.get_time_func,
             ),
         )
@@ -208,7 +316,7 @@ class NotificationDispatcher:
         return self._send_to_multi_accounts(
             channel_name="钉钉",
             config_value=self.config["DINGTALK_WEBHOOK_URL"],
-            send_func=lambda url, account_label: send_to_dingtalk(
+            send_func=lambda url, account_label, session: send_to_dingtalk(
                 webhook_url=url,
                 report_data=report_data,
                 report_type=report_type,
@@ -219,6 +327,7 @@ class NotificationDispatcher:
                 batch_size=self.config.get("DINGTALK_BATCH_SIZE", 20000),
                 batch_interval=self.config.get("BATCH_SEND_INTERVAL", 1.0),
                 split_content_func=self.split_content_func,
+                session=session,
             ),
         )
 
@@ -234,7 +343,7 @@ class NotificationDispatcher:
         return self._send_to_multi_accounts(
             channel_name="企业微信",
             config_value=self.config["WEWORK_WEBHOOK_URL"],
-            send_func=lambda url, account_label: send_to_wework(
+            send_func=lambda url, account_label, session: send_to_wework(
                 webhook_url=url,
                 report_data=report_data,
                 report_type=report_type,
@@ -246,6 +355,7 @@ class NotificationDispatcher:
                 batch_interval=self.config.get("BATCH_SEND_INTERVAL", 1.0),
                 msg_type=self.config.get("WEWORK_MSG_TYPE", "markdown"),
                 split_content_func=self.split_content_func,
+                session=session,
             ),
         )
 
@@ -277,13 +387,14 @@ class NotificationDispatcher:
         telegram_tokens = limit_accounts(telegram_tokens, self.max_accounts, "Telegram")
         telegram_chat_ids = telegram_chat_ids[: len(telegram_tokens)]
 
-        results = []
+        jobs = []
         for i in range(len(telegram_tokens)):
             token = telegram_tokens[i]
             chat_id = telegram_chat_ids[i]
             if token and chat_id:
                 account_label = f"账号{i+1}" if len(telegram_tokens) > 1 else ""
-                result = send_to_telegram(
+                send = partial(
+                    send_to_telegram,
                     bot_token=token,
                     chat_id=chat_id,
                     report_data=report_data,
@@ -295,9 +406,11 @@ class NotificationDispatcher:
                     batch_size=self.config.get("MESSAGE_BATCH_SIZE", 4000),
                     batch_interval=self.config.get("BATCH_SEND_INTERVAL", 1.0),
                     split_content_func=self.split_content_func,
+                    session=self._get_session(f"Telegram/{i}"),
                 )
-                results.append(result)
+                jobs.append((f"Telegram{account_label}", send))
 
+        results = self._run_concurrently(jobs)
         return any(results) if results else False
 
     def _send_ntfy(
@@ -328,12 +441,13 @@ class NotificationDispatcher:
         if ntfy_tokens:
             ntfy_tokens = ntfy_tokens[: len(ntfy_topics)]
 
-        results = []
+        jobs = []
         for i, topic in enumerate(ntfy_topics):
             if topic:
                 token = get_account_at_index(ntfy_tokens, i, "") if ntfy_tokens else ""
                 account_label = f"账号{i+1}" if len(ntfy_topics) > 1 else ""
-                result = send_to_ntfy(
+                send = partial(
+                    send_to_ntfy,
                     server_url=ntfy_server_url,
                     topic=topic,
                     token=token,
@@ -345,9 +459,11 @@ class NotificationDispatcher:
                     account_label=account_label,
                     batch_size=3800,
                     split_content_func=self.split_content_func,
+                    session=self._get_session(f"ntfy/{i}"),
                 )
-                results.append(result)
+                jobs.append((f"ntfy{account_label}", send))
 
+        results = self._run_concurrently(jobs)
         return any(results) if results else False
 
     def _send_bark(
@@ -362,7 +478,7 @@ class NotificationDispatcher:
         return self._send_to_multi_accounts(
             channel_name="Bark",
             config_value=self.config["BARK_URL"],
-            send_func=lambda url, account_label: send_to_bark(
+            send_func=lambda url, account_label, session: send_to_bark(
                 bark_url=url,
                 report_data=report_data,
                 report_type=report_type,
@@ -373,6 +489,7 @@ class NotificationDispatcher:
                 batch_size=self.config.get("BARK_BATCH_SIZE", 3600),
                 batch_interval=self.config.get("BATCH_SEND_INTERVAL", 1.0),
                 split_content_func=self.split_content_func,
+                session=session,
             ),
         )
 
@@ -388,7 +505,7 @@ class NotificationDispatcher:
         return self._send_to_multi_accounts(
             channel_name="Slack",
             config_value=self.config["SLACK_WEBHOOK_URL"],
-            send_func=lambda url, account_label: send_to_slack(
+            send_func=lambda url, account_label, session: send_to_slack(
                 webhook_url=url,
                 report_data=report_data,
                 report_type=report_type,
@@ -399,6 +516,7 @@ class NotificationDispatcher:
                 batch_size=self.config.get("SLACK_BATCH_SIZE", 4000),
                 batch_interval=self.config.get("BATCH_SEND_INTERVAL", 1.0),
                 split_content_func=self.split_content_func,
+                session=session,
             ),
         )
 
@@ -408,13 +526,14 @@ class NotificationDispatcher:
         html_file_path: Optional[str],
     ) -> bool:
         """发送邮件（保持原有逻辑，已支持多收件人）"""
-        return send_to_email(
-            from_email=self.config["EMAIL_FROM"],
-            password=self.config["EMAIL_PASSWORD"],
-            to_email=self.config["EMAIL_TO"],
-            report_type=report_type,
-            html_file_path=html_file_path,
-            custom_smtp_server=self.config.get("EMAIL_SMTP_SERVER", ""),
-            custom_smtp_port=self.config.get("EMAIL_SMTP_PORT", ""),
-            get_time_func=self.get_time_func,
-        )
+        with self._send_slots:
+            return send_to_email(
+                from_email=self.config["EMAIL_FROM"],
+                password=self.config["EMAIL_PASSWORD"],
+                to_email=self.config["EMAIL_TO"],
+                report_type=report_type,
+                html_file_path=html_file_path,
+                custom_smtp_server=self.config.get("EMAIL_SMTP_SERVER", ""),
+                custom_smtp_port=self.config.get("EMAIL_SMTP_PORT", ""),
+                get_time_func=self.get_time_func,
+            )
@@ -69,6 +69,7 @@ def send_to_feishu(
     batch_interval: float = 1.0,
     split_content_func: Callable = None,
     get_time_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到飞书（支持分批发送）
@@ -85,6 +86,7 @@ def send_to_feishu(
         batch_interval: 批次发送间隔（秒）
         split_content_func: 内容分批函数
         get_time_func: 获取当前时间的函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -135,7 +137,7 @@ def send_to_feishu(
         }
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
             if response.status_code == 200:
@@ -177,6 +179,7 @@ def send_to_dingtalk(
     batch_size: int = 20000,
     batch_interval: float = 1.0,
     split_content_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到钉钉（支持分批发送）
@@ -192,6 +195,7 @@ def send_to_dingtalk(
         batch_size: 批次大小（字节）
         batch_interval: 批次发送间隔（秒）
         split_content_func: 内容分批函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -235,7 +239,7 @@ def send_to_dingtalk(
         }
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
             if response.status_code == 200:
@@ -276,6 +280,7 @@ def send_to_wework(
     batch_interval: float = 1.0,
     msg_type: str = "markdown",
     split_content_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到企业微信（支持分批发送，支持 markdown 和 text 两种格式）
@@ -292,6 +297,7 @@ def send_to_wework(
         batch_interval: 批次发送间隔（秒）
         msg_type: 消息类型 (markdown/text)
         split_content_func: 内容分批函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -344,7 +350,7 @@ def send_to_wework(
         )
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
             if response.status_code == 200:
@@ -385,6 +391,7 @@ def send_to_telegram(
     batch_size: int = 4000,
     batch_interval: float = 1.0,
     split_content_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到 Telegram（支持分批发送）
@@ -401,6 +408,7 @@ def send_to_telegram(
         batch_size: 批次大小（字节）
         batch_interval: 批次发送间隔（秒）
         split_content_func: 内容分批函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -441,7 +449,7 @@ def send_to_telegram(
         }
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
             if response.status_code == 200:
@@ -638,6 +646,7 @@ def send_to_ntfy(
     *,
     batch_size: int = 3800,
     split_content_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到 ntfy（支持分批发送，严格遵守4KB限制）
@@ -654,6 +663,7 @@ def send_to_ntfy(
         account_label: 账号标签（多账号时显示）
         batch_size: 批次大小（字节）
         split_content_func: 内容分批函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -731,7 +741,7 @@ def send_to_ntfy(
             current_headers["Title"] = f"{report_type_en} ({actual_batch_num}/{total_batches})"
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 url,
                 headers=current_headers,
                 data=batch_content.encode("utf-8"),
@@ -752,7 +762,7 @@ def send_to_ntfy(
                 )
                 time.sleep(10)  # 等待10秒后重试
                 # 重试一次
-                retry_response = requests.post(
+                retry_response = (session or requests).post(
                     url,
                     headers=current_headers,
                     data=batch_content.encode("utf-8"),
@@ -812,6 +822,7 @@ def send_to_bark(
     batch_size: int = 3600,
     batch_interval: float = 1.0,
     split_content_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到 Bark（支持分批发送，使用 markdown 格式）
@@ -827,6 +838,7 @@ def send_to_bark(
         batch_size: 批次大小（字节）
         batch_interval: 批次发送间隔（秒）
         split_content_func: 内容分批函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -896,7 +908,7 @@ def send_to_bark(
         }
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 api_endpoint,
                 json=payload,
                 proxies=proxies,
@@ -957,6 +969,7 @@ def send_to_slack(
     batch_size: int = 4000,
     batch_interval: float = 1.0,
     split_content_func: Callable = None,
+    session: Optional[requests.Session] = None,
 ) -> bool:
     """
     发送到 Slack（支持分批发送，使用 mrkdwn 格式）
@@ -972,6 +985,7 @@ def send_to_slack(
         batch_size: 批次大小（字节）
         batch_interval: 批次发送间隔（秒）
         split_content_func: 内容分批函数
+        session: 复用的 HTTP 会话（可选，由调度器按渠道/账号提供连接池）
 
     Returns:
         bool: 发送是否成功
@@ -1009,7 +1023,7 @@ def send_to_slack(
         payload = {"text": mrkdwn_content}
 
         try:
-            response = requests.post(
+            response = (session or requests).post(
                 webhook_url, headers=headers, json=payload, proxies=proxies, timeout=30
             )
 
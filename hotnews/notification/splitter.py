@@ -3,10 +3,17 @@
 消息分批处理模块
 
 提供消息内容分批拆分功能，确保消息大小不超过各平台限制
+
+分两步完成：
+1. 渲染模型：每份报告按格式只渲染一次，得到各区块的文本行及其 UTF-8 字节数
+   （同一报告的多个渠道 / 多个账号共享，标题格式化结果在 wework/bark 等相同格式间复用）
+2. 打包：按批次大小对渲染模型做一次线性扫描，只累加预先算好的字节数，不再重复编码
 """
 
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Callable
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from hotnews.report.formatter import format_title_for_platform
 
@@ -19,6 +26,309 @@ DEFAULT_BATCH_SIZES = {
     "default": 4000,
 }
 
+# 各区块标题使用的格式（未列出的格式输出纯标题，保持与原实现一致）
+_STATS_TITLE_FORMATS = {
+    "wework": "wework",
+    "bark": "wework",
+    "telegram": "telegram",
+    "ntfy": "ntfy",
+    "feishu": "feishu",
+    "dingtalk": "dingtalk",
+    "slack": "slack",
+}
+_NEW_FIRST_TITLE_FORMATS = {
+    "wework": "wework",
+    "bark": "wework",
+    "telegram": "telegram",
+    "feishu": "feishu",
+    "dingtalk": "dingtalk",
+    "slack": "slack",
+}
+_NEW_REST_TITLE_FORMATS = {
+    "wework": "wework",
+    "telegram": "telegram",
+    "feishu": "feishu",
+    "dingtalk": "dingtalk",
+    "slack": "slack",
+}
+
+# 文本片段：(文本, UTF-8 字节数)
+Piece = Tuple[str, int]
+
+# 最近渲染过的报告数（每次推送只有一份报告，保留少量即可）
+_RENDER_CACHE_SIZE = 4
+
+
+def _piece(text: str) -> Piece:
+    return text, len(text.encode("utf-8"))
+
+
+class _ReportRender:
+    """单份报告的渲染缓存：按格式缓存渲染模型，按标题格式缓存格式化后的标题"""
+
+    def __init__(self, report_data: Dict):
+        self.report_data = report_data
+        self.models: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._titles: Dict[Tuple[Any, ...], str] = {}
+
+    def format_title(self, title_format: Optional[str], title_data: Dict, show_source: bool, hide_new: bool) -> str:
+        if title_format is None:
+            return f"{title_data['title']}"
+        key = (title_format, id(title_data), show_source, hide_new)
+        cached = self._titles.get(key)
+        if cached is None:
+            if hide_new:
+                title_data = title_data.copy()
+                title_data["is_new"] = False
+            cached = format_title_for_platform(title_format, title_data, show_source=show_source)
+            self._titles[key] = cached
+        return cached
+
+
+_render_cache: "OrderedDict[int, _ReportRender]" = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def _get_report_render(report_data: Dict) -> _ReportRender:
+    """获取报告的渲染缓存（按对象身份识别，缓存项持有报告引用，避免 id 复用误命中）"""
+    key = id(report_data)
+    with _render_cache_lock:
+        render = _render_cache.get(key)
+        if render is not None and render.report_data is report_data:
+            _render_cache.move_to_end(key)
+            return render
+        render = _ReportRender(report_data)
+        _render_cache[key] = render
+        while len(_render_cache) > _RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+        return render
+
+
+def _word_header(format_type: str, sequence_display: str, word: str, count: int) -> str:
+    """构建词组标题"""
+    if format_type in ("wework", "bark", "ntfy", "dingtalk"):
+        if count >= 10:
+            return f"🔥 {sequence_display} **{word}** : **{count}** 条\n\n"
+        if count >= 5:
+            return f"📈 {sequence_display} **{word}** : **{count}** 条\n\n"
+        return f"📌 {sequence_display} **{word}** : {count} 条\n\n"
+    if format_type == "telegram":
+        if count >= 10:
+            return f"🔥 {sequence_display} {word} : {count} 条\n\n"
+        if count >= 5:
+            return f"📈 {sequence_display} {word} : {count} 条\n\n"
+        return f"📌 {sequence_display} {word} : {count} 条\n\n"
+    if format_type == "feishu":
+        if count >= 10:
+            return f"🔥 <font color='grey'>{sequence_display}</font> **{word}** : <font color='red'>{count}</font> 条\n\n"
+        if count >= 5:
+            return f"📈 <font color='grey'>{sequence_display}</font> **{word}** : <font color='orange'>{count}</font> 条\n\n"
+        return f"📌 <font color='grey'>{sequence_display}</font> **{word}** : {count} 条\n\n"
+    if format_type == "slack":
+        if count >= 10:
+            return f"🔥 {sequence_display} *{word}* : *{count}* 条\n\n"
+        if count >= 5:
+            return f"📈 {sequence_display} *{word}* : *{count}* 条\n\n"
+        return f"📌 {sequence_display} *{word}* : {count} 条\n\n"
+    return ""
+
+
+def _stats_header(format_type: str) -> str:
+    if format_type == "telegram":
+        return "📊 热点词汇统计\n\n"
+    if format_type == "slack":
+        return "📊 *热点词汇统计*\n\n"
+    if format_type in ("wework", "bark", "ntfy", "feishu", "dingtalk"):
+        return "📊 **热点词汇统计**\n\n"
+    return ""
+
+
+def _stats_separator(format_type: str, feishu_separator: str) -> str:
+    if format_type in ("wework", "bark"):
+        return "\n\n\n\n"
+    if format_type in ("telegram", "ntfy", "slack"):
+        return "\n\n"
+    if format_type == "feishu":
+        return f"\n{feishu_separator}\n\n"
+    if format_type == "dingtalk":
+        return "\n---\n\n"
+    return ""
+
+
+def _new_header(format_type: str, feishu_separator: str, total_new_count: Any) -> str:
+    if format_type in ("wework", "bark"):
+        return f"\n\n\n\n🆕 **本次新增热点新闻** (共 {total_new_count} 条)\n\n"
+    if format_type == "telegram":
+        return f"\n\n🆕 本次新增热点新闻 (共 {total_new_count} 条)\n\n"
+    if format_type == "ntfy":
+        return f"\n\n🆕 **本次新增热点新闻** (共 {total_new_count} 条)\n\n"
+    if format_type == "feishu":
+        return f"\n{feishu_separator}\n\n🆕 **本次新增热点新闻** (共 {total_new_count} 条)\n\n"
+    if format_type == "dingtalk":
+        return f"\n---\n\n🆕 **本次新增热点新闻** (共 {total_new_count} 条)\n\n"
+    if format_type == "slack":
+        return f"\n\n🆕 *本次新增热点新闻* (共 {total_new_count} 条)\n\n"
+    return ""
+
+
+def _source_header(format_type: str, source_name: str, count: int) -> str:
+    if format_type == "telegram":
+        return f"{source_name} ({count} 条):\n\n"
+    if format_type == "slack":
+        return f"*{source_name}* ({count} 条):\n\n"
+    if format_type in ("wework", "bark", "ntfy", "feishu", "dingtalk"):
+        return f"**{source_name}** ({count} 条):\n\n"
+    return ""
+
+
+def _failed_header(format_type: str, feishu_separator: str) -> str:
+    if format_type == "wework":
+        return "\n\n\n\n⚠️ **数据获取失败的平台：**\n\n"
+    if format_type == "telegram":
+        return "\n\n⚠️ 数据获取失败的平台：\n\n"
+    if format_type == "ntfy":
+        return "\n\n⚠️ **数据获取失败的平台：**\n\n"
+    if format_type == "feishu":
+        return f"\n{feishu_separator}\n\n⚠️ **数据获取失败的平台：**\n\n"
+    if format_type == "dingtalk":
+        return "\n---\n\n⚠️ **数据获取失败的平台：**\n\n"
+    return ""
+
+
+def _failed_line(format_type: str, id_value: Any) -> str:
+    if format_type == "feishu":
+        return f"  • <font color='red'>{id_value}</font>\n"
+    if format_type == "dingtalk":
+        return f"  • **{id_value}**\n"
+    return f"  • {id_value}\n"
+
+
+def build_render_model(report_data: Dict, format_type: str, feishu_separator: str = "---") -> Dict[str, Any]:
+    """
+    构建（或从缓存获取）报告在某一格式下的渲染模型
+
+    渲染模型只包含与批次大小无关的内容：各区块的标题、每个词组 / 来源的首条（与标题原子打包）
+    和后续新闻行，每个片段附带 UTF-8 字节数。页眉页脚依赖发送时间，在打包阶段生成。
+
+    Args:
+        report_data: 报告数据字典
+        format_type: 格式类型
+        feishu_separator: 飞书消息分隔符
+
+    Returns:
+        渲染模型字典
+    """
+    render = _get_report_render(report_data)
+    model_key = (format_type, feishu_separator if format_type == "feishu" else "")
+    model = render.models.get(model_key)
+    if model is not None:
+        return model
+
+    stats = report_data["stats"]
+    stats_format = _STATS_TITLE_FORMATS.get(format_type)
+    stats_groups = []
+    total_count = len(stats)
+    separator = _piece(_stats_separator(format_type, feishu_separator))
+    for i, stat in enumerate(stats):
+        titles = stat["titles"]
+        word_header = _word_header(format_type, f"[{i + 1}/{total_count}]", stat["word"], stat["count"])
+
+        first_news_line = ""
+        if titles:
+            formatted_title = render.format_title(stats_format, titles[0], True, False)
+            first_news_line = f"  1. {formatted_title}\n"
+            if len(titles) > 1:
+                first_news_line += "\n"
+
+        rest = []
+        for j in range(1, len(titles)):
+            formatted_title = render.format_title(stats_format, titles[j], True, False)
+            news_line = f"  {j + 1}. {formatted_title}\n"
+            if j < len(titles) - 1:
+                news_line += "\n"
+            rest.append(_piece(news_line))
+
+        stats_groups.append({
+            "header": _piece(word_header),
+            "first": _piece(word_header + first_news_line),
+            "rest": rest,
+            "separator": separator if i < total_count - 1 else None,
+        })
+
+    new_first_format = _NEW_FIRST_TITLE_FORMATS.get(format_type)
+    new_rest_format = _NEW_REST_TITLE_FORMATS.get(format_type)
+    new_sources = []
+    for source_data in report_data["new_titles"]:
+        titles = source_data["titles"]
+        source_header = _source_header(format_type, source_data["source_name"], len(titles))
+
+        first_news_line = ""
+        if titles:
+            formatted_title = render.format_title(new_first_format, titles[0], False, True)
+            first_news_line = f"  1. {formatted_title}\n"
+
+        rest = []
+        for j in range(1, len(titles)):
+            formatted_title = render.format_title(new_rest_format, titles[j], False, True)
+            rest.append(_piece(f"  {j + 1}. {formatted_title}\n"))
+
+        new_sources.append({
+            "header": _piece(source_header),
+            "first": _piece(source_header + first_news_line),
+            "rest": rest,
+        })
+
+    model = {
+        "stats_header": _piece(_stats_header(format_type)) if stats else _piece(""),
+        "stats_groups": stats_groups,
+        "new_header": _piece(
+            _new_header(format_type, feishu_separator, report_data.get("total_new_count"))
+        ) if report_data["new_titles"] else _piece(""),
+        "new_sources": new_sources,
+        "failed_header": _piece(_failed_header(format_type, feishu_separator)),
+        "failed_lines": [_piece(_failed_line(format_type, v)) for v in report_data["failed_ids"]],
+    }
+    render.models[model_key] = model
+    return model
+
+
+class _BatchPacker:
+    """按字节上限线性打包片段，片段字节数已预先计算"""
+
+    def __init__(self, base_header: str, base_footer: str, max_bytes: int):
+        self.base_header = _piece(base_header)
+        self.footer_text, self.footer_size = _piece(base_footer)
+        self.max_bytes = max_bytes
+        self.batches: List[str] = []
+        self.parts: List[str] = [self.base_header[0]]
+        self.size = self.base_header[1]
+        self.has_content = False
+
+    def fits(self, piece: Piece) -> bool:
+        return self.size + piece[1] + self.footer_size < self.max_bytes
+
+    def append(self, piece: Piece) -> None:
+        self.parts.append(piece[0])
+        self.size += piece[1]
+
+    def push(self, piece: Piece, *restart: Piece) -> None:
+        """放得下则追加，否则结束当前批次，并以 页眉 + restart 开启新批次"""
+        if self.fits(piece):
+            self.append(piece)
+        else:
+            if self.has_content:
+                self.batches.append("".join(self.parts) + self.footer_text)
+            self.parts = [self.base_header[0]]
+            self.size = self.base_header[1]
+            for p in restart:
+                self.append(p)
+        self.has_content = True
+
+    def finish(self) -> List[str]:
+        if self.has_content:
+            self.batches.append("".join(self.parts) + self.footer_text)
+        return self.batches
+
 
 def split_content_into_batches(
     report_data: Dict,
@@ -60,8 +370,6 @@ def split_content_into_batches(
         else:
             max_bytes = sizes.get("default", 4000)
 
-    batches = []
-
     total_titles = sum(
         len(stat["titles"]) for stat in report_data["stats"] if stat["count"] > 0
     )
@@ -110,24 +418,6 @@ def split_content_into_batches(
         if update_info:
             base_footer += f"\n_Hotnews 发现新版本 *{update_info['remote_version']}*，当前 *{update_info['current_version']}_"
 
-    stats_header = ""
-    if report_data["stats"]:
-        if format_type in ("wework", "bark"):
-            stats_header = f"📊 **热点词汇统计**\n\n"
-        elif format_type == "telegram":
-            stats_header = f"📊 热点词汇统计\n\n"
-        elif format_type == "ntfy":
-            stats_header = f"📊 **热点词汇统计**\n\n"
-        elif format_type == "feishu":
-            stats_header = f"📊 **热点词汇统计**\n\n"
-        elif format_type == "dingtalk":
-            stats_header = f"📊 **热点词汇统计**\n\n"
-        elif format_type == "slack":
-            stats_header = f"📊 *热点词汇统计*\n\n"
-
-    current_batch = base_header
-    current_batch_has_content = False
-
     if (
         not report_data["stats"]
         and not report_data["new_titles"]
@@ -140,441 +430,53 @@ def split_content_into_batches(
         else:
             mode_text = "暂无匹配的热点词汇"
         simple_content = f"📭 {mode_text}\n\n"
-        final_content = base_header + simple_content + base_footer
-        batches.append(final_content)
-        return batches
-
-    # 定义处理热点词汇统计的函数
-    def process_stats_section(current_batch, current_batch_has_content, batches):
-        """处理热点词汇统计"""
-        if not report_data["stats"]:
-            return current_batch, current_batch_has_content, batches
-
-        total_count = len(report_data["stats"])
-
-        # 添加统计标题
-        test_content = current_batch + stats_header
-        if (
-            len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-            < max_bytes
-        ):
-            current_batch = test_content
-            current_batch_has_content = True
-        else:
-            if current_batch_has_content:
-                batches.append(current_batch + base_footer)
-            current_batch = base_header + stats_header
-            current_batch_has_content = True
-
-        # 逐个处理词组（确保词组标题+第一条新闻的原子性）
-        for i, stat in enumerate(report_data["stats"]):
-            word = stat["word"]
-            count = stat["count"]
-            sequence_display = f"[{i + 1}/{total_count}]"
-
-            # 构建词组标题
-            word_header = ""
-            if format_type in ("wework", "bark"):
-                if count >= 10:
-                    word_header = (
-                        f"🔥 {sequence_display} **{word}** : **{count}** 条\n\n"
-                    )
-                elif count >= 5:
-                    word_header = (
-                        f"📈 {sequence_display} **{word}** : **{count}** 条\n\n"
-                    )
-                else:
-                    word_header = f"📌 {sequence_display} **{word}** : {count} 条\n\n"
-            elif format_type == "telegram":
-                if count >= 10:
-                    word_header = f"🔥 {sequence_display} {word} : {count} 条\n\n"
-                elif count >= 5:
-                    word_header = f"📈 {sequence_display} {word} : {count} 条\n\n"
-                else:
-                    word_header = f"📌 {sequence_display} {word} : {count} 条\n\n"
-            elif format_type == "ntfy":
-                if count >= 10:
-                    word_header = (
-                        f"🔥 {sequence_display} **{word}** : **{count}** 条\n\n"
-                    )
-                elif count >= 5:
-                    word_header = (
-                        f"📈 {sequence_display} **{word}** : **{count}** 条\n\n"
-                    )
-                else:
-                    word_header = f"📌 {sequence_display} **{word}** : {count} 条\n\n"
-            elif format_type == "feishu":
-                if count >= 10:
-                    word_header = f"🔥 <font color='grey'>{sequence_display}</font> **{word}** : <font color='red'>{count}</font> 条\n\n"
-                elif count >= 5:
-                    word_header = f"📈 <font color='grey'>{sequence_display}</font> **{word}** : <font color='orange'>{count}</font> 条\n\n"
-                else:
-                    word_header = f"📌 <font color='grey'>{sequence_display}</font> **{word}** : {count} 条\n\n"
-            elif format_type == "dingtalk":
-                if count >= 10:
-                    word_header = (
-                        f"🔥 {sequence_display} **{word}** : **{count}** 条\n\n"
-                    )
-                elif count >= 5:
-                    word_header = (
-                        f"📈 {sequence_display} **{word}** : **{count}** 条\n\n"
-                    )
-                else:
-                    word_header = f"📌 {sequence_display} **{word}** : {count} 条\n\n"
-            elif format_type == "slack":
-                if count >= 10:
-                    word_header = (
-                        f"🔥 {sequence_display} *{word}* : *{count}* 条\n\n"
-                    )
-                elif count >= 5:
-                    word_header = (
-                        f"📈 {sequence_display} *{word}* : *{count}* 条\n\n"
-                    )
-                else:
-                    word_header = f"📌 {sequence_display} *{word}* : {count} 条\n\n"
-
-            # 构建第一条新闻
-            first_news_line = ""
-            if stat["titles"]:
-                first_title_data = stat["titles"][0]
-                if format_type in ("wework", "bark"):
-                    formatted_title = format_title_for_platform(
-                        "wework", first_title_data, show_source=True
-                    )
-                elif format_type == "telegram":
-                    formatted_title = format_title_for_platform(
-                        "telegram", first_title_data, show_source=True
-                    )
-                elif format_type == "ntfy":
-                    formatted_title = format_title_for_platform(
-                        "ntfy", first_title_data, show_source=True
-                    )
-                elif format_type == "feishu":
-                    formatted_title = format_title_for_platform(
-                        "feishu", first_title_data, show_source=True
-                    )
-                elif format_type == "dingtalk":
-                    formatted_title = format_title_for_platform(
-                        "dingtalk", first_title_data, show_source=True
-                    )
-                elif format_type == "slack":
-                    formatted_title = format_title_for_platform(
-                        "slack", first_title_data, show_source=True
-                    )
-                else:
-                    formatted_title = f"{first_title_data['title']}"
-
-                first_news_line = f"  1. {formatted_title}\n"
-                if len(stat["titles"]) > 1:
-                    first_news_line += "\n"
-
-            # 原子性检查：词组标题+第一条新闻必须一起处理
-            word_with_first_news = word_header + first_news_line
-            test_content = current_batch + word_with_first_news
-
-            if (
-                len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-                >= max_bytes
-            ):
-                # 当前批次容纳不下，开启新批次
-                if current_batch_has_content:
-                    batches.append(current_batch + base_footer)
-                current_batch = base_header + stats_header + word_with_first_news
-                current_batch_has_content = True
-                start_index = 1
-            else:
-                current_batch = test_content
-                current_batch_has_content = True
-                start_index = 1
-
-            # 处理剩余新闻条目
-            for j in range(start_index, len(stat["titles"])):
-                title_data = stat["titles"][j]
-                if format_type in ("wework", "bark"):
-                    formatted_title = format_title_for_platform(
-                        "wework", title_data, show_source=True
-                    )
-                elif format_type == "telegram":
-                    formatted_title = format_title_for_platform(
-                        "telegram", title_data, show_source=True
-                    )
-                elif format_type == "ntfy":
-                    formatted_title = format_title_for_platform(
-                        "ntfy", title_data, show_source=True
-                    )
-                elif format_type == "feishu":
-                    formatted_title = format_title_for_platform(
-                        "feishu", title_data, show_source=True
-                    )
-                elif format_type == "dingtalk":
-                    formatted_title = format_title_for_platform(
-                        "dingtalk", title_data, show_source=True
-                    )
-                elif format_type == "slack":
-                    formatted_title = format_title_for_platform(
-                        "slack", title_data, show_source=True
-                    )
-                else:
-                    formatted_title = f"{title_data['title']}"
-
-                news_line = f"  {j + 1}. {formatted_title}\n"
-                if j < len(stat["titles"]) - 1:
-                    news_line += "\n"
-
-                test_content = current_batch + news_line
-                if (
-                    len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-                    >= max_bytes
-                ):
-                    if current_batch_has_content:
-                        batches.append(current_batch + base_footer)
-                    current_batch = base_header + stats_header + word_header + news_line
-                    current_batch_has_content = True
-                else:
-                    current_batch = test_content
-                    current_batch_has_content = True
-
-            # 词组间分隔符
-            if i < len(report_data["stats"]) - 1:
-                separator = ""
-                if format_type in ("wework", "bark"):
-                    separator = f"\n\n\n\n"
-                elif format_type == "telegram":
-                    separator = f"\n\n"
-                elif format_type == "ntfy":
-                    separator = f"\n\n"
-                elif format_type == "feishu":
-                    separator = f"\n{feishu_separator}\n\n"
-                elif format_type == "dingtalk":
-                    separator = f"\n---\n\n"
-                elif format_type == "slack":
-                    separator = f"\n\n"
-
-                test_content = current_batch + separator
-                if (
-                    len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-                    < max_bytes
-                ):
-                    current_batch = test_content
-
-        return current_batch, current_batch_has_content, batches
-
-    # 定义处理新增新闻的函数
-    def process_new_titles_section(current_batch, current_batch_has_content, batches):
-        """处理新增新闻"""
-        if not report_data["new_titles"]:
-            return current_batch, current_batch_has_content, batches
-
-        new_header = ""
-        if format_type in ("wework", "bark"):
-            new_header = f"\n\n\n\n🆕 **本次新增热点新闻** (共 {report_data['total_new_count']} 条)\n\n"
-        elif format_type == "telegram":
-            new_header = (
-                f"\n\n🆕 本次新增热点新闻 (共 {report_data['total_new_count']} 条)\n\n"
-            )
-        elif format_type == "ntfy":
-            new_header = f"\n\n🆕 **本次新增热点新闻** (共 {report_data['total_new_count']} 条)\n\n"
-        elif format_type == "feishu":
-            new_header = f"\n{feishu_separator}\n\n🆕 **本次新增热点新闻** (共 {report_data['total_new_count']} 条)\n\n"
-        elif format_type == "dingtalk":
-            new_header = f"\n---\n\n🆕 **本次新增热点新闻** (共 {report_data['total_new_count']} 条)\n\n"
-        elif format_type == "slack":
-            new_header = f"\n\n🆕 *本次新增热点新闻* (共 {report_data['total_new_count']} 条)\n\n"
-
-        test_content = current_batch + new_header
-        if (
-            len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-            >= max_bytes
-        ):
-            if current_batch_has_content:
-                batches.append(current_batch + base_footer)
-            current_batch = base_header + new_header
-            current_batch_has_content = True
-        else:
-            current_batch = test_content
-            current_batch_has_content = True
-
-        # 逐个处理新增新闻来源
-        for source_data in report_data["new_titles"]:
-            source_header = ""
-            if format_type in ("wework", "bark"):
-                source_header = f"**{source_data['source_name']}** ({len(source_data['titles'])} 条):\n\n"
-            elif format_type == "telegram":
-                source_header = f"{source_data['source_name']} ({len(source_data['titles'])} 条):\n\n"
-            elif format_type == "ntfy":
-                source_header = f"**{source_data['source_name']}** ({len(source_data['titles'])} 条):\n\n"
-            elif format_type == "feishu":
-                source_header = f"**{source_data['source_name']}** ({len(source_data['titles'])} 条):\n\n"
-            elif format_type == "dingtalk":
-                source_header = f"**{source_data['source_name']}** ({len(source_data['titles'])} 条):\n\n"
-            elif format_type == "slack":
-                source_header = f"*{source_data['source_name']}* ({len(source_data['titles'])} 条):\n\n"
-
-            # 构建第一条新增新闻
-            first_news_line = ""
-            if source_data["titles"]:
-                first_title_data = source_data["titles"][0]
-                title_data_copy = first_title_data.copy()
-                title_data_copy["is_new"] = False
-
-                if format_type in ("wework", "bark"):
-                    formatted_title = format_title_for_platform(
-                        "wework", title_data_copy, show_source=False
-                    )
-                elif format_type == "telegram":
-                    formatted_title = format_title_for_platform(
-                        "telegram", title_data_copy, show_source=False
-                    )
-                elif format_type == "feishu":
-                    formatted_title = format_title_for_platform(
-                        "feishu", title_data_copy, show_source=False
-                    )
-                elif format_type == "dingtalk":
-                    formatted_title = format_title_for_platform(
-                        "dingtalk", title_data_copy, show_source=False
-                    )
-                elif format_type == "slack":
-                    formatted_title = format_title_for_platform(
-                        "slack", title_data_copy, show_source=False
-                    )
-                else:
-                    formatted_title = f"{title_data_copy['title']}"
-
-                first_news_line = f"  1. {formatted_title}\n"
-
-            # 原子性检查：来源标题+第一条新闻
-            source_with_first_news = source_header + first_news_line
-            test_content = current_batch + source_with_first_news
-
-            if (
-                len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-                >= max_bytes
-            ):
-                if current_batch_has_content:
-                    batches.append(current_batch + base_footer)
-                current_batch = base_header + new_header + source_with_first_news
-                current_batch_has_content = True
-                start_index = 1
-            else:
-                current_batch = test_content
-                current_batch_has_content = True
-                start_index = 1
-
-            # 处理剩余新增新闻
-            for j in range(start_index, len(source_data["titles"])):
-                title_data = source_data["titles"][j]
-                title_data_copy = title_data.copy()
-                title_data_copy["is_new"] = False
-
-                if format_type == "wework":
-                    formatted_title = format_title_for_platform(
-                        "wework", title_data_copy, show_source=False
-                    )
-                elif format_type == "telegram":
-                    formatted_title = format_title_for_platform(
-                        "telegram", title_data_copy, show_source=False
-                    )
-                elif format_type == "feishu":
-                    formatted_title = format_title_for_platform(
-                        "feishu", title_data_copy, show_source=False
-                    )
-                elif format_type == "dingtalk":
-                    formatted_title = format_title_for_platform(
-                        "dingtalk", title_data_copy, show_source=False
-                    )
-                elif format_type == "slack":
-                    formatted_title = format_title_for_platform(
-                        "slack", title_data_copy, show_source=False
-                    )
-                else:
-                    formatted_title = f"{title_data_copy['title']}"
-
-                news_line = f"  {j + 1}. {formatted_title}\n"
-
-                test_content = current_batch + news_line
-                if (
-                    len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-                    >= max_bytes
-                ):
-                    if current_batch_has_content:
-                        batches.append(current_batch + base_footer)
-                    current_batch = base_header + new_header + source_header + news_line
-                    current_batch_has_content = True
-                else:
-                    current_batch = test_content
-                    current_batch_has_content = True
-
-            current_batch += "\n"
-
-        return current_batch, current_batch_has_content, batches
+        return [base_header + simple_content + base_footer]
+
+    model = build_render_model(report_data, format_type, feishu_separator)
+    packer = _BatchPacker(base_header, base_footer, max_bytes)
+
+    def process_stats_section() -> None:
+        """处理热点词汇统计（确保词组标题+第一条新闻的原子性）"""
+        if not model["stats_groups"]:
+            return
+        stats_header = model["stats_header"]
+        packer.push(stats_header, stats_header)
+        for group in model["stats_groups"]:
+            packer.push(group["first"], stats_header, group["first"])
+            for news_line in group["rest"]:
+                packer.push(news_line, stats_header, group["header"], news_line)
+            # 词组间分隔符（放不下时省略）
+            separator = group["separator"]
+            if separator is not None and packer.fits(separator):
+                packer.append(separator)
+
+    def process_new_titles_section() -> None:
+        """处理新增新闻（确保来源标题+第一条新闻的原子性）"""
+        if not model["new_sources"]:
+            return
+        new_header = model["new_header"]
+        packer.push(new_header, new_header)
+        for source in model["new_sources"]:
+            packer.push(source["first"], new_header, source["first"])
+            for news_line in source["rest"]:
+                packer.push(news_line, new_header, source["header"], news_line)
+            packer.append(_piece("\n"))
 
     # 根据配置决定处理顺序
     if reverse_content_order:
         # 新增热点在前，热点词汇统计在后
-        current_batch, current_batch_has_content, batches = process_new_titles_section(
-            current_batch, current_batch_has_content, batches
-        )
-        current_batch, current_batch_has_content, batches = process_stats_section(
-            current_batch, current_batch_has_content, batches
-        )
+        process_new_titles_section()
+        process_stats_section()
     else:
         # 默认：热点词汇统计在前，新增热点在后
-        current_batch, current_batch_has_content, batches = process_stats_section(
-            current_batch, current_batch_has_content, batches
-        )
-        current_batch, current_batch_has_content, batches = process_new_titles_section(
-            current_batch, current_batch_has_content, batches
-        )
-
-    if report_data["failed_ids"]:
-        failed_header = ""
-        if format_type == "wework":
-            failed_header = f"\n\n\n\n⚠️ **数据获取失败的平台：**\n\n"
-        elif format_type == "telegram":
-            failed_header = f"\n\n⚠️ 数据获取失败的平台：\n\n"
-        elif format_type == "ntfy":
-            failed_header = f"\n\n⚠️ **数据获取失败的平台：**\n\n"
-        elif format_type == "feishu":
-            failed_header = f"\n{feishu_separator}\n\n⚠️ **数据获取失败的平台：**\n\n"
-        elif format_type == "dingtalk":
-            failed_header = f"\n---\n\n⚠️ **数据获取失败的平台：**\n\n"
-
-        test_content = current_batch + failed_header
-        if (
-            len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-            >= max_bytes
-        ):
-            if current_batch_has_content:
-                batches.append(current_batch + base_footer)
-            current_batch = base_header + failed_header
-            current_batch_has_content = True
-        else:
-            current_batch = test_content
-            current_batch_has_content = True
-
-        for i, id_value in enumerate(report_data["failed_ids"], 1):
-            if format_type == "feishu":
-                failed_line = f"  • <font color='red'>{id_value}</font>\n"
-            elif format_type == "dingtalk":
-                failed_line = f"  • **{id_value}**\n"
-            else:
-                failed_line = f"  • {id_value}\n"
-
-            test_content = current_batch + failed_line
-            if (
-                len(test_content.encode("utf-8")) + len(base_footer.encode("utf-8"))
-                >= max_bytes
-            ):
-                if current_batch_has_content:
-                    batches.append(current_batch + base_footer)
-                current_batch = base_header + failed_header + failed_line
-                current_batch_has_content = True
-            else:
-                current_batch = test_content
-                current_batch_has_content = True
+        process_stats_section()
+        process_new_titles_section()
 
-    # 完成最后批次
-    if current_batch_has_content:
-        batches.append(current_batch + base_footer)
+    if model["failed_lines"]:
+        failed_header = model["failed_header"]
+        packer.push(failed_header, failed_header)
+        for failed_line in model["failed_lines"]:
+            packer.push(failed_line, failed_header, failed_line)
 
-    return batches
+    # 完成最后批次
+    return packer.finish()
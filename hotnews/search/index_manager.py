@@ -8,11 +8,13 @@
 import hashlib
 import logging
 import time
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from hotnews.core.logger import get_logger
+from mcp_server.services.shared_cache import get_shared_cache
 from .config import SearchConfig, get_search_config
 from .daily_aggregator import DailyDataAggregator
 from .fts_index import FTSIndex, SearchResult
@@ -189,6 +191,22 @@ class SearchIndexManager:
                 # 过期，删除
                 del self._search_cache[cache_key]
 
+        # 检查共享缓存（其他 worker 的搜索结果）
+        shared = get_shared_cache()
+        if shared is not None:
+            try:
+                found = shared.get(f"search:{cache_key}")
+            except Exception:
+                found = None
+            if found is not None and now - found[1] < self._cache_ttl:
+                try:
+                    cached_results = [HybridSearchResult(**r) for r in found[0]]
+                except (TypeError, KeyError):
+                    cached_results = None  # 旧格式或字段变化，当作未命中
+                if cached_results is not None:
+                    self._search_cache[cache_key] = (found[1], cached_results)
+                    return cached_results
+
         # 执行搜索
         results = unified_search(
             query=query,
@@ -236,6 +254,14 @@ class SearchIndexManager:
 
         self._search_cache[cache_key] = (now, results)
 
+        shared = get_shared_cache()
+        if shared is not None:
+            try:
+                # 共享缓存只存纯 JSON 结构，dataclass 先转成 dict
+                shared.set(f"search:{cache_key}", [asdict(r) for r in results], now, now + self._cache_ttl)
+            except Exception:
+                pass
+
     def keyword_search(
         self,
         query: str,
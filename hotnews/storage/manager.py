@@ -123,6 +123,18 @@ class StorageManager:
 
         return has_config
 
+    def _async_upload_setting(self) -> bool:
+        """后台上传队列开关：未配置时在 GitHub Actions 中使用同步上传（runner 结束后队列会丢失）"""
+        value = self.remote_config.get("async_upload")
+        if isinstance(value, str):
+            value = value.strip().lower()
+            if value in {"", "auto"}:
+                return not self.is_github_actions()
+            return value not in {"0", "false", "no", "off"}
+        if value is None:
+            return not self.is_github_actions()
+        return bool(value)
+
     def _create_remote_backend(self) -> Optional[StorageBackend]:
         """创建远程存储后端"""
         try:
@@ -137,6 +149,12 @@ class StorageManager:
                 enable_txt=self.enable_txt,
                 enable_html=self.enable_html,
                 timezone=self.timezone,
+                transfer_workers=int(self.remote_config.get("transfer_workers") or 4),
+                multipart_threshold_mb=int(self.remote_config.get("multipart_threshold_mb") or 8),
+                delta_upload=bool(self.remote_config.get("delta_upload", False)),
+                async_upload=self._async_upload_setting(),
+                upload_queue_dir=os.path.join(self.data_dir, ".upload_queue"),
+                upload_flush_timeout=int(self.remote_config.get("upload_flush_timeout", 120)),
             )
         except ImportError as e:
             print(f"[存储管理器] 远程后端导入失败: {e}")
@@ -225,12 +243,25 @@ class StorageManager:
         """检查是否是当天第一次抓取"""
         return self.get_backend().is_first_crawl_today(date)
 
+    def get_upload_metrics(self) -> dict:
+        """远程上传队列指标（非远程后端时返回 enabled=False）"""
+        backend = self.get_backend()
+        if hasattr(backend, "get_upload_metrics"):
+            return backend.get_upload_metrics()
+        return {"enabled": False}
+
     def cleanup(self) -> None:
-        """清理资源"""
-        if self._backend:
-            self._backend.cleanup()
-        if self._remote_backend:
-            self._remote_backend.cleanup()
+        """清理资源（上传队列未清空时抛出 RuntimeError，让进程以非零状态退出）"""
+        errors = []
+        for backend in (self._backend, self._remote_backend):
+            if not backend:
+                continue
+            try:
+                backend.cleanup()
+            except RuntimeError as e:
+                errors.append(str(e))
+        if errors:
+            raise RuntimeError("; ".join(errors))
 
     def cleanup_old_data(self) -> int:
         """
@@ -8,13 +8,17 @@
 """
 
 import atexit
+import hashlib
+import json
 import os
 import pytz
 import re
 import shutil
+import struct
 import sys
 import tempfile
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -31,6 +35,7 @@ except ImportError:
     ClientError = Exception
 
 from hotnews.storage.base import StorageBackend, NewsItem, NewsData
+from hotnews.storage.upload_queue import UploadQueue
 from hotnews.utils.time import (
     get_configured_time,
     format_date_folder,
@@ -38,6 +43,57 @@ from hotnews.utils.time import (
 )
 
 
+# 增量（changeset）上传参数
+DELTA_PAGE_SIZE = 4096                 # 比较粒度（与 SQLite 默认页大小一致）
+DELTA_MAGIC = b"HNDELTA1"
+DELTA_MAX_SEGMENTS = 24                # 增量段超过该数量时回退为全量上传（压实）
+DELTA_MAX_RATIO = 0.5                  # 增量累计大小超过基线的该比例时回退为全量上传
+
+_NOT_FOUND_CODES = ("404", "NoSuchKey", "Not Found")
+
+
+def _file_md5(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """流式计算文件 MD5（不把整个文件读入内存）"""
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _page_hashes(path: Path, page_size: int = DELTA_PAGE_SIZE) -> List[bytes]:
+    """按页计算文件摘要，用于找出自上次同步以来变化的页"""
+    hashes = []
+    with open(path, "rb") as f:
+        for page in iter(lambda: f.read(page_size), b""):
+            hashes.append(hashlib.blake2b(page, digest_size=8).digest())
+    return hashes
+
+
+def _apply_delta_segment(path: Path, segment: bytes) -> None:
+    """
+    把一个增量段应用到本地文件
+
+    段格式: MAGIC | >QII(file_size, page_size, page_count) | page_count × (>I page_no + page bytes)
+    """
+    if not segment.startswith(DELTA_MAGIC):
+        raise ValueError("无效的增量段")
+    offset = len(DELTA_MAGIC)
+    file_size, page_size, page_count = struct.unpack_from(">QII", segment, offset)
+    offset += struct.calcsize(">QII")
+
+    with open(path, "r+b") as f:
+        f.truncate(file_size)
+        for _ in range(page_count):
+            (page_no,) = struct.unpack_from(">I", segment, offset)
+            offset += 4
+            start = page_no * page_size
+            length = max(0, min(page_size, file_size - start))
+            f.seek(start)
+            f.write(segment[offset:offset + length])
+            offset += length
+
+
 class RemoteStorageBackend(StorageBackend):
     """
     远程云存储后端（S3 兼容协议）
@@ -62,6 +118,12 @@ class RemoteStorageBackend(StorageBackend):
         enable_html: bool = True,
         temp_dir: Optional[str] = None,
         timezone: str = "Asia/Shanghai",
+        transfer_workers: int = 4,
+        multipart_threshold_mb: int = 8,
+        delta_upload: bool = False,
+        async_upload: Optional[bool] = None,
+        upload_queue_dir: Optional[str] = None,
+        upload_flush_timeout: int = 120,
     ):
         """
         初始化远程存储后端
@@ -76,6 +138,13 @@ class RemoteStorageBackend(StorageBackend):
             enable_html: 是否启用 HTML 报告
             temp_dir: 临时目录路径（默认使用系统临时目录）
             timezone: 时区配置（默认 Asia/Shanghai）
+            transfer_workers: 并发传输线程数（分片上传 / 批量下载）
+            multipart_threshold_mb: 超过该大小（MB）使用流式分片上传，同时也是分片大小
+            delta_upload: 是否启用增量上传（只上传自上次同步以来变化的页）
+            async_upload: 是否使用后台上传队列（抓取路径只做本地快照并入队）；
+                默认在 GitHub Actions 中关闭（runner 用完即弃，队列里的快照无法在下次启动时继续上传）
+            upload_queue_dir: 上传队列持久化目录（未完成的上传在重启后继续）
+            upload_flush_timeout: 清理资源时等待队列上传完成的最长秒数
         """
         if not HAS_BOTO3:
             raise ImportError("远程存储后端需要安装 boto3: pip install boto3")
@@ -86,6 +155,12 @@ class RemoteStorageBackend(StorageBackend):
         self.enable_txt = enable_txt
         self.enable_html = enable_html
         self.timezone = timezone
+        self.transfer_workers = max(1, int(transfer_workers or 1))
+        self.multipart_threshold = max(5, int(multipart_threshold_mb or 8)) * 1024 * 1024
+        self.delta_upload = bool(delta_upload)
+        self.upload_flush_timeout = max(0, int(upload_flush_timeout or 0))
+        if async_upload is None:
+            async_upload = os.environ.get("GITHUB_ACTIONS") != "true"
 
         # 创建临时目录
         self.temp_dir = Path(temp_dir) if temp_dir else Path(tempfile.mkdtemp(prefix="hotnews_"))
@@ -97,6 +172,7 @@ class RemoteStorageBackend(StorageBackend):
         s3_config = BotoConfig(
             s3={"addressing_style": "virtual"},
             signature_version='s3',  # 使用 S3v2 签名，兼容性更好
+            max_pool_connections=max(10, self.transfer_workers * 2),
         )
 
         client_kwargs = {
@@ -113,6 +189,17 @@ class RemoteStorageBackend(StorageBackend):
         # 跟踪下载的文件（用于清理）
         self._downloaded_files: List[Path] = []
         self._db_connections: Dict[str, sqlite3.Connection] = {}
+        # 每个日期最近一次与远程同步时的状态（md5 / 页摘要 / manifest），用于跳过与增量上传
+        self._synced_state: Dict[str, Dict[str, Any]] = {}
+
+        # 后台上传队列：快照目录需要跨进程保留，因此不放在临时目录里
+        self._upload_queue: Optional[UploadQueue] = None
+        if async_upload:
+            queue_dir = Path(upload_queue_dir) if upload_queue_dir else Path("output") / ".upload_queue"
+            self._upload_queue = UploadQueue(
+                spool_dir=str(queue_dir),
+                upload_fn=lambda date, path: self._upload_sqlite(date, local_path=path),
+            )
 
         print(f"[远程存储] 初始化完成，存储桶: {bucket_name}")
 
@@ -171,12 +258,104 @@ class RemoteStorageBackend(StorageBackend):
             print(f"[远程存储] 检查对象存在性异常 ({r2_key}): {e}")
             return False
 
+    def _get_remote_manifest_key(self, date: Optional[str] = None) -> str:
+        """增量上传 manifest 的对象键"""
+        return f"{self._get_remote_db_key(date)}.manifest.json"
+
+    def _get_remote_delta_prefix(self, date: Optional[str] = None) -> str:
+        """增量段对象键前缀"""
+        return f"{self._get_remote_db_key(date)}.delta/"
+
+    def _fetch_object_to_file(self, r2_key: str, local_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        流式下载对象到本地文件（先写 .part 再原子替换）
+
+        直接 GET，不再预先 HEAD；对象不存在时返回 None。
+
+        Returns:
+            {"etag": ..., "size": ...}，对象不存在返回 None
+        """
+        tmp_path = local_path.with_name(local_path.name + ".part")
+        try:
+            # 使用 get_object + iter_chunks 替代 download_file
+            # iter_chunks 会自动处理 chunked transfer encoding
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=r2_key)
+            with open(tmp_path, 'wb') as f:
+                for chunk in response['Body'].iter_chunks(chunk_size=1024*1024):
+                    f.write(chunk)
+            os.replace(tmp_path, local_path)
+            return {
+                "etag": str(response.get("ETag") or "").strip('"'),
+                "size": int(response.get("ContentLength") or local_path.stat().st_size),
+            }
+        except ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code", "")
+            if error_code in _NOT_FOUND_CODES:
+                return None
+            raise
+        finally:
+            if tmp_path.exists():
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+
+    def _load_manifest(self, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """读取增量 manifest，不存在时返回 None"""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name, Key=self._get_remote_manifest_key(date)
+            )
+            return json.loads(response['Body'].read().decode("utf-8"))
+        except ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code", "")
+            if error_code in _NOT_FOUND_CODES:
+                return None
+            raise
+
+    def _materialize_remote_db(self, date: Optional[str], local_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        下载基线数据库并依次应用增量段，得到与远程一致的本地文件
+
+        manifest 中记录了基线的 ETag，只有与当前基线匹配时才应用增量段，
+        这样全量上传过程中被并发读取也不会拼出损坏的文件。
+
+        Returns:
+            {"etag", "size", "manifest", "version"}，远程不存在返回 None
+        """
+        info = self._fetch_object_to_file(self._get_remote_db_key(date), local_path)
+        if info is None:
+            return None
+
+        manifest = self._load_manifest(date)
+        if manifest and manifest.get("base_etag") != info["etag"]:
+            manifest = None
+
+        applied = 0
+        for seg in (manifest or {}).get("deltas", []):
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=seg["key"])
+            _apply_delta_segment(local_path, response['Body'].read())
+            applied += 1
+
+        info["manifest"] = manifest
+        info["version"] = f"{info['etag']}+{applied}"
+        return info
+
+    def _remember_synced_state(self, date: Optional[str], local_path: Path, manifest: Optional[Dict[str, Any]]) -> None:
+        """记录与远程一致时的文件状态，供下次上传判断是否变化"""
+        state: Dict[str, Any] = {"manifest": manifest}
+        if self.delta_upload:
+            state["pages"] = _page_hashes(local_path)
+        else:
+            state["md5"] = _file_md5(local_path)
+        self._synced_state[self._format_date_folder(date)] = state
+
     def _download_sqlite(self, date: Optional[str] = None) -> Optional[Path]:
         """
         从远程存储下载当天的 SQLite 文件到本地临时目录
 
-        使用 get_object + iter_chunks 替代 download_file，
-        以正确处理腾讯云 COS 的 chunked transfer encoding。
+        使用 get_object + iter_chunks 流式写入，以正确处理腾讯云 COS 的 chunked transfer encoding；
+        启用增量上传时会同时应用远程的增量段。
 
         Args:
             date: 日期字符串
@@ -190,46 +369,184 @@ class RemoteStorageBackend(StorageBackend):
         # 确保目录存在
         local_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # 先检查文件是否存在
-        if not self._check_object_exists(r2_key):
-            print(f"[远程存储] 文件不存在，将创建新数据库: {r2_key}")
-            return None
-
         try:
-            # 使用 get_object + iter_chunks 替代 download_file
-            # iter_chunks 会自动处理 chunked transfer encoding
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=r2_key)
-            with open(local_path, 'wb') as f:
-                for chunk in response['Body'].iter_chunks(chunk_size=1024*1024):
-                    f.write(chunk)
-            self._downloaded_files.append(local_path)
-            print(f"[远程存储] 已下载: {r2_key} -> {local_path}")
-            return local_path
+            info = self._materialize_remote_db(date, local_path)
         except ClientError as e:
             error_code = e.response.get("Error", {}).get("Code", "")
-            # S3 兼容存储可能返回不同的错误码
-            if error_code in ("404", "NoSuchKey", "Not Found"):
-                print(f"[远程存储] 文件不存在，将创建新数据库: {r2_key}")
-                return None
-            else:
-                print(f"[远程存储] 下载失败 (错误码: {error_code}): {e}")
-                raise
+            print(f"[远程存储] 下载失败 (错误码: {error_code}): {e}")
+            raise
         except Exception as e:
             print(f"[远程存储] 下载异常: {e}")
             raise
 
-    def _upload_sqlite(self, date: Optional[str] = None) -> bool:
+        if info is None:
+            print(f"[远程存储] 文件不存在，将创建新数据库: {r2_key}")
+            return None
+
+        self._downloaded_files.append(local_path)
+        self._remember_synced_state(date, local_path, info.get("manifest"))
+        print(f"[远程存储] 已下载: {r2_key} -> {local_path} ({info['size']} bytes)")
+        return local_path
+
+    def _put_file(self, r2_key: str, local_path: Path, md5_hex: str) -> str:
+        """
+        上传本地文件，返回对象 ETag
+
+        小文件按原方式 put_object(bytes) 并显式设置 ContentLength（避免 chunked encoding）；
+        超过阈值的文件使用分片上传，各分片由线程池并发读取、上传，内存占用只与分片大小相关。
+        """
+        local_size = local_path.stat().st_size
+        metadata = {"md5": md5_hex}
+
+        if local_size <= self.multipart_threshold:
+            with open(local_path, 'rb') as f:
+                file_content = f.read()
+            response = self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=r2_key,
+                Body=file_content,
+                ContentLength=local_size,
+                ContentType='application/octet-stream',
+                Metadata=metadata,
+            )
+            return str(response.get("ETag") or "").strip('"')
+
+        part_size = self.multipart_threshold
+        part_count = (local_size + part_size - 1) // part_size
+        upload = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=r2_key,
+            ContentType='application/octet-stream',
+            Metadata=metadata,
+        )
+        upload_id = upload["UploadId"]
+
+        def _upload_part(part_number: int) -> Dict[str, Any]:
+            offset = (part_number - 1) * part_size
+            length = min(part_size, local_size - offset)
+            with open(local_path, 'rb') as f:
+                f.seek(offset)
+                body = f.read(length)
+            resp = self.s3_client.upload_part(
+                Bucket=self.bucket_name,
+                Key=r2_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+                ContentLength=length,
+            )
+            return {"PartNumber": part_number, "ETag": resp["ETag"]}
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.transfer_workers, part_count)) as pool:
+                parts = list(pool.map(_upload_part, range(1, part_count + 1)))
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=r2_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])},
+            )
+            print(f"[远程存储] 分片上传完成: {r2_key} ({part_count} 个分片)")
+            return str(response.get("ETag") or "").strip('"')
+        except Exception:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name, Key=r2_key, UploadId=upload_id
+                )
+            except Exception:
+                pass
+            raise
+
+    def _put_manifest(self, date: Optional[str], manifest: Dict[str, Any]) -> None:
+        body = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=self._get_remote_manifest_key(date),
+            Body=body,
+            ContentLength=len(body),
+            ContentType='application/json',
+        )
+
+    def _delete_delta_segments(self, segments: List[Dict[str, Any]]) -> None:
+        keys = [{"Key": seg["key"]} for seg in segments if seg.get("key")]
+        for i in range(0, len(keys), 1000):
+            try:
+                self.s3_client.delete_objects(
+                    Bucket=self.bucket_name, Delete={"Objects": keys[i:i + 1000]}
+                )
+            except Exception as e:
+                print(f"[远程存储] 清理增量段失败: {e}")
+
+    def _try_upload_delta(
+        self,
+        date: Optional[str],
+        local_path: Path,
+        pages: List[bytes],
+        state: Dict[str, Any],
+    ) -> bool:
+        """
+        只上传自上次同步以来变化的页
+
+        Returns:
+            True 表示已通过增量段完成同步；False 表示需要回退到全量上传
+        """
+        manifest = state.get("manifest")
+        old_pages = state.get("pages")
+        if not manifest or old_pages is None:
+            return False
+
+        changed = [i for i, h in enumerate(pages) if i >= len(old_pages) or old_pages[i] != h]
+        deltas = list(manifest.get("deltas", []))
+        base_size = int(manifest.get("base_size") or 0)
+        delta_bytes = sum(int(d.get("size") or 0) for d in deltas) + len(changed) * DELTA_PAGE_SIZE
+        if len(deltas) >= DELTA_MAX_SEGMENTS or delta_bytes > base_size * DELTA_MAX_RATIO:
+            return False
+
+        file_size = local_path.stat().st_size
+        chunks = [DELTA_MAGIC, struct.pack(">QII", file_size, DELTA_PAGE_SIZE, len(changed))]
+        with open(local_path, 'rb') as f:
+            for page_no in changed:
+                f.seek(page_no * DELTA_PAGE_SIZE)
+                chunks.append(struct.pack(">I", page_no))
+                chunks.append(f.read(DELTA_PAGE_SIZE))
+        segment = b"".join(chunks)
+
+        seg_key = f"{self._get_remote_delta_prefix(date)}{len(deltas) + 1:06d}"
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=seg_key,
+            Body=segment,
+            ContentLength=len(segment),
+            ContentType='application/octet-stream',
+        )
+        # 先写增量段再更新 manifest，读取方看到的永远是完整的段列表
+        deltas.append({"key": seg_key, "size": len(segment), "pages": len(changed)})
+        manifest = dict(manifest, deltas=deltas)
+        self._put_manifest(date, manifest)
+
+        state["manifest"] = manifest
+        state["pages"] = pages
+        print(f"[远程存储] 增量上传: {seg_key} ({len(changed)} 页, {len(segment)} bytes)")
+        return True
+
+    def _upload_sqlite(self, date: Optional[str] = None, local_path: Optional[Path] = None) -> bool:
         """
         上传本地 SQLite 文件到远程存储
 
+        - 内容与上次同步一致时跳过上传
+        - 启用增量上传时优先只上传变化的页，增量段过多 / 过大时回退为全量上传
+        - 全量上传超过阈值时使用流式分片上传
+
         Args:
             date: 日期字符串
+            local_path: 要上传的文件（默认为当天的本地数据库，上传队列传入快照路径）
 
         Returns:
             是否上传成功
         """
-        local_path = self._get_local_db_path(date)
+        local_path = local_path or self._get_local_db_path(date)
         r2_key = self._get_remote_db_key(date)
+        date_key = self._format_date_folder(date)
 
         if not local_path.exists():
             print(f"[远程存储] 本地文件不存在，无法上传: {local_path}")
@@ -238,36 +555,83 @@ class RemoteStorageBackend(StorageBackend):
         try:
             # 获取本地文件大小
             local_size = local_path.stat().st_size
-            print(f"[远程存储] 准备上传: {local_path} ({local_size} bytes) -> {r2_key}")
-
-            # 读取文件内容为 bytes 后上传
-            # 避免传入文件对象时 requests 库使用 chunked transfer encoding
-            # 腾讯云 COS 等 S3 兼容服务可能无法正确处理 chunked encoding
-            with open(local_path, 'rb') as f:
-                file_content = f.read()
+            state = self._synced_state.get(date_key, {})
+
+            pages: Optional[List[bytes]] = None
+            if self.delta_upload:
+                pages = _page_hashes(local_path)
+                if state.get("pages") == pages:
+                    print(f"[远程存储] 内容未变化，跳过上传: {r2_key}")
+                    return True
+                if self._try_upload_delta(date, local_path, pages, state):
+                    return True
+
+            md5_hex = _file_md5(local_path)
+            if not self.delta_upload and state.get("md5") == md5_hex:
+                print(f"[远程存储] 内容未变化，跳过上传: {r2_key}")
+                return True
 
-            # 使用 put_object 并明确设置 ContentLength，确保不使用 chunked encoding
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=r2_key,
-                Body=file_content,
-                ContentLength=local_size,
-                ContentType='application/octet-stream',
-            )
+            print(f"[远程存储] 准备上传: {local_path} ({local_size} bytes) -> {r2_key}")
+            etag = self._put_file(r2_key, local_path, md5_hex)
             print(f"[远程存储] 已上传: {local_path} -> {r2_key}")
 
-            # 验证上传成功
-            if self._check_object_exists(r2_key):
-                print(f"[远程存储] 上传验证成功: {r2_key}")
-                return True
-            else:
-                print(f"[远程存储] 上传验证失败: 文件未在远程存储中找到")
+            # 验证上传成功（大小一致）
+            try:
+                head = self.s3_client.head_object(Bucket=self.bucket_name, Key=r2_key)
+            except Exception as e:
+                print(f"[远程存储] 上传验证失败: {e}")
                 return False
+            if int(head.get("ContentLength") or -1) != local_size:
+                print(f"[远程存储] 上传验证失败: 远程大小 {head.get('ContentLength')} != 本地大小 {local_size}")
+                return False
+            print(f"[远程存储] 上传验证成功: {r2_key}")
+
+            new_state: Dict[str, Any] = {"md5": md5_hex, "manifest": None}
+            if self.delta_upload:
+                old_segments = (state.get("manifest") or {}).get("deltas", [])
+                manifest = {
+                    "base_etag": etag or str(head.get("ETag") or "").strip('"'),
+                    "base_size": local_size,
+                    "page_size": DELTA_PAGE_SIZE,
+                    "deltas": [],
+                }
+                self._put_manifest(date, manifest)
+                self._delete_delta_segments(old_segments)
+                new_state = {"pages": pages, "manifest": manifest}
+            self._synced_state[date_key] = new_state
+            return True
 
         except Exception as e:
             print(f"[远程存储] 上传失败: {e}")
             return False
 
+    def _schedule_upload(self, date: Optional[str], conn: sqlite3.Connection) -> bool:
+        """
+        同步数据库到远程存储
+
+        启用上传队列时只做本地快照并入队（立即返回），否则同步上传。
+        """
+        if self._upload_queue is None:
+            return self._upload_sqlite(date)
+        try:
+            self._upload_queue.enqueue(self._format_date_folder(date), conn)
+            return True
+        except Exception as e:
+            print(f"[远程存储] 加入上传队列失败，改为同步上传: {e}")
+            return self._upload_sqlite(date)
+
+    def get_upload_metrics(self) -> Dict[str, Any]:
+        """上传队列指标（队列深度、上传耗时等）"""
+        if self._upload_queue is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._upload_queue.metrics()}
+
+    def flush_uploads(self, timeout: Optional[float] = None) -> bool:
+        """等待上传队列清空"""
+        if self._upload_queue is None:
+            return True
+        return self._upload_queue.flush(timeout)
+
     def _get_connection(self, date: Optional[str] = None) -> sqlite3.Connection:
         """获取数据库连接"""
         local_path = self._get_local_db_path(date)
@@ -277,9 +641,16 @@ class RemoteStorageBackend(StorageBackend):
             # 确保目录存在
             local_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # 如果本地不存在，尝试从远程存储下载
+            # 如果本地不存在：优先使用尚未上传完成的队列快照（比远程新），否则从远程存储下载
             if not local_path.exists():
-                self._download_sqlite(date)
+                pending = None
+                if self._upload_queue is not None:
+                    pending = self._upload_queue.pending_snapshot(self._format_date_folder(date))
+                if pending is not None and pending.exists():
+                    shutil.copyfile(pending, local_path)
+                    print(f"[远程存储] 使用上传队列中的未同步快照: {pending}")
+                else:
+                    self._download_sqlite(date)
 
             conn = sqlite3.connect(db_path)
             conn.row_factory = sqlite3.Row
@@ -491,9 +862,9 @@ class RemoteStorageBackend(StorageBackend):
             log_parts.append(f"(去重后总计: {final_count} 条)")
             print("，".join(log_parts))
 
-            # 上传到远程存储
-            if self._upload_sqlite(data.date):
-                print(f"[远程存储] 数据已同步到远程存储")
+            # 上传到远程存储（启用上传队列时只入队，由后台线程上传）
+            if self._schedule_upload(data.date, conn):
+                print(f"[远程存储] 数据已{'加入上传队列' if self._upload_queue else '同步到远程存储'}")
                 return True
             else:
                 print(f"[远程存储] 上传远程存储失败")
@@ -807,11 +1178,32 @@ class RemoteStorageBackend(StorageBackend):
             return True
 
     def cleanup(self) -> None:
-        """清理资源（关闭连接和删除临时文件）"""
+        """
+        清理资源（等待后台上传、关闭连接和删除临时文件）
+
+        Raises:
+            RuntimeError: 上传队列在 upload_flush_timeout 内未清空（未上传的快照保留在队列目录）
+        """
+        self._release_resources(flush_uploads=True)
+
+    def _release_resources(self, flush_uploads: bool) -> None:
         # 检查 Python 是否正在关闭
         if sys.meta_path is None:
             return
 
+        # 等待后台上传完成（超时的任务已持久化，下次启动继续上传）
+        pending_error: Optional[str] = None
+        upload_queue = getattr(self, "_upload_queue", None)
+        if upload_queue is not None and flush_uploads:
+            self._upload_queue = None
+            if not upload_queue.close(timeout=self.upload_flush_timeout):
+                metrics = upload_queue.metrics()
+                pending_error = (
+                    f"上传队列未在 {self.upload_flush_timeout}s 内清空，"
+                    f"剩余 {metrics.get('depth', 0)} 个任务保留在 {upload_queue.spool_dir}"
+                )
+            print(f"[远程存储] 上传队列指标: {upload_queue.metrics()}")
+
         # 关闭数据库连接
         db_connections = getattr(self, "_db_connections", {})
         for db_path, conn in list(db_connections.items()):
@@ -840,6 +1232,9 @@ class RemoteStorageBackend(StorageBackend):
         if downloaded_files:
             downloaded_files.clear()
 
+        if pending_error:
+            raise RuntimeError(f"[远程存储] {pending_error}")
+
     def cleanup_old_data(self, retention_days: int) -> int:
         """
         清理远程存储上的过期数据
@@ -876,7 +1271,7 @@ class RemoteStorageBackend(StorageBackend):
                     folder_date = None
                     try:
                         # ISO 格式: news/YYYY-MM-DD.db
-                        date_match = re.match(r'news/(\d{4})-(\d{2})-(\d{2})\.db$', key)
+                        date_match = re.match(r'news/(\d{4})-(\d{2})-(\d{2})\.db(?:\.manifest\.json|\.delta/\d+)?$', key)
                         if date_match:
                             folder_date = datetime(
                                 int(date_match.group(1)),
@@ -990,8 +1385,8 @@ class RemoteStorageBackend(StorageBackend):
             print(f"[远程存储] 推送记录已保存: {report_type} at {now_str}")
 
             # 上传到远程存储 确保记录持久化
-            if self._upload_sqlite(date):
-                print(f"[远程存储] 推送记录已同步到远程存储")
+            if self._schedule_upload(date, conn):
+                print(f"[远程存储] 推送记录已{'加入上传队列' if self._upload_queue else '同步到远程存储'}")
                 return True
             else:
                 print(f"[远程存储] 推送记录同步到远程存储失败")
@@ -1002,70 +1397,154 @@ class RemoteStorageBackend(StorageBackend):
             return False
 
     def __del__(self):
-        """析构函数"""
+        """析构函数（不等待上传队列：未完成的任务已持久化）"""
         # 检查 Python 是否正在关闭
         if sys.meta_path is None:
             return
         try:
-            self.cleanup()
+            self._release_resources(flush_uploads=False)
         except Exception:
             # Python 关闭时可能会出错，忽略即可
             pass
 
-    def pull_recent_days(self, days: int, local_data_dir: str = "output") -> int:
+    def _list_remote_objects(self) -> Dict[str, Dict[str, Any]]:
+        """一次列举 news/ 前缀下所有对象的 ETag 和大小（代替逐个 HEAD）"""
+        objects: Dict[str, Dict[str, Any]] = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix="news/"):
+            for obj in page.get('Contents', []) or []:
+                objects[obj['Key']] = {
+                    "etag": str(obj.get('ETag') or "").strip('"'),
+                    "size": int(obj.get('Size') or 0),
+                }
+        return objects
+
+    def _pull_one_date(
+        self,
+        date_str: str,
+        local_dir: Path,
+        remote_objects: Dict[str, Dict[str, Any]],
+    ) -> str:
+        """
+        拉取单个日期的数据库
+
+        本地文件旁的 .news.db.remote.json 记录上次拉取时的远程版本与文件大小：
+        - 远程版本未变 → 跳过
+        - 远程已更新且本地文件未被改动（大小一致）→ 重新拉取
+        - 没有记录（本地自行生成的文件）→ 保持原有行为，跳过
+
+        Returns:
+            "pulled" / "skipped" / "missing"
         """
-        从远程拉取最近 N 天的数据到本地
+        base = remote_objects.get(f"news/{date_str}.db")
+        if base is None:
+            return "missing"
+        manifest = remote_objects.get(f"news/{date_str}.db.manifest.json")
+        remote_version = base["etag"] + (f"+{manifest['etag']}" if manifest else "")
+
+        local_date_dir = local_dir / date_str
+        local_db_path = local_date_dir / "news.db"
+        sidecar_path = local_date_dir / ".news.db.remote.json"
+
+        if local_db_path.exists():
+            try:
+                sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+            except Exception:
+                return "skipped"
+            if sidecar.get("version") == remote_version:
+                return "skipped"
+            if int(sidecar.get("size") or -1) != local_db_path.stat().st_size:
+                return "skipped"
+
+        local_date_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = local_date_dir / "news.db.pulling"
+        try:
+            info = self._materialize_remote_db(date_str, tmp_path)
+            if info is None:
+                return "missing"
+            os.replace(tmp_path, local_db_path)
+        finally:
+            if tmp_path.exists():
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+
+        sidecar_path.write_text(
+            json.dumps({"version": remote_version, "size": local_db_path.stat().st_size}),
+            encoding="utf-8",
+        )
+        return "pulled"
+
+    def pull_dates(self, date_strs: List[str], local_data_dir: str = "output") -> Dict[str, str]:
+        """
+        并发拉取指定日期的数据库到本地
 
         Args:
-            days: 拉取天数
+            date_strs: 日期列表（YYYY-MM-DD）
             local_data_dir: 本地数据目录
 
         Returns:
-            成功拉取的数据库文件数量
+            {date: "pulled" / "skipped" / "missing" / "failed: <原因>"}
         """
-        if days <= 0:
-            return 0
-
         local_dir = Path(local_data_dir)
         local_dir.mkdir(parents=True, exist_ok=True)
 
-        pulled_count = 0
-        now = self._get_configured_time()
+        results: Dict[str, str] = {}
+        if not date_strs:
+            return results
 
-        print(f"[远程存储] 开始拉取最近 {days} 天的数据...")
+        try:
+            remote_objects = self._list_remote_objects()
+        except Exception as e:
+            print(f"[远程存储] 列出远程对象失败: {e}")
+            return {d: f"failed: {e}" for d in date_strs}
+
+        with ThreadPoolExecutor(max_workers=min(self.transfer_workers, len(date_strs))) as pool:
+            futures = {
+                pool.submit(self._pull_one_date, d, local_dir, remote_objects): d
+                for d in date_strs
+            }
+            for future in as_completed(futures):
+                date_str = futures[future]
+                try:
+                    results[date_str] = future.result()
+                except Exception as e:
+                    results[date_str] = f"failed: {e}"
+        return results
 
-        for i in range(days):
-            date = now - timedelta(days=i)
-            date_str = date.strftime("%Y-%m-%d")
+    def pull_recent_days(self, days: int, local_data_dir: str = "output") -> int:
+        """
+        从远程拉取最近 N 天的数据到本地（并发下载）
 
-            # 本地目标路径
-            local_date_dir = local_dir / date_str
-            local_db_path = local_date_dir / "news.db"
+        Args:
+            days: 拉取天数
+            local_data_dir: 本地数据目录
 
-            # 如果本地已存在，跳过
-            if local_db_path.exists():
-                print(f"[远程存储] 跳过（本地已存在）: {date_str}")
-                continue
+        Returns:
+            成功拉取的数据库文件数量
+        """
+        if days <= 0:
+            return 0
 
-            # 远程对象键
-            remote_key = f"news/{date_str}.db"
+        now = self._get_configured_time()
+        date_strs = [(now - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
 
-            # 检查远程是否存在
-            if not self._check_object_exists(remote_key):
-                print(f"[远程存储] 跳过（远程不存在）: {date_str}")
-                continue
+        print(f"[远程存储] 开始拉取最近 {days} 天的数据（{self.transfer_workers} 个并发）...")
 
-            # 下载（使用 get_object + iter_chunks 处理 chunked encoding）
-            try:
-                local_date_dir.mkdir(parents=True, exist_ok=True)
-                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=remote_key)
-                with open(local_db_path, 'wb') as f:
-                    for chunk in response['Body'].iter_chunks(chunk_size=1024*1024):
-                        f.write(chunk)
-                print(f"[远程存储] 已拉取: {remote_key} -> {local_db_path}")
+        results = self.pull_dates(date_strs, local_data_dir)
+        pulled_count = 0
+        for date_str in date_strs:
+            status = results.get(date_str, "")
+            if status == "pulled":
                 pulled_count += 1
-            except Exception as e:
-                print(f"[远程存储] 拉取失败 ({date_str}): {e}")
+                print(f"[远程存储] 已拉取: news/{date_str}.db")
+            elif status == "skipped":
+                print(f"[远程存储] 跳过（本地已是最新）: {date_str}")
+            elif status == "missing":
+                print(f"[远程存储] 跳过（远程不存在）: {date_str}")
+            else:
+                print(f"[远程存储] 拉取失败 ({date_str}): {status}")
 
         print(f"[远程存储] 拉取完成，共下载 {pulled_count} 个数据库文件")
         return pulled_count
@@ -0,0 +1,338 @@
+# coding=utf-8
+"""
+远程上传队列
+
+把"上传 SQLite 到远程存储"从抓取路径中剥离出来：
+- 抓取路径只负责把当前数据库做一次一致性快照（sqlite3 backup API）并入队，立即返回
+- 后台线程按日期串行上传；同一日期在上传前多次入队会合并为最新快照，只上传一次
+- 上传失败按指数退避重试
+- 队列状态（日期 -> 快照文件）持久化到 spool 目录，进程重启后继续上传未完成的任务
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+QUEUE_STATE_FILE = "queue.json"
+
+
+class UploadQueue:
+    """按日期合并的后台上传队列"""
+
+    def __init__(
+        self,
+        spool_dir: str,
+        upload_fn: Callable[[str, Path], bool],
+        max_retries: int = 5,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+    ):
+        """
+        初始化上传队列
+
+        Args:
+            spool_dir: 快照与队列状态的持久化目录
+            upload_fn: 实际上传函数 (date, snapshot_path) -> 是否成功
+            max_retries: 本进程内单个任务的最大重试次数（超过后保留在磁盘，下次启动再试）
+            base_backoff: 首次重试等待秒数，之后按 2 的幂增长
+            max_backoff: 单次重试最大等待秒数
+        """
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self._upload_fn = upload_fn
+        self.max_retries = max(0, int(max_retries))
+        self.base_backoff = max(0.1, float(base_backoff))
+        self.max_backoff = max(self.base_backoff, float(max_backoff))
+
+        self._cond = threading.Condition()
+        # date -> {"path", "attempts", "next_attempt_at", "enqueued_at", "first_enqueued_at"}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Optional[str] = None
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._seq = 0
+
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "uploaded": 0,
+            "failed_attempts": 0,
+            "gave_up": 0,
+        }
+
+        self._load_state()
+        if self._jobs:
+            print(f"[上传队列] 恢复未完成的上传任务: {', '.join(sorted(self._jobs))}")
+            self._ensure_worker()
+
+    # === 持久化 ===
+
+    def _state_path(self) -> Path:
+        return self.spool_dir / QUEUE_STATE_FILE
+
+    def _load_state(self) -> None:
+        """读取磁盘上的队列状态，丢弃快照文件已不存在的任务"""
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[上传队列] 读取队列状态失败: {e}")
+            return
+
+        now = time.time()
+        for date, job in (data.get("jobs") or {}).items():
+            path = Path(str(job.get("path") or ""))
+            if not path.is_file():
+                continue
+            self._jobs[str(date)] = {
+                "path": str(path),
+                "attempts": 0,
+                "next_attempt_at": now,
+                "enqueued_at": float(job.get("enqueued_at") or now),
+                "first_enqueued_at": float(job.get("first_enqueued_at") or now),
+            }
+
+        # 清理不再被引用的孤儿快照
+        referenced = {job["path"] for job in self._jobs.values()}
+        for p in self.spool_dir.glob("*.db"):
+            if str(p) not in referenced:
+                try:
+                    p.unlink()
+                except Exception:
+                    pass
+
+    def _save_state(self) -> None:
+        """原子写入队列状态（调用方需持有锁）"""
+        payload = {
+            "version": 1,
+            "jobs": {
+                date: {
+                    "path": job["path"],
+                    "enqueued_at": job["enqueued_at"],
+                    "first_enqueued_at": job["first_enqueued_at"],
+                }
+                for date, job in self._jobs.items()
+            },
+        }
+        tmp_path = self._state_path().with_suffix(".json.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self._state_path())
+        except Exception as e:
+            print(f"[上传队列] 保存队列状态失败: {e}")
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[上传队列] 删除快照失败 {path}: {e}")
+
+    # === 入队 ===
+
+    def enqueue(self, date: str, source: sqlite3.Connection) -> None:
+        """
+        对数据库做一致性快照并入队
+
+        快照在调用线程内完成（本地磁盘拷贝），真正的网络上传交给后台线程。
+        同一日期尚未开始上传的旧快照会被新快照替换。
+
+        Args:
+            date: 日期字符串（YYYY-MM-DD）
+            source: 当前数据库连接
+        """
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+        snapshot = self.spool_dir / f"{date}.{os.getpid()}.{seq}.db"
+        tmp = snapshot.with_suffix(".db.tmp")
+
+        dst = sqlite3.connect(str(tmp))
+        try:
+            source.backup(dst)
+        finally:
+            dst.close()
+        os.replace(tmp, snapshot)
+
+        now = time.time()
+        with self._cond:
+            old = self._jobs.get(date)
+            # 已放弃重试的旧任务被新快照替换时重新计数
+            retrying = old is not None and old["attempts"] <= self.max_retries
+            if old is not None:
+                self._stats["coalesced"] += 1
+                # 正在上传的快照由工作线程负责删除
+                if old["path"] != self._inflight:
+                    self._remove_file(old["path"])
+            self._jobs[date] = {
+                "path": str(snapshot),
+                "attempts": old["attempts"] if retrying else 0,
+                "next_attempt_at": old["next_attempt_at"] if retrying else now,
+                "enqueued_at": now,
+                "first_enqueued_at": old["first_enqueued_at"] if old else now,
+            }
+            self._stats["enqueued"] += 1
+            self._save_state()
+            self._cond.notify_all()
+        self._ensure_worker()
+
+    def pending_snapshot(self, date: str) -> Optional[Path]:
+        """返回某日期尚未上传的最新快照（比远程更新，重启后应优先使用）"""
+        with self._cond:
+            job = self._jobs.get(date)
+            return Path(job["path"]) if job else None
+
+    # === 工作线程 ===
+
+    def _ensure_worker(self) -> None:
+        with self._cond:
+            if self._stopping or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="hotnews-upload-queue", daemon=True)
+            self._thread.start()
+
+    def _next_job(self) -> Optional[str]:
+        """取出最早到期的任务（调用方需持有锁）；没有到期任务时等待"""
+        while not self._stopping:
+            now = time.time()
+            ready = [
+                (job["next_attempt_at"], date)
+                for date, job in self._jobs.items()
+                if job["attempts"] <= self.max_retries and job["next_attempt_at"] <= now
+            ]
+            if ready:
+                return min(ready)[1]
+            waiting = [
+                job["next_attempt_at"] - now
+                for job in self._jobs.values()
+                if job["attempts"] <= self.max_retries
+            ]
+            if not waiting:
+                self._cond.notify_all()
+                self._cond.wait()
+            else:
+                self._cond.wait(timeout=max(0.05, min(waiting)))
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                date = self._next_job()
+                if date is None:
+                    return
+                job = self._jobs[date]
+                path = job["path"]
+                self._inflight = path
+
+            started = time.time()
+            try:
+                ok = bool(self._upload_fn(date, Path(path)))
+            except Exception as e:
+                print(f"[上传队列] 上传异常 {date}: {e}")
+                ok = False
+            elapsed = time.time() - started
+
+            with self._cond:
+                self._inflight = None
+                current = self._jobs.get(date)
+                superseded = current is None or current["path"] != path
+
+                if ok:
+                    self._latencies.append(elapsed)
+                    self._stats["uploaded"] += 1
+                    if not superseded:
+                        del self._jobs[date]
+                    self._remove_file(path)
+                    print(f"[上传队列] 已上传 {date}，耗时 {elapsed:.2f}s，剩余 {len(self._jobs)} 个任务")
+                else:
+                    self._stats["failed_attempts"] += 1
+                    if superseded:
+                        # 已有更新的快照，旧快照无需再传
+                        self._remove_file(path)
+                    else:
+                        current["attempts"] += 1
+                        if current["attempts"] > self.max_retries:
+                            self._stats["gave_up"] += 1
+                            print(f"[上传队列] {date} 重试 {self.max_retries} 次仍失败，保留到下次启动再试")
+                        else:
+                            delay = min(self.max_backoff, self.base_backoff * (2 ** (current["attempts"] - 1)))
+                            current["next_attempt_at"] = time.time() + delay
+                            print(f"[上传队列] {date} 上传失败，{delay:.1f}s 后第 {current['attempts']} 次重试")
+                self._save_state()
+                self._cond.notify_all()
+
+    # === 生命周期 ===
+
+    def _has_runnable(self) -> bool:
+        return self._inflight is not None or any(
+            job["attempts"] <= self.max_retries for job in self._jobs.values()
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待队列中可重试的任务全部完成
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否已全部完成（超时或放弃重试的任务仍保留在磁盘上）
+        """
+        deadline = None if timeout is None else time.time() + max(0.0, float(timeout))
+        with self._cond:
+            while self._has_runnable():
+                if deadline is None:
+                    self._cond.wait(timeout=1.0)
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=min(1.0, remaining))
+            return not self._jobs
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """尽量上传完剩余任务后停止工作线程；未完成的任务保留在磁盘，下次启动继续"""
+        drained = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread and thread.is_alive():
+            # 正在进行的上传无法中断，最多再等一小段时间
+            thread.join(timeout=5.0)
+        if not drained:
+            with self._cond:
+                pending = ", ".join(sorted(self._jobs))
+            print(f"[上传队列] 仍有未完成的上传任务，已持久化待下次启动: {pending}")
+        return drained
+
+    def metrics(self) -> Dict[str, Any]:
+        """队列深度与上传耗时指标"""
+        with self._cond:
+            now = time.time()
+            latencies = sorted(self._latencies)
+            last_latency = self._latencies[-1] if self._latencies else None
+            oldest = min((job["first_enqueued_at"] for job in self._jobs.values()), default=None)
+            result: Dict[str, Any] = {
+                "depth": len(self._jobs),
+                "inflight": self._inflight is not None,
+                "oldest_pending_age_s": round(now - oldest, 3) if oldest else 0.0,
+                **self._stats,
+            }
+        if latencies:
+            result["last_latency_s"] = round(last_latency, 3)
+            result["avg_latency_s"] = round(sum(latencies) / len(latencies), 3)
+            result["p95_latency_s"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+        return result
@@ -1,9 +1,11 @@
 import argparse
+import asyncio
 import csv
 import hashlib
 import sqlite3
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
@@ -333,12 +335,245 @@ def run_import(*, csv_path: Path, db_path: Path, write: bool) -> Dict[str, int]:
     }
 
 
+_STAGE_COLUMNS = (
+    "url", "id", "name", "host", "category", "feed_type", "country", "language", "source", "seed_last_updated",
+)
+
+
+def _create_stage(conn: sqlite3.Connection) -> None:
+    # url PRIMARY KEY dedups while loading; rowid keeps CSV order for the merge
+    conn.execute("DROP TABLE IF EXISTS temp.rss_import_stage")
+    conn.execute(
+        """
+        CREATE TEMP TABLE rss_import_stage (
+            url TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            host TEXT NOT NULL,
+            category TEXT NOT NULL,
+            feed_type TEXT NOT NULL,
+            country TEXT NOT NULL,
+            language TEXT NOT NULL,
+            source TEXT NOT NULL,
+            seed_last_updated TEXT NOT NULL,
+            existing_id TEXT,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            last_error_reason TEXT NOT NULL DEFAULT ''
+        )
+        """
+    )
+
+
+def _stage_row(feed: FeedRow) -> Tuple[str, ...]:
+    return (
+        feed.url,
+        f"rsssrc-{_md5_hex(feed.url)[:12]}",
+        feed.name,
+        _extract_host(feed.url),
+        feed.category,
+        feed.feed_type,
+        feed.country,
+        feed.language,
+        feed.source,
+        feed.seed_last_updated,
+    )
+
+
+def _load_stage(
+    conn: sqlite3.Connection, csv_path: Path, only_sources: Optional[set], chunk_size: int
+) -> Dict[str, int]:
+    total = 0
+    invalid = 0
+    staged = 0
+    sql = (
+        f"INSERT OR IGNORE INTO temp.rss_import_stage({', '.join(_STAGE_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in _STAGE_COLUMNS)})"
+    )
+    rows_iter = iter(_read_csv_rows(csv_path))
+    while True:
+        chunk = list(islice(rows_iter, chunk_size))
+        if not chunk:
+            break
+        batch: List[Tuple[str, ...]] = []
+        for line_no, row in chunk:
+            try:
+                feed = _parse_feed_row(line_no, row)
+            except Exception:
+                total += 1
+                invalid += 1
+                continue
+            if only_sources is not None and feed.source not in only_sources:
+                continue
+            total += 1
+            batch.append(_stage_row(feed))
+        if batch:
+            before = conn.total_changes
+            conn.executemany(sql, batch)
+            staged += conn.total_changes - before
+    return {"total_rows": total, "unique_urls": staged, "duplicates": total - invalid - staged, "invalid": invalid}
+
+
+def _resolve_existing(conn: sqlite3.Connection, schema: str) -> None:
+    # Existing rows keep their id (matched by url, like _upsert_source)
+    conn.execute(
+        f"""
+        UPDATE temp.rss_import_stage
+        SET existing_id = s.id
+        FROM (SELECT url, MIN(id) AS id FROM {schema}.rss_sources GROUP BY url) AS s
+        WHERE s.url = rss_import_stage.url
+        """
+    )
+
+
+async def _probe_feeds(
+    urls: List[Tuple[str, str]], concurrency: int, per_host: int, timeout_s: float
+) -> Dict[str, str]:
+    """GET each feed; returns url -> failure reason for the ones that are not reachable."""
+    import aiohttp
+
+    global_sem = asyncio.Semaphore(max(1, concurrency))
+    host_sems: Dict[str, asyncio.Semaphore] = {}
+    failed: Dict[str, str] = {}
+    timeout = aiohttp.ClientTimeout(total=timeout_s)
+    connector = aiohttp.TCPConnector(limit=max(1, concurrency), ttl_dns_cache=300)
+
+    async def probe(session: "aiohttp.ClientSession", url: str, host: str) -> None:
+        sem = host_sems.setdefault(host, asyncio.Semaphore(max(1, per_host)))
+        async with sem, global_sem:
+            try:
+                async with session.get(url, allow_redirects=True) as resp:
+                    if resp.status >= 400:
+                        failed[url] = f"http_{resp.status}"
+                    else:
+                        await resp.content.read(1024)
+            except asyncio.TimeoutError:
+                failed[url] = "timeout"
+            except Exception as e:
+                failed[url] = type(e).__name__
+
+    headers = {"User-Agent": "Mozilla/5.0 (compatible; hotnews-import/1.0)"}
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector, headers=headers) as session:
+        await asyncio.gather(*(probe(session, url, host) for url, host in urls))
+    return failed
+
+
+def _probe_stage(conn: sqlite3.Connection, concurrency: int, per_host: int, timeout_s: float) -> Dict[str, int]:
+    # Only new feeds are probed; unreachable ones are imported disabled with the reason recorded
+    urls = [
+        (str(r[0]), str(r[1]))
+        for r in conn.execute("SELECT url, host FROM temp.rss_import_stage WHERE existing_id IS NULL ORDER BY rowid")
+    ]
+    if not urls:
+        return {"probed": 0, "probe_dead": 0}
+    failed = asyncio.run(_probe_feeds(urls, concurrency, per_host, timeout_s))
+    conn.executemany(
+        "UPDATE temp.rss_import_stage SET enabled = 0, last_error_reason = ? WHERE url = ?",
+        [(f"import_probe: {reason}", url) for url, reason in failed.items()],
+    )
+    return {"probed": len(urls), "probe_dead": len(failed)}
+
+
+def _merge_stage(conn: sqlite3.Connection, now: int) -> Dict[str, int]:
+    updated = int(conn.execute("SELECT COUNT(*) FROM temp.rss_import_stage WHERE existing_id IS NOT NULL").fetchone()[0])
+    new = int(conn.execute("SELECT COUNT(*) FROM temp.rss_import_stage WHERE existing_id IS NULL").fetchone()[0])
+    before = int(conn.execute("SELECT COUNT(*) FROM rss_sources").fetchone()[0])
+    # A new url whose id is already taken by a different url is skipped (INSERT OR IGNORE semantics)
+    conn.execute(
+        """
+        INSERT INTO rss_sources(
+            id, name, url, host, category, feed_type, country, language, source, seed_last_updated,
+            enabled, last_error_reason, created_at, updated_at, added_at
+        )
+        SELECT COALESCE(existing_id, id), name, url, host, category, feed_type, country, language, source,
+               seed_last_updated, enabled, last_error_reason, ?, ?, ?
+        FROM temp.rss_import_stage
+        WHERE true
+        ORDER BY rowid
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            host = excluded.host,
+            category = excluded.category,
+            feed_type = excluded.feed_type,
+            country = excluded.country,
+            language = excluded.language,
+            source = excluded.source,
+            seed_last_updated = excluded.seed_last_updated,
+            updated_at = excluded.updated_at
+        WHERE rss_sources.url = excluded.url
+        """,
+        (now, now, now),
+    )
+    inserted = int(conn.execute("SELECT COUNT(*) FROM rss_sources").fetchone()[0]) - before
+    return {"inserted": inserted, "updated": updated, "skipped": new - inserted}
+
+
+def run_bulk_import(
+    *,
+    csv_path: Path,
+    db_path: Path,
+    write: bool,
+    chunk_size: int = 5000,
+    probe: bool = False,
+    probe_concurrency: int = 64,
+    probe_per_host: int = 2,
+    probe_timeout_s: float = 15.0,
+) -> Dict[str, int]:
+    only_sources: Optional[set] = getattr(run_import, "_only_sources", None)
+
+    if write:
+        if not _looks_like_sqlite_db(db_path):
+            raise ValueError(
+                f"DB file exists but is not a valid SQLite database: {db_path}. "
+                "Please import into a new db path (e.g. output/online.NEW.db) and then replace online.db after verification."
+            )
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path))
+        _ensure_schema(conn)
+        schema = "main"
+    else:
+        # Dry run: stage in memory and read the target db (if any) read-only
+        conn = sqlite3.connect(":memory:")
+        schema = ""
+        if db_path.exists():
+            try:
+                conn.execute("ATTACH DATABASE ? AS target", (f"file:{db_path}?mode=ro",))
+                conn.execute("SELECT 1 FROM target.rss_sources LIMIT 1")
+                schema = "target"
+            except Exception:
+                schema = ""
+
+    try:
+        _create_stage(conn)
+        stats = _load_stage(conn, csv_path, only_sources, max(1, int(chunk_size)))
+        if schema:
+            _resolve_existing(conn, schema)
+        if probe:
+            stats.update(_probe_stage(conn, probe_concurrency, probe_per_host, probe_timeout_s))
+        if write:
+            stats.update(_merge_stage(conn, _now_ts()))
+            conn.commit()
+        else:
+            existing = int(
+                conn.execute("SELECT COUNT(*) FROM temp.rss_import_stage WHERE existing_id IS NOT NULL").fetchone()[0]
+            )
+            stats.update({"inserted": stats["unique_urls"] - existing, "updated": existing, "skipped": 0})
+    finally:
+        conn.close()
+    return stats
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--csv", dest="csv_path", default="rss_feeds.csv")
     ap.add_argument("--db", dest="db_path", default="output/online.db")
     ap.add_argument("--write", action="store_true")
     ap.add_argument("--only-source", action="append", default=None)
+    ap.add_argument("--bulk", action="store_true")
+    ap.add_argument("--chunk-size", type=int, default=5000)
+    ap.add_argument("--probe", action="store_true")
+    ap.add_argument("--probe-concurrency", type=int, default=64)
+    ap.add_argument("--probe-per-host", type=int, default=2)
+    ap.add_argument("--probe-timeout", type=float, default=15.0)
     args = ap.parse_args()
 
     csv_path = Path(str(args.csv_path)).expanduser().resolve()
@@ -350,7 +585,19 @@ def main() -> None:
         if only_sources:
             setattr(run_import, "_only_sources", only_sources)
 
-    stats = run_import(csv_path=csv_path, db_path=db_path, write=bool(args.write))
+    if bool(args.bulk) or bool(args.probe):
+        stats = run_bulk_import(
+            csv_path=csv_path,
+            db_path=db_path,
+            write=bool(args.write),
+            chunk_size=int(args.chunk_size),
+            probe=bool(args.probe),
+            probe_concurrency=int(args.probe_concurrency),
+            probe_per_host=int(args.probe_per_host),
+            probe_timeout_s=float(args.probe_timeout),
+        )
+    else:
+        stats = run_import(csv_path=csv_path, db_path=db_path, write=bool(args.write))
     mode = "WRITE" if bool(args.write) else "DRY_RUN"
     print(f"mode={mode}")
     print(f"csv={csv_path}")
@@ -363,7 +610,11 @@ def main() -> None:
         "skipped",
         "duplicates",
         "invalid",
+        "probed",
+        "probe_dead",
     ]:
+        if k in ("probed", "probe_dead") and k not in stats:
+            continue
         print(f"{k}={stats.get(k, 0)}")
 
 
@@ -2,11 +2,21 @@
 Web 模块初始化
 """
 
-from .content_filter import ContentFilter
-from .news_viewer import NewsViewerService, PLATFORM_CATEGORIES
-
 __all__ = [
     "ContentFilter",
     "NewsViewerService",
     "PLATFORM_CATEGORIES",
 ]
+
+
+def __getattr__(name):
+    # 延迟导入：parse_pool 的 spawn 子进程只加载 feed_parser，不拉起 news_viewer / fastapi
+    if name == "ContentFilter":
+        from .content_filter import ContentFilter
+
+        return ContentFilter
+    if name in ("NewsViewerService", "PLATFORM_CATEGORIES"):
+        from . import news_viewer
+
+        return getattr(news_viewer, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
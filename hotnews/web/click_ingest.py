@@ -0,0 +1,392 @@
+"""Write-behind ingestion for ``/api/news/click``.
+
+The click endpoint used to look up the entry's tags, insert into
+``news_clicks``, validate the session and upsert ``user_tag_preferences``,
+committing twice inside every request. At peak those commits queue behind the
+RSS writers on ``online.db``.
+
+Now the endpoint only appends a raw record to an in-memory buffer and returns.
+A daemon thread drains the buffer every ``HOTNEWS_CLICK_FLUSH_MS`` (default
+500) and, per batch of up to ``HOTNEWS_CLICK_BATCH_MAX`` records:
+
+- resolves tags once per distinct (source_id, dedup_key) / news_id
+- validates each distinct session token once
+- inserts all clicks with one ``executemany`` in one transaction, on its own
+  ``online.db`` connection (not the shared request-path connection)
+- aggregates tag preferences per (user_id, tag_id) and applies them with one
+  upsert batch
+
+The buffer is bounded (``HOTNEWS_CLICK_BUFFER_MAX``, default 50000); when it
+is full the oldest records are dropped and counted. ``stop()`` (app shutdown)
+drains the buffer; records that still cannot be written are appended to
+``output/click_spool.jsonl`` and replayed by the next ``start()``. Sessions are
+resolved before spooling; the file holds user ids, never session tokens.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+def _click_flush_ms() -> int:
+    return _env_int("HOTNEWS_CLICK_FLUSH_MS", 500, 50, 60000)
+
+
+def _click_batch_max() -> int:
+    return _env_int("HOTNEWS_CLICK_BATCH_MAX", 2000, 1, 50000)
+
+
+def _click_buffer_max() -> int:
+    return _env_int("HOTNEWS_CLICK_BUFFER_MAX", 50000, 100, 1000000)
+
+
+# (news_id, url, title, source_name, category, clicked_at, user_agent, source_id, dedup_key, session)
+# ``session`` is the raw session token as submitted, or the already resolved user id (int) for
+# spooled records, so tokens never hit the disk.
+ClickRecord = Tuple[str, str, str, str, str, int, str, str, str, Union[str, int]]
+
+
+def _default_session_resolver(project_root: Path) -> Callable[[str], int]:
+    def resolve(token: str) -> int:
+        try:
+            from hotnews.kernel.auth.auth_service import validate_session
+            from hotnews.web.user_db import get_user_db_conn
+
+            is_valid, user_info = validate_session(get_user_db_conn(project_root), token)
+            if is_valid and user_info:
+                return int(user_info.get("id") or 0)
+        except Exception:
+            pass
+        return 0
+
+    return resolve
+
+
+class ClickIngestor:
+    def __init__(
+        self,
+        project_root: Path,
+        session_resolver: Optional[Callable[[str], int]] = None,
+        flush_ms: Optional[int] = None,
+        batch_max: Optional[int] = None,
+        buffer_max: Optional[int] = None,
+    ):
+        self.project_root = Path(project_root)
+        self.flush_s = float(flush_ms or _click_flush_ms()) / 1000.0
+        self.batch_max = int(batch_max or _click_batch_max())
+        self._buffer: Deque[ClickRecord] = deque(maxlen=int(buffer_max or _click_buffer_max()))
+        self._resolve_session = session_resolver or _default_session_resolver(self.project_root)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed_batches = 0
+        self.spooled = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def spool_path(self) -> Path:
+        return self.project_root / "output" / "click_spool.jsonl"
+
+    # --- request path ---------------------------------------------------------
+
+    def submit(self, record: ClickRecord) -> None:
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(record)
+            self.accepted += 1
+            if len(self._buffer) >= self.batch_max:
+                self._wake.set()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    # --- lifecycle ------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._replay_spool()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hotnews-click-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and drain the buffer; leftovers go to the spool file."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        deadline = time.monotonic() + max(0.0, timeout)
+        while self._buffer and time.monotonic() < deadline:
+            if not self.flush():
+                break
+        self._spool_remaining()
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            while self._buffer and not self._stop.is_set():
+                if not self.flush():
+                    break
+
+    # --- flushing -------------------------------------------------------------
+
+    def _take(self) -> List[ClickRecord]:
+        with self._lock:
+            n = min(self.batch_max, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(n)]
+
+    def _requeue(self, batch: List[ClickRecord]) -> None:
+        with self._lock:
+            room = self._buffer.maxlen - len(self._buffer)
+            keep = batch[-room:] if room > 0 else []
+            self.dropped += len(batch) - len(keep)
+            self._buffer.extendleft(reversed(keep))
+
+    def _online_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            from hotnews.web.db_online import get_online_db_conn
+
+            get_online_db_conn(self.project_root)  # make sure the schema exists
+            conn = sqlite3.connect(str(self.project_root / "output" / "online.db"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._conn = conn
+        return self._conn
+
+    def flush(self) -> bool:
+        """Write one batch. Returns False if the batch failed (it is put back)."""
+        with self._flush_lock:
+            batch = self._take()
+            if not batch:
+                return True
+            t0 = time.perf_counter()
+            try:
+                conn = self._online_conn()
+                tags = self._lookup_tags(conn, batch)
+                users = self._lookup_users(batch)
+                rows = []
+                prefs: Dict[Tuple[int, str], List[int]] = {}
+                for rec, (source_id, dedup_key, tag_list) in zip(batch, tags):
+                    news_id, url, title, source_name, category, clicked_at, user_agent, _, _, session = rec
+                    user_id = self._user_id(session, users)
+                    rows.append((
+                        news_id, url, title, source_name, category, clicked_at, user_agent,
+                        user_id, json.dumps(tag_list), source_id, dedup_key,
+                    ))
+                    if user_id > 0:
+                        for tag_id in tag_list:
+                            agg = prefs.setdefault((user_id, tag_id), [0, 0])
+                            agg[0] += 1
+                            agg[1] = max(agg[1], clicked_at)
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        """
+                        INSERT INTO news_clicks (news_id, url, title, source_name, category, clicked_at, user_agent, user_id, tags_json, source_id, dedup_key)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        rows,
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            except Exception as e:
+                self.failed_batches += 1
+                self._requeue(batch)
+                logger.warning("Click flush failed (%d records re-queued): %s", len(batch), e)
+                return False
+            self.written += len(rows)
+            if prefs:
+                self._apply_preferences(prefs)
+            self.last_flush_ms = (time.perf_counter() - t0) * 1000.0
+            return True
+
+    def _lookup_tags(self, conn: sqlite3.Connection, batch: List[ClickRecord]) -> List[Tuple[str, str, List[str]]]:
+        """Same resolution as the old inline code, done once per distinct key."""
+        by_pair: Dict[Tuple[str, str], List[str]] = {}
+        by_news: Dict[str, Optional[Tuple[str, str]]] = {}
+
+        def tags_for(source_id: str, dedup_key: str) -> List[str]:
+            key = (source_id, dedup_key)
+            if key not in by_pair:
+                try:
+                    cur = conn.execute(
+                        "SELECT tag_id FROM rss_entry_tags WHERE source_id = ? AND dedup_key = ?", key
+                    )
+                    by_pair[key] = [r[0] for r in cur.fetchall() or []]
+                except Exception:
+                    by_pair[key] = []
+            return by_pair[key]
+
+        out = []
+        for rec in batch:
+            news_id, source_id, dedup_key = rec[0], rec[7], rec[8]
+            tag_list: List[str] = []
+            if source_id and dedup_key:
+                tag_list = tags_for(source_id, dedup_key)
+            if not tag_list and news_id:
+                if news_id not in by_news:
+                    try:
+                        row = conn.execute(
+                            "SELECT source_id, dedup_key FROM rss_entries WHERE id = ?", (news_id,)
+                        ).fetchone()
+                        by_news[news_id] = (row[0], row[1]) if row else None
+                    except Exception:
+                        by_news[news_id] = None
+                found = by_news[news_id]
+                if found:
+                    source_id, dedup_key = found
+                    tag_list = tags_for(source_id, dedup_key)
+            out.append((source_id, dedup_key, tag_list))
+        return out
+
+    def _lookup_users(self, batch: List[ClickRecord]) -> Dict[str, int]:
+        users: Dict[str, int] = {}
+        for rec in batch:
+            token = rec[9]
+            if token and isinstance(token, str) and token not in users:
+                users[token] = self._resolve_session(token)
+        return users
+
+    @staticmethod
+    def _user_id(session: Union[str, int], users: Dict[str, int]) -> int:
+        if isinstance(session, int):
+            return session
+        return users.get(session, 0) if session else 0
+
+    def _apply_preferences(self, prefs: Dict[Tuple[int, str], List[int]]) -> None:
+        try:
+            from hotnews.web.user_db import get_user_db_conn
+
+            user_conn = get_user_db_conn(self.project_root)
+            user_conn.executemany(
+                """
+                INSERT INTO user_tag_preferences (user_id, tag_id, click_count, last_interaction_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, tag_id) DO UPDATE SET
+                    click_count = click_count + excluded.click_count,
+                    last_interaction_at = MAX(COALESCE(last_interaction_at, 0), excluded.last_interaction_at),
+                    updated_at = excluded.updated_at
+                """,
+                [(uid, tag_id, n, last_ts, last_ts) for (uid, tag_id), (n, last_ts) in prefs.items()],
+            )
+            user_conn.commit()
+        except Exception as e:
+            logger.warning("Click preference update failed: %s", e)
+
+    # --- spool ----------------------------------------------------------------
+
+    def _spool_remaining(self) -> None:
+        with self._lock:
+            leftover = list(self._buffer)
+            self._buffer.clear()
+        if not leftover:
+            return
+        try:
+            # Resolve sessions now and spool the user id instead of the bearer token
+            users = self._lookup_users(leftover)
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for rec in leftover:
+                    row = list(rec[:9]) + [self._user_id(rec[9], users)]
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.spooled += len(leftover)
+            logger.warning("Spooled %d unflushed clicks to %s", len(leftover), self.spool_path)
+        except Exception as e:
+            logger.warning("Click spool write failed, %d clicks lost: %s", len(leftover), e)
+
+    def _replay_spool(self) -> None:
+        path = self.spool_path
+        if not path.exists():
+            return
+        replay = path.with_suffix(".replay")
+        try:
+            os.replace(path, replay)
+            n = 0
+            with open(replay, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        if isinstance(rec, list) and len(rec) == 10:
+                            self.submit(tuple(rec))
+                            n += 1
+                    except Exception:
+                        continue
+            replay.unlink()
+            if n:
+                logger.info("Replayed %d spooled clicks", n)
+        except Exception as e:
+            logger.warning("Click spool replay failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending(),
+            "accepted": self.accepted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "spooled": self.spooled,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "flush_ms": int(self.flush_s * 1000),
+            "batch_max": self.batch_max,
+        }
+
+
+_ingestor: Optional[ClickIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def get_click_ingestor(project_root: Path) -> ClickIngestor:
+    global _ingestor
+    if _ingestor is None:
+        with _ingestor_lock:
+            if _ingestor is None:
+                _ingestor = ClickIngestor(project_root)
+                _ingestor.start()
+    return _ingestor
+
+
+def shutdown_click_ingestor() -> None:
+    global _ingestor
+    with _ingestor_lock:
+        ing, _ingestor = _ingestor, None
+    if ing is not None:
+        ing.stop()
@@ -0,0 +1,256 @@
+"""Central registry for config files and derived asset values.
+
+Several request paths used to re-read the same files every time:
+``NewsViewerService`` and ``page_rendering`` parsed ``config/config.yaml``,
+``_get_asset_rev`` re-read and hashed the JS/CSS bundles, and
+``get_system_settings`` ran on every ``/api/news``.
+
+Entries are loaded once and handed out as immutable snapshots
+(``FrozenDict`` / ``FrozenList``). They are JSON-serialisable and
+``isinstance`` of ``dict`` / ``list``, and raise ``TypeError`` on mutation;
+take ``thaw(value)`` for a private mutable copy. A daemon thread polls every
+``HOTNEWS_CONFIG_POLL_S`` seconds (default 2):
+
+- file-backed entries are reloaded when the (mtime, size, inode) of any
+  watched path changes
+- entries without files (e.g. settings from the kernel) are reloaded every
+  ``refresh_s`` seconds
+
+Reloads build the new snapshot completely and then swap one reference. A
+failed reload keeps serving the previous snapshot.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _config_poll_s() -> float:
+    try:
+        v = float((os.environ.get("HOTNEWS_CONFIG_POLL_S", "") or "").strip() or "2")
+    except Exception:
+        v = 2.0
+    if not (v > 0):
+        v = 2.0
+    return float(max(0.2, min(60.0, v)))
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is a read-only config snapshot; use thaw() for a copy")
+
+
+class FrozenDict(dict):
+    __slots__ = ()
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+def _stat_signature(paths: Iterable[Path]) -> Tuple[Any, ...]:
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+class _Entry:
+    __slots__ = ("loader", "paths", "refresh_s", "value", "signature", "loaded_at", "loaded", "reloads", "errors")
+
+    def __init__(self, loader: Callable[[], Any], paths: Tuple[Path, ...], refresh_s: Optional[float]):
+        self.loader = loader
+        self.paths = paths
+        self.refresh_s = refresh_s
+        self.value: Any = None
+        self.signature: Tuple[Any, ...] = ()
+        self.loaded_at = 0.0
+        self.loaded = False
+        self.reloads = 0
+        self.errors = 0
+
+
+class ConfigRegistry:
+    def __init__(self, poll_s: Optional[float] = None):
+        self.poll_s = float(poll_s or _config_poll_s())
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        paths: Iterable[Path] = (),
+        refresh_s: Optional[float] = None,
+    ) -> None:
+        """Register (or keep) an entry; ``loader`` runs on first ``get`` and on every change."""
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(loader, tuple(Path(p) for p in paths), refresh_s)
+        self._ensure_watcher()
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        if not entry.loaded:
+            with self._lock:
+                if not entry.loaded:
+                    self._load(name, entry)
+        return entry.value
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Reload now (e.g. after the app itself wrote the file)."""
+        with self._lock:
+            targets = [name] if name else list(self._entries)
+            for n in targets:
+                entry = self._entries.get(n)
+                if entry is not None and entry.loaded:
+                    self._load(n, entry)
+
+    def _load(self, name: str, entry: _Entry) -> None:
+        signature = _stat_signature(entry.paths)
+        try:
+            value = freeze(entry.loader())
+        except Exception as e:
+            entry.errors += 1
+            logger.warning("Config reload failed for %s: %s", name, e)
+            if entry.loaded:
+                entry.signature = signature  # don't retry until the file changes again
+                return
+            value = None
+        entry.value = value
+        entry.signature = signature
+        entry.loaded_at = time.monotonic()
+        if entry.loaded:
+            entry.reloads += 1
+        entry.loaded = True
+
+    def poll_once(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for name, entry in list(self._entries.items()):
+                if not entry.loaded:
+                    continue
+                if entry.paths and _stat_signature(entry.paths) != entry.signature:
+                    self._load(name, entry)
+                elif entry.refresh_s is not None and now - entry.loaded_at >= entry.refresh_s:
+                    self._load(name, entry)
+
+    def _ensure_watcher(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="hotnews-config-watcher", daemon=True)
+        self._thread.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_s):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning("Config watcher error: %s", e)
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {"loaded": e.loaded, "reloads": e.reloads, "errors": e.errors, "paths": [str(p) for p in e.paths]}
+            for name, e in list(self._entries.items())
+        }
+
+
+_registry = ConfigRegistry()
+
+
+def get_config_registry() -> ConfigRegistry:
+    return _registry
+
+
+# --- well-known entries ----------------------------------------------------
+
+
+def _load_yaml(path: Path) -> Dict[str, Any]:
+    import yaml
+
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def viewer_config(project_root) -> Dict[str, Any]:
+    """The ``viewer`` section of ``config/config.yaml`` (read-only snapshot)."""
+    path = Path(project_root) / "config" / "config.yaml"
+    name = f"viewer_config:{path}"
+    _registry.register(name, lambda: _load_yaml(path).get("viewer", {}) or {}, paths=[path])
+    return _registry.get(name) or FrozenDict()
+
+
+def _asset_paths(project_root) -> List[Path]:
+    static = Path(project_root) / "hotnews" / "web" / "static"
+    return [static / "css" / "viewer.css", static / "js" / "index.js"]
+
+
+def _hash_assets(paths: List[Path]) -> str:
+    h = hashlib.md5()
+    found = False
+    for p in paths:
+        try:
+            if p.exists():
+                h.update(p.read_bytes())
+                found = True
+        except Exception:
+            pass
+    return h.hexdigest() if found else "0"
+
+
+def asset_rev(project_root) -> str:
+    """MD5 of the CSS/JS bundles, recomputed only when either file changes."""
+    paths = _asset_paths(project_root)
+    name = f"asset_rev:{project_root}"
+    _registry.register(name, lambda: _hash_assets(paths), paths=paths)
+    return _registry.get(name) or "0"
+
+
+def system_settings(project_root, loader: Callable[[Any], Dict[str, Any]], refresh_s: float = 5.0) -> Dict[str, Any]:
+    """Snapshot of ``loader(project_root)`` (the kernel's settings), refreshed every ``refresh_s``."""
+    name = f"system_settings:{project_root}"
+    _registry.register(name, lambda: loader(project_root), refresh_s=refresh_s)
+    return _registry.get(name) or FrozenDict()
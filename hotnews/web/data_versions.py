@@ -0,0 +1,162 @@
+"""Change tracking for the freshness / long-poll endpoints.
+
+``online.db`` has a ``data_versions`` table with one row per data category
+(``rss`` via a trigger on ``rss_entries``, ``news`` bumped after each hot-list
+crawl), holding a counter and the last write time. ``/api/news/check-updates``
+used to run ``MAX(created_at)`` over the entry tables on every poll; it now
+reads this watcher's in-memory snapshot.
+
+Per worker, the snapshot is re-read from the table at most every
+``HOTNEWS_DATA_VERSION_POLL_S`` seconds (default 1), so writes made by
+other processes show up within that interval. Writes made in this process
+call ``bump()`` and wake waiters immediately. Long-poll / streaming handlers
+``await wait_for_change(token, timeout)``. A single poller task per event loop
+fires one shared ``asyncio.Event``, so idle waiters cost no periodic wakeups.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from hotnews.web.db_online import bump_data_version, get_online_db_conn, read_data_versions
+
+logger = logging.getLogger(__name__)
+
+Versions = Dict[str, Tuple[int, int]]
+
+
+def _data_version_poll_s() -> float:
+    try:
+        v = float((os.environ.get("HOTNEWS_DATA_VERSION_POLL_S", "") or "").strip() or "1")
+    except Exception:
+        v = 1.0
+    if not (v > 0):
+        v = 1.0
+    return float(max(0.1, min(30.0, v)))
+
+
+def version_token(versions: Versions) -> str:
+    """Opaque token clients send back as ``since``; changes whenever any counter does."""
+    return ",".join(f"{name}:{versions[name][0]}" for name in sorted(versions))
+
+
+class DataVersionWatcher:
+    def __init__(self, reader: Callable[[], Versions], writer: Optional[Callable[[str, int], None]] = None,
+                 poll_s: Optional[float] = None):
+        self._reader = reader
+        self._writer = writer
+        self.poll_s = float(poll_s or _data_version_poll_s())
+        self._versions: Versions = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners = []
+
+    def snapshot(self) -> Versions:
+        if time.monotonic() - self._loaded_at >= self.poll_s:
+            self.refresh()
+        return self._versions
+
+    def refresh(self) -> bool:
+        """Re-read the table; returns True (and wakes waiters) if anything changed."""
+        try:
+            versions = self._reader()
+        except Exception as e:
+            logger.warning("data_versions read failed: %s", e)
+            self._loaded_at = time.monotonic()
+            return False
+        with self._lock:
+            self._loaded_at = time.monotonic()
+            if versions == self._versions:
+                return False
+            old, self._versions = self._versions, versions
+        self._fire(old, versions)
+        return True
+
+    def bump(self, name: str, updated_at: Optional[int] = None) -> None:
+        """Record a write from this process (safe to call from worker threads)."""
+        if self._writer is not None:
+            self._writer(name, int(updated_at if updated_at is not None else time.time()))
+        self.refresh()
+
+    def add_listener(self, fn: Callable[[Versions, Versions], None]) -> None:
+        """``fn(old, new)`` runs on the event loop after every detected change."""
+        self._listeners.append(fn)
+
+    def _fire(self, old: Versions, new: Versions) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        def wake():
+            ev, self._changed = self._changed, asyncio.Event()
+            if ev is not None:
+                ev.set()
+            for fn in list(self._listeners):
+                try:
+                    fn(old, new)
+                except Exception as e:
+                    logger.warning("data_versions listener failed: %s", e)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wake()
+        else:
+            loop.call_soon_threadsafe(wake)
+
+    def ensure_started(self) -> None:
+        """Start the poller on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._changed = asyncio.Event()
+        self._task = loop.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_s)
+            self.refresh()
+
+    async def wait_for_change(self, token: str, timeout: float) -> Versions:
+        """Return as soon as the version token differs from ``token``, or after ``timeout``."""
+        self.ensure_started()
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        while True:
+            versions = self.snapshot()
+            if version_token(versions) != token:
+                return versions
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return versions
+            ev = self._changed
+            try:
+                await asyncio.wait_for(ev.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+_watcher: Optional[DataVersionWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_data_version_watcher(project_root: Path) -> DataVersionWatcher:
+    global _watcher
+    if _watcher is None:
+        with _watcher_lock:
+            if _watcher is None:
+                root = Path(project_root)
+                _watcher = DataVersionWatcher(
+                    reader=lambda: read_data_versions(get_online_db_conn(root)),
+                    writer=lambda name, ts: bump_data_version(get_online_db_conn(root), name, ts),
+                )
+    return _watcher
@@ -1,6 +1,7 @@
+import json
 import sqlite3
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
 _online_db_conn: Optional[sqlite3.Connection] = None
@@ -21,6 +22,8 @@ def get_online_db_conn(project_root: Path) -> sqlite3.Connection:
     db_path = output_dir / "online.db"
 
     conn = sqlite3.connect(str(db_path), check_same_thread=False)
+    # Only takes effect on a new file; existing ones are converted by db_retention.convert_to_incremental
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA synchronous=NORMAL")
 
@@ -107,6 +110,11 @@ def get_online_db_conn(project_root: Path) -> sqlite3.Connection:
     # Indexes for data lifecycle management and custom source queries
     conn.execute("CREATE INDEX IF NOT EXISTS idx_rss_entries_fetched_at ON rss_entries(fetched_at DESC)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_rss_entries_source_fetched ON rss_entries(source_id, fetched_at DESC)")
+    # Per-source "newest first" ordering used by feed pages; the expression must match RSS_ENTRY_ORDER exactly
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_rss_entries_source_effective ON rss_entries("
+        "source_id, (CASE WHEN published_at > 0 THEN published_at ELSE created_at END) DESC, id DESC)"
+    )
 
     conn.execute(
         """
@@ -430,6 +438,51 @@ def get_online_db_conn(project_root: Path) -> sqlite3.Connection:
     conn.execute("CREATE INDEX IF NOT EXISTS idx_source_stats_type ON source_stats(source_type)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_source_stats_type_due ON source_stats(source_type, next_due_at)")
 
+    # ========== Story Clusters (跨平台故事聚类) ==========
+    # 同一事件在热榜 / RSS 中的多条内容归并为一个故事，见 hotnews.core.story_cluster
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS story_clusters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rep_item_type TEXT NOT NULL,
+            rep_item_key TEXT NOT NULL,
+            rep_platform_id TEXT NOT NULL DEFAULT '',
+            rep_title TEXT NOT NULL,
+            rep_url TEXT NOT NULL DEFAULT '',
+            rep_rank INTEGER NOT NULL DEFAULT 0,
+            item_count INTEGER NOT NULL DEFAULT 1,
+            platform_count INTEGER NOT NULL DEFAULT 1,
+            first_seen_at INTEGER NOT NULL,
+            last_seen_at INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_story_clusters_last_seen ON story_clusters(last_seen_at DESC)")
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS story_cluster_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_type TEXT NOT NULL,
+            item_key TEXT NOT NULL,
+            cluster_id INTEGER NOT NULL,
+            platform_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            url TEXT NOT NULL DEFAULT '',
+            rank INTEGER NOT NULL DEFAULT 0,
+            signature BLOB NOT NULL,
+            seen_at INTEGER NOT NULL,
+            UNIQUE(item_type, item_key)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_story_members_cluster ON story_cluster_members(cluster_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_story_members_seen ON story_cluster_members(seen_at DESC)")
+
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS story_cluster_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+
     def _ensure_column(table: str, column: str, col_def: str) -> None:
         try:
             cur = conn.execute(f"PRAGMA table_info({table})")
@@ -499,7 +552,90 @@ def get_online_db_conn(project_root: Path) -> sqlite3.Connection:
     except Exception:
         pass
 
+    # Per-category write versions, so pollers do not aggregate over the entry tables.
+    # rss_entries is written by the RSS scheduler; the trigger keeps "rss" current
+    # without touching every writer. Other names are bumped via bump_data_version().
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_rss_entries_data_version
+        AFTER INSERT ON rss_entries
+        BEGIN
+            INSERT INTO data_versions(name, version, updated_at) VALUES('rss', 1, NEW.created_at)
+            ON CONFLICT(name) DO UPDATE SET
+                version = version + 1,
+                updated_at = MAX(updated_at, excluded.updated_at);
+        END
+        """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO data_versions(name, version, updated_at) "
+        "SELECT 'rss', 0, COALESCE(MAX(created_at), 0) FROM rss_entries"
+    )
+
     conn.commit()
 
     _online_db_conn = conn
     return conn
+
+
+RSS_ENTRY_ORDER = "(CASE WHEN published_at > 0 THEN published_at ELSE created_at END) DESC, id DESC"
+
+
+def fetch_rss_entries_top_n(
+    conn: sqlite3.Connection, source_ids: Iterable[str], limit: int
+) -> Dict[str, List[Tuple]]:
+    """Newest ``limit`` entries for each source in one query.
+
+    Returns ``{source_id: [(title, url, published_at, published_raw, created_at), ...]}``
+    in RSS_ENTRY_ORDER; every requested source gets a (possibly empty) list.
+
+    Each source's top-N is an index range scan on idx_rss_entries_source_effective
+    (correlated subquery per json_each row); ROW_NUMBER() OVER (PARTITION BY
+    source_id ...) would number every entry of every source before filtering.
+    """
+    ids = list(dict.fromkeys(str(s) for s in source_ids if s))
+    out: Dict[str, List[Tuple]] = {sid: [] for sid in ids}
+    if not ids or limit <= 0:
+        return out
+    cur = conn.execute(
+        f"""
+        SELECT e.source_id, e.title, e.url, e.published_at, e.published_raw, e.created_at
+        FROM json_each(?) s
+        JOIN rss_entries e ON e.id IN (
+            SELECT id FROM rss_entries WHERE source_id = s.value ORDER BY {RSS_ENTRY_ORDER} LIMIT ?
+        )
+        ORDER BY s.key, (CASE WHEN e.published_at > 0 THEN e.published_at ELSE e.created_at END) DESC, e.id DESC
+        """,
+        (json.dumps(ids), int(limit)),
+    )
+    for row in cur.fetchall():
+        out[row[0]].append(tuple(row[1:]))
+    return out
+
+
+def bump_data_version(conn: sqlite3.Connection, name: str, updated_at: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO data_versions(name, version, updated_at) VALUES(?, 1, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            version = version + 1,
+            updated_at = MAX(updated_at, excluded.updated_at)
+        """,
+        (str(name), int(updated_at)),
+    )
+    conn.commit()
+
+
+def read_data_versions(conn: sqlite3.Connection) -> Dict[str, Tuple[int, int]]:
+    """{name: (version, updated_at)}"""
+    rows = conn.execute("SELECT name, version, updated_at FROM data_versions").fetchall()
+    return {str(r[0]): (int(r[1] or 0), int(r[2] or 0)) for r in rows}
@@ -0,0 +1,495 @@
+"""Retention for ``online.db``: batched deletes plus incremental vacuum.
+
+``scripts/cleanup_old_data.py`` used to issue one unbounded ``DELETE`` per
+table and then a full ``VACUUM``. On a multi-GB file that held the write lock
+for the whole delete and blocked every reader and writer during the vacuum.
+It also left ``rss_entry_tags`` rows behind for deleted entries.
+
+This job works in short transactions instead:
+
+- ``rss_entries`` older than the cutoff are selected oldest-first through
+  ``idx_rss_entries_fetched_at``, ``HOTNEWS_RETENTION_BATCH`` rows at a time.
+  Their ``rss_entry_tags`` / ``rss_entry_ai_labels`` rows are deleted in the
+  same transaction by ``(source_id, dedup_key)``, which both tables index.
+- ``rss_entry_ai_labels`` (``labeled_at``) and ``rss_usage_events`` (``ts``)
+  are trimmed the same way through their timestamp indexes.
+- Orphan ``rss_entry_tags`` (no matching entry) are swept by primary-key
+  range, one chunk per transaction.
+- ``story_cluster_members`` older than the story clustering window
+  (``HOTNEWS_STORY_CLUSTER_WINDOW_HOURS``) are deleted through
+  ``idx_story_members_seen``; a ``story_clusters`` row goes with its last
+  member, the others get their counts refreshed.
+- Freed pages are returned to the OS with ``PRAGMA incremental_vacuum(N)``
+  in small steps, with a pause between steps.
+
+Each transaction is ``BEGIN IMMEDIATE`` … ``COMMIT`` and the job sleeps
+``HOTNEWS_RETENTION_PAUSE_MS`` between them, so other writers only ever wait
+for one batch. ``run()`` returns rows deleted, lock wait / hold times
+(max, p50, total) and pages reclaimed.
+
+``incremental_vacuum`` needs ``auto_vacuum=INCREMENTAL``. New databases get
+it from ``get_online_db_conn``. An existing database has to be converted once
+with a full ``VACUUM`` (``convert_to_incremental``, or
+``scripts/cleanup_old_data.py --convert-auto-vacuum`` during a maintenance
+window). Until then the vacuum step is skipped and SQLite reuses the freed
+pages for new rows.
+
+With several uvicorn workers every process starts the background thread, but
+only the one holding an exclusive ``flock`` on ``online.db.retention.lock``
+runs the job. The others retry the lock each interval, so if the holder exits
+another worker takes over.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process runs the job
+    fcntl = None
+
+DEFAULT_RETENTION_DAYS = {
+    "rss_entries": 60,
+    "rss_entry_ai_labels": 30,
+    "rss_usage_events": 90,
+}
+
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+# Tags created within this window are not swept as orphans (the entry row may still be in flight)
+_ORPHAN_GRACE_S = 3600
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+def retention_enabled() -> bool:
+    return (os.environ.get("HOTNEWS_RETENTION_ENABLED", "1") or "").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _retention_batch() -> int:
+    return _env_int("HOTNEWS_RETENTION_BATCH", 500, 10, 100000)
+
+
+def _retention_pause_s() -> float:
+    return _env_int("HOTNEWS_RETENTION_PAUSE_MS", 50, 1, 60000) / 1000.0
+
+
+def _vacuum_pages() -> int:
+    return _env_int("HOTNEWS_RETENTION_VACUUM_PAGES", 256, 1, 1000000)
+
+
+def _vacuum_max_steps() -> int:
+    return _env_int("HOTNEWS_RETENTION_VACUUM_STEPS", 400, 1, 1000000)
+
+
+def _retention_interval_s() -> int:
+    return _env_int("HOTNEWS_RETENTION_INTERVAL_S", 6 * 3600, 60, 7 * 86400)
+
+
+def _retention_days() -> Dict[str, int]:
+    return {
+        "rss_entries": _env_int("HOTNEWS_RETENTION_RSS_ENTRIES_DAYS", DEFAULT_RETENTION_DAYS["rss_entries"], 1, 36500),
+        "rss_entry_ai_labels": _env_int(
+            "HOTNEWS_RETENTION_AI_LABELS_DAYS", DEFAULT_RETENTION_DAYS["rss_entry_ai_labels"], 1, 36500
+        ),
+        "rss_usage_events": _env_int(
+            "HOTNEWS_RETENTION_USAGE_EVENTS_DAYS", DEFAULT_RETENTION_DAYS["rss_usage_events"], 1, 36500
+        ),
+    }
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _pragma_int(conn: sqlite3.Connection, name: str) -> int:
+    row = conn.execute(f"PRAGMA {name}").fetchone()
+    return int(row[0]) if row else 0
+
+
+def _ms_summary(values: List[float]) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0, "max_ms": 0.0, "p50_ms": 0.0, "total_ms": 0.0}
+    s = sorted(values)
+    return {
+        "count": len(s),
+        "max_ms": round(s[-1], 2),
+        "p50_ms": round(s[(len(s) - 1) // 2], 2),
+        "total_ms": round(sum(s), 2),
+    }
+
+
+def convert_to_incremental(db_path: Path) -> str:
+    """
+    Switch an existing database to ``auto_vacuum=INCREMENTAL``.
+
+    Runs a full ``VACUUM`` (blocking, needs free disk about the size of the file);
+    a no-op if the database is already incremental.
+    """
+    conn = sqlite3.connect(str(db_path), isolation_level=None, timeout=60)
+    try:
+        if _pragma_int(conn, "auto_vacuum") != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        return _AUTO_VACUUM_MODES.get(_pragma_int(conn, "auto_vacuum"), "unknown")
+    finally:
+        conn.close()
+
+
+class RetentionJob:
+    def __init__(
+        self,
+        db_path: Path,
+        retention_days: Optional[Dict[str, int]] = None,
+        batch_size: Optional[int] = None,
+        pause_s: Optional[float] = None,
+        vacuum_pages: Optional[int] = None,
+        vacuum_max_steps: Optional[int] = None,
+    ):
+        self.db_path = Path(db_path)
+        self.retention_days = dict(DEFAULT_RETENTION_DAYS)
+        self.retention_days.update(retention_days if retention_days is not None else _retention_days())
+        self.batch_size = int(batch_size or _retention_batch())
+        self.pause_s = float(pause_s if pause_s is not None else _retention_pause_s())
+        self.vacuum_pages = int(vacuum_pages or _vacuum_pages())
+        self.vacuum_max_steps = int(vacuum_max_steps or _vacuum_max_steps())
+        self.last_stats: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._hold_ms: List[float] = []
+        self._wait_ms: List[float] = []
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # --- transactions -----------------------------------------------------------
+
+    def _txn(self, conn: sqlite3.Connection, fn: Callable[[sqlite3.Connection], int]) -> int:
+        """Run ``fn`` in one write transaction and record lock wait / hold time."""
+        t0 = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        t1 = time.perf_counter()
+        try:
+            n = fn(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        t2 = time.perf_counter()
+        self._wait_ms.append((t1 - t0) * 1000.0)
+        self._hold_ms.append((t2 - t1) * 1000.0)
+        return n
+
+    def _pause(self) -> None:
+        self._stop.wait(self.pause_s)
+
+    @staticmethod
+    def _story_window_seconds() -> int:
+        from hotnews.core.story_cluster import story_cluster_window_seconds
+
+        return story_cluster_window_seconds()
+
+    # --- deletes ----------------------------------------------------------------
+
+    def _delete_entries(self, conn: sqlite3.Connection, cutoff: int, stats: Dict[str, int]) -> None:
+        has_tags = _table_exists(conn, "rss_entry_tags")
+        has_labels = _table_exists(conn, "rss_entry_ai_labels")
+
+        def batch(c: sqlite3.Connection) -> int:
+            rows = c.execute(
+                "SELECT id, source_id, dedup_key FROM rss_entries WHERE fetched_at < ? ORDER BY fetched_at LIMIT ?",
+                (cutoff, self.batch_size),
+            ).fetchall()
+            if not rows:
+                return 0
+            keys = [(r[1], r[2]) for r in rows]
+            if has_tags:
+                before = c.total_changes
+                c.executemany("DELETE FROM rss_entry_tags WHERE source_id = ? AND dedup_key = ?", keys)
+                stats["rss_entry_tags"] += c.total_changes - before
+            if has_labels:
+                before = c.total_changes
+                c.executemany("DELETE FROM rss_entry_ai_labels WHERE source_id = ? AND dedup_key = ?", keys)
+                stats["rss_entry_ai_labels"] += c.total_changes - before
+            c.executemany("DELETE FROM rss_entries WHERE id = ?", [(r[0],) for r in rows])
+            return len(rows)
+
+        while not self._stop.is_set():
+            n = self._txn(conn, batch)
+            stats["rss_entries"] += n
+            if n < self.batch_size:
+                break
+            self._pause()
+
+    def _delete_by_ts(self, conn: sqlite3.Connection, table: str, ts_col: str, cutoff: int) -> int:
+        if not _table_exists(conn, table):
+            return 0
+        # rowid subquery keeps each statement to one index range scan of batch_size rows
+        sql = (
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} WHERE {ts_col} < ? ORDER BY {ts_col} LIMIT ?)"
+        )
+        deleted = 0
+        while not self._stop.is_set():
+            n = self._txn(conn, lambda c: c.execute(sql, (cutoff, self.batch_size)).rowcount)
+            deleted += max(0, n)
+            if n < self.batch_size:
+                break
+            self._pause()
+        return deleted
+
+    def _sweep_orphan_tags(self, conn: sqlite3.Connection, now_ts: int) -> int:
+        if not (_table_exists(conn, "rss_entry_tags") and _table_exists(conn, "rss_entries")):
+            return 0
+        row = conn.execute("SELECT MAX(id) FROM rss_entry_tags").fetchone()
+        max_id = int(row[0] or 0) if row else 0
+        grace_cutoff = now_ts - _ORPHAN_GRACE_S
+        chunk = self.batch_size * 10
+        deleted, lo = 0, 0
+        while lo < max_id and not self._stop.is_set():
+            hi = lo + chunk
+            n = self._txn(
+                conn,
+                lambda c: c.execute(
+                    """
+                    DELETE FROM rss_entry_tags
+                    WHERE id > ? AND id <= ? AND created_at < ?
+                      AND NOT EXISTS (
+                          SELECT 1 FROM rss_entries e
+                          WHERE e.source_id = rss_entry_tags.source_id AND e.dedup_key = rss_entry_tags.dedup_key
+                      )
+                    """,
+                    (lo, hi, grace_cutoff),
+                ).rowcount,
+            )
+            deleted += max(0, n)
+            lo = hi
+            self._pause()
+        return deleted
+
+    def _delete_story_members(self, conn: sqlite3.Connection, cutoff: int, stats: Dict[str, int]) -> None:
+        if not (_table_exists(conn, "story_cluster_members") and _table_exists(conn, "story_clusters")):
+            return
+
+        def batch(c: sqlite3.Connection) -> int:
+            rows = c.execute(
+                "SELECT id, cluster_id FROM story_cluster_members WHERE seen_at < ? ORDER BY seen_at LIMIT ?",
+                (cutoff, self.batch_size),
+            ).fetchall()
+            if not rows:
+                return 0
+            c.executemany("DELETE FROM story_cluster_members WHERE id = ?", [(r[0],) for r in rows])
+            cluster_ids = [(cid,) for cid in {r[1] for r in rows}]
+            before = c.total_changes
+            c.executemany(
+                """
+                DELETE FROM story_clusters
+                WHERE id = ? AND NOT EXISTS (SELECT 1 FROM story_cluster_members m WHERE m.cluster_id = story_clusters.id)
+                """,
+                cluster_ids,
+            )
+            stats["story_clusters"] += c.total_changes - before
+            c.executemany(
+                """
+                UPDATE story_clusters SET
+                    item_count = (SELECT COUNT(*) FROM story_cluster_members WHERE cluster_id = story_clusters.id),
+                    platform_count = (SELECT COUNT(DISTINCT platform_id) FROM story_cluster_members
+                                      WHERE cluster_id = story_clusters.id)
+                WHERE id = ?
+                """,
+                cluster_ids,
+            )
+            return len(rows)
+
+        while not self._stop.is_set():
+            n = self._txn(conn, batch)
+            stats["story_cluster_members"] += n
+            if n < self.batch_size:
+                break
+            self._pause()
+
+    # --- vacuum -----------------------------------------------------------------
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        mode = _AUTO_VACUUM_MODES.get(_pragma_int(conn, "auto_vacuum"), "unknown")
+        page_size = _pragma_int(conn, "page_size")
+        free_before = _pragma_int(conn, "freelist_count")
+        out: Dict[str, Any] = {
+            "auto_vacuum": mode,
+            "page_size": page_size,
+            "freelist_before": free_before,
+            "steps": 0,
+        }
+        if mode == "incremental":
+            hold: List[float] = []
+            for _ in range(self.vacuum_max_steps):
+                if self._stop.is_set() or _pragma_int(conn, "freelist_count") <= 0:
+                    break
+                # execute() stops after the first step (one page) for a pragma without result
+                # columns, so the step runs through executescript() with its own transaction;
+                # the measured time includes the wait for the write lock
+                t0 = time.perf_counter()
+                conn.executescript(f"BEGIN IMMEDIATE; PRAGMA incremental_vacuum({self.vacuum_pages}); COMMIT;")
+                ms = (time.perf_counter() - t0) * 1000.0
+                self._hold_ms.append(ms)
+                hold.append(ms)
+                out["steps"] += 1
+                self._pause()
+            out["lock_hold"] = _ms_summary(hold)
+        free_after = _pragma_int(conn, "freelist_count")
+        out["freelist_after"] = free_after
+        out["pages_reclaimed"] = max(0, free_before - free_after) if mode == "incremental" else 0
+        out["bytes_reclaimed"] = out["pages_reclaimed"] * page_size
+        return out
+
+    # --- entry point ------------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        self._stop.clear()
+        self._hold_ms, self._wait_ms = [], []
+        started = time.perf_counter()
+        now_ts = int(time.time())
+        conn = sqlite3.connect(str(self.db_path), isolation_level=None, timeout=30)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            deleted = {"rss_entries": 0, "rss_entry_tags": 0, "rss_entry_ai_labels": 0, "rss_usage_events": 0}
+            page_count_before = _pragma_int(conn, "page_count")
+
+            if _table_exists(conn, "rss_entries"):
+                self._delete_entries(conn, now_ts - self.retention_days["rss_entries"] * 86400, deleted)
+            deleted["rss_entry_ai_labels"] += self._delete_by_ts(
+                conn, "rss_entry_ai_labels", "labeled_at", now_ts - self.retention_days["rss_entry_ai_labels"] * 86400
+            )
+            deleted["rss_usage_events"] += self._delete_by_ts(
+                conn, "rss_usage_events", "ts", now_ts - self.retention_days["rss_usage_events"] * 86400
+            )
+            deleted["orphan_tags"] = self._sweep_orphan_tags(conn, now_ts)
+            deleted["story_cluster_members"] = deleted["story_clusters"] = 0
+            self._delete_story_members(conn, now_ts - self._story_window_seconds(), deleted)
+            delete_hold = _ms_summary(self._hold_ms)
+
+            vacuum = self._incremental_vacuum(conn)
+            stats = {
+                "deleted": deleted,
+                "lock_wait": _ms_summary(self._wait_ms),
+                "lock_hold": _ms_summary(self._hold_ms),
+                "delete_lock_hold": delete_hold,
+                "vacuum": vacuum,
+                "page_count_before": page_count_before,
+                "page_count_after": _pragma_int(conn, "page_count"),
+                "interrupted": self._stop.is_set(),
+                "elapsed_s": round(time.perf_counter() - started, 3),
+                "finished_at": int(time.time()),
+            }
+        finally:
+            conn.close()
+        self.last_stats = stats
+        return stats
+
+
+def format_retention_stats(stats: Dict[str, Any]) -> str:
+    d, v, h = stats.get("deleted", {}), stats.get("vacuum", {}), stats.get("lock_hold", {})
+    return (
+        f"entries={d.get('rss_entries', 0)} tags={d.get('rss_entry_tags', 0)} "
+        f"labels={d.get('rss_entry_ai_labels', 0)} events={d.get('rss_usage_events', 0)} "
+        f"orphan_tags={d.get('orphan_tags', 0)} story_members={d.get('story_cluster_members', 0)} "
+        f"story_clusters={d.get('story_clusters', 0)} | auto_vacuum={v.get('auto_vacuum')} "
+        f"reclaimed_pages={v.get('pages_reclaimed', 0)} ({v.get('bytes_reclaimed', 0)} bytes) "
+        f"freelist={v.get('freelist_before', 0)}->{v.get('freelist_after', 0)} | "
+        f"lock_hold max={h.get('max_ms', 0)}ms p50={h.get('p50_ms', 0)}ms txns={h.get('count', 0)} "
+        f"lock_wait max={stats.get('lock_wait', {}).get('max_ms', 0)}ms | {stats.get('elapsed_s', 0)}s"
+    )
+
+
+# --- in-process scheduler ---------------------------------------------------------
+
+_job: Optional[RetentionJob] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_runner_fd: Optional[int] = None
+
+
+def _acquire_runner_lock(db_path: Path) -> bool:
+    """Take the cross-process runner lock (non-blocking); kept until the process exits."""
+    global _runner_fd
+    if _runner_fd is not None or fcntl is None:
+        return True
+    fd = os.open(f"{db_path}.retention.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _runner_fd = fd
+    return True
+
+
+def _release_runner_lock() -> None:
+    global _runner_fd
+    fd, _runner_fd = _runner_fd, None
+    if fd is not None:
+        os.close(fd)
+
+
+def get_retention_job(project_root: Path) -> RetentionJob:
+    global _job
+    if _job is None:
+        with _lock:
+            if _job is None:
+                _job = RetentionJob(Path(project_root) / "output" / "online.db")
+    return _job
+
+
+def _loop(job: RetentionJob, interval_s: int) -> None:
+    # First run a few minutes after start so it doesn't compete with cache warmup
+    delay = min(600, interval_s)
+    while not job._stop.wait(delay):
+        delay = interval_s
+        try:
+            if not _acquire_runner_lock(job.db_path):
+                continue
+            stats = job.run()
+            print(f"[Retention] {format_retention_stats(stats)}")
+        except Exception as e:
+            print(f"[Retention] run failed: {e}")
+
+
+def start_retention_job(project_root: Path) -> Optional[RetentionJob]:
+    """Start the background retention thread (``HOTNEWS_RETENTION_ENABLED``, default on).
+
+    Safe to call from every worker: only the process holding the runner lock runs the job.
+    """
+    global _thread
+    if not retention_enabled():
+        return None
+    job = get_retention_job(project_root)
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            job._stop.clear()
+            _thread = threading.Thread(
+                target=_loop, args=(job, _retention_interval_s()), name="online-db-retention", daemon=True
+            )
+            _thread.start()
+    return job
+
+
+def stop_retention_job() -> None:
+    global _thread
+    job, t = _job, _thread
+    if job is not None:
+        job.stop()
+    if t is not None:
+        t.join(timeout=5)
+    _thread = None
+    _release_runner_lock()
@@ -0,0 +1,485 @@
+"""Incremental RSS / Atom / JSON Feed parser.
+
+XML feeds are parsed with ``XMLPullParser``: entries are emitted as soon as their
+closing tag arrives, each finished element is detached from the tree so memory
+stays flat, and parsing stops once ``max_entries`` entries have been collected.
+Callers feed raw body chunks as they arrive and call ``close()`` at the end.
+
+JSON feeds cannot be parsed incrementally with the stdlib, so their bytes are
+buffered and decoded once on ``close()``.
+
+``FeedBodyReader`` sits in front of the parser for network reads: it takes raw
+body chunks straight off the socket, decodes gzip/deflate incrementally,
+enforces the byte cap and read deadline, and tells the caller when to stop.
+
+The module has no web-framework imports so it can also be loaded cheaply in
+parse worker processes (see ``hotnews.web.parse_pool``), together with
+``parse_html_content`` for scraped HTML sources.
+"""
+
+import json
+import time
+import zlib
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+
+def _strip_xml_tag(tag: str) -> str:
+    if not tag:
+        return ""
+    if "}" in tag:
+        return tag.split("}", 1)[1]
+    return tag
+
+
+_XML_LANG_ATTR = "{http://www.w3.org/XML/1998/namespace}lang"
+
+
+class FeedStreamParser:
+    """Push-style feed parser.
+
+    ``feed(chunk)`` returns True once enough entries were collected; the caller
+    can then stop reading the body. ``close()`` returns the same dict shape as
+    ``parse_feed_content``.
+    """
+
+    def __init__(self, content_type: str = "", max_entries: Optional[int] = None):
+        self.content_type = (content_type or "").lower()
+        self.max_entries = int(max_entries) if max_entries and int(max_entries) > 0 else None
+        self.is_json = "json" in self.content_type
+        self.done = False
+        self.bytes_fed = 0
+
+        self._json_chunks: List[bytes] = []
+        self._parser: Optional[ET.XMLPullParser] = None
+        if not self.is_json:
+            self._parser = ET.XMLPullParser(events=("start", "end"))
+
+        self._stack: List[ET.Element] = []
+        self._root_tag = ""
+        self._feed_title = ""
+        self._feed_title_seen = False
+        self._feed_lang = ""
+        self._feed_lang_seen = False
+        self._entries: List[Dict[str, Any]] = []
+
+    @property
+    def entries_count(self) -> int:
+        return len(self._entries)
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done or not chunk:
+            return self.done
+        self.bytes_fed += len(chunk)
+
+        if self.is_json:
+            self._json_chunks.append(chunk)
+            return False
+
+        self._parser.feed(chunk)
+        self._drain_events()
+        return self.done
+
+    def _container_depth(self) -> int:
+        # RSS: <rss><channel><item>; Atom: <feed><entry>
+        return 2 if self._root_tag == "rss" else 1
+
+    def _drain_events(self) -> None:
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if not self._stack:
+                    self._root_tag = _strip_xml_tag(elem.tag).lower()
+                    if self._root_tag == "feed":
+                        self._feed_lang = (elem.attrib.get(_XML_LANG_ATTR) or elem.attrib.get("lang") or "").strip()
+                self._stack.append(elem)
+                continue
+
+            # end event
+            depth = len(self._stack) - 1
+            if self._stack:
+                self._stack.pop()
+            if self._root_tag not in {"rss", "feed"}:
+                continue
+
+            tag = _strip_xml_tag(elem.tag).lower()
+            container_depth = self._container_depth()
+
+            if depth == container_depth:
+                if tag == ("item" if self._root_tag == "rss" else "entry"):
+                    self._entries.append(self._extract_entry(elem))
+                elif tag == "title" and not self._feed_title_seen:
+                    self._feed_title = (elem.text or "").strip()
+                    self._feed_title_seen = True
+                elif tag == "language" and not self._feed_lang_seen:
+                    v = (elem.text or "").strip()
+                    if v:
+                        self._feed_lang = v
+                        self._feed_lang_seen = True
+
+                # Release the finished subtree.
+                parent = self._stack[-1] if self._stack else None
+                elem.clear()
+                if parent is not None:
+                    try:
+                        parent.remove(elem)
+                    except ValueError:
+                        pass
+
+                if self.max_entries is not None and len(self._entries) >= self.max_entries:
+                    self.done = True
+                    return
+
+    def _extract_entry(self, elem: ET.Element) -> Dict[str, Any]:
+        title = ""
+        link = ""
+        pub = ""
+        if self._root_tag == "rss":
+            for c in elem:
+                t = _strip_xml_tag(c.tag).lower()
+                if t == "title":
+                    title = (c.text or "").strip()
+                elif t == "link":
+                    link = (c.text or "").strip() or (c.attrib.get("href") or "").strip()
+                elif t in {"pubdate", "published", "updated", "date"}:
+                    pub = (c.text or "").strip()
+        else:
+            for c in elem:
+                t = _strip_xml_tag(c.tag).lower()
+                if t == "title":
+                    title = (c.text or "").strip()
+                elif t == "link":
+                    rel = (c.attrib.get("rel") or "").strip().lower()
+                    href = (c.attrib.get("href") or "").strip()
+                    if href and (not link) and (not rel or rel == "alternate"):
+                        link = href
+                elif t in {"published", "updated"}:
+                    pub = (c.text or "").strip()
+        if not title:
+            title = link
+        return {"title": title, "link": link, "published": pub}
+
+    def close(self, truncated: bool = False) -> Dict[str, Any]:
+        """Finish parsing.
+
+        ``truncated`` means the body was cut off by the byte cap: the entries
+        collected so far are returned instead of raising on the unfinished
+        document (raises only if nothing usable was parsed).
+        """
+        if self.is_json:
+            return self._close_json()
+
+        if not self.done:
+            try:
+                self._parser.close()
+                self._drain_events()
+            except ET.ParseError:
+                if not truncated:
+                    raise
+        self._parser = None
+        self._stack = []
+
+        if truncated and not self._entries:
+            raise ValueError("Response too large")
+
+        if self._root_tag == "rss":
+            fmt = "rss"
+        elif self._root_tag == "feed":
+            fmt = "atom"
+        else:
+            return {"format": "xml", "feed": {"title": ""}, "entries": []}
+        return {
+            "format": fmt,
+            "feed": {"title": self._feed_title, "language": self._feed_lang},
+            "entries": self._entries,
+        }
+
+    def _close_json(self) -> Dict[str, Any]:
+        body = self._json_chunks[0] if len(self._json_chunks) == 1 else b"".join(self._json_chunks)
+        self._json_chunks = []
+        payload = json.loads(body.decode("utf-8", errors="replace"))
+        if isinstance(payload, dict) and isinstance(payload.get("items"), list):
+            feed_title = str(payload.get("title") or "")
+            feed_lang = str(payload.get("language") or "")
+            entries = []
+            for it in payload.get("items") or []:
+                if not isinstance(it, dict):
+                    continue
+                url = it.get("url") or it.get("external_url")
+                title = it.get("title") or url
+                published = it.get("date_published") or it.get("date_modified")
+                entries.append({"title": title, "link": url, "published": published})
+                if self.max_entries is not None and len(entries) >= self.max_entries:
+                    break
+            return {"format": "json", "feed": {"title": feed_title, "language": feed_lang}, "entries": entries}
+        return {"format": "json", "payload": payload}
+
+
+def parse_feed_bytes(
+    content_type: str,
+    body: bytes,
+    max_entries: Optional[int] = None,
+    chunk_size: int = 64 * 1024,
+    truncated: bool = False,
+) -> Dict[str, Any]:
+    parser = FeedStreamParser(content_type, max_entries=max_entries)
+    if parser.is_json:
+        # Nothing to gain from chunking a buffered JSON body; avoid the extra copy.
+        parser.feed(body)
+        return parser.close(truncated=truncated)
+    view = memoryview(body)
+    for off in range(0, len(body), chunk_size):
+        if parser.feed(bytes(view[off:off + chunk_size])):
+            break
+    return parser.close(truncated=truncated)
+
+
+_SNIFF_BYTES = 512
+
+
+def _make_decoder(content_encoding: str, first: bytes):
+    """Pick an incremental decoder from Content-Encoding, or sniff mislabeled gzip."""
+    enc = (content_encoding or "").strip().lower()
+    if enc in {"gzip", "x-gzip"}:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if enc == "deflate":
+        # "deflate" is zlib-wrapped per the RFC, but some servers send raw deflate.
+        if len(first) >= 2 and (first[0] & 0x0F) == 8 and ((first[0] << 8) | first[1]) % 31 == 0:
+            return zlib.decompressobj(zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+    if first[:2] == b"\x1f\x8b":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return None
+
+
+class FeedBodyReader:
+    """Push-style consumer for an upstream feed body.
+
+    ``push(raw_chunk)`` returns True when the caller should stop reading:
+    the byte cap was hit (``truncated``), the parser collected enough entries,
+    or the body turned out to be HTML that nobody wants (``kind == "html"``).
+    Call ``finish()`` after the last chunk, then ``result()`` for a feed or
+    ``body()`` for buffered HTML / feed bytes.
+
+    ``max_bytes`` caps the *decoded* size, so compressed bodies cannot expand
+    past it. With ``keep_html`` an HTML body is buffered for the scraper; with
+    ``buffer_feed`` feed bytes are buffered instead of parsed here (for the
+    process parse backend).
+    """
+
+    def __init__(
+        self,
+        content_type: str = "",
+        content_encoding: str = "",
+        max_bytes: int = 8 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        deadline_s: Optional[float] = None,
+        keep_html: bool = False,
+        buffer_feed: bool = False,
+    ):
+        self.content_type = content_type or ""
+        self.content_encoding = content_encoding or ""
+        self.max_bytes = max(1, int(max_bytes))
+        self.max_entries = max_entries
+        self.deadline = (time.monotonic() + float(deadline_s)) if deadline_s else None
+        self.keep_html = bool(keep_html)
+        self.buffer_feed = bool(buffer_feed)
+
+        self.kind: Optional[str] = None  # "feed" | "html", decided from the first bytes
+        self.head = b""
+        self.truncated = False
+        self.timed_out = False
+        self.raw_bytes = 0
+        self.size = 0
+        self.compressed = False
+
+        self._decoder = None
+        self._decoder_ready = False
+        self._pending = bytearray()
+        self._buffer: Optional[bytearray] = None
+        self._parser: Optional[FeedStreamParser] = None
+        self._stop = False
+
+    # --- reading -----------------------------------------------------------
+
+    def remaining_s(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expire(self) -> None:
+        """Mark the read deadline as exceeded; whatever was parsed so far is kept."""
+        self.timed_out = True
+        self.truncated = True
+        self._stop = True
+
+    def push(self, raw: bytes) -> bool:
+        if self._stop or not raw:
+            return self._stop
+        rem = self.remaining_s()
+        if rem is not None and rem <= 0:
+            self.expire()
+            return True
+        self.raw_bytes += len(raw)
+
+        if not self._decoder_ready:
+            self._decoder = _make_decoder(self.content_encoding, raw)
+            self.compressed = self._decoder is not None
+            self._decoder_ready = True
+
+        if self._decoder is not None:
+            try:
+                data = self._decoder.decompress(raw, self.max_bytes - self.size + 1)
+            except zlib.error as e:
+                raise ValueError("Upstream returned gzip-compressed bytes that could not be decoded") from e
+        else:
+            data = raw
+
+        room = self.max_bytes - self.size
+        if len(data) > room:
+            data = data[:room]
+            self.truncated = True
+            self._stop = True
+        self.size += len(data)
+        self._consume(data)
+        return self._stop
+
+    def finish(self) -> None:
+        if self._decoder is not None and not self._stop:
+            try:
+                tail = self._decoder.flush()
+            except zlib.error as e:
+                raise ValueError("Upstream returned gzip-compressed bytes that could not be decoded") from e
+            room = self.max_bytes - self.size
+            if len(tail) > room:
+                tail = tail[:room]
+                self.truncated = True
+            self.size += len(tail)
+            self._consume(tail)
+        if self.kind is None:
+            self._decide()
+        self._decoder = None
+
+    def _consume(self, data: bytes) -> None:
+        if self.kind is None:
+            self._pending += data
+            if len(self._pending.lstrip()) < _SNIFF_BYTES and not self._stop:
+                return
+            self._decide()
+            return
+        self._route(data)
+
+    def _decide(self) -> None:
+        stripped = bytes(self._pending.lstrip())
+        head = stripped[:_SNIFF_BYTES].lower()
+        is_html = stripped.startswith(b"<") and ((b"<html" in head) or (b"<!doctype html" in head))
+        self.kind = "html" if is_html else "feed"
+        self.head = stripped[:_SNIFF_BYTES]
+        pending = bytes(self._pending)
+        self._pending = bytearray()
+
+        if self.kind == "html":
+            if not self.keep_html:
+                self._stop = True
+                return
+            self._buffer = bytearray()
+        elif self.buffer_feed:
+            self._buffer = bytearray()
+        else:
+            self._parser = FeedStreamParser(self.content_type, max_entries=self.max_entries)
+        self._route(pending)
+
+    def _route(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._buffer is not None:
+            self._buffer += data
+        elif self._parser is not None:
+            if self._parser.feed(data):
+                self._stop = True
+
+    # --- results -----------------------------------------------------------
+
+    @property
+    def entries_count(self) -> int:
+        return self._parser.entries_count if self._parser is not None else 0
+
+    def body(self) -> bytes:
+        """Buffered decoded body (HTML with ``keep_html``, feed with ``buffer_feed``)."""
+        return bytes(self._buffer or b"")
+
+    def result(self) -> Dict[str, Any]:
+        """Close the incremental parser; a cut-off body keeps the entries read so far."""
+        parser = self._parser
+        if parser is None:
+            parser = FeedStreamParser(self.content_type, max_entries=self.max_entries)
+        try:
+            return parser.close(truncated=self.truncated)
+        except ValueError as e:
+            if self.timed_out:
+                raise ValueError("Upstream read deadline exceeded") from e
+            if self.truncated:
+                raise ValueError("Response too large") from e
+            raise
+
+
+def parse_html_content(body: bytes, rules: str) -> Dict[str, Any]:
+    """Parse HTML content using CSS selectors defined in rules JSON."""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        raise ValueError("bs4 not installed")
+
+    rule_dict = {}
+    try:
+        rule_dict = json.loads(rules)
+    except Exception:
+        pass
+    
+    if not isinstance(rule_dict, dict):
+        raise ValueError("Invalid scrape_rules json")
+
+    item_sel = rule_dict.get("item")
+    title_sel = rule_dict.get("title")
+    link_sel = rule_dict.get("link")
+    date_sel = rule_dict.get("date")  # Optional
+
+    if not item_sel or not title_sel or not link_sel:
+        raise ValueError("Missing required selectors: item, title, link")
+
+    text = body.decode("utf-8", errors="replace")
+    soup = BeautifulSoup(text, "html.parser")
+    
+    entries = []
+    items = soup.select(item_sel)
+    for it in items:
+        try:
+            # Title
+            t_el = it.select_one(title_sel)
+            if not t_el:
+                continue
+            title = t_el.get_text(strip=True)
+            
+            # Link
+            l_el = it.select_one(link_sel)
+            if not l_el:
+                continue
+            link = l_el.get("href")
+            if not link:
+                continue
+            
+            # Date (Optional)
+            pub = ""
+            if date_sel:
+                d_el = it.select_one(date_sel)
+                if d_el:
+                    pub = d_el.get_text(strip=True) or d_el.get("datetime") or ""
+
+            entries.append({"title": title, "link": link, "published": pub})
+        except Exception:
+            continue
+
+    return {
+        "format": "html",
+        "feed": {"title": "Scraped Feed", "language": ""},
+        "entries": entries
+    }
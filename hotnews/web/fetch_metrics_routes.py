@@ -1,61 +1,53 @@
-import json
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Query, Request
-from fastapi.responses import Response
 
-
-router = APIRouter()
+from hotnews.web.json_response import UnicodeJSONResponse
 
 
-class UnicodeJSONResponse(Response):
-    media_type = "application/json"
-
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
+router = APIRouter()
 
 
-def _get_metrics_items(request: Request) -> List[Dict[str, Any]]:
-    fn = getattr(request.app.state, "fetch_metrics_get_items", None)
-    if callable(fn):
-        items = fn()
-        return items if isinstance(items, list) else []
-    return []
+def _get_store(request: Request):
+    fn = getattr(request.app.state, "get_fetch_metrics_store", None)
+    return fn() if callable(fn) else None
 
 
 def _get_metrics_max(request: Request) -> int:
-    v = getattr(request.app.state, "fetch_metrics_max", None)
+    store = _get_store(request)
     try:
-        return int(v)
+        return int(store.max_rows)
     except Exception:
         return 5000
 
 
+def _time_window(since: Optional[float], minutes: Optional[int]) -> Optional[float]:
+    if minutes:
+        t = time.time() - int(minutes) * 60
+        return t if since is None else max(float(since), t)
+    return since
+
+
 @router.get("/api/fetch-metrics")
 async def api_fetch_metrics(
     request: Request,
     limit: int = Query(200, ge=1),
     platform: Optional[str] = Query(None),
     provider: Optional[str] = Query(None),
+    since: Optional[float] = Query(None, description="Unix seconds, inclusive"),
+    until: Optional[float] = Query(None, description="Unix seconds, exclusive"),
+    minutes: Optional[int] = Query(None, ge=1, description="Only the last N minutes"),
 ):
     max_n = _get_metrics_max(request)
     if limit > max_n:
         limit = max_n
 
-    items = _get_metrics_items(request)
-
-    if provider:
-        items = [m for m in items if str(m.get("provider") or "").strip() == provider]
-    if platform:
-        items = [m for m in items if str(m.get("platform_id") or "").strip() == platform]
-
-    items = items[-limit:]
+    store = _get_store(request)
+    items = store.query(
+        limit=limit, platform=platform, provider=provider,
+        since=_time_window(since, minutes), until=until,
+    ) if store is not None else []
 
     summary: Dict[str, Any] = {}
     for m in items:
@@ -124,3 +116,21 @@ async def api_fetch_metrics(
             ent["avg_changed_count"] = round(hs / hn, 2)
 
     return UnicodeJSONResponse(content={"limit": limit, "metrics": items, "summary": list(summary.values())})
+
+
+@router.get("/api/fetch-metrics/rollup")
+async def api_fetch_metrics_rollup(
+    request: Request,
+    platform: Optional[str] = Query(None),
+    provider: Optional[str] = Query(None),
+    since: Optional[float] = Query(None, description="Unix seconds, inclusive"),
+    until: Optional[float] = Query(None, description="Unix seconds, exclusive"),
+    minutes: Optional[int] = Query(None, ge=1, description="Only the last N minutes"),
+):
+    """Per-platform success rate and duration percentiles over the stored window."""
+    store = _get_store(request)
+    platforms = store.rollup(
+        platform=platform, provider=provider,
+        since=_time_window(since, minutes), until=until,
+    ) if store is not None else []
+    return UnicodeJSONResponse(content={"platforms": platforms})
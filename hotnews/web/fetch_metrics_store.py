@@ -0,0 +1,282 @@
+"""SQLite-backed store for per-platform crawl metrics.
+
+Metrics used to live in an in-memory deque plus
+``output/metrics/fetch_metrics.jsonl``. Every crawl appended to the file, read
+the whole file back and rewrote it once it passed 5000 lines: O(file) I/O per
+batch, and a crash during the rewrite could truncate it.
+
+Rows now go to ``output/metrics/fetch_metrics.db`` (WAL) with ring-buffer
+semantics: each batch is inserted and the rows older than the newest
+``HOTNEWS_FETCH_METRICS_MAX`` (default 5000) are deleted in the same
+transaction, a primary-key range delete. Queries by platform / provider and
+time window use indexes, and ``rollup`` computes per-platform success rates
+and latency percentiles.
+
+An existing JSONL file is imported once and renamed to ``*.jsonl.migrated``.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_COLUMNS = (
+    "platform_id", "platform_name", "provider", "status", "duration_ms",
+    "items_count", "changed_count", "error", "content_hash", "fetched_at",
+)
+
+
+def _fetch_metrics_max() -> int:
+    try:
+        v = int((os.environ.get("HOTNEWS_FETCH_METRICS_MAX", "") or "").strip() or "5000")
+    except Exception:
+        v = 5000
+    if v <= 0:
+        v = 5000
+    return int(max(100, min(5000000, v)))
+
+
+def _num(v: Any) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+
+def _out_num(v: Optional[float]) -> Any:
+    return int(v) if v is not None and float(v).is_integer() else v
+
+
+def _parse_fetched_at(v: Any) -> Optional[float]:
+    try:
+        return datetime.strptime(str(v), "%Y-%m-%d %H:%M:%S").timestamp()
+    except Exception:
+        return None
+
+
+def _percentile(sorted_vals: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return None
+    rank = math.ceil(q * len(sorted_vals))
+    return sorted_vals[max(0, min(len(sorted_vals), rank) - 1)]
+
+
+class FetchMetricsStore:
+    def __init__(self, db_path: Path, max_rows: Optional[int] = None, legacy_jsonl: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.max_rows = int(max_rows or _fetch_metrics_max())
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetch_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                platform_id TEXT NOT NULL DEFAULT '',
+                platform_name TEXT NOT NULL DEFAULT '',
+                provider TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL DEFAULT '',
+                duration_ms REAL,
+                items_count REAL,
+                changed_count REAL,
+                error TEXT NOT NULL DEFAULT '',
+                content_hash TEXT NOT NULL DEFAULT '',
+                fetched_at TEXT NOT NULL DEFAULT '',
+                extra TEXT NOT NULL DEFAULT ''
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_metrics_platform_ts ON fetch_metrics(platform_id, ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_metrics_provider_ts ON fetch_metrics(provider, ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_metrics_ts ON fetch_metrics(ts)")
+        if legacy_jsonl is not None:
+            self._migrate_jsonl(Path(legacy_jsonl))
+
+    def _row(self, m: Dict[str, Any], now: float) -> Tuple[Any, ...]:
+        extra = {k: v for k, v in m.items() if k not in _COLUMNS and not str(k).startswith("_")}
+        ts = _parse_fetched_at(m.get("fetched_at")) or now
+        return (
+            ts,
+            str(m.get("platform_id") or "").strip(),
+            str(m.get("platform_name") or ""),
+            str(m.get("provider") or ""),
+            str(m.get("status") or ""),
+            _num(m.get("duration_ms")),
+            _num(m.get("items_count")),
+            _num(m.get("changed_count")),
+            str(m.get("error") or ""),
+            str(m.get("content_hash") or ""),
+            str(m.get("fetched_at") or ""),
+            json.dumps(extra, ensure_ascii=False) if extra else "",
+        )
+
+    def append(self, metrics: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        rows = [self._row(m, now) for m in metrics or [] if isinstance(m, dict)]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO fetch_metrics (ts, platform_id, platform_name, provider, status, duration_ms,
+                                               items_count, changed_count, error, content_hash, fetched_at, extra)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                # Ring buffer: keep only the newest max_rows ids
+                conn.execute(
+                    "DELETE FROM fetch_metrics WHERE id <= (SELECT MAX(id) FROM fetch_metrics) - ?",
+                    (self.max_rows,),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _migrate_jsonl(self, path: Path) -> None:
+        if not path.exists():
+            return
+        try:
+            if self._conn.execute("SELECT 1 FROM fetch_metrics LIMIT 1").fetchone() is None:
+                items = []
+                with path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            m = json.loads(line)
+                        except Exception:
+                            continue
+                        if isinstance(m, dict):
+                            items.append(m)
+                self.append(items[-self.max_rows:])
+            os.replace(path, path.with_name(path.name + ".migrated"))
+        except Exception as e:
+            print(f"[FetchMetrics] JSONL migration failed: {e}")
+
+    @staticmethod
+    def _where(
+        platform: Optional[str], provider: Optional[str], since: Optional[float], until: Optional[float]
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if platform:
+            clauses.append("platform_id = ?")
+            params.append(platform)
+        if provider:
+            clauses.append("provider = ?")
+            params.append(provider)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(float(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(float(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(
+        self,
+        limit: int = 200,
+        platform: Optional[str] = None,
+        provider: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Newest ``limit`` matching rows, returned oldest first (same order as the old deque)."""
+        where, params = self._where(platform, provider, since, until)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT platform_id, platform_name, provider, status, duration_ms, items_count,
+                       changed_count, error, content_hash, fetched_at, extra
+                FROM fetch_metrics{where}
+                ORDER BY id DESC LIMIT ?
+                """,
+                params + [int(max(1, limit))],
+            ).fetchall()
+        out = []
+        for r in reversed(rows):
+            m: Dict[str, Any] = {
+                "platform_id": r[0],
+                "platform_name": r[1],
+                "provider": r[2],
+                "status": r[3],
+                "duration_ms": _out_num(r[4]),
+                "items_count": _out_num(r[5]),
+                "error": r[7],
+                "content_hash": r[8],
+                "fetched_at": r[9],
+                "changed_count": _out_num(r[6]),
+            }
+            if r[10]:
+                try:
+                    for k, v in json.loads(r[10]).items():
+                        m.setdefault(k, v)
+                except Exception:
+                    pass
+            out.append(m)
+        return out
+
+    def rollup(
+        self,
+        platform: Optional[str] = None,
+        provider: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Per-platform counts, success rate and duration percentiles (p50/p90/p99)."""
+        where, params = self._where(platform, provider, since, until)
+        with self._lock:
+            counts = self._conn.execute(
+                f"""
+                SELECT platform_id, MAX(platform_name), MAX(provider), COUNT(*),
+                       SUM(status = 'success'), SUM(status = 'cache'),
+                       SUM(status NOT IN ('success', 'cache')),
+                       AVG(items_count), MIN(ts), MAX(ts)
+                FROM fetch_metrics{where}
+                GROUP BY platform_id
+                ORDER BY platform_id
+                """,
+                params,
+            ).fetchall()
+            dur_where = where + (" AND " if where else " WHERE ") + "duration_ms IS NOT NULL"
+            durations = self._conn.execute(
+                f"SELECT platform_id, duration_ms FROM fetch_metrics{dur_where} ORDER BY platform_id, duration_ms",
+                params,
+            ).fetchall()
+        by_platform: Dict[str, List[float]] = {}
+        for pid, d in durations:
+            by_platform.setdefault(pid, []).append(float(d))
+        out = []
+        for pid, name, prov, n, ok, cache, err, avg_items, first_ts, last_ts in counts:
+            ds = by_platform.get(pid, [])
+            out.append({
+                "platform_id": pid or "unknown",
+                "platform_name": name or pid,
+                "provider": prov or "",
+                "count": int(n),
+                "success": int(ok or 0),
+                "cache": int(cache or 0),
+                "error": int(err or 0),
+                "success_rate": round((int(ok or 0) + int(cache or 0)) / n, 4) if n else None,
+                "p50_duration_ms": _percentile(ds, 0.50),
+                "p90_duration_ms": _percentile(ds, 0.90),
+                "p99_duration_ms": _percentile(ds, 0.99),
+                "max_duration_ms": ds[-1] if ds else None,
+                "avg_items_count": round(avg_items, 2) if avg_items is not None else None,
+                "first_ts": first_ts,
+                "last_ts": last_ts,
+            })
+        return out
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM fetch_metrics").fetchone()[0])
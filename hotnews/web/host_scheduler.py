@@ -0,0 +1,437 @@
+"""Adaptive per-host scheduler for outbound RSS fetches.
+
+Each upstream host gets a token bucket (rate + burst) and a concurrency window.
+Both adapt to what the host tells us (AIMD):
+
+- every successful response adds rate and concurrency back (multiplicatively
+  until the host first pushes back, additively after that)
+- 429 / 503 halve rate and concurrency, empty the bucket and, when the host
+  sends ``Retry-After``, block the host until then
+- timeouts / connection errors and responses much slower than the host's
+  usual latency shrink the rate more gently
+
+Decreases are applied at most once per cooldown window so a burst of in-flight
+failures does not collapse the rate to the floor.
+
+The state lives behind a ``threading.Lock`` and is shared by the sync fetchers
+(threads) and the async fetcher. Callers that cannot get a permit right away
+join the host's FIFO waiter queue; only the head of the queue may take a permit.
+The head sleeps until the bucket refills (or the ``Retry-After`` block ends),
+and every ``release()`` wakes it, so nobody polls for a concurrency slot. A
+thread waits on a ``threading.Event``; a coroutine waits on an ``asyncio.Event``
+set through ``call_soon_threadsafe``. Host states are kept in an LRU bounded by
+``HOTNEWS_RSS_HOST_STATE_MAX``.
+
+A caller gives up (``ValueError``) after ``HOTNEWS_RSS_HOST_MAX_QUEUE_WAIT_S`` in
+the queue, or after ``HOTNEWS_RSS_HOST_MAX_WAIT_S`` if the host is throttled
+(blocked by ``Retry-After``, or a 429/503 within the last
+``THROTTLED_WINDOW_S``).
+
+Tunables (env):
+- ``HOTNEWS_RSS_HOST_RATE_10S``          initial requests per 10s per host (also the burst)
+- ``HOTNEWS_RSS_HOST_MAX_RPS``           rate ceiling per host
+- ``HOTNEWS_RSS_HOST_CONCURRENCY``       initial in-flight requests per host
+- ``HOTNEWS_RSS_HOST_MAX_CONCURRENCY``   concurrency ceiling per host
+- ``HOTNEWS_RSS_HOST_MAX_WAIT_S``        longest a fetch waits for a throttled host before giving up
+- ``HOTNEWS_RSS_HOST_MAX_QUEUE_WAIT_S``  longest a fetch waits in a host's queue at all
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+def _env_float(name: str, default: float, lo: float, hi: float) -> float:
+    try:
+        v = float((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if not (v > 0):
+        v = default
+    return float(max(lo, min(hi, v)))
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+MIN_RATE = 0.05  # never slower than one request per 20s
+RATE_STEP = 0.05  # additive increase per success (req/s)
+DECREASE_COOLDOWN_S = 2.0
+RETRY_AFTER_MAX_S = 600.0
+THROTTLED_WINDOW_S = 60.0  # how long after a 429/503 waits on the host may fail fast
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP date), clamped to RETRY_AFTER_MAX_S."""
+    v = (value or "").strip()
+    if not v:
+        return None
+    try:
+        secs = float(v)
+    except ValueError:
+        try:
+            secs = parsedate_to_datetime(v).timestamp() - time.time()
+        except Exception:
+            return None
+    if secs != secs:  # NaN
+        return None
+    return max(0.0, min(RETRY_AFTER_MAX_S, secs))
+
+
+class _HostState:
+    __slots__ = (
+        "rate", "burst", "tokens", "refilled_at", "limit", "in_flight", "blocked_until",
+        "ewma_latency", "base_latency", "last_decrease", "ssthresh", "requests", "throttled", "errors", "waited_s",
+        "throttled_at", "waiters",
+    )
+
+    def __init__(self, rate: float, burst: float, limit: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.refilled_at = now
+        self.limit = limit
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.ewma_latency: Optional[float] = None
+        self.base_latency: Optional[float] = None
+        self.last_decrease = 0.0
+        self.ssthresh = float("inf")
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.waited_s = 0.0
+        self.throttled_at = float("-inf")
+        self.waiters: Deque["_Waiter"] = deque()
+
+    def refill(self, now: float) -> None:
+        if now > self.refilled_at:
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+            self.refilled_at = now
+
+
+class _Waiter:
+    """A queued caller: a thread (``threading.Event``) or a coroutine (``asyncio.Event`` on its loop)."""
+
+    __slots__ = ("loop", "event")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:  # loop closed; the waiter is gone with it
+            pass
+
+
+class HostPermit:
+    """One granted request slot; report the outcome with ``observe()`` and give it back via ``release()``."""
+
+    __slots__ = ("host", "started", "status", "retry_after_s", "latency_s", "released")
+
+    def __init__(self, host: str):
+        self.host = host
+        self.started = time.monotonic()
+        self.status: Optional[int] = None
+        self.retry_after_s: Optional[float] = None
+        self.latency_s: Optional[float] = None
+        self.released = False
+
+    def observe(self, status: int, retry_after: Optional[str] = None) -> None:
+        """Record the response status (call when headers arrive, so latency excludes the body)."""
+        self.status = int(status)
+        self.latency_s = time.monotonic() - self.started
+        self.retry_after_s = parse_retry_after(retry_after)
+
+
+class HostScheduler:
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_hosts: Optional[int] = None,
+        max_wait_s: Optional[float] = None,
+        max_queue_wait_s: Optional[float] = None,
+    ):
+        rate_10s = _env_int("HOTNEWS_RSS_HOST_RATE_10S", 5, 1, 1000)
+        self.initial_rate = float(rate) if rate else rate_10s / 10.0
+        self.burst = max(1.0, float(burst or rate_10s))
+        self.max_rate = float(max_rate) if max_rate else _env_float("HOTNEWS_RSS_HOST_MAX_RPS", 2.0, MIN_RATE, 100.0)
+        self.max_rate = max(self.max_rate, self.initial_rate)
+        self.initial_limit = float(concurrency or _env_int("HOTNEWS_RSS_HOST_CONCURRENCY", 1, 1, 64))
+        self.max_limit = float(max_concurrency or _env_int("HOTNEWS_RSS_HOST_MAX_CONCURRENCY", 4, 1, 64))
+        self.max_limit = max(self.max_limit, self.initial_limit)
+        self.max_hosts = int(max_hosts or _env_int("HOTNEWS_RSS_HOST_STATE_MAX", 2048, 16, 1_000_000))
+        self.max_wait_s = float(max_wait_s or _env_float("HOTNEWS_RSS_HOST_MAX_WAIT_S", 30.0, 1.0, 600.0))
+        self.max_queue_wait_s = float(
+            max_queue_wait_s or _env_float("HOTNEWS_RSS_HOST_MAX_QUEUE_WAIT_S", 120.0, 1.0, 3600.0)
+        )
+        self.max_queue_wait_s = max(self.max_queue_wait_s, self.max_wait_s)
+
+        self._lock = threading.Lock()
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+        self.evicted = 0
+
+    # --- state -------------------------------------------------------------
+
+    @staticmethod
+    def _key(host: str) -> str:
+        return (host or "").strip().lower() or "_"
+
+    def _state(self, host: str, now: float) -> _HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            st = _HostState(self.initial_rate, self.burst, self.initial_limit, now)
+            self._hosts[host] = st
+            self._evict(keep=host)
+        else:
+            self._hosts.move_to_end(host)
+        return st
+
+    def _evict(self, keep: str) -> None:
+        # Drop least recently used hosts that have nothing in flight.
+        if len(self._hosts) <= self.max_hosts:
+            return
+        for h in list(self._hosts.keys()):
+            if len(self._hosts) <= self.max_hosts:
+                break
+            if h != keep and self._hosts[h].in_flight == 0 and not self._hosts[h].waiters:
+                del self._hosts[h]
+                self.evicted += 1
+
+    # --- acquire -----------------------------------------------------------
+
+    def _try_acquire(self, host: str, waiter: Optional[_Waiter] = None) -> Tuple[Optional[float], bool]:
+        """Grant a permit (0.0) or say how long to wait; ``None`` means "until woken".
+
+        Also returns whether the host is throttled. A ``waiter`` that has to wait is
+        queued; only the head of a host's queue can be granted.
+        """
+        h = self._key(host)
+        now = time.monotonic()
+        with self._lock:
+            st = self._state(h, now)
+            throttled = now < st.blocked_until or now - st.throttled_at < THROTTLED_WINDOW_S
+            if st.waiters and st.waiters[0] is not waiter:
+                if waiter is not None and waiter not in st.waiters:
+                    st.waiters.append(waiter)
+                return None, throttled
+            if now < st.blocked_until:
+                wait: Optional[float] = st.blocked_until - now
+            else:
+                st.refill(now)
+                if st.tokens < 1.0:
+                    wait = (1.0 - st.tokens) / st.rate
+                elif st.in_flight >= int(st.limit):
+                    wait = None  # release() wakes the head
+                else:
+                    st.tokens -= 1.0
+                    st.in_flight += 1
+                    st.requests += 1
+                    if st.waiters:
+                        st.waiters.popleft()
+                        self._wake_head(st)
+                    return 0.0, throttled
+            if waiter is not None and not st.waiters:
+                st.waiters.append(waiter)
+            return wait, throttled
+
+    @staticmethod
+    def _wake_head(st: _HostState) -> None:
+        if st.waiters:
+            st.waiters[0].wake()
+
+    def _leave(self, host: str, waiter: _Waiter) -> None:
+        """Drop a waiter that gave up (timeout, error, cancellation) and pass the turn on."""
+        with self._lock:
+            st = self._hosts.get(self._key(host))
+            if st is None:
+                return
+            was_head = bool(st.waiters) and st.waiters[0] is waiter
+            try:
+                st.waiters.remove(waiter)
+            except ValueError:
+                return
+            if was_head:
+                self._wake_head(st)
+
+    def try_acquire(self, host: str) -> float:
+        """Grant a slot (returns 0.0) or return roughly how many seconds to wait; never queues."""
+        wait, _ = self._try_acquire(host)
+        return 0.05 if wait is None else wait
+
+    def _check_wait(self, host: str, wait: Optional[float], throttled: bool, waited: float) -> float:
+        """Raise if the caller should give up, else return how long to sleep before the next try."""
+        if throttled and wait is not None and waited + wait > self.max_wait_s:
+            raise ValueError(f"Upstream rate limited: host {host} is cooling down ({wait:.1f}s)")
+        left = self.max_queue_wait_s - waited
+        if left <= 0 or (wait is not None and wait > left):
+            raise ValueError(f"Upstream rate limited: host {host} queue wait exceeded {self.max_queue_wait_s:.0f}s")
+        return left if wait is None else max(0.001, wait)
+
+    def acquire_sync(self, host: str) -> HostPermit:
+        waiter = _Waiter()
+        started = time.monotonic()
+        try:
+            while True:
+                waiter.event.clear()
+                wait, throttled = self._try_acquire(host, waiter)
+                waited = time.monotonic() - started
+                if wait == 0.0:
+                    self._note_wait(host, waited)
+                    return HostPermit(self._key(host))
+                waiter.event.wait(self._check_wait(host, wait, throttled, waited))
+        except BaseException:
+            self._leave(host, waiter)
+            raise
+
+    async def acquire(self, host: str) -> HostPermit:
+        waiter = _Waiter(asyncio.get_running_loop())
+        started = time.monotonic()
+        try:
+            while True:
+                waiter.event.clear()
+                wait, throttled = self._try_acquire(host, waiter)
+                waited = time.monotonic() - started
+                if wait == 0.0:
+                    self._note_wait(host, waited)
+                    return HostPermit(self._key(host))
+                timeout = self._check_wait(host, wait, throttled, waited)
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._leave(host, waiter)
+            raise
+
+    def _note_wait(self, host: str, waited: float) -> None:
+        if waited <= 0:
+            return
+        with self._lock:
+            st = self._hosts.get(self._key(host))
+            if st is not None:
+                st.waited_s += waited
+
+    # --- feedback ----------------------------------------------------------
+
+    def release(self, permit: Optional[HostPermit], adapt: bool = True) -> None:
+        """Return the slot and adapt the host's rate from the observed outcome.
+
+        A permit released without ``observe()`` counts as a network error, unless
+        ``adapt`` is False (the caller never saw a response; only the slot is returned).
+        """
+        if permit is None or permit.released:
+            return
+        permit.released = True
+        now = time.monotonic()
+        with self._lock:
+            st = self._hosts.get(permit.host)
+            if st is None:
+                return
+            st.in_flight = max(0, st.in_flight - 1)
+            # Whatever the outcome, the head of the queue re-checks (it sleeps again if still limited)
+            self._wake_head(st)
+            if not adapt:
+                return
+            status = permit.status
+
+            if status in {429, 503}:
+                st.throttled += 1
+                st.throttled_at = now
+                if permit.retry_after_s:
+                    st.blocked_until = max(st.blocked_until, now + permit.retry_after_s)
+                self._decrease(st, now, 0.5, drain=True)
+                return
+
+            if status is None:
+                st.errors += 1
+                self._decrease(st, now, 0.8)
+                return
+
+            if status >= 500:
+                st.errors += 1
+                self._decrease(st, now, 0.8)
+                return
+
+            lat = permit.latency_s
+            if lat is not None:
+                st.ewma_latency = lat if st.ewma_latency is None else 0.8 * st.ewma_latency + 0.2 * lat
+                # Baseline follows the fastest responses, drifting up slowly if the host gets slower for good.
+                st.base_latency = lat if st.base_latency is None else min(lat, st.base_latency * 1.01)
+                if st.base_latency and st.ewma_latency > max(1.0, 3.0 * st.base_latency):
+                    self._decrease(st, now, 0.8)
+                    return
+
+            # Slow start (x1.1 per success) until the host first pushes back, then additive.
+            if st.rate < st.ssthresh:
+                st.rate = min(self.max_rate, st.ssthresh, st.rate * 1.1)
+            else:
+                st.rate = min(self.max_rate, st.rate + RATE_STEP)
+            st.limit = min(self.max_limit, st.limit + 1.0 / max(1.0, st.limit))
+
+    def _decrease(self, st: _HostState, now: float, factor: float, drain: bool = False) -> None:
+        if drain:
+            st.tokens = 0.0
+            st.refilled_at = now
+        if now - st.last_decrease < DECREASE_COOLDOWN_S:
+            return
+        st.last_decrease = now
+        st.rate = max(MIN_RATE, st.rate * factor)
+        st.ssthresh = st.rate
+        st.limit = max(1.0, st.limit * factor)
+
+    # --- introspection -----------------------------------------------------
+
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._hosts.items())
+            evicted = self.evicted
+        items.sort(key=lambda kv: kv[1].requests, reverse=True)
+        hosts = {}
+        for h, st in items[:top]:
+            hosts[h] = {
+                "rate": round(st.rate, 3),
+                "concurrency": int(st.limit),
+                "in_flight": st.in_flight,
+                "queued": len(st.waiters),
+                "blocked_for_s": round(max(0.0, st.blocked_until - now), 1),
+                "ewma_latency_s": round(st.ewma_latency, 3) if st.ewma_latency is not None else None,
+                "requests": st.requests,
+                "throttled": st.throttled,
+                "errors": st.errors,
+                "waited_s": round(st.waited_s, 1),
+            }
+        return {"tracked_hosts": len(items), "evicted": evicted, "hosts": hosts}
+
+
+_scheduler: Optional[HostScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_host_scheduler() -> HostScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = HostScheduler()
+        return _scheduler
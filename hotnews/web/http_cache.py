@@ -0,0 +1,200 @@
+"""Conditional (ETag / 304) JSON responses with precompressed bodies.
+
+Polling clients hit the news and timeline APIs far more often than the data
+changes. ``conditional_json`` gives those endpoints:
+
+- a strong ``ETag``: either supplied by the caller from a data version (e.g. a
+  cache's build time + config hash), or derived from the rendered payload with
+  volatile fields such as ``updated_at`` (response generation time) left out
+- ``304 Not Modified`` for matching ``If-None-Match`` (or ``If-Modified-Since``
+  when the endpoint knows its ``Last-Modified``)
+- ``Cache-Control: no-cache`` (``private`` for per-user payloads) so clients
+  always revalidate, and ``Vary: Accept-Encoding``
+- bodies compressed once per ETag (brotli when the ``brotli`` package is
+  installed and accepted, else gzip) and kept in a small LRU, so repeated
+  polls skip both serialisation and compression. Responses carrying
+  ``Content-Encoding`` pass through ``GZipMiddleware`` untouched.
+
+Budget: ``HOTNEWS_HTTP_PRECOMPRESS_MAX_BYTES`` (default 32MB).
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from hotnews.web.json_response import render_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+_MIN_COMPRESS_SIZE = 500  # same threshold as the app's GZipMiddleware
+
+
+def _precompress_max_bytes() -> int:
+    try:
+        v = int((os.environ.get("HOTNEWS_HTTP_PRECOMPRESS_MAX_BYTES", "") or "").strip() or str(32 * 1024 * 1024))
+    except Exception:
+        v = 32 * 1024 * 1024
+    if v < 0:
+        v = 32 * 1024 * 1024
+    return int(min(1024 * 1024 * 1024, v))
+
+
+class _BodyCache:
+    """LRU of encoded bodies keyed by (etag, content-coding), bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        size = len(body)
+        if size > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._items[key] = body
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                _, dropped = self._items.popitem(last=False)
+                self._bytes -= len(dropped)
+
+
+_bodies = _BodyCache(_precompress_max_bytes())
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from version parts (cache build time, config hash, page window, ...)."""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_from_body(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _pick_coding(request: Request) -> str:
+    accept = (request.headers.get("accept-encoding") or "").lower()
+    codings = {c.split(";", 1)[0].strip() for c in accept.split(",")}
+    if brotli is not None and "br" in codings:
+        return "br"
+    if "gzip" in codings:
+        return "gzip"
+    return ""
+
+
+def _compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=5)
+    # mtime=0 keeps the gzip bytes identical for identical bodies
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x".
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _not_modified_since(request: Request, last_modified: Optional[float]) -> bool:
+    if last_modified is None:
+        return False
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        return int(last_modified) <= int(parsedate_to_datetime(header).timestamp())
+    except Exception:
+        return False
+
+
+def conditional_json(
+    request: Request,
+    content: Union[Any, Callable[[], Any]],
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[float] = None,
+    private: bool = False,
+    volatile: Iterable[str] = ("updated_at",),
+) -> Response:
+    """
+    Build a JSON response that honours If-None-Match / If-Modified-Since.
+
+    Args:
+        request: Incoming request (conditional and Accept-Encoding headers)
+        content: Payload, or a zero-argument callable producing it (only
+            called when the body is actually needed)
+        etag: Version-derived ETag (see ``make_etag``); when omitted it is
+            hashed from the payload without the ``volatile`` top-level keys
+        last_modified: Unix time the underlying data last changed
+        private: Payload depends on the caller (cookies), not shareable by proxies
+    """
+    payload: Any = None
+    have_payload = False
+    if etag is None:
+        payload = content() if callable(content) else content
+        have_payload = True
+        stable = payload
+        if isinstance(payload, dict):
+            drop = [k for k in volatile if k in payload]
+            if drop:
+                stable = {k: v for k, v in payload.items() if k not in drop}
+        etag = _etag_from_body(render_json(stable))
+
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(float(last_modified), usegmt=True)
+
+    inm = request.headers.get("if-none-match")
+    if (inm is not None and _etag_matches(inm, etag)) or (inm is None and _not_modified_since(request, last_modified)):
+        return Response(status_code=304, headers=headers)
+
+    coding = _pick_coding(request)
+    body = _bodies.get((etag, coding))
+    if body is None:
+        raw = _bodies.get((etag, "")) if coding else None
+        if raw is None:
+            if not have_payload:
+                payload = content() if callable(content) else content
+            raw = render_json(payload)
+            _bodies.put((etag, ""), raw)
+        if coding and len(raw) >= _MIN_COMPRESS_SIZE:
+            body = _compress(raw, coding)
+            _bodies.put((etag, coding), body)
+        else:
+            body, coding = raw, ""
+    if coding:
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
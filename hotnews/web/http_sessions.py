@@ -0,0 +1,216 @@
+"""Keyed registry of long-lived aiohttp sessions for outbound RSS fetches.
+
+Every upstream route gets its own ``ClientSession`` + connector that lives for
+the whole process, so keep-alive connections (and the SOCKS handshake / TLS
+session behind them) are reused across requests and retries:
+
+- ``direct``      plain ``TCPConnector``
+- ``http_proxy``  ``TCPConnector``; requests pass ``proxy=`` per call
+- ``socks``       ``aiohttp_socks.ProxyConnector``, one per proxy URL
+- ``scraperapi``  ``TCPConnector`` dedicated to the ScraperAPI endpoint
+
+Connectors share the same limits (``HOTNEWS_RSS_POOL_LIMIT``,
+``HOTNEWS_RSS_POOL_LIMIT_PER_HOST``), DNS cache and keep-alive settings.
+Routes unused for ``HOTNEWS_RSS_POOL_IDLE_S`` are closed on the next lookup.
+Per-route request / new-connection / reused-connection counters come from
+aiohttp trace hooks. ``close_all()`` runs on app shutdown.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from aiohttp_socks import ProxyConnector
+
+
+logger = logging.getLogger(__name__)
+
+
+RouteKey = Tuple[str, str]
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+def _rss_pool_limit() -> int:
+    return _env_int("HOTNEWS_RSS_POOL_LIMIT", 100, 1, 1000)
+
+
+def _rss_pool_limit_per_host() -> int:
+    return _env_int("HOTNEWS_RSS_POOL_LIMIT_PER_HOST", 8, 1, 100)
+
+
+def _rss_pool_idle_s() -> int:
+    return _env_int("HOTNEWS_RSS_POOL_IDLE_S", 300, 30, 86400)
+
+
+def _connector_kwargs() -> Dict[str, Any]:
+    return {
+        "limit": _rss_pool_limit(),
+        "limit_per_host": _rss_pool_limit_per_host(),
+        "ttl_dns_cache": 300,
+        "keepalive_timeout": 30,
+        "enable_cleanup_closed": True,
+    }
+
+
+def direct_route() -> RouteKey:
+    return ("direct", "")
+
+
+def http_proxy_route(proxy_url: str) -> RouteKey:
+    return ("http_proxy", proxy_url)
+
+
+def socks_route(proxy_url: str) -> RouteKey:
+    """``socks5h://`` (remote DNS) is kept in the key and mapped to ``rdns=True`` on creation."""
+    return ("socks", proxy_url)
+
+
+def scraperapi_route() -> RouteKey:
+    return ("scraperapi", "")
+
+
+def _route_label(key: RouteKey) -> str:
+    kind, target = key
+    if not target:
+        return kind
+    # Drop credentials from proxy URLs before they show up in stats.
+    if "@" in target:
+        scheme, _, rest = target.partition("://")
+        target = f"{scheme}://***@{rest.split('@', 1)[1]}"
+    return f"{kind}:{target}"
+
+
+class _Route:
+    def __init__(self, key: RouteKey, loop: asyncio.AbstractEventLoop):
+        self.key = key
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.loop = loop
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.stats = {"requests": 0, "new_connections": 0, "reused_connections": 0, "dns_cache_hits": 0, "dns_lookups": 0}
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+        stats = self.stats
+
+        def _bump(name: str):
+            async def _hook(session, ctx, params):
+                stats[name] += 1
+            return _hook
+
+        tc.on_request_start.append(_bump("requests"))
+        tc.on_connection_create_end.append(_bump("new_connections"))
+        tc.on_connection_reuseconn.append(_bump("reused_connections"))
+        tc.on_dns_cache_hit.append(_bump("dns_cache_hits"))
+        tc.on_dns_resolvehost_end.append(_bump("dns_lookups"))
+        return tc
+
+
+class SessionRegistry:
+    """One pooled ``ClientSession`` per route key, bound to the running event loop."""
+
+    def __init__(self):
+        self._routes: Dict[RouteKey, _Route] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closed_idle = 0
+
+    def _get_lock(self, loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _build(self, key: RouteKey, loop: asyncio.AbstractEventLoop) -> _Route:
+        kind, target = key
+        kwargs = _connector_kwargs()
+        if kind == "socks":
+            # aiohttp_socks has no socks5h scheme; remote DNS is the rdns flag.
+            rdns = target.startswith("socks5h://")
+            url = target.replace("socks5h://", "socks5://", 1) if rdns else target
+            connector = ProxyConnector.from_url(url, rdns=rdns, **kwargs)
+        else:
+            connector = aiohttp.TCPConnector(**kwargs)
+        route = _Route(key, loop)
+        route.session = aiohttp.ClientSession(connector=connector, trace_configs=[route.trace_config()])
+        return route
+
+    async def get(self, key: RouteKey) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        async with self._get_lock(loop):
+            await self._close_idle(loop, exclude=key)
+            route = self._routes.get(key)
+            if route is not None and (route.session.closed or route.loop is not loop):
+                # A session from another (finished) loop cannot be reused or awaited here.
+                self._routes.pop(key, None)
+                route = None
+            if route is None:
+                route = self._build(key, loop)
+                self._routes[key] = route
+            route.last_used = time.time()
+            return route.session
+
+    async def _close_idle(self, loop: asyncio.AbstractEventLoop, exclude: RouteKey) -> None:
+        cutoff = time.time() - _rss_pool_idle_s()
+        for key, route in list(self._routes.items()):
+            if key == exclude or route.last_used >= cutoff or route.loop is not loop:
+                continue
+            self._routes.pop(key, None)
+            self.closed_idle += 1
+            try:
+                await route.session.close()
+            except Exception:
+                pass
+
+    async def close_all(self) -> None:
+        routes = list(self._routes.values())
+        self._routes.clear()
+        for route in routes:
+            try:
+                if not route.session.closed:
+                    await route.session.close()
+            except Exception as e:
+                logger.warning("Closing %s session failed: %s", _route_label(route.key), e)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        out: Dict[str, Any] = {}
+        for key, route in list(self._routes.items()):
+            s = dict(route.stats)
+            conns = s["new_connections"] + s["reused_connections"]
+            s["reuse_ratio"] = round(s["reused_connections"] / conns, 3) if conns else None
+            s["age_s"] = int(now - route.created_at)
+            s["idle_s"] = int(now - route.last_used)
+            out[_route_label(key)] = s
+        return {"routes": out, "closed_idle": self.closed_idle}
+
+
+_registry = SessionRegistry()
+
+
+def get_session_registry() -> SessionRegistry:
+    return _registry
+
+
+async def get_route_session(key: RouteKey) -> aiohttp.ClientSession:
+    return await _registry.get(key)
+
+
+async def close_http_sessions() -> None:
+    await _registry.close_all()
+
+
+def get_http_session_stats() -> Dict[str, Any]:
+    return _registry.stats()
@@ -0,0 +1,140 @@
+"""JSON response rendering shared by all API routes.
+
+``UnicodeJSONResponse`` renders with orjson when it is installed and falls back
+to the stdlib encoder (same compact, non-ASCII-escaped output) otherwise, or
+when orjson rejects a value (e.g. integers wider than 64 bits).
+
+Cached item lists (timelines, per-platform news) can be wrapped in
+``PreEncodedList``: every item is encoded to a JSON fragment once, on first
+render, and later responses only join the cached byte slices. A
+``PreEncodedList`` is still a regular ``list`` for everything else (templates,
+slicing, ``len``); mutating it drops the encoded fragments.
+"""
+
+import json
+import re
+import secrets
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(content: Any) -> bytes:
+        try:
+            return orjson.dumps(content, option=_ORJSON_OPTIONS)
+        except TypeError:
+            return _stdlib_dumps(content)
+else:
+    def dumps_bytes(content: Any) -> bytes:
+        return _stdlib_dumps(content)
+
+
+def json_backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+class PreEncodedList(list):
+    """A list that caches the JSON encoding of each item for reuse across responses."""
+
+    def __init__(self, items: Iterable[Any] = ()):
+        super().__init__(items)
+        self._frags: List[Optional[bytes]] = [None] * len(self)
+
+    def _invalidate(self) -> None:
+        self._frags = [None] * len(self)
+
+    def _encoded_range(self, start: int, stop: int) -> List[bytes]:
+        frags = self._frags
+        if len(frags) != len(self):
+            self._invalidate()
+            frags = self._frags
+        for i in range(start, stop):
+            if frags[i] is None:
+                frags[i] = dumps_bytes(self[i])
+        return frags[start:stop]
+
+    def window(self, start: int, stop: int) -> "PreEncodedList":
+        """Slice that reuses (and fills) this list's encoded fragments."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        out = PreEncodedList(self[start:stop])
+        out._frags = list(self._encoded_range(start, stop))
+        return out
+
+    def encoded(self) -> bytes:
+        return b"[" + b",".join(self._encoded_range(0, len(self))) + b"]"
+
+
+def _wrap_mutator(name: str):
+    base = getattr(list, name)
+
+    def method(self, *args, **kwargs):
+        result = base(self, *args, **kwargs)
+        self._invalidate()
+        return result
+
+    method.__name__ = name
+    return method
+
+
+for _name in (
+    "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+    "__setitem__", "__delitem__", "__iadd__", "__imul__",
+):
+    setattr(PreEncodedList, _name, _wrap_mutator(_name))
+
+
+_TOKEN_PREFIX = f"__hotnews_json_fragment_{secrets.token_hex(8)}_"
+_TOKEN_RE = re.compile(b'"' + re.escape(_TOKEN_PREFIX.encode("ascii")) + rb'(\d+)"')
+
+
+def _swap_fragments(obj: Any, parts: List[bytes]) -> Any:
+    """Replace PreEncodedList values (reachable through dicts) with placeholder tokens."""
+    if isinstance(obj, PreEncodedList):
+        parts.append(obj.encoded())
+        return f"{_TOKEN_PREFIX}{len(parts) - 1}"
+    if type(obj) is not dict:
+        return obj
+    out: Optional[Dict[Any, Any]] = None
+    for k, v in obj.items():
+        if isinstance(v, (dict, PreEncodedList)):
+            nv = _swap_fragments(v, parts)
+            if nv is not v:
+                if out is None:
+                    out = dict(obj)
+                out[k] = nv
+    return obj if out is None else out
+
+
+def render_json(content: Any) -> bytes:
+    parts: List[bytes] = []
+    swapped = _swap_fragments(content, parts)
+    body = dumps_bytes(swapped)
+    if not parts:
+        return body
+    return _TOKEN_RE.sub(lambda m: parts[int(m.group(1))], body)
+
+
+class UnicodeJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return render_json(content)
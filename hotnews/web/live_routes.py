@@ -0,0 +1,131 @@
+"""Live update stream (Server-Sent Events).
+
+``GET /api/live/updates`` keeps the connection open and streams the events
+published on the ``LiveUpdateHub`` (see ``live_updates``). Browsers reconnect
+by themselves and send ``Last-Event-ID``, which replays missed events from the
+hub's buffer (or a ``resync`` if they are gone).
+"""
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from hotnews.web.data_versions import get_data_version_watcher, version_token
+from hotnews.web.db_online import get_online_db_conn
+from hotnews.web.json_response import UnicodeJSONResponse
+from hotnews.web.live_updates import (
+    encode_sse,
+    get_live_hub,
+    live_max_connections,
+    rss_rows_delta,
+)
+
+
+router = APIRouter()
+
+_RSS_DELTA_MAX_ROWS = 1000
+
+
+def start_live_updates(project_root: Path) -> None:
+    """
+    Start the hub and feed it from data-version changes (call on app startup).
+
+    Every change becomes a ``version`` event; new rss_entries rows (by id)
+    additionally become an ``rss`` delta. Works the same in every worker,
+    whichever process wrote the rows. With nobody subscribed the cursor just
+    moves to ``MAX(id)``; a backlog larger than ``_RSS_DELTA_MAX_ROWS`` moves it
+    there too and publishes ``resync`` rather than a partial, stale delta.
+    """
+    hub = get_live_hub()
+    hub.ensure_started()
+    watcher = get_data_version_watcher(project_root)
+    watcher.ensure_started()
+
+    conn = get_online_db_conn(project_root)
+    row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rss_entries").fetchone()
+    state = {"last_rss_id": int(row[0] or 0) if row else 0}
+    read_lock = threading.Lock()
+
+    def read_rss_delta() -> None:
+        with read_lock:
+            _read_rss_delta()
+
+    def skip_rss_backlog() -> None:
+        with read_lock:
+            _skip_to_max_id(get_online_db_conn(project_root))
+
+    def _skip_to_max_id(conn) -> None:
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rss_entries").fetchone()
+        state["last_rss_id"] = max(state["last_rss_id"], int(row[0] or 0) if row else 0)
+
+    def _read_rss_delta() -> None:
+        conn = get_online_db_conn(project_root)
+        rows = conn.execute(
+            "SELECT id, source_id, title, url FROM rss_entries WHERE id > ? ORDER BY id LIMIT ?",
+            (state["last_rss_id"], _RSS_DELTA_MAX_ROWS + 1),
+        ).fetchall()
+        if not rows:
+            return
+        if len(rows) > _RSS_DELTA_MAX_ROWS:
+            # Too many to be "new" items; clients refetch instead of replaying the backlog piecemeal
+            _skip_to_max_id(conn)
+            hub.publish("resync", {"reason": "rss_backlog"})
+            return
+        state["last_rss_id"] = int(rows[-1][0])
+        hub.publish("delta", rss_rows_delta([(r[1], r[2], r[3]) for r in rows], False))
+
+    def on_change(old: Dict[str, Tuple[int, int]], new: Dict[str, Tuple[int, int]]) -> None:
+        if not old:
+            return
+        changed = sorted(n for n in set(old) | set(new) if old.get(n) != new.get(n))
+        if "rss" in changed:
+            # Keep the cursor current while nobody listens, so the first subscriber never gets old rows
+            asyncio.get_running_loop().run_in_executor(None, read_rss_delta if len(hub) else skip_rss_backlog)
+        hub.publish("version", {"version": version_token(new), "changed": changed})
+
+    watcher.add_listener(on_change)
+
+
+@router.get("/api/live/updates")
+async def api_live_updates(request: Request):
+    hub = get_live_hub()
+    if len(hub) >= live_max_connections():
+        return UnicodeJSONResponse(
+            content={"error": "too many live connections"},
+            status_code=503,
+            headers={"Retry-After": "30"},
+        )
+
+    watcher = get_data_version_watcher(request.app.state.project_root)
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    sub, backlog = hub.subscribe(last_event_id)
+    hello = encode_sse("hello", {"version": version_token(watcher.snapshot())}, retry_ms=5000)
+
+    async def stream():
+        try:
+            yield hello
+            for chunk in backlog:
+                yield chunk
+            while True:
+                chunk = await sub.queue.get()
+                if chunk is None:
+                    return
+                yield chunk
+                # A slow reader gets one "resync" and is disconnected; it reconnects fresh
+                if sub.overflowed and sub.queue.empty():
+                    return
+        finally:
+            hub.unsubscribe(sub)
+
+    # Starlette only stopped gzipping text/event-stream in 0.46; GZipMiddleware
+    # passes through any response that already declares a Content-Encoding, so
+    # the stream is never buffered by the compressor on older releases either.
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Content-Encoding": "identity"},
+    )
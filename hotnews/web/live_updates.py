@@ -0,0 +1,284 @@
+"""In-process pub/sub behind the live-update SSE channel.
+
+The front end learns about new content by polling ``/api/news/check-updates``
+and then refetching whole timelines / category payloads. ``/api/live/updates``
+(see ``live_routes``) streams small delta events instead:
+
+- ``hello``: the current data-version token
+- ``delta``: new item ``stable_id``s per platform (and per category for
+  hot-list crawls), plus whether the category layout changed
+- ``version``: a data version changed somewhere (e.g. a crawl in another
+  worker); carries the new token and the changed names
+- ``resync``: this client missed events (slow reader or resume point too
+  old) and should refetch in full
+
+Publishers: ``fetch_news_data`` diffs the old and new category snapshots. RSS
+entries are written by the RSS scheduler, so each worker reads new rows
+(``id > last seen``) when the ``rss`` data version changes, instead of
+hooking the writer.
+
+Each event is encoded to SSE bytes once and shared by every subscriber. A
+subscriber is a bounded queue; one that falls behind gets its queue replaced
+by a single ``resync``. A single task sends heartbeats to all
+subscribers, so an idle connection costs one queue and one suspended
+generator and has no timer of its own. The last ``HOTNEWS_LIVE_REPLAY`` events
+are kept for ``Last-Event-ID`` resume.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+def live_max_connections() -> int:
+    return _env_int("HOTNEWS_LIVE_MAX_CONNECTIONS", 10000, 1, 1000000)
+
+
+def _live_queue_max() -> int:
+    return _env_int("HOTNEWS_LIVE_QUEUE_MAX", 32, 2, 10000)
+
+
+def _live_replay() -> int:
+    return _env_int("HOTNEWS_LIVE_REPLAY", 256, 1, 100000)
+
+
+def _live_heartbeat_s() -> float:
+    return float(_env_int("HOTNEWS_LIVE_HEARTBEAT_S", 25, 1, 300))
+
+
+_MAX_IDS_PER_PLATFORM = 50
+_HEARTBEAT = b": ping\n\n"
+
+
+def encode_sse(event: str, data: Any, event_id: Optional[int] = None, retry_ms: Optional[int] = None) -> bytes:
+    lines = []
+    if retry_ms is not None:
+        lines.append(f"retry: {int(retry_ms)}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class Subscriber:
+    __slots__ = ("queue", "overflowed")
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class LiveUpdateHub:
+    def __init__(self, queue_max: Optional[int] = None, replay: Optional[int] = None,
+                 heartbeat_s: Optional[float] = None):
+        self.queue_max = int(queue_max or _live_queue_max())
+        self.heartbeat_s = float(heartbeat_s or _live_heartbeat_s())
+        self._subs: Set[Subscriber] = set()
+        self._replay: Deque[Tuple[int, bytes]] = deque(maxlen=int(replay or _live_replay()))
+        self._seq = itertools.count(int(time.time() * 1000))  # ids stay increasing across restarts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.resyncs = 0
+
+    # --- lifecycle ------------------------------------------------------------
+
+    def ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._heartbeat_task is not None and not self._heartbeat_task.done():
+            return
+        self._loop = loop
+        self._heartbeat_task = loop.create_task(self._heartbeat())
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_s)
+            for sub in list(self._subs):
+                try:
+                    sub.queue.put_nowait(_HEARTBEAT)
+                except asyncio.QueueFull:
+                    pass
+
+    def close(self) -> None:
+        """Ends every open stream (app shutdown)."""
+        for sub in list(self._subs):
+            self._replace_queue(sub, None)
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    # --- subscribers ----------------------------------------------------------
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[Subscriber, List[bytes]]:
+        """
+        Register a stream. Returns the subscriber and the events to replay
+        first (a single ``resync`` if ``last_event_id`` is older than the buffer).
+        """
+        self.ensure_started()
+        sub = Subscriber(self.queue_max)
+        self._subs.add(sub)
+        backlog: List[bytes] = []
+        if last_event_id:
+            try:
+                last = int(last_event_id)
+            except ValueError:
+                last = None
+            if last is not None:
+                # Empty buffer: the id came from a previous process, anything may be missing
+                if not self._replay or self._replay[0][0] > last + 1:
+                    backlog = [encode_sse("resync", {"reason": "replay_window"})]
+                else:
+                    backlog = [chunk for seq, chunk in self._replay if seq > last]
+        return sub, backlog
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subs.discard(sub)
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def _replace_queue(self, sub: Subscriber, last: Optional[bytes]) -> None:
+        # Drop whatever is queued; the reader gets exactly one final message
+        while True:
+            try:
+                sub.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+        sub.queue.put_nowait(last)
+
+    # --- publishing -----------------------------------------------------------
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Thread-safe; the event is encoded once and fanned out on the loop."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(event, data)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, event, data)
+
+    def _dispatch(self, event: str, data: Dict[str, Any]) -> None:
+        seq = next(self._seq)
+        chunk = encode_sse(event, data, event_id=seq)
+        self._replay.append((seq, chunk))
+        self.published += 1
+        resync = None
+        for sub in list(self._subs):
+            if sub.overflowed:
+                continue
+            try:
+                sub.queue.put_nowait(chunk)
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.resyncs += 1
+                if resync is None:
+                    resync = encode_sse("resync", {"reason": "slow_consumer"})
+                self._replace_queue(sub, resync)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self._subs),
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "replay_buffered": len(self._replay),
+            "queue_max": self.queue_max,
+            "heartbeat_s": self.heartbeat_s,
+        }
+
+
+_hub: Optional[LiveUpdateHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_live_hub() -> LiveUpdateHub:
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = LiveUpdateHub()
+    return _hub
+
+
+# --- delta builders -----------------------------------------------------------
+
+
+def _ids(news: Iterable[Dict[str, Any]]) -> List[str]:
+    out = []
+    for n in news or []:
+        sid = n.get("stable_id") or n.get("id")
+        if sid:
+            out.append(str(sid))
+    return out
+
+
+def news_snapshot_delta(
+    old_platforms: Optional[Dict[str, List[Dict[str, Any]]]],
+    old_layout: Optional[Dict[str, List[str]]],
+    new_platforms: Dict[str, List[Dict[str, Any]]],
+    new_layout: Dict[str, List[str]],
+) -> Dict[str, Any]:
+    """
+    Diff two category-snapshot views (platform id → news, category id → platform ids).
+
+    Without an old view (first crawl after start) only ``full: true`` is sent.
+    """
+    if old_platforms is None:
+        return {"type": "news", "full": True, "platforms": {}, "categories": {}, "categories_changed": True}
+    platforms: Dict[str, List[str]] = {}
+    for pid, news in new_platforms.items():
+        seen = set(_ids(old_platforms.get(pid) or []))
+        fresh = [i for i in _ids(news) if i not in seen]
+        if fresh:
+            platforms[pid] = fresh[:_MAX_IDS_PER_PLATFORM]
+    categories: Dict[str, List[str]] = {}
+    for cat_id, pids in new_layout.items():
+        ids = [i for pid in pids for i in platforms.get(pid, [])]
+        if ids:
+            categories[cat_id] = ids
+    return {
+        "type": "news",
+        "platforms": platforms,
+        "categories": categories,
+        "categories_changed": (old_layout or {}) != new_layout,
+    }
+
+
+def rss_rows_delta(rows: Iterable[Tuple[str, str, str]], truncated: bool) -> Dict[str, Any]:
+    """``rows``: (source_id, title, url) of newly inserted entries, oldest first."""
+    from hotnews.web.news_viewer import generate_news_id
+
+    platforms: Dict[str, List[str]] = {}
+    for source_id, title, url in rows:
+        # Same id derivation as the subscription timeline (title falls back to the link)
+        link = str(url or "").strip()
+        if not link:
+            continue
+        pid = f"rss-{source_id}"
+        ids = platforms.setdefault(pid, [])
+        if len(ids) < _MAX_IDS_PER_PLATFORM:
+            ids.append(generate_news_id(pid, str(title or "").strip() or link))
+    return {"type": "rss", "platforms": platforms, "categories_changed": False, "truncated": bool(truncated)}
@@ -1,27 +1,15 @@
 import asyncio
-import json
 import os
 from datetime import date
 
 import requests
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse
 
-
-router = APIRouter()
+from hotnews.web.json_response import UnicodeJSONResponse
 
 
-class UnicodeJSONResponse(Response):
-    media_type = "application/json"
-
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
+router = APIRouter()
 
 
 @router.get("/api/nba-today")
@@ -6,25 +6,121 @@
 
 import hashlib
 import re
+import threading
 import time
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from mcp_server.services.shared_cache import get_shared_cache
+
+from .config_registry import viewer_config
 from .content_filter import ContentFilter
+from .json_response import PreEncodedList
 
-# 简单的内存缓存
+# 简单的内存缓存（启用共享缓存时，多个 worker 共用同一份结果）
 _categorized_news_cache = {}
 _categorized_news_cache_time = 0
 _CACHE_TTL_SECONDS = 60  # 缓存 60 秒
+_SHARED_KEY_PREFIX = "categorized:"
+
+
+# 全平台分类快照：每次抓取后整体构建一次，构建完成后整体替换引用（原子切换）
+_category_snapshot = None
+_category_snapshot_stale = False
+_category_snapshot_lock = threading.Lock()
+_SNAPSHOT_MAX_AGE_SECONDS = 60
 
 
 def clear_categorized_news_cache():
     """清除分类新闻缓存"""
-    global _categorized_news_cache, _categorized_news_cache_time
+    global _categorized_news_cache, _categorized_news_cache_time, _category_snapshot_stale
     _categorized_news_cache = {}
     _categorized_news_cache_time = 0
+    # 快照不直接丢弃：标记过期，重建完成前仍由旧快照应答
+    _category_snapshot_stale = True
+    shared = get_shared_cache()
+    if shared is not None:
+        try:
+            shared.delete_prefix(_SHARED_KEY_PREFIX)
+        except Exception:
+            pass
+
+
+def _pre_encode_platform_news(result: Dict) -> Dict:
+    """把各平台的新闻列表换成 PreEncodedList，缓存命中时直接复用已编码的 JSON 片段"""
+    try:
+        for cat in (result.get("categories") or {}).values():
+            for platform in (cat.get("platforms") or {}).values():
+                news = platform.get("news")
+                if type(news) is list:
+                    platform["news"] = PreEncodedList(news)
+    except Exception:
+        pass
+    return result
+
+
+class CategorySnapshot:
+    """
+    某一时刻全部平台新闻的只读快照
+
+    持有一次 get_latest_news 的结果；每种过滤模式首次使用时分类一次，
+    得到「平台 ID → 过滤、排序后的新闻列表」，之后分页只需切片。
+    """
+
+    def __init__(self, news_list: List[Dict], per_platform_limit: int):
+        self.news_list = news_list
+        self.per_platform_limit = per_platform_limit
+        self.built_at = time.time()
+        self._views: Dict[str, Tuple[Dict[str, PreEncodedList], Optional[str]]] = {}
+        self._layouts: Dict[str, Dict[str, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def view(self, service: "NewsViewerService", filter_mode: str) -> Tuple[Dict[str, PreEncodedList], Optional[str]]:
+        """
+        获取某过滤模式下的平台索引
+
+        Returns:
+            (平台ID → 新闻列表, updated_at)
+        """
+        found = self._views.get(filter_mode)
+        if found is not None:
+            return found
+        with self._lock:
+            found = self._views.get(filter_mode)
+            if found is not None:
+                return found
+            original_mode = service.content_filter.filter_mode
+            if filter_mode != original_mode:
+                service.content_filter.set_filter_mode(filter_mode)
+            try:
+                data = service.categorize_news(self.news_list, apply_filter=True)
+            finally:
+                if filter_mode != original_mode:
+                    service.content_filter.set_filter_mode(original_mode)
+            platforms: Dict[str, PreEncodedList] = {}
+            for cat in (data.get("categories") or {}).values():
+                for pid, platform in (cat.get("platforms") or {}).items():
+                    if pid not in platforms:
+                        platforms[pid] = PreEncodedList(platform.get("news") or [])
+            found = (platforms, data.get("updated_at"))
+            self._layouts[filter_mode] = {
+                cat_id: list((cat.get("platforms") or {}).keys())
+                for cat_id, cat in (data.get("categories") or {}).items()
+            }
+            self._views[filter_mode] = found
+            return found
+
+    def layout(self, service: "NewsViewerService", filter_mode: str) -> Dict[str, List[str]]:
+        """分类 ID → 平台 ID 列表"""
+        self.view(service, filter_mode)
+        return self._layouts.get(filter_mode, {})
+
+
+def get_category_snapshot() -> Optional[CategorySnapshot]:
+    """当前分类快照（可能为 None）"""
+    return _category_snapshot
 
 
 def generate_news_id(platform_id: str, title: str) -> str:
@@ -178,7 +274,9 @@ class NewsViewerService:
 
     def reload_cache(self):
         """Public method to reload platform and category cache."""
+        global _category_snapshot_stale
         self._reload_platform_config()
+        _category_snapshot_stale = True
         return {"status": "ok", "message": "Cache reloaded successfully"}
 
     def _reload_platform_config(self):
@@ -297,14 +395,9 @@ class NewsViewerService:
                     self._platform_to_category[platform_id] = cat_id
 
     def _load_viewer_config(self) -> Dict:
-        """加载查看器配置"""
+        """加载查看器配置（只读快照，config.yaml 变化时由配置注册表自动重载）"""
         try:
-            import yaml
-            config_path = self.project_root / "config" / "config.yaml"
-            if config_path.exists():
-                with open(config_path, "r", encoding="utf-8") as f:
-                    full_config = yaml.safe_load(f)
-                    return full_config.get("viewer", {})
+            return viewer_config(self.project_root)
         except Exception:
             pass
         return {}
@@ -625,6 +718,25 @@ class NewsViewerService:
         now = time.time()
         if cache_key in _categorized_news_cache and (now - _categorized_news_cache_time) < _CACHE_TTL_SECONDS:
             return _categorized_news_cache[cache_key]
+
+        # 其他 worker 可能已经算过
+        shared = get_shared_cache()
+        if shared is not None:
+            try:
+                found = shared.get(_SHARED_KEY_PREFIX + cache_key)
+            except Exception:
+                found = None
+            if found is not None:
+                value, stored_at = _pre_encode_platform_news(found[0]), found[1]
+                # 回填 L1：缓存时间取 L2 的写入时间，不延长有效期；L1 已过期时先清空，
+                # 避免旧条目借新的缓存时间“复活”
+                if (now - _categorized_news_cache_time) >= _CACHE_TTL_SECONDS:
+                    _categorized_news_cache = {}
+                    _categorized_news_cache_time = stored_at
+                else:
+                    _categorized_news_cache_time = min(_categorized_news_cache_time, stored_at)
+                _categorized_news_cache[cache_key] = value
+                return value
         
         # 临时设置过滤模式
         original_mode = None
@@ -658,7 +770,12 @@ class NewsViewerService:
             result["filter_mode"] = self.content_filter.filter_mode
             
             # 更新缓存
-            _categorized_news_cache[cache_key] = result
+            if shared is not None:
+                try:
+                    shared.set(_SHARED_KEY_PREFIX + cache_key, result, now, now + _CACHE_TTL_SECONDS)
+                except Exception:
+                    pass
+            _categorized_news_cache[cache_key] = _pre_encode_platform_news(result)
             _categorized_news_cache_time = now
 
             return result
@@ -668,6 +785,75 @@ class NewsViewerService:
             if original_mode is not None:
                 self.content_filter.set_filter_mode(original_mode)
 
+    def refresh_category_snapshot(self, per_platform_limit: int = 50) -> Optional[CategorySnapshot]:
+        """
+        构建新的全平台分类快照并替换当前快照
+
+        新快照在旧快照之外完整构建，最后一次性替换全局引用，
+        读者要么看到完整的旧快照，要么看到完整的新快照。
+        """
+        global _category_snapshot, _category_snapshot_stale
+        if not self.data_service:
+            return None
+        _category_snapshot_stale = False
+        try:
+            news_list = self.data_service.get_latest_news(
+                platforms=None,
+                limit=1_000_000,
+                include_url=True,
+                per_platform_limit=per_platform_limit,
+            )
+        except Exception as e:
+            print(f"[分类快照] 构建失败: {e}")
+            _category_snapshot_stale = True
+            return _category_snapshot
+        snapshot = CategorySnapshot(news_list or [], per_platform_limit)
+        # 预先生成默认过滤模式的视图，切换后第一批请求无需再分类
+        snapshot.view(self, self.content_filter.filter_mode)
+        _category_snapshot = snapshot
+        return snapshot
+
+    def _current_snapshot(self) -> Optional[CategorySnapshot]:
+        snapshot = _category_snapshot
+        fresh = (
+            snapshot is not None
+            and not _category_snapshot_stale
+            and (time.time() - snapshot.built_at) < _SNAPSHOT_MAX_AGE_SECONDS
+        )
+        if fresh:
+            return snapshot
+        # 只让一个线程重建；已有旧快照时其他线程直接用旧的
+        if not _category_snapshot_lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if _category_snapshot is not snapshot and _category_snapshot is not None:
+                return _category_snapshot
+            return self.refresh_category_snapshot()
+        finally:
+            _category_snapshot_lock.release()
+
+    def get_platform_news(
+        self,
+        platform_id: str,
+        filter_mode: Optional[str] = None,
+    ) -> Tuple[Optional[PreEncodedList], Optional[str]]:
+        """
+        从分类快照中取单个平台过滤、排序后的新闻列表
+
+        Args:
+            platform_id: 平台ID
+            filter_mode: 临时覆盖过滤模式
+
+        Returns:
+            (新闻列表, updated_at)；平台不存在时列表为 None
+        """
+        mode = filter_mode if filter_mode in ("strict", "moderate", "off") else self.content_filter.filter_mode
+        snapshot = self._current_snapshot()
+        if snapshot is None:
+            return None, None
+        platforms, updated_at = snapshot.view(self, mode)
+        return platforms.get(platform_id), updated_at
+
     def get_category_list(self) -> List[Dict]:
         """获取所有分类列表"""
         cats = self._dynamic_categories or PLATFORM_CATEGORIES
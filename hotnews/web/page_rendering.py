@@ -1,5 +1,4 @@
 import json
-import hashlib
 import os
 import secrets
 from datetime import datetime
@@ -9,6 +8,8 @@ from urllib.parse import unquote
 from fastapi import Request
 from fastapi.responses import HTMLResponse
 
+from hotnews.web.config_registry import asset_rev, system_settings, viewer_config
+
 
 def _inject_my_tags_category(data: Dict[str, Any]) -> Dict[str, Any]:
     """Inject 'my-tags' as the first category (requires auth, loaded dynamically)."""
@@ -97,13 +98,7 @@ def _inject_explore_category(data: Dict[str, Any]) -> Dict[str, Any]:
 def _get_cdn_base_url(project_root) -> str:
     """获取 CDN 基础 URL"""
     try:
-        import yaml
-
-        config_path = project_root / "config" / "config.yaml"
-        with open(config_path, "r", encoding="utf-8") as f:
-            full_config = yaml.safe_load(f) or {}
-        viewer_config = full_config.get("viewer", {}) or {}
-        return (viewer_config.get("cdn_base_url") or "").strip()
+        return (viewer_config(project_root).get("cdn_base_url") or "").strip()
     except Exception:
         return ""
 
@@ -113,22 +108,8 @@ def _get_asset_rev(project_root) -> str:
     if forced:
         return forced
 
-    # Use the new esbuild output files
-    css_path = project_root / "hotnews" / "web" / "static" / "css" / "viewer.css"
-    js_path = project_root / "hotnews" / "web" / "static" / "js" / "index.js"
-
-    h = hashlib.md5()
-    found = False
-
-    for p in (css_path, js_path):
-        try:
-            if p.exists():
-                h.update(p.read_bytes())
-                found = True
-        except Exception:
-            pass
-
-    return h.hexdigest() if found else "0"
+    # Hash of the esbuild output files, recomputed only when they change
+    return asset_rev(project_root)
 
 
 def _read_user_config_from_cookie(request: Request) -> Optional[dict]:
@@ -301,7 +282,7 @@ async def render_viewer_page(
 
     # Load system settings first
     from hotnews.kernel.admin.settings_admin import get_system_settings
-    sys_settings = get_system_settings(project_root)
+    sys_settings = system_settings(project_root, get_system_settings)
     items_per_card = sys_settings.get("display", {}).get("items_per_card", 20)
 
     try:
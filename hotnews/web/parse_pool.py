@@ -0,0 +1,311 @@
+"""Optional process-pool backend for feed / HTML parsing.
+
+``asyncio.to_thread`` keeps parsing inside the server process, so hundreds of
+concurrent warmup parses contend on the GIL and stall the event loop, and
+``wait_for`` timeouts leave the runaway thread running. This backend runs the
+parsers in a small set of dedicated worker processes instead:
+
+- worker count is bounded (``HOTNEWS_RSS_PARSE_WORKERS``)
+- a task that exceeds its timeout gets its worker process terminated and
+  replaced, so runaway parses really stop
+- results come back as compact tuples and are expanded in the parent
+
+Enable with ``HOTNEWS_RSS_PARSE_BACKEND=process`` (default ``thread``).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from hotnews.web.feed_parser import parse_feed_bytes, parse_html_content
+
+
+logger = logging.getLogger(__name__)
+
+
+def rss_parse_backend() -> str:
+    try:
+        v = (os.environ.get("HOTNEWS_RSS_PARSE_BACKEND", "") or "").strip().lower()
+    except Exception:
+        v = ""
+    return "process" if v == "process" else "thread"
+
+
+def _rss_parse_workers() -> int:
+    try:
+        v = int((os.environ.get("HOTNEWS_RSS_PARSE_WORKERS", "") or "").strip() or "0")
+    except Exception:
+        v = 0
+    if v <= 0:
+        v = min(4, os.cpu_count() or 1)
+    return int(max(1, min(32, v)))
+
+
+def rss_parse_timeout_s() -> float:
+    try:
+        v = float((os.environ.get("HOTNEWS_RSS_PARSE_TIMEOUT_S", "") or "").strip() or "20")
+    except Exception:
+        v = 20.0
+    if not (v > 0):
+        v = 20.0
+    return float(max(1.0, min(120.0, v)))
+
+
+def _compact(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Shrink a parse result to tuples before it crosses the process boundary."""
+    if "entries" not in result:
+        return ("raw", result)
+    feed = result.get("feed") or {}
+    entries = tuple(
+        (e.get("title"), e.get("link"), e.get("published"))
+        for e in (result.get("entries") or [])
+    )
+    return ("feed", result.get("format"), feed.get("title", ""), feed.get("language"), entries)
+
+
+def _expand(compact: Tuple[Any, ...]) -> Dict[str, Any]:
+    if compact[0] == "raw":
+        return compact[1]
+    _, fmt, title, language, entries = compact
+    feed: Dict[str, Any] = {"title": title}
+    if language is not None:
+        feed["language"] = language
+    return {
+        "format": fmt,
+        "feed": feed,
+        "entries": [{"title": t, "link": l, "published": p} for t, l, p in entries],
+    }
+
+
+def _worker_main(conn) -> None:
+    """Worker loop: receive (kind, args) tasks, reply with (ok, compact_result | error)."""
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        kind, args = msg
+        try:
+            if kind == "feed":
+                content_type, body, max_entries, truncated = args
+                result = parse_feed_bytes(content_type, body, max_entries=max_entries, truncated=truncated)
+            elif kind == "html":
+                body, rules = args
+                result = parse_html_content(body, rules)
+            else:
+                raise ValueError(f"Unknown parse task: {kind}")
+            reply = (True, _compact(result))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            return
+
+
+def _roundtrip(conn, msg: Tuple[str, Tuple[Any, ...]]) -> Tuple[bool, Any]:
+    # Runs in a helper thread: the pipe send/recv (and the body copy) stay off the event loop.
+    conn.send(msg)
+    return conn.recv()
+
+
+class _Worker:
+    def __init__(self, ctx):
+        parent_conn, child_conn = ctx.Pipe(duplex=True)
+        self.conn = parent_conn
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True, name="hotnews-parse-worker")
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def kill(self) -> None:
+        try:
+            self.process.terminate()
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(timeout=2)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        try:
+            self.process.join(timeout=2)
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+
+
+class FeedParsePool:
+    """Bounded pool of parse worker processes with kill-on-timeout."""
+
+    def __init__(self, workers: int):
+        self.size = max(1, int(workers))
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._restarts: Set[asyncio.Task] = set()
+        self.stats = {"tasks": 0, "errors": 0, "timeouts": 0, "restarts": 0, "parse_s": 0.0}
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                w = _Worker(self._ctx)
+                self._workers.append(w)
+                self._idle.put_nowait(w)
+        return self._idle
+
+    async def _replace(self, worker: _Worker) -> _Worker:
+        # kill() joins the process and spawning starts a new interpreter: both block, keep them off the loop
+        await asyncio.to_thread(worker.kill)
+        fresh = await asyncio.to_thread(_Worker, self._ctx)
+        with self._lock:
+            try:
+                self._workers.remove(worker)
+            except ValueError:
+                pass
+            self._workers.append(fresh)
+        self.stats["restarts"] += 1
+        return fresh
+
+    async def _restart_into(self, worker: _Worker, idle: asyncio.Queue) -> None:
+        fresh = await self._replace(worker)
+        if self._closed:
+            await asyncio.to_thread(fresh.stop)
+        else:
+            idle.put_nowait(fresh)
+
+    async def run(self, kind: str, args: Tuple[Any, ...], timeout: float) -> Dict[str, Any]:
+        if self._closed:
+            raise RuntimeError("parse pool is closed")
+        idle = self._ensure_started()
+        worker: _Worker = await idle.get()
+        loop = asyncio.get_running_loop()
+        started = time.time()
+        # Only a worker whose pipe is quiet (roundtrip finished, or freshly spawned) goes back to idle
+        reusable = False
+        try:
+            ok, payload = await asyncio.wait_for(
+                loop.run_in_executor(None, _roundtrip, worker.conn, (kind, args)),
+                timeout=timeout,
+            )
+            reusable = True
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.warning("RSS parse task timed out after %.1fs, restarting worker", timeout)
+            worker = await self._replace(worker)
+            reusable = True
+            raise ValueError("Feed parsing timeout")
+        except (EOFError, OSError) as e:
+            self.stats["errors"] += 1
+            worker = await self._replace(worker)
+            reusable = True
+            raise ValueError(f"Parse worker died: {e}")
+        finally:
+            self.stats["parse_s"] += time.time() - started
+            if not reusable:
+                # Cancelled (or failed) mid-roundtrip: the executor thread is still reading this
+                # worker's pipe, so the worker must die; its replacement is spawned in the background.
+                task = asyncio.ensure_future(self._restart_into(worker, idle))
+                self._restarts.add(task)
+                task.add_done_callback(self._restarts.discard)
+            elif self._closed:
+                worker.stop()
+            else:
+                idle.put_nowait(worker)
+
+        self.stats["tasks"] += 1
+        worker.tasks += 1
+        if not ok:
+            self.stats["errors"] += 1
+            raise ValueError(payload)
+        return _expand(payload)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for w in workers:
+            w.stop()
+
+
+_pool: Optional[FeedParsePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> FeedParsePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = FeedParsePool(_rss_parse_workers())
+        return _pool
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None:
+        pool.close()
+
+
+def get_parse_pool_stats() -> Dict[str, Any]:
+    pool = _pool
+    if pool is None:
+        return {"backend": rss_parse_backend(), "workers": 0}
+    return {"backend": rss_parse_backend(), "workers": pool.size, **pool.stats}
+
+
+async def parse_feed_async(
+    content_type: str, body: bytes, max_entries: Optional[int] = None, truncated: bool = False
+) -> Dict[str, Any]:
+    """Parse a feed off the event loop using the configured backend.
+
+    ``truncated`` marks a body cut off by the byte cap (entries before the cut are kept).
+    """
+    timeout = rss_parse_timeout_s()
+    if rss_parse_backend() == "process":
+        return await get_parse_pool().run("feed", (content_type, body, max_entries, truncated), timeout)
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(parse_feed_bytes, content_type, body, max_entries, 64 * 1024, truncated),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        raise ValueError("Feed parsing timeout")
+
+
+async def parse_html_async(body: bytes, rules: str) -> Dict[str, Any]:
+    """Run the CSS-selector HTML scraper off the event loop using the configured backend."""
+    timeout = rss_parse_timeout_s()
+    if rss_parse_backend() == "process":
+        return await get_parse_pool().run("html", (body, rules), timeout)
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(parse_html_content, body, rules), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise ValueError("HTML parsing timeout")
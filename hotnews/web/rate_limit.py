@@ -2,11 +2,37 @@
 速率限制模块
 
 提供基于 IP/API Key 的请求频率限制功能。
+
+算法为 GCRA（通用信元速率算法，等价于漏桶）：每个客户端只保存一个浮点数
+TAT（理论到达时间），判断与更新都是 O(1)，允许在窗口内突发 limit 个请求。
+
+- 本地存储：按 key 哈希分片（锁分段），每片一个 LRU；TAT 早于当前时间的
+  条目与“不存在”等价，可随时淘汰，因此按容量淘汰最久未访问的客户端，
+  并定期清理已恢复满额的条目，内存有上限
+- 共享存储（可选）：HOTNEWS_RATE_LIMIT_BACKEND=sqlite 时同机多个 worker
+  共用一个 SQLite（WAL）文件，单条 UPSERT ... RETURNING 原子完成判断与更新，
+  限额对整台机器生效而不是每个 worker 各算一份；写事务在线程池中执行，
+  不阻塞事件循环，锁等待超过 HOTNEWS_RATE_LIMIT_BUSY_MS 时直接放行
+- 中间件：RateLimitMiddleware 为纯 ASGI 中间件，按路径前缀匹配各自的限额
+
+环境变量：
+- HOTNEWS_RATE_LIMIT=1 启用中间件（默认关闭）
+- HOTNEWS_RATE_LIMIT_RULES 路由限额，如 "/api/news/click=60/60,/api/=100/60"
+  （前缀=请求数/窗口秒数，最长前缀优先）
+- HOTNEWS_RATE_LIMIT_MAX_CLIENTS 本地最多跟踪的客户端数（默认 100000）
+- HOTNEWS_RATE_LIMIT_BACKEND=local|sqlite，HOTNEWS_RATE_LIMIT_DB 共享库路径
+- HOTNEWS_RATE_LIMIT_BUSY_MS 共享库锁等待上限（默认 50 毫秒）
 """
 
-from collections import deque
+from collections import OrderedDict
 from threading import Lock
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
 import time
 
 from fastapi import Request
@@ -16,32 +42,290 @@ from fastapi.responses import JSONResponse
 RATE_LIMIT_REQUESTS = 100  # 每窗口最大请求数
 RATE_LIMIT_WINDOW = 60  # 窗口大小（秒）
 
-# 存储: {client_id: [timestamp1, timestamp2, ...]}
-_rate_limit_storage: Dict[str, deque] = {}
+_DEFAULT_SKIP_PATHS = {"/", "/health", "/healthz", "/static"}
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+def rate_limit_enabled() -> bool:
+    v = (os.environ.get("HOTNEWS_RATE_LIMIT", "") or "").strip().lower()
+    return v in {"1", "true", "yes", "on"}
+
+
+class RateLimitRule:
+    """一条限额规则：路径前缀 + 窗口内最大请求数"""
+
+    __slots__ = ("name", "prefix", "limit", "window", "interval")
+
+    def __init__(self, prefix: str, limit: int, window: float):
+        self.prefix = prefix
+        self.limit = max(1, int(limit))
+        self.window = max(0.001, float(window))
+        self.interval = self.window / self.limit  # 每个请求“消耗”的时间
+        self.name = f"{prefix}:{self.limit}/{self.window:g}"
+
+
+def parse_rate_limit_rules(spec: str) -> List[RateLimitRule]:
+    """
+    解析 "前缀=请求数/窗口秒数" 列表（逗号或分号分隔），非法项忽略
+
+    Returns:
+        按前缀长度降序排列的规则（最长前缀优先匹配）
+    """
+    rules = []
+    for part in (spec or "").replace(";", ",").split(","):
+        part = part.strip()
+        if not part or "=" not in part:
+            continue
+        prefix, _, rate = part.partition("=")
+        try:
+            limit, _, window = rate.partition("/")
+            rules.append(RateLimitRule(prefix.strip(), int(limit), float(window or RATE_LIMIT_WINDOW)))
+        except ValueError:
+            continue
+    rules.sort(key=lambda r: len(r.prefix), reverse=True)
+    return rules
+
+
+def _default_rules() -> List[RateLimitRule]:
+    spec = (os.environ.get("HOTNEWS_RATE_LIMIT_RULES", "") or "").strip()
+    rules = parse_rate_limit_rules(spec) if spec else []
+    return rules or [RateLimitRule("/api/", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)]
+
+
+def _gcra(tat: Optional[float], now: float, rule: RateLimitRule) -> Tuple[bool, float, int, float]:
+    """
+    GCRA 单步判断
+
+    Returns:
+        (是否被限制, 新的 TAT, 剩余可用请求数, 需等待秒数)
+    """
+    base = now if tat is None or tat < now else tat
+    new_tat = base + rule.interval
+    allow_at = new_tat - rule.window
+    if allow_at > now:
+        return True, base, 0, allow_at - now
+    remaining = int((rule.window - (new_tat - now)) / rule.interval + 1e-9)
+    return False, new_tat, max(0, remaining), 0.0
+
+
+class LocalRateLimitStore:
+    """进程内存储：分片 LRU，每片一把锁"""
+
+    def __init__(self, max_clients: Optional[int] = None, stripes: Optional[int] = None):
+        self.max_clients = int(max_clients or _env_int("HOTNEWS_RATE_LIMIT_MAX_CLIENTS", 100000, 100, 10000000))
+        self.stripes = int(stripes or _env_int("HOTNEWS_RATE_LIMIT_STRIPES", 16, 1, 256))
+        self._per_shard = max(1, self.max_clients // self.stripes)
+        self._shards: List["OrderedDict[str, float]"] = [OrderedDict() for _ in range(self.stripes)]
+        self._locks = [Lock() for _ in range(self.stripes)]
+        self.evictions = 0
+
+    def acquire(self, key: str, rule: RateLimitRule, now: float) -> Tuple[bool, int, float]:
+        i = hash(key) % self.stripes
+        shard = self._shards[i]
+        with self._locks[i]:
+            limited, tat, remaining, retry = _gcra(shard.get(key), now, rule)
+            if not limited:
+                shard[key] = tat
+            if key in shard:
+                shard.move_to_end(key)
+            while len(shard) > self._per_shard:
+                shard.popitem(last=False)
+                self.evictions += 1
+        return limited, remaining, retry
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """清理已恢复满额（TAT 不晚于当前时间）的客户端"""
+        now = time.time() if now is None else now
+        removed = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                stale = [k for k, tat in shard.items() if tat <= now]
+                for k in stale:
+                    del shard[k]
+                removed += len(stale)
+        return removed
+
+    def clear(self) -> None:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "local",
+            "clients": len(self),
+            "max_clients": self.max_clients,
+            "stripes": self.stripes,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteRateLimitStore:
+    """同机多进程共享存储（SQLite WAL）"""
+
+    def __init__(self, path: str, busy_ms: Optional[int] = None):
+        self.path = str(path)
+        # 限流判断在请求路径上，宁可放行也不长时间等锁
+        self.busy_ms = int(busy_ms or _env_int("HOTNEWS_RATE_LIMIT_BUSY_MS", 50, 1, 1000))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._sweep_lock = Lock()
+        self._last_sweep = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_ms / 1000.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 限流状态丢失只会让客户端多得到一次满额，不需要落盘保证
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_ms}")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, rule: RateLimitRule, now: float) -> Tuple[bool, int, float]:
+        conn = self._conn()
+        # 插入或在未超限时推进 TAT；超限时 WHERE 不成立、不返回行
+        row = conn.execute(
+            """
+            INSERT INTO rate_limits(key, tat) VALUES(?1, ?2 + ?3)
+            ON CONFLICT(key) DO UPDATE SET tat = MAX(tat, ?2) + ?3
+            WHERE MAX(tat, ?2) + ?3 - ?4 <= ?2
+            RETURNING tat
+            """,
+            (key, now, rule.interval, rule.window),
+        ).fetchone()
+        if now - self._last_sweep > 60.0:
+            self._maybe_sweep(now)
+        if row is not None:
+            remaining = int((rule.window - (float(row[0]) - now)) / rule.interval + 1e-9)
+            return False, max(0, remaining), 0.0
+        cur = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        tat = float(cur[0]) if cur else now
+        return True, 0, max(0.0, tat + rule.interval - rule.window - now)
+
+    def _maybe_sweep(self, now: float) -> None:
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self._conn().execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+        except Exception:
+            pass
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return self._conn().execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM rate_limits")
+
+    def __len__(self) -> int:
+        return int(self._conn().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path, "clients": len(self)}
+
+
+class RateLimiter:
+    """GCRA 限流器，存储可替换"""
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else LocalRateLimitStore()
+        self.allowed = 0
+        self.limited = 0
+        self._last_sweep = time.time()
+
+    def hit(self, client_id: str, rule: RateLimitRule, now: Optional[float] = None) -> Tuple[bool, int, float]:
+        """
+        记录一次请求
+
+        Returns:
+            (是否被限制, 剩余可用请求数, 需等待秒数)
+        """
+        now = time.time() if now is None else now
+        limited, remaining, retry = self.store.acquire(f"{rule.name}|{client_id}", rule, now)
+        if limited:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        if isinstance(self.store, LocalRateLimitStore) and now - self._last_sweep > 60.0:
+            self._last_sweep = now
+            self.store.sweep(now)
+        return limited, remaining, retry
+
+    def stats(self) -> Dict[str, Any]:
+        out = dict(self.store.stats())
+        out.update({"allowed": self.allowed, "limited": self.limited})
+        return out
+
+
+def _create_store():
+    backend = (os.environ.get("HOTNEWS_RATE_LIMIT_BACKEND", "") or "").strip().lower()
+    if backend == "sqlite":
+        path = (os.environ.get("HOTNEWS_RATE_LIMIT_DB", "") or "").strip() or "output/cache/rate_limit.db"
+        try:
+            store = SQLiteRateLimitStore(path)
+            print(f"[限流] 使用共享存储: {path}")
+            return store
+        except Exception as e:
+            print(f"[限流] 共享存储初始化失败，退回进程内存储: {e}")
+    return LocalRateLimitStore()
+
+
+_rate_limiter: Optional[RateLimiter] = None
 _rate_limit_lock = Lock()
+_default_rule = RateLimitRule("*", RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
 
 
-def _get_client_identifier(request: Request) -> str:
-    """获取客户端唯一标识符（IP或API Key）"""
-    # 优先使用 X-Forwarded-For（如果配置了代理）
-    forwarded = request.headers.get("X-Forwarded-For", "").strip()
-    if forwarded:
-        # 取第一个IP（原始客户端IP）
-        client_ip = forwarded.split(",")[0].strip()
-    else:
-        client_ip = request.client.host if request.client else "unknown"
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limit_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(_create_store())
+    return _rate_limiter
+
 
+def _client_identifier(headers: Dict[str, str], client_host: Optional[str]) -> str:
     # 如果有API Key，使用API Key
-    api_key = request.headers.get("X-API-Key", "").strip()
+    api_key = (headers.get("x-api-key") or "").strip()
     if api_key:
         return f"apikey:{api_key[:16]}"  # 只取前16字符用于标识
 
+    # 优先使用 X-Forwarded-For（如果配置了代理），取第一个IP（原始客户端IP）
+    forwarded = (headers.get("x-forwarded-for") or "").strip()
+    client_ip = forwarded.split(",")[0].strip() if forwarded else (client_host or "unknown")
     return f"ip:{client_ip}"
 
 
+def _get_client_identifier(request: Request) -> str:
+    """获取客户端唯一标识符（IP或API Key）"""
+    return _client_identifier(request.headers, request.client.host if request.client else None)
+
+
 def is_rate_limited(client_id: str) -> Tuple[bool, int]:
     """
-    检查是否超过速率限制
+    检查是否超过速率限制（默认限额 RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW）
 
     Args:
         client_id: 客户端标识符
@@ -49,28 +333,16 @@ def is_rate_limited(client_id: str) -> Tuple[bool, int]:
     Returns:
         (是否被限制, 剩余可用请求数)
     """
-    now = time.time()
-    window_start = now - RATE_LIMIT_WINDOW
-
-    with _rate_limit_lock:
-        # 获取或创建该客户端的时间戳队列
-        if client_id not in _rate_limit_storage:
-            _rate_limit_storage[client_id] = deque(maxlen=RATE_LIMIT_REQUESTS + 10)
-
-        timestamps = _rate_limit_storage[client_id]
+    limited, remaining, _ = get_rate_limiter().hit(client_id, _default_rule)
+    return limited, remaining
 
-        # 清理过期的 timestamp
-        while timestamps and timestamps[0] < window_start:
-            timestamps.popleft()
 
-        # 检查是否超过限制
-        remaining = RATE_LIMIT_REQUESTS - len(timestamps)
-        if len(timestamps) >= RATE_LIMIT_REQUESTS:
-            return True, remaining
-
-        # 记录当前请求
-        timestamps.append(now)
-        return False, remaining
+def _limited_body(retry_after: int) -> Dict[str, Any]:
+    return {
+        "error": "Rate limit exceeded",
+        "message": f"请求过于频繁，请等待 {retry_after} 秒后重试",
+        "retry_after": retry_after,
+    }
 
 
 def check_rate_limit(request: Request, skip_paths: Optional[set] = None) -> Tuple[bool, JSONResponse]:
@@ -85,7 +357,7 @@ def check_rate_limit(request: Request, skip_paths: Optional[set] = None) -> Tupl
         (是否被限制, 响应对象)
     """
     if skip_paths is None:
-        skip_paths = {"/", "/health", "/healthz", "/static"}
+        skip_paths = _DEFAULT_SKIP_PATHS
 
     path = request.url.path
 
@@ -97,18 +369,12 @@ def check_rate_limit(request: Request, skip_paths: Optional[set] = None) -> Tupl
         return False, None
 
     client_id = _get_client_identifier(request)
-    is_limited, remaining = is_rate_limited(client_id)
-
-    if is_limited:
-        response = JSONResponse(
-            content={
-                "error": "Rate limit exceeded",
-                "message": f"请求过于频繁，请等待 {RATE_LIMIT_WINDOW} 秒后重试",
-                "retry_after": RATE_LIMIT_WINDOW,
-            },
-            status_code=429,
-        )
-        response.headers["Retry-After"] = str(RATE_LIMIT_WINDOW)
+    limited, _, retry = get_rate_limiter().hit(client_id, _default_rule)
+
+    if limited:
+        retry_after = max(1, int(math.ceil(retry)))
+        response = JSONResponse(content=_limited_body(retry_after), status_code=429)
+        response.headers["Retry-After"] = str(retry_after)
         response.headers["X-RateLimit-Limit"] = str(RATE_LIMIT_REQUESTS)
         response.headers["X-RateLimit-Remaining"] = "0"
         return True, response
@@ -122,21 +388,98 @@ def add_rate_limit_headers(response, remaining: int) -> None:
     response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
 
 
+class RateLimitMiddleware:
+    """
+    按路由限流的 ASGI 中间件
+
+    只处理 http 请求；未匹配任何规则的路径直接放行。
+    放行的响应附带 X-RateLimit-Limit / X-RateLimit-Remaining，
+    超限返回 429 与 Retry-After。
+    """
+
+    def __init__(
+        self,
+        app,
+        rules: Optional[List[RateLimitRule]] = None,
+        limiter: Optional[RateLimiter] = None,
+        skip_paths: Optional[set] = None,
+    ):
+        self.app = app
+        self.rules = sorted(rules or _default_rules(), key=lambda r: len(r.prefix), reverse=True)
+        self.limiter = limiter
+        self.skip_paths = _DEFAULT_SKIP_PATHS if skip_paths is None else set(skip_paths)
+
+    def _match(self, path: str) -> Optional[RateLimitRule]:
+        if path in self.skip_paths or path.startswith("/static"):
+            return None
+        for rule in self.rules:
+            if path.startswith(rule.prefix):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = self._match(scope.get("path") or "")
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers") or []}
+        client = scope.get("client")
+        client_id = _client_identifier(headers, client[0] if client else None)
+        limiter = self.limiter or get_rate_limiter()
+        try:
+            if isinstance(limiter.store, SQLiteRateLimitStore):
+                # 共享库是同步写事务，放到线程池里执行，避免锁等待卡住事件循环
+                limited, remaining, retry = await asyncio.to_thread(limiter.hit, client_id, rule)
+            else:
+                limited, remaining, retry = limiter.hit(client_id, rule)
+        except Exception:
+            # 限流存储异常（包括等锁超时）时放行，不影响正常服务
+            await self.app(scope, receive, send)
+            return
+
+        limit_headers = [
+            (b"x-ratelimit-limit", str(rule.limit).encode("latin-1")),
+            (b"x-ratelimit-remaining", str(remaining).encode("latin-1")),
+        ]
+        if limited:
+            retry_after = max(1, int(math.ceil(retry)))
+            body = json.dumps(_limited_body(retry_after), ensure_ascii=False).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"retry-after", str(retry_after).encode("latin-1")),
+                ] + limit_headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers") or []) + limit_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
 def reset_rate_limit_storage() -> None:
     """清空速率限制存储（主要用于测试）"""
-    global _rate_limit_storage
-    with _rate_limit_lock:
-        _rate_limit_storage = {}
+    get_rate_limiter().store.clear()
 
 
 def get_rate_limit_stats() -> Dict:
     """获取速率限制统计信息"""
-    with _rate_limit_lock:
-        total_clients = len(_rate_limit_storage)
-        total_requests = sum(len(q) for q in _rate_limit_storage.values())
-        return {
-            "total_clients": total_clients,
-            "total_requests": total_requests,
-            "window_seconds": RATE_LIMIT_WINDOW,
-            "max_requests": RATE_LIMIT_REQUESTS,
-        }
+    stats = get_rate_limiter().stats()
+    stats.update({
+        "total_clients": stats.get("clients", 0),
+        "window_seconds": RATE_LIMIT_WINDOW,
+        "max_requests": RATE_LIMIT_REQUESTS,
+    })
+    return stats
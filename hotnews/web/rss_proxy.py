@@ -1,23 +1,31 @@
 import asyncio
-import json
 import os
 import socket
+import threading
 import time
 import ipaddress
 import logging
-from collections import deque
-from threading import Lock, Semaphore
 from typing import Any, Dict, List, Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
 import aiohttp
-from aiohttp_socks import ProxyConnector
 from fastapi import APIRouter, Body, Query, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse
 
 from mcp_server.services.cache_service import get_cache
+from hotnews.web.feed_parser import FeedBodyReader, parse_feed_bytes, parse_html_content
+from hotnews.web.parse_pool import parse_feed_async, parse_html_async, rss_parse_backend
 from hotnews.web.db_online import get_online_db_conn
+from hotnews.web.json_response import UnicodeJSONResponse
+from hotnews.web.host_scheduler import HostPermit, get_host_scheduler
+from hotnews.web.http_sessions import (
+    direct_route,
+    get_route_session,
+    http_proxy_route,
+    scraperapi_route,
+    socks_route,
+)
 from hotnews.web.user_db import get_user_db_conn, list_rss_subscriptions, resolve_user_id_by_cookie_token
 
 
@@ -107,11 +115,106 @@ def _rss_http_max_bytes() -> int:
     return int(max(256 * 1024, min(64 * 1024 * 1024, v)))
 
 
+def _rss_http_read_deadline_s() -> float:
+    """Total time allowed for reading one upstream body (HOTNEWS_RSS_HTTP_READ_DEADLINE_S)."""
+    try:
+        v = float((os.environ.get("HOTNEWS_RSS_HTTP_READ_DEADLINE_S", "") or "").strip() or "30")
+    except Exception:
+        v = 30.0
+    if not (v > 0):
+        v = 30.0
+    return float(max(1.0, min(120.0, v)))
+
+
+_RSS_READ_CHUNK = 64 * 1024
+
+
+def _new_body_reader(content_type: str, content_encoding: str = "", keep_html: bool = False, buffer_feed: bool = False, max_entries: Optional[int] = None) -> FeedBodyReader:
+    return FeedBodyReader(
+        content_type,
+        content_encoding=content_encoding,
+        max_bytes=_rss_http_max_bytes(),
+        max_entries=max_entries,
+        deadline_s=_rss_http_read_deadline_s(),
+        keep_html=keep_html,
+        buffer_feed=buffer_feed,
+    )
+
+
+def _read_body_sync(resp: requests.Response, reader: FeedBodyReader) -> FeedBodyReader:
+    """Stream a requests body into ``reader`` without letting urllib3 buffer or decode it."""
+    raw = resp.raw
+    read1 = getattr(raw, "read1", None)
+    while True:
+        rem = reader.remaining_s()
+        if rem is not None and rem <= 0:
+            reader.expire()
+            break
+        # read1 returns whatever the socket has (urllib3 2.x), so a slow upstream
+        # still gets its deadline checked between small reads.
+        if read1 is not None:
+            chunk = read1(_RSS_READ_CHUNK, decode_content=False)
+        else:
+            chunk = raw.read(_RSS_READ_CHUNK, decode_content=False)
+        if not chunk:
+            break
+        if reader.push(chunk):
+            break
+    reader.finish()
+    return reader
+
+
+async def _read_body_async(resp: aiohttp.ClientResponse, reader: FeedBodyReader, offload: bool = False) -> FeedBodyReader:
+    """Stream an aiohttp body (already de-compressed by aiohttp) into ``reader``.
+
+    With ``offload`` each chunk is parsed in a worker thread so a large feed does
+    not hold the event loop.
+    """
+    while True:
+        rem = reader.remaining_s()
+        if rem is not None and rem <= 0:
+            reader.expire()
+            break
+        try:
+            chunk = await asyncio.wait_for(resp.content.readany(), timeout=rem)
+        except asyncio.TimeoutError:
+            reader.expire()
+            break
+        if not chunk:
+            break
+        stop = await asyncio.to_thread(reader.push, chunk) if offload else reader.push(chunk)
+        if stop:
+            break
+    if offload:
+        await asyncio.to_thread(reader.finish)
+    else:
+        reader.finish()
+    return reader
+
+
+def _html_not_feed_error(reader: FeedBodyReader) -> ValueError:
+    snippet = reader.head[:240].decode("utf-8", errors="replace")
+    return ValueError(f"Upstream returned HTML, not a feed: {snippet[:240]}")
+
+
+def _rss_parse_max_entries() -> int:
+    """Max entries kept per feed on the proxy / preview / warmup paths (HOTNEWS_RSS_MAX_ENTRIES)."""
+    try:
+        v = int((os.environ.get("HOTNEWS_RSS_MAX_ENTRIES", "") or "").strip() or "100")
+    except Exception:
+        v = 100
+    if v <= 0:
+        v = 100
+    return int(max(1, min(5000, v)))
+
+
 def _rss_default_headers() -> Dict[str, str]:
     return {
         "User-Agent": _rss_user_agent(),
         "Accept": "application/atom+xml, application/rss+xml, application/xml, text/xml, application/json, */*",
         "Accept-Language": _rss_accept_language(),
+        # Bodies are decoded incrementally by FeedBodyReader, which handles these two.
+        "Accept-Encoding": "gzip, deflate",
     }
 
 
@@ -126,19 +229,6 @@ def _rss_http_proxies() -> Optional[Dict[str, str]]:
     return {"http": proxy, "https": proxy}
 
 
-class UnicodeJSONResponse(Response):
-    media_type = "application/json"
-
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
-
-
 def _md5_hex(s: str) -> str:
     import hashlib
 
@@ -156,7 +246,8 @@ def is_blocked_ip(ip: Any) -> bool:
     )
 
 
-def resolve_and_validate_host(host: str) -> None:
+def _check_host_literal(host: str) -> Optional[str]:
+    """Normalized host name to resolve, or None if ``host`` is an (allowed) IP literal."""
     host = (host or "").strip().lower()
     if not host:
         raise ValueError("Empty host")
@@ -171,9 +262,24 @@ def resolve_and_validate_host(host: str) -> None:
     if ip is not None:
         if is_blocked_ip(ip):
             raise ValueError("Blocked IP")
-        return
+        return None
+    return host
+
 
-    infos = socket.getaddrinfo(host, None)
+def resolve_and_validate_host(host: str) -> None:
+    name = _check_host_literal(host)
+    if name is not None:
+        _check_resolved_infos(socket.getaddrinfo(name, None))
+
+
+async def resolve_and_validate_host_async(host: str) -> None:
+    """Same checks as ``resolve_and_validate_host``; the DNS lookup does not block the event loop."""
+    name = _check_host_literal(host)
+    if name is not None:
+        _check_resolved_infos(await asyncio.get_running_loop().getaddrinfo(name, None))
+
+
+def _check_resolved_infos(infos: List[Any]) -> None:
     if not infos:
         raise ValueError("Host resolve failed")
     for info in infos:
@@ -189,7 +295,7 @@ def resolve_and_validate_host(host: str) -> None:
             raise ValueError("Blocked resolved IP")
 
 
-def validate_http_url(raw_url: str, check_resolve: bool = True) -> str:
+def _check_http_url(raw_url: str) -> str:
     u = (raw_url or "").strip()
     if not u:
         raise ValueError("Missing url")
@@ -200,506 +306,112 @@ def validate_http_url(raw_url: str, check_resolve: bool = True) -> str:
         raise ValueError("Invalid url")
     if parsed.username or parsed.password:
         raise ValueError("Invalid url")
-    if check_resolve:
-        resolve_and_validate_host(parsed.hostname or "")
     return u
 
 
-def _strip_xml_tag(tag: str) -> str:
-    if not tag:
-        return ""
-    if "}" in tag:
-        return tag.split("}", 1)[1]
-    return tag
-
-
-def parse_feed_content(content_type: str, body: bytes) -> Dict[str, Any]:
-    ct = (content_type or "").lower()
-    text = body.decode("utf-8", errors="replace")
-    if "json" in ct:
-        payload = json.loads(text)
-        if isinstance(payload, dict) and isinstance(payload.get("items"), list):
-            feed_title = str(payload.get("title") or "")
-            feed_lang = str(payload.get("language") or "")
-            entries = []
-            for it in payload.get("items") or []:
-                if not isinstance(it, dict):
-                    continue
-                url = it.get("url") or it.get("external_url")
-                title = it.get("title") or url
-                published = it.get("date_published") or it.get("date_modified")
-                entries.append({"title": title, "link": url, "published": published})
-            return {"format": "json", "feed": {"title": feed_title, "language": feed_lang}, "entries": entries}
-        return {"format": "json", "payload": payload}
-
-    import xml.etree.ElementTree as ET
-
-    root = ET.fromstring(body)
-    root_tag = _strip_xml_tag(root.tag).lower()
-
-    if root_tag == "rss":
-        channel = None
-        for child in root:
-            if _strip_xml_tag(child.tag).lower() == "channel":
-                channel = child
-                break
-        if channel is None:
-            return {"format": "xml", "feed": {"title": ""}, "entries": []}
-
-        feed_title = ""
-        feed_lang = ""
-        for child in channel:
-            if _strip_xml_tag(child.tag).lower() == "title":
-                feed_title = (child.text or "").strip()
-                break
-        for child in channel:
-            if _strip_xml_tag(child.tag).lower() in {"language", "dc:language"}:
-                feed_lang = (child.text or "").strip()
-                if feed_lang:
-                    break
-
-        entries = []
-        for item in channel:
-            if _strip_xml_tag(item.tag).lower() != "item":
-                continue
-            title = ""
-            link = ""
-            pub = ""
-            for c in item:
-                t = _strip_xml_tag(c.tag).lower()
-                if t == "title":
-                    title = (c.text or "").strip()
-                elif t == "link":
-                    link = (c.text or "").strip() or (c.attrib.get("href") or "").strip()
-                elif t in {"pubdate", "published", "updated", "date"}:
-                    pub = (c.text or "").strip()
-            if not title:
-                title = link
-            entries.append({"title": title, "link": link, "published": pub})
-        return {"format": "rss", "feed": {"title": feed_title, "language": feed_lang}, "entries": entries}
-
-    if root_tag == "feed":
-        feed_title = ""
-        feed_lang = ""
-        try:
-            feed_lang = (root.attrib.get("{http://www.w3.org/XML/1998/namespace}lang") or root.attrib.get("lang") or "").strip()
-        except Exception:
-            feed_lang = ""
-        for child in root:
-            if _strip_xml_tag(child.tag).lower() == "title":
-                feed_title = (child.text or "").strip()
-                break
-        for child in root:
-            if _strip_xml_tag(child.tag).lower() == "language":
-                v = (child.text or "").strip()
-                if v:
-                    feed_lang = v
-                    break
-
-        entries = []
-        for ent in root:
-            if _strip_xml_tag(ent.tag).lower() != "entry":
-                continue
-            title = ""
-            link = ""
-            pub = ""
-            for c in ent:
-                t = _strip_xml_tag(c.tag).lower()
-                if t == "title":
-                    title = (c.text or "").strip()
-                elif t == "link":
-                    rel = (c.attrib.get("rel") or "").strip().lower()
-                    href = (c.attrib.get("href") or "").strip()
-                    if href and (not link) and (not rel or rel == "alternate"):
-                        link = href
-                elif t in {"published", "updated"}:
-                    pub = (c.text or "").strip()
-            if not title:
-                title = link
-            entries.append({"title": title, "link": link, "published": pub})
-        return {"format": "atom", "feed": {"title": feed_title, "language": feed_lang}, "entries": entries}
-
-    return {"format": "xml", "feed": {"title": ""}, "entries": []}
-
-
-def parse_html_content(body: bytes, rules: str) -> Dict[str, Any]:
-    """Parse HTML content using CSS selectors defined in rules JSON."""
-    try:
-        from bs4 import BeautifulSoup
-    except ImportError:
-        raise ValueError("bs4 not installed")
-
-    rule_dict = {}
-    try:
-        rule_dict = json.loads(rules)
-    except Exception:
-        pass
-    
-    if not isinstance(rule_dict, dict):
-        raise ValueError("Invalid scrape_rules json")
-
-    item_sel = rule_dict.get("item")
-    title_sel = rule_dict.get("title")
-    link_sel = rule_dict.get("link")
-    date_sel = rule_dict.get("date")  # Optional
+def validate_http_url(raw_url: str, check_resolve: bool = True) -> str:
+    u = _check_http_url(raw_url)
+    if check_resolve:
+        resolve_and_validate_host(urlparse(u).hostname or "")
+    return u
 
-    if not item_sel or not title_sel or not link_sel:
-        raise ValueError("Missing required selectors: item, title, link")
 
-    text = body.decode("utf-8", errors="replace")
-    soup = BeautifulSoup(text, "html.parser")
-    
-    entries = []
-    items = soup.select(item_sel)
-    for it in items:
-        try:
-            # Title
-            t_el = it.select_one(title_sel)
-            if not t_el:
-                continue
-            title = t_el.get_text(strip=True)
-            
-            # Link
-            l_el = it.select_one(link_sel)
-            if not l_el:
-                continue
-            link = l_el.get("href")
-            if not link:
-                continue
-            
-            # Date (Optional)
-            pub = ""
-            if date_sel:
-                d_el = it.select_one(date_sel)
-                if d_el:
-                    pub = d_el.get_text(strip=True) or d_el.get("datetime") or ""
-
-            entries.append({"title": title, "link": link, "published": pub})
-        except Exception:
-            continue
-
-    return {
-        "format": "html",
-        "feed": {"title": "Scraped Feed", "language": ""},
-        "entries": entries
-    }
+async def validate_http_url_async(raw_url: str, check_resolve: bool = True) -> str:
+    u = _check_http_url(raw_url)
+    if check_resolve:
+        await resolve_and_validate_host_async(urlparse(u).hostname or "")
+    return u
 
 
-def _extract_first_n_entries_from_truncated_xml(body: bytes, limit: int) -> Optional[bytes]:
-    """Best-effort: salvage a valid minimal RSS/Atom XML from a truncated upstream response.
+def parse_feed_content(content_type: str, body: bytes, max_entries: Optional[int] = None) -> Dict[str, Any]:
+    """Parse an RSS/Atom/JSON feed body; ``max_entries`` (default: all) caps the entries kept.
 
-    This is used only when upstream response exceeds our max_bytes cap.
-    It attempts to extract the first N <entry> (Atom) or <item> (RSS) blocks and
-    wrap them with a minimal closing tail to make it well-formed for XML parsing.
+    XML is parsed incrementally (see ``hotnews.web.feed_parser``) and, with a cap,
+    stops as soon as enough entries were read. Ingest callers keep every entry;
+    the proxy / preview / warmup paths pass ``_rss_parse_max_entries()``.
     """
+    return parse_feed_bytes(content_type, body, max_entries=max_entries)
 
-    if not body or limit <= 0:
-        return None
 
-    b = body
-    stripped = b.lstrip()
-    if not stripped.startswith(b"<"):
-        return None
+async def get_rss_async_session():
+    """Pooled session for direct (non-proxied) fetches."""
+    return await get_route_session(direct_route())
 
-    lower = stripped[:4096].lower()
-    is_atom = b"<feed" in lower
-    is_rss = b"<rss" in lower
 
-    if not (is_atom or is_rss):
-        return None
+# --- compatibility shims ----------------------------------------------------------
+# The per-host semaphores / sleep limiter were replaced by the host scheduler, but
+# code outside this tree (hotnews.kernel) still imports these names. They take
+# permits from the same scheduler and return them without rate feedback.
 
-    if is_atom:
-        open_tag = b"<entry"
-        close_tag = b"</entry>"
-        end_tail = b"</feed>"
-    else:
-        open_tag = b"<item"
-        close_tag = b"</item>"
-        end_tail = b"</channel></rss>"
 
-    start = stripped.find(open_tag)
-    if start < 0:
-        return None
+class _HostSlot:
+    """Semaphore-shaped view of one host's scheduler permits (sync and async)."""
 
-    prefix = stripped[:start]
-    items: List[bytes] = []
-    pos = start
-    for _ in range(int(limit)):
-        o = stripped.find(open_tag, pos)
-        if o < 0:
-            break
-        c = stripped.find(close_tag, o)
-        if c < 0:
-            break
-        c_end = c + len(close_tag)
-        items.append(stripped[o:c_end])
-        pos = c_end
+    def __init__(self, host: str):
+        self.host = host
+        self._permits: List[HostPermit] = []
+        self._lock = threading.Lock()
 
-    if not items:
-        return None
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        self._push(get_host_scheduler().acquire_sync(self.host))
+        return True
 
-    # Ensure we have a minimal tail to close the document.
-    # If the truncated body already contains the full tail, keep it.
-    tail_pos = stripped.rfind(end_tail)
-    if tail_pos >= 0:
-        tail = stripped[tail_pos:]
-    else:
-        tail = end_tail
+    def release(self) -> None:
+        with self._lock:
+            permit = self._permits.pop() if self._permits else None
+        get_host_scheduler().release(permit, adapt=False)
 
-    return prefix + b"".join(items) + tail
+    def _push(self, permit: HostPermit) -> None:
+        with self._lock:
+            self._permits.append(permit)
 
+    def __enter__(self) -> "_HostSlot":
+        self.acquire()
+        return self
 
-_rss_host_limit_lock = Lock()
-_rss_host_semaphores: Dict[str, Any] = {}
-_rss_host_recent: Dict[str, deque] = {}
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
 
 
-def get_rss_host_semaphore(host: str):
-    h = (host or "").strip().lower() or "_"
-    with _rss_host_limit_lock:
-        sem = _rss_host_semaphores.get(h)
-        if sem is None:
-            max_conc = 1
-            try:
-                max_conc = int(os.environ.get("HOTNEWS_RSS_HOST_CONCURRENCY", "1"))
-            except Exception:
-                max_conc = 1
-            sem = Semaphore(max_conc)
-            _rss_host_semaphores[h] = sem
-        return sem
+class _AsyncHostSlot(_HostSlot):
+    async def acquire(self) -> bool:  # type: ignore[override]
+        self._push(await get_host_scheduler().acquire(self.host))
+        return True
 
+    async def __aenter__(self) -> "_AsyncHostSlot":
+        await self.acquire()
+        return self
 
-# Async primitives must be initialized lazily per event loop
-_rss_host_async_lock = None
-_rss_host_async_semaphores: Dict[str, asyncio.Semaphore] = {}
-_rss_async_session = None
+    async def __aexit__(self, *exc: Any) -> None:
+        self.release()
 
 
-async def get_rss_async_session():
-    global _rss_async_session
-    if _rss_async_session is None or _rss_async_session.closed:
-        connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
-        _rss_async_session = aiohttp.ClientSession(connector=connector)
-    return _rss_async_session
+def get_rss_host_semaphore(host: str) -> _HostSlot:
+    """Deprecated: use ``get_host_scheduler().acquire_sync()``."""
+    return _HostSlot((host or "").strip().lower() or "_")
 
 
-async def get_rss_host_async_semaphore(host: str) -> asyncio.Semaphore:
-    global _rss_host_async_lock
-    if _rss_host_async_lock is None:
-        _rss_host_async_lock = asyncio.Lock()
-    
-    h = (host or "").strip().lower() or "_"
-    async with _rss_host_async_lock:
-        sem = _rss_host_async_semaphores.get(h)
-        if sem is None:
-            max_conc = 1
-            try:
-                max_conc = int(os.environ.get("HOTNEWS_RSS_HOST_CONCURRENCY", "1"))
-            except Exception:
-                pass
-            sem = asyncio.Semaphore(max_conc)
-            _rss_host_async_semaphores[h] = sem
-        return sem
+async def get_rss_host_async_semaphore(host: str) -> _AsyncHostSlot:
+    """Deprecated: use ``await get_host_scheduler().acquire()``."""
+    return _AsyncHostSlot((host or "").strip().lower() or "_")
 
 
 def rss_host_rate_limit_sleep(host: str) -> None:
-    h = (host or "").strip().lower() or "_"
-    max_per_10s = 5
-    try:
-        max_per_10s = int(os.environ.get("HOTNEWS_RSS_HOST_RATE_10S", "5"))
-    except Exception:
-        max_per_10s = 5
-
-    now = time.time()
-    with _rss_host_limit_lock:
-        dq = _rss_host_recent.get(h)
-        if dq is None:
-            dq = deque(maxlen=max_per_10s * 3)
-            _rss_host_recent[h] = dq
-        while dq and now - dq[0] > 10:
-            dq.popleft()
-        if len(dq) >= max_per_10s:
-            sleep_s = max(0.0, 10 - (now - dq[0]))
-        else:
-            sleep_s = 0.0
-        dq.append(now)
-    if sleep_s > 0:
-        time.sleep(min(2.0, sleep_s))
+    """Deprecated: waits for one token of the host's bucket."""
+    scheduler = get_host_scheduler()
+    scheduler.release(scheduler.acquire_sync(host), adapt=False)
 
 
 def rss_proxy_fetch_cached(url: str) -> Dict[str, Any]:
-    cache = get_cache()
-    key = f"rssproxy:{_md5_hex(url)}"
-    cached = cache.get(key, ttl=300)
+    """Deprecated sync cached fetch; request paths use ``rss_proxy_fetch_cached_async``.
+
+    Fresh cache hits are returned as is, misses go through the sync fetcher (same
+    cache key and host scheduler as the async path).
+    """
+    cached = get_cache().get(f"rssproxy:{_md5_hex(url)}", ttl=_RSS_PROXY_FRESH_TTL_S)
     if isinstance(cached, dict):
         return cached
-
-    parsed0 = urlparse(url)
-    host0 = (parsed0.hostname or "").strip().lower()
-
-    sem = get_rss_host_semaphore(host0)
-    sem.acquire()
-    try:
-        current_url = url
-        redirects = 0
-        attempts = 0
-        while True:
-            current_url = validate_http_url(current_url)
-            rss_host_rate_limit_sleep(host0)
-
-            headers = _rss_default_headers()
-
-            retry_after_s = None
-            resp = None
-            try:
-                timeout = _rss_http_timeouts()
-                resp = requests.get(
-                    current_url,
-                    headers=headers,
-                    timeout=timeout,
-                    allow_redirects=False,
-                    stream=True,
-                    proxies=_rss_http_proxies(),
-                )
-
-                if resp.status_code in {301, 302, 303, 307, 308}:
-                    loc = (resp.headers.get("Location") or "").strip()
-                    if not loc:
-                        raise ValueError("Redirect without location")
-                    redirects += 1
-                    if redirects > 5:
-                        raise ValueError("Too many redirects")
-                    current_url = urljoin(current_url, loc)
-                    continue
-
-                if resp.status_code == 429:
-                    logger.warning(
-                        "RSS upstream may be blocked or rate limited (status=429). 可能触发了反爬或访问频率限制. url=%s",
-                        current_url,
-                    )
-                    ra = (resp.headers.get("Retry-After") or "").strip()
-                    try:
-                        retry_after_s = int(ra)
-                    except Exception:
-                        retry_after_s = None
-                    raise ValueError("Upstream rate limited")
-
-                if resp.status_code == 403:
-                    logger.warning(
-                        "RSS upstream may be blocked or rate limited (status=403). 可能触发了反爬或访问频率限制. url=%s",
-                        current_url,
-                    )
-
-                if resp.status_code >= 500:
-                    if resp.status_code == 503:
-                        logger.warning(
-                            "RSS upstream may be blocked or rate limited (status=503). 可能触发了反爬或访问频率限制. url=%s",
-                            current_url,
-                        )
-                    raise ValueError(f"Upstream error: {resp.status_code}")
-
-                if resp.status_code >= 400:
-                    raise ValueError(f"Upstream error: {resp.status_code}")
-
-                content_type = (resp.headers.get("Content-Type") or "").split(";", 1)[0].strip()
-                max_bytes = _rss_http_max_bytes()
-                try:
-                    resp.raw.decode_content = True
-                except Exception:
-                    pass
-                data = resp.raw.read(max_bytes + 1)
-                if len(data) > max_bytes:
-                    # Best-effort fallback for huge feeds:
-                    # Attempt to salvage a minimal valid feed from the truncated bytes.
-                    truncated = data[:max_bytes]
-                    parsed = None
-                    for lim in (40, 20):
-                        try:
-                            maybe = _extract_first_n_entries_from_truncated_xml(truncated, lim)
-                            if not maybe:
-                                continue
-                            parsed = parse_feed_content(content_type, maybe)
-                            if isinstance(parsed, dict) and isinstance(parsed.get("entries"), list):
-                                parsed["entries"] = (parsed.get("entries") or [])[:lim]
-                            break
-                        except Exception:
-                            parsed = None
-                            continue
-                    if parsed is None:
-                        raise ValueError("Response too large")
-
-                    result = {
-                        "url": url,
-                        "final_url": current_url,
-                        "content_type": content_type,
-                        "data": parsed,
-                        "etag": (resp.headers.get("ETag") or "").strip(),
-                        "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
-                    }
-                    cache.set(key, result)
-                    return result
-
-                stripped = data.lstrip()
-                if stripped.startswith(b"<"):
-                    head = stripped[:512].lower()
-                    is_html = (b"<html" in head) or (b"<!doctype html" in head)
-                    if is_html:
-                        snippet = stripped[:240].decode("utf-8", errors="replace")
-                        raise ValueError(f"Upstream returned HTML, not a feed: {snippet[:240]}")
-
-                try:
-                    parsed = parse_feed_content(content_type, data)
-                except Exception as e:
-                    if stripped[:2] == b"\x1f\x8b":
-                        raise ValueError(
-                            "Upstream returned gzip-compressed bytes that could not be decoded"
-                        ) from e
-                    raise
-
-                result = {
-                    "url": url,
-                    "final_url": current_url,
-                    "content_type": content_type,
-                    "data": parsed,
-                    "etag": (resp.headers.get("ETag") or "").strip(),
-                    "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
-                }
-                cache.set(key, result)
-                return result
-            except (requests.Timeout, requests.ConnectionError) as e:
-                attempts += 1
-                if attempts >= 3:
-                    raise ValueError("Upstream timeout") from e
-                time.sleep(min(4.0, 0.5 * (2 ** (attempts - 1))))
-                continue
-            except ValueError as e:
-                msg = str(e)
-                retryable = (
-                    ("rate limited" in msg.lower())
-                    or ("upstream error: 5" in msg.lower())
-                    or ("upstream timeout" in msg.lower())
-                )
-                if retryable:
-                    attempts += 1
-                    if attempts >= 3:
-                        raise
-                    if retry_after_s is not None and retry_after_s > 0:
-                        time.sleep(min(6.0, float(retry_after_s)))
-                    else:
-                        time.sleep(min(4.0, 0.5 * (2 ** (attempts - 1))))
-                    continue
-                raise
-            finally:
-                try:
-                    if resp is not None:
-                        resp.close()
-                except Exception:
-                    pass
-    finally:
-        try:
-            sem.release()
-        except Exception:
-            pass
+    return rss_proxy_fetch_warmup(url)
 
 
 def _resolve_anon_user_id_from_request(request: Request) -> Optional[int]:
@@ -748,56 +460,296 @@ def rss_proxy_fetch_warmup(url: str, etag: str = "", last_modified: str = "", sc
     parsed0 = urlparse(url)
     host0 = (parsed0.hostname or "").strip().lower()
 
-    sem = get_rss_host_semaphore(host0)
-    sem.acquire()
-    try:
-        current_url = url
-        redirects = 0
-        attempts = 0
-        cur_etag = (etag or "").strip()
-        cur_lm = (last_modified or "").strip()
-        while True:
-            current_url = validate_http_url(current_url, check_resolve=not use_scraperapi)
-            rss_host_rate_limit_sleep(host0)
-
-            headers = _rss_default_headers()
-            if cur_etag:
-                headers["If-None-Match"] = cur_etag
-            if cur_lm:
-                headers["If-Modified-Since"] = cur_lm
-
-            retry_after_s = None
-            resp = None
-            try:
-                timeout = _rss_http_timeouts()
-                
-                # Use ScraperAPI if enabled and API key is available
-                request_url = current_url
-                if use_scraperapi:
-                    scraper_api_key = os.environ.get("SCRAPERAPI_KEY", "").strip()
-                    if scraper_api_key:
-                        # Route through ScraperAPI
-                        request_url = f"http://api.scraperapi.com?api_key={scraper_api_key}&url={current_url}"
-                        logger.info(f"Using ScraperAPI for RSS feed: {current_url}")
-                
-                # Determine proxy configuration
-                proxies = _rss_http_proxies()
-                if use_socks_proxy and not use_scraperapi:
-                    socks_proxy = os.environ.get("HOTNEWS_SOCKS_PROXY", "socks5h://172.17.0.1:7891").strip()
-                    if socks_proxy:
-                        proxies = {"http": socks_proxy, "https": socks_proxy}
-                        logger.info(f"Using SOCKS5 proxy for RSS feed: {current_url}")
-                
-                resp = requests.get(
-                    request_url,
-                    headers=headers,
-                    timeout=timeout,
-                    allow_redirects=False,
-                    stream=True,
-                    proxies=proxies,
+    scheduler = get_host_scheduler()
+    current_url = url
+    redirects = 0
+    attempts = 0
+    cur_etag = (etag or "").strip()
+    cur_lm = (last_modified or "").strip()
+    while True:
+        current_url = validate_http_url(current_url, check_resolve=not use_scraperapi)
+        permit = scheduler.acquire_sync(urlparse(current_url).hostname or host0)
+
+        headers = _rss_default_headers()
+        if cur_etag:
+            headers["If-None-Match"] = cur_etag
+        if cur_lm:
+            headers["If-Modified-Since"] = cur_lm
+
+        retry_after_s = None
+        resp = None
+        try:
+            timeout = _rss_http_timeouts()
+            
+            # Use ScraperAPI if enabled and API key is available
+            request_url = current_url
+            if use_scraperapi:
+                scraper_api_key = os.environ.get("SCRAPERAPI_KEY", "").strip()
+                if scraper_api_key:
+                    # Route through ScraperAPI
+                    request_url = f"http://api.scraperapi.com?api_key={scraper_api_key}&url={current_url}"
+                    logger.info(f"Using ScraperAPI for RSS feed: {current_url}")
+            
+            # Determine proxy configuration
+            proxies = _rss_http_proxies()
+            if use_socks_proxy and not use_scraperapi:
+                socks_proxy = os.environ.get("HOTNEWS_SOCKS_PROXY", "socks5h://172.17.0.1:7891").strip()
+                if socks_proxy:
+                    proxies = {"http": socks_proxy, "https": socks_proxy}
+                    logger.info(f"Using SOCKS5 proxy for RSS feed: {current_url}")
+            
+            resp = requests.get(
+                request_url,
+                headers=headers,
+                timeout=timeout,
+                allow_redirects=False,
+                stream=True,
+                proxies=proxies,
+            )
+            permit.observe(resp.status_code, resp.headers.get("Retry-After"))
+
+            if resp.status_code in {301, 302, 303, 307, 308}:
+                loc = (resp.headers.get("Location") or "").strip()
+                if not loc:
+                    raise ValueError("Redirect without location")
+                redirects += 1
+                if redirects > 5:
+                    raise ValueError("Too many redirects")
+                current_url = urljoin(current_url, loc)
+                continue
+
+            if resp.status_code == 304:
+                cached_any = rss_proxy_cache_get_any_ttl(url, ttl=10**9)
+                if cached_any is not None:
+                    cached_any = dict(cached_any)
+                    cached_any["etag"] = (resp.headers.get("ETag") or cur_etag or "").strip()
+                    cached_any["last_modified"] = (
+                        resp.headers.get("Last-Modified") or cur_lm or ""
+                    ).strip()
+                    cache.set(key, cached_any, ttl=_rss_proxy_stale_ttl_s())
+                    return cached_any
+                cur_etag = ""
+                cur_lm = ""
+                continue
+
+            if resp.status_code == 429:
+                logger.warning(
+                    "RSS upstream may be blocked or rate limited (status=429). 可能触发了反爬或访问频率限制. url=%s",
+                    current_url,
+                )
+                ra = (resp.headers.get("Retry-After") or "").strip()
+                try:
+                    retry_after_s = int(ra)
+                except Exception:
+                    retry_after_s = None
+                raise ValueError("Upstream rate limited")
+
+            if resp.status_code == 403:
+                logger.warning(
+                    "RSS upstream may be blocked or rate limited (status=403). 可能触发了反爬或访问频率限制. url=%s",
+                    current_url,
                 )
 
-                if resp.status_code in {301, 302, 303, 307, 308}:
+            if resp.status_code >= 500:
+                if resp.status_code == 503:
+                    logger.warning(
+                        "RSS upstream may be blocked or rate limited (status=503). 可能触发了反爬或访问频率限制. url=%s",
+                        current_url,
+                    )
+                raise ValueError(f"Upstream error: {resp.status_code}")
+
+            if resp.status_code >= 400:
+                raise ValueError(f"Upstream error: {resp.status_code}")
+
+            content_type = (resp.headers.get("Content-Type") or "").split(";", 1)[0].strip()
+            reader = _read_body_sync(
+                resp,
+                _new_body_reader(
+                    content_type,
+                    resp.headers.get("Content-Encoding") or "",
+                    keep_html=bool(scrape_rules),
+                    max_entries=_rss_parse_max_entries(),
+                ),
+            )
+            if reader.kind == "html":
+                if scrape_rules:
+                    try:
+                        parsed = parse_html_content(reader.body(), scrape_rules)
+                        result = {
+                            "url": url,
+                            "final_url": current_url,
+                            "content_type": content_type,
+                            "data": parsed,
+                            "etag": (resp.headers.get("ETag") or "").strip(),
+                            "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
+                        }
+                        cache.set(key, result, ttl=_rss_proxy_stale_ttl_s())
+                        return result
+                    except Exception:
+                        pass
+                raise _html_not_feed_error(reader)
+
+            parsed = reader.result()
+
+            result = {
+                "url": url,
+                "final_url": current_url,
+                "content_type": content_type,
+                "data": parsed,
+                "etag": (resp.headers.get("ETag") or "").strip(),
+                "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
+            }
+            cache.set(key, result, ttl=_rss_proxy_stale_ttl_s())
+            return result
+        except (requests.Timeout, requests.ConnectionError) as e:
+            attempts += 1
+            if attempts >= 3:
+                raise ValueError("Upstream timeout") from e
+            time.sleep(min(4.0, 0.5 * (2 ** (attempts - 1))))
+            continue
+        except ValueError as e:
+            msg = str(e)
+            retryable = (
+                ("rate limited" in msg.lower())
+                or ("upstream error: 5" in msg.lower())
+                or ("upstream timeout" in msg.lower())
+            )
+            if retryable:
+                attempts += 1
+                if attempts >= 3:
+                    raise
+                if retry_after_s is not None and retry_after_s > 0:
+                    time.sleep(min(6.0, float(retry_after_s)))
+                else:
+                    time.sleep(min(4.0, 0.5 * (2 ** (attempts - 1))))
+                continue
+            raise
+        finally:
+            try:
+                if resp is not None:
+                    resp.close()
+            except Exception:
+                pass
+            scheduler.release(permit)
+
+
+@router.get("/api/proxy/fetch")
+async def api_proxy_fetch(request: Request, url: str = Query(...)):
+    allowed = None
+    fn = getattr(request.app.state, "db_find_enabled_source_by_url", None)
+    if callable(fn):
+        allowed = fn(url)
+    if allowed is None:
+        ra = getattr(request.app.state, "require_admin", None)
+        if callable(ra):
+            ra(request)
+
+    try:
+        result = await rss_proxy_fetch_cached_async(url)
+        return UnicodeJSONResponse(content=result)
+    except Exception as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
+
+
+async def rss_proxy_fetch_warmup_async(
+    url: str,
+    etag: str = "",
+    last_modified: str = "",
+    scrape_rules: str = "",
+    use_scraperapi: bool = False,
+    use_socks_proxy: bool = False,
+) -> Dict[str, Any]:
+    """Async version of rss_proxy_fetch_warmup using aiohttp."""
+    # Note: Cache operations are currently sync, but they are fast enough for now.
+    # We mainly want to unblock the network I/O.
+    cache = get_cache()
+    key = f"rssproxy:{_md5_hex(url)}"
+
+    parsed0 = urlparse(url)
+    host0 = (parsed0.hostname or "").strip().lower()
+
+    scheduler = get_host_scheduler()
+    current_url = url
+    redirects = 0
+    attempts = 0
+    cur_etag = (etag or "").strip()
+    cur_lm = (last_modified or "").strip()
+    
+    while True:
+        current_url = await validate_http_url_async(current_url, check_resolve=not use_scraperapi)
+
+        headers = _rss_default_headers()
+        if cur_etag:
+            headers["If-None-Match"] = cur_etag
+        if cur_lm:
+            headers["If-Modified-Since"] = cur_lm
+
+        retry_after_s = None
+        
+        # Determine timeout
+        connect_timeout = 15.0
+        read_timeout = 30.0
+        total_timeout = 45.0
+        try:
+            t_val = _rss_http_timeouts()
+            if isinstance(t_val, tuple):
+                connect_timeout, read_timeout = t_val
+                total_timeout = connect_timeout + read_timeout
+            else:
+                total_timeout = float(t_val)
+                connect_timeout = min(15.0, total_timeout)
+                read_timeout = total_timeout
+        except Exception:
+            pass
+        
+        timeout = aiohttp.ClientTimeout(
+            total=total_timeout,
+            connect=connect_timeout,
+            sock_read=read_timeout
+        )
+        
+        # Prepare URL
+        request_url = current_url
+        if use_scraperapi:
+            scraper_api_key = os.environ.get("SCRAPERAPI_KEY", "").strip()
+            if scraper_api_key:
+                request_url = f"http://api.scraperapi.com?api_key={scraper_api_key}&url={current_url}"
+                logger.info(f"Using ScraperAPI for RSS feed (async): {current_url}")
+
+        # Pick the pooled session for this route (direct / HTTP proxy / SOCKS / ScraperAPI).
+        # Sessions live for the whole process so keep-alive connections, including the
+        # SOCKS handshake and TLS behind them, are reused across requests and retries.
+        proxy = None
+        route = direct_route()
+        socks_proxy = ""
+        if use_socks_proxy and not use_scraperapi:
+            socks_proxy = os.environ.get("HOTNEWS_SOCKS_PROXY", "socks5://172.17.0.1:7891").strip()
+        if socks_proxy:
+            route = socks_route(socks_proxy)
+            logger.info(f"Using SOCKS5 proxy for RSS feed (async): {current_url}")
+        else:
+            proxies = _rss_http_proxies()
+            if proxies:
+                scheme = urlparse(request_url).scheme
+                proxy = proxies.get(scheme) or proxies.get("http")
+            if use_scraperapi and request_url != current_url:
+                route = scraperapi_route()
+            elif proxy:
+                route = http_proxy_route(proxy)
+
+        permit = await scheduler.acquire(urlparse(current_url).hostname or host0)
+        try:
+            session = await get_route_session(route)
+            async with session.get(
+                request_url,
+                headers=headers,
+                timeout=timeout,
+                allow_redirects=False,
+                proxy=proxy,
+            ) as resp:
+                permit.observe(resp.status, resp.headers.get("Retry-After"))
+                # Handle Redirects
+                if resp.status in {301, 302, 303, 307, 308}:
                     loc = (resp.headers.get("Location") or "").strip()
                     if not loc:
                         raise ValueError("Redirect without location")
@@ -807,7 +759,8 @@ def rss_proxy_fetch_warmup(url: str, etag: str = "", last_modified: str = "", sc
                     current_url = urljoin(current_url, loc)
                     continue
 
-                if resp.status_code == 304:
+                # Handle 304 Not Modified
+                if resp.status == 304:
                     cached_any = rss_proxy_cache_get_any_ttl(url, ttl=10**9)
                     if cached_any is not None:
                         cached_any = dict(cached_any)
@@ -815,83 +768,80 @@ def rss_proxy_fetch_warmup(url: str, etag: str = "", last_modified: str = "", sc
                         cached_any["last_modified"] = (
                             resp.headers.get("Last-Modified") or cur_lm or ""
                         ).strip()
-                        cache.set(key, cached_any)
+                        cache.set(key, cached_any, ttl=_rss_proxy_stale_ttl_s())
                         return cached_any
                     cur_etag = ""
                     cur_lm = ""
                     continue
 
-                if resp.status_code == 429:
-                    logger.warning(
-                        "RSS upstream may be blocked or rate limited (status=429). 可能触发了反爬或访问频率限制. url=%s",
-                        current_url,
-                    )
+                # Handle Rate Limits
+                if resp.status == 429:
+                    logger.warning("RSS upstream 429. url=%s", current_url)
                     ra = (resp.headers.get("Retry-After") or "").strip()
                     try:
                         retry_after_s = int(ra)
                     except Exception:
                         retry_after_s = None
                     raise ValueError("Upstream rate limited")
+                
+                if resp.status == 403:
+                    logger.warning("RSS upstream 403. url=%s", current_url)
 
-                if resp.status_code == 403:
-                    logger.warning(
-                        "RSS upstream may be blocked or rate limited (status=403). 可能触发了反爬或访问频率限制. url=%s",
-                        current_url,
-                    )
-
-                if resp.status_code >= 500:
-                    if resp.status_code == 503:
-                        logger.warning(
-                            "RSS upstream may be blocked or rate limited (status=503). 可能触发了反爬或访问频率限制. url=%s",
-                            current_url,
-                        )
-                    raise ValueError(f"Upstream error: {resp.status_code}")
+                if resp.status >= 500:
+                    if resp.status == 503:
+                        logger.warning("RSS upstream 503. url=%s", current_url)
+                    raise ValueError(f"Upstream error: {resp.status}")
 
-                if resp.status_code >= 400:
-                    raise ValueError(f"Upstream error: {resp.status_code}")
+                if resp.status >= 400:
+                    raise ValueError(f"Upstream error: {resp.status}")
 
+                # Stream the body: byte cap and read deadline are enforced while
+                # reading, and with the thread backend chunks go straight into the
+                # incremental parser so reading stops once enough entries arrived.
+                # The process backend needs the bytes, so they are buffered (capped).
                 content_type = (resp.headers.get("Content-Type") or "").split(";", 1)[0].strip()
-                max_bytes = _rss_http_max_bytes()
+                use_pool = rss_parse_backend() == "process"
+                reader = _new_body_reader(
+                    content_type, keep_html=bool(scrape_rules), buffer_feed=use_pool, max_entries=_rss_parse_max_entries()
+                )
                 try:
-                    resp.raw.decode_content = True
-                except Exception:
-                    pass
-                data = resp.raw.read(max_bytes + 1)
-                if len(data) > max_bytes:
-                    raise ValueError("Response too large")
-
-                stripped = data.lstrip()
-                if stripped.startswith(b"<"):
-                    head = stripped[:512].lower()
-                    is_html = (b"<html" in head) or (b"<!doctype html" in head)
-                    if is_html:
-                        if scrape_rules:
-                            try:
-                                parsed = parse_html_content(data, scrape_rules)
-                                result = {
-                                    "url": url,
-                                    "final_url": current_url,
-                                    "content_type": content_type,
-                                    "data": parsed,
-                                    "etag": (resp.headers.get("ETag") or "").strip(),
-                                    "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
-                                }
-                                cache.set(key, result)
-                                return result
-                            except Exception as e:
-                                pass
-                        
-                        snippet = stripped[:240].decode("utf-8", errors="replace")
-                        raise ValueError(f"Upstream returned HTML, not a feed: {snippet[:240]}")
+                    await _read_body_async(resp, reader, offload=not use_pool)
+                except (ValueError, asyncio.TimeoutError, aiohttp.ClientError):
+                    raise
+                except Exception as e:
+                    raise ValueError(f"Read error: {e}")
+
+                if reader.kind == "html":
+                    if scrape_rules:
+                        try:
+                            parsed = await parse_html_async(reader.body(), scrape_rules)
+                            result = {
+                                "url": url,
+                                "final_url": current_url,
+                                "content_type": content_type,
+                                "data": parsed,
+                                "etag": (resp.headers.get("ETag") or "").strip(),
+                                "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
+                            }
+                            cache.set(key, result, ttl=_rss_proxy_stale_ttl_s())
+                            return result
+                        except Exception:
+                            pass
+                    raise _html_not_feed_error(reader)
 
                 try:
-                    parsed = parse_feed_content(content_type, data)
+                    if use_pool:
+                        # Timeouts in the parse worker processes kill the worker
+                        parsed = await parse_feed_async(
+                            content_type, reader.body(), _rss_parse_max_entries(), truncated=reader.truncated
+                        )
+                    else:
+                        parsed = reader.result()
                 except Exception as e:
-                    if stripped[:2] == b"\x1f\x8b":
-                        raise ValueError(
-                            "Upstream returned gzip-compressed bytes that could not be decoded"
-                        ) from e
-                    raise
+                    msg = str(e)
+                    if msg in {"Feed parsing timeout", "Response too large", "Upstream read deadline exceeded"}:
+                        raise
+                    raise ValueError(f"Feed parse error: {e}") from e
 
                 result = {
                     "url": url,
@@ -901,318 +851,108 @@ def rss_proxy_fetch_warmup(url: str, etag: str = "", last_modified: str = "", sc
                     "etag": (resp.headers.get("ETag") or "").strip(),
                     "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
                 }
-                cache.set(key, result)
+                cache.set(key, result, ttl=_rss_proxy_stale_ttl_s())
                 return result
-            except (requests.Timeout, requests.ConnectionError) as e:
+        
+        except (asyncio.TimeoutError, aiohttp.ClientError, socket.gaierror) as e:
+            attempts += 1
+            if attempts >= 3:
+                raise ValueError(f"Upstream timeout/error: {e}") from e
+            
+            sleep_s = min(4.0, 0.5 * (2 ** (attempts - 1)))
+            await asyncio.sleep(sleep_s)
+            continue
+            
+        except ValueError as e:
+            msg = str(e)
+            retryable = (
+                ("rate limited" in msg.lower())
+                or ("upstream error: 5" in msg.lower())
+                or ("upstream timeout" in msg.lower())
+            )
+            if retryable:
                 attempts += 1
                 if attempts >= 3:
-                    raise ValueError("Upstream timeout") from e
-                time.sleep(min(4.0, 0.5 * (2 ** (attempts - 1))))
+                    raise
+                
+                sleep_s = min(4.0, 0.5 * (2 ** (attempts - 1)))
+                if retry_after_s is not None and retry_after_s > 0:
+                    sleep_s = min(6.0, float(retry_after_s))
+                
+                await asyncio.sleep(sleep_s)
                 continue
-            except ValueError as e:
-                msg = str(e)
-                retryable = (
-                    ("rate limited" in msg.lower())
-                    or ("upstream error: 5" in msg.lower())
-                    or ("upstream timeout" in msg.lower())
-                )
-                if retryable:
-                    attempts += 1
-                    if attempts >= 3:
-                        raise
-                    if retry_after_s is not None and retry_after_s > 0:
-                        time.sleep(min(6.0, float(retry_after_s)))
-                    else:
-                        time.sleep(min(4.0, 0.5 * (2 ** (attempts - 1))))
-                    continue
-                raise
-            finally:
-                try:
-                    if resp is not None:
-                        resp.close()
-                except Exception:
-                    pass
-    finally:
-        try:
-            sem.release()
-        except Exception:
-            pass
+            raise
+        finally:
+            scheduler.release(permit)
 
 
-@router.get("/api/proxy/fetch")
-async def api_proxy_fetch(request: Request, url: str = Query(...)):
-    allowed = None
-    fn = getattr(request.app.state, "db_find_enabled_source_by_url", None)
-    if callable(fn):
-        allowed = fn(url)
-    if allowed is None:
-        ra = getattr(request.app.state, "require_admin", None)
-        if callable(ra):
-            ra(request)
+_RSS_PROXY_FRESH_TTL_S = 300
+
+
+def _rss_proxy_stale_ttl_s() -> int:
+    """How long a cached feed may still be served while it is refreshed (HOTNEWS_RSS_PROXY_STALE_TTL_S).
 
+    Also the write-time TTL of ``rssproxy:`` entries: no reader accepts anything older.
+    """
     try:
-        result = await asyncio.to_thread(rss_proxy_fetch_cached, url)
-        return UnicodeJSONResponse(content=result)
-    except Exception as e:
-        return JSONResponse(content={"detail": str(e)}, status_code=400)
+        v = int((os.environ.get("HOTNEWS_RSS_PROXY_STALE_TTL_S", "") or "").strip() or "3600")
+    except Exception:
+        v = 3600
+    if v <= 0:
+        v = 3600
+    return int(max(_RSS_PROXY_FRESH_TTL_S, min(86400, v)))
 
 
-async def rss_proxy_fetch_warmup_async(
-    url: str,
-    etag: str = "",
-    last_modified: str = "",
-    scrape_rules: str = "",
-    use_scraperapi: bool = False,
-    use_socks_proxy: bool = False,
-) -> Dict[str, Any]:
-    """Async version of rss_proxy_fetch_warmup using aiohttp."""
-    # Note: Cache operations are currently sync, but they are fast enough for now.
-    # We mainly want to unblock the network I/O.
-    cache = get_cache()
-    key = f"rssproxy:{_md5_hex(url)}"
+# Single-flight: one upstream fetch per cache key, shared by every waiter (per event loop).
+_rss_inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+_rss_inflight_stats = {"fetches": 0, "joined": 0, "stale_served": 0}
 
-    parsed0 = urlparse(url)
-    host0 = (parsed0.hostname or "").strip().lower()
 
-    sem = await get_rss_host_async_semaphore(host0)
-    await sem.acquire()
-    try:
-        current_url = url
-        redirects = 0
-        attempts = 0
-        cur_etag = (etag or "").strip()
-        cur_lm = (last_modified or "").strip()
-        
-        while True:
-            # CPU-bound URL validation
-            try:
-                current_url = validate_http_url(current_url, check_resolve=not use_scraperapi)
-            except Exception:
-                raise
+def _rss_fetch_single_flight(key: str, url: str, etag: str = "", last_modified: str = "") -> "asyncio.Task[Dict[str, Any]]":
+    task = _rss_inflight.get(key)
+    if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+        _rss_inflight_stats["joined"] += 1
+        return task
 
-            headers = _rss_default_headers()
-            if cur_etag:
-                headers["If-None-Match"] = cur_etag
-            if cur_lm:
-                headers["If-Modified-Since"] = cur_lm
+    task = asyncio.create_task(rss_proxy_fetch_warmup_async(url, etag=etag, last_modified=last_modified))
+    _rss_inflight[key] = task
+    _rss_inflight_stats["fetches"] += 1
 
-            retry_after_s = None
-            
-            # Determine timeout
-            connect_timeout = 15.0
-            read_timeout = 30.0
-            total_timeout = 45.0
-            try:
-                t_val = _rss_http_timeouts()
-                if isinstance(t_val, tuple):
-                    connect_timeout, read_timeout = t_val
-                    total_timeout = connect_timeout + read_timeout
-                else:
-                    total_timeout = float(t_val)
-                    connect_timeout = min(15.0, total_timeout)
-                    read_timeout = total_timeout
-            except Exception:
-                pass
-            
-            timeout = aiohttp.ClientTimeout(
-                total=total_timeout,
-                connect=connect_timeout,
-                sock_read=read_timeout
-            )
-            
-            # Prepare URL
-            request_url = current_url
-            if use_scraperapi:
-                scraper_api_key = os.environ.get("SCRAPERAPI_KEY", "").strip()
-                if scraper_api_key:
-                    request_url = f"http://api.scraperapi.com?api_key={scraper_api_key}&url={current_url}"
-                    logger.info(f"Using ScraperAPI for RSS feed (async): {current_url}")
+    def _done(t: "asyncio.Task[Dict[str, Any]]") -> None:
+        if _rss_inflight.get(key) is t:
+            _rss_inflight.pop(key, None)
+        if not t.cancelled() and t.exception() is not None:
+            logger.info("RSS proxy fetch failed: url=%s err=%s", url, t.exception())
 
-            proxy = None
-            proxies = _rss_http_proxies()
-            # Use SOCKS5 proxy if enabled (takes precedence over default proxies)
-            connector = None
-            if use_socks_proxy and not use_scraperapi:
-                socks_proxy = os.environ.get("HOTNEWS_SOCKS_PROXY", "socks5://172.17.0.1:7891").strip()
-                if socks_proxy:
-                    # Convert socks5h to socks5 (aiohttp_socks uses rdns param instead of 'h' suffix)
-                    # socks5h means remote DNS resolution, which is rdns=True in aiohttp_socks
-                    use_rdns = socks_proxy.startswith("socks5h://")
-                    if use_rdns:
-                        socks_proxy = socks_proxy.replace("socks5h://", "socks5://", 1)
-                    connector = ProxyConnector.from_url(socks_proxy, rdns=use_rdns)
-                    logger.info(f"Using SOCKS5 proxy for RSS feed (async): {current_url}")
-            
-            proxy = None
-            if not connector:
-                proxies = _rss_http_proxies()
-                if proxies:
-                    scheme = urlparse(request_url).scheme
-                    proxy = proxies.get(scheme) or proxies.get("http")
+    task.add_done_callback(_done)
+    return task
 
-            try:
-                # Create session based on proxy type
-                if connector:
-                    # Use dedicated session with ProxyConnector for socks5
-                    session = aiohttp.ClientSession(connector=connector)
-                    should_close_session = True
-                else:
-                    session = await get_rss_async_session()
-                    should_close_session = False
-                
-                try:
-                    async with session.get(
-                        request_url,
-                        headers=headers,
-                        timeout=timeout,
-                        allow_redirects=False,
-                        proxy=proxy if not connector else None,
-                    ) as resp:
-                        # Handle Redirects
-                        if resp.status in {301, 302, 303, 307, 308}:
-                            loc = (resp.headers.get("Location") or "").strip()
-                            if not loc:
-                                raise ValueError("Redirect without location")
-                            redirects += 1
-                            if redirects > 5:
-                                raise ValueError("Too many redirects")
-                            current_url = urljoin(current_url, loc)
-                            continue
-
-                        # Handle 304 Not Modified
-                        if resp.status == 304:
-                            cached_any = rss_proxy_cache_get_any_ttl(url, ttl=10**9)
-                            if cached_any is not None:
-                                cached_any = dict(cached_any)
-                                cached_any["etag"] = (resp.headers.get("ETag") or cur_etag or "").strip()
-                                cached_any["last_modified"] = (
-                                    resp.headers.get("Last-Modified") or cur_lm or ""
-                                ).strip()
-                                cache.set(key, cached_any)
-                                return cached_any
-                            cur_etag = ""
-                            cur_lm = ""
-                            continue
-
-                        # Handle Rate Limits
-                        if resp.status == 429:
-                            logger.warning("RSS upstream 429. url=%s", current_url)
-                            ra = (resp.headers.get("Retry-After") or "").strip()
-                            try:
-                                retry_after_s = int(ra)
-                            except Exception:
-                                retry_after_s = None
-                            raise ValueError("Upstream rate limited")
-                        
-                        if resp.status == 403:
-                            logger.warning("RSS upstream 403. url=%s", current_url)
-
-                        if resp.status >= 500:
-                            if resp.status == 503:
-                                logger.warning("RSS upstream 503. url=%s", current_url)
-                            raise ValueError(f"Upstream error: {resp.status}")
-
-                        if resp.status >= 400:
-                            raise ValueError(f"Upstream error: {resp.status}")
-
-                        # Read Content
-                        content_type = (resp.headers.get("Content-Type") or "").split(";", 1)[0].strip()
-                        max_bytes = _rss_http_max_bytes()
-                        
-                        try:
-                            # Use aiohttp's default read which reads full body
-                            data = await resp.read()
-                        except Exception as e:
-                            raise ValueError(f"Read error: {e}")
-
-                        if len(data) > max_bytes:
-                                data = data[:max_bytes]
-
-                        stripped = data.lstrip()
-                        if stripped.startswith(b"<"):
-                            head = stripped[:512].lower()
-                            is_html = (b"<html" in head) or (b"<!doctype html" in head)
-                            if is_html:
-                                if scrape_rules:
-                                    try:
-                                        parsed = await asyncio.to_thread(parse_html_content, data, scrape_rules)
-                                        result = {
-                                            "url": url,
-                                            "final_url": current_url,
-                                            "content_type": content_type,
-                                            "data": parsed,
-                                            "etag": (resp.headers.get("ETag") or "").strip(),
-                                            "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
-                                        }
-                                        cache.set(key, result)
-                                        return result
-                                    except Exception:
-                                        pass
-                                
-                                snippet = stripped[:240].decode("utf-8", errors="replace")
-                                raise ValueError(f"Upstream returned HTML, not a feed: {snippet[:240]}")
 
-                        try:
-                            # Feed parsing is CPU bound, offload to thread with timeout to prevent hangs
-                            parsed = await asyncio.wait_for(
-                                asyncio.to_thread(parse_feed_content, content_type, data),
-                                timeout=20.0
-                            )
-                        except asyncio.TimeoutError:
-                            raise ValueError("Feed parsing timeout")
-                        except Exception as e:
-                            if stripped[:2] == b"\x1f\x8b":
-                                raise ValueError("Upstream returned gzip-compressed bytes") from e
-                            raise ValueError(f"Feed parse error: {e}") from e
+async def rss_proxy_fetch_cached_async(url: str) -> Dict[str, Any]:
+    """Cached fetch for request paths (proxy, preview, subscriptions).
+
+    - fresh cache hit (< 5 min): returned as is
+    - stale hit (< HOTNEWS_RSS_PROXY_STALE_TTL_S): returned immediately, a refresh
+      runs in the background
+    - miss: fetched with the aiohttp fetcher; concurrent requests for the same URL
+      share one upstream fetch
+    """
+    cache = get_cache()
+    key = f"rssproxy:{_md5_hex(url)}"
+    cached, age = cache.get_with_age(key, max_age=_rss_proxy_stale_ttl_s())
+    if isinstance(cached, dict):
+        if age >= _RSS_PROXY_FRESH_TTL_S:
+            # Conditional refresh: an unchanged feed costs a 304 and just renews the entry.
+            _rss_inflight_stats["stale_served"] += 1
+            _rss_fetch_single_flight(key, url, cached.get("etag") or "", cached.get("last_modified") or "")
+        return cached
+
+    # shield: a client disconnect must not cancel the fetch other waiters share.
+    return await asyncio.shield(_rss_fetch_single_flight(key, url))
 
-                        result = {
-                            "url": url,
-                            "final_url": current_url,
-                            "content_type": content_type,
-                            "data": parsed,
-                            "etag": (resp.headers.get("ETag") or "").strip(),
-                            "last_modified": (resp.headers.get("Last-Modified") or "").strip(),
-                        }
-                        cache.set(key, result)
-                        return result
-                finally:
-                    if should_close_session:
-                        await session.close()
-            
-            except (asyncio.TimeoutError, aiohttp.ClientError, socket.gaierror) as e:
-                attempts += 1
-                if attempts >= 3:
-                    raise ValueError(f"Upstream timeout/error: {e}") from e
-                
-                sleep_s = min(4.0, 0.5 * (2 ** (attempts - 1)))
-                await asyncio.sleep(sleep_s)
-                continue
-                
-            except ValueError as e:
-                msg = str(e)
-                retryable = (
-                    ("rate limited" in msg.lower())
-                    or ("upstream error: 5" in msg.lower())
-                    or ("upstream timeout" in msg.lower())
-                )
-                if retryable:
-                    attempts += 1
-                    if attempts >= 3:
-                        raise
-                    
-                    sleep_s = min(4.0, 0.5 * (2 ** (attempts - 1)))
-                    if retry_after_s is not None and retry_after_s > 0:
-                        sleep_s = min(6.0, float(retry_after_s))
-                    
-                    await asyncio.sleep(sleep_s)
-                    continue
-                logger.info(f"DEBUG: fetch_async re-raising ValueError")
-                raise
 
-    finally:
-        logger.info(f"DEBUG: fetch_async FINALLY releasing sem")
-        sem.release()
-        logger.info(f"DEBUG: fetch_async FINALLY released sem")
+def get_rss_proxy_inflight_stats() -> Dict[str, Any]:
+    return {"inflight": len(_rss_inflight), **_rss_inflight_stats}
 
 
 @router.get("/api/rss-sources/explore-cards")
@@ -1435,7 +1175,7 @@ async def api_rss_sources_preview(request: Request, source_id: str = Query(...))
     if not src or not src.get("enabled"):
         return JSONResponse(content={"detail": "Source not found"}, status_code=404)
     try:
-        result = await asyncio.to_thread(rss_proxy_fetch_cached, src.get("url") or "")
+        result = await rss_proxy_fetch_cached_async(src.get("url") or "")
         return UnicodeJSONResponse(content=result)
     except Exception as e:
         return JSONResponse(content={"detail": str(e)}, status_code=400)
@@ -1454,7 +1194,7 @@ async def api_rss_source_requests(request: Request, body: Dict[str, Any] = Body(
         return JSONResponse(content={"detail": "Missing note"}, status_code=400)
 
     try:
-        url = validate_http_url(url)
+        url = await validate_http_url_async(url)
     except Exception as e:
         return JSONResponse(content={"detail": str(e)}, status_code=400)
 
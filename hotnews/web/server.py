@@ -17,8 +17,6 @@ import sqlite3
 import sys
 import time
 import traceback
-from collections import deque
-from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
 from threading import Lock, Semaphore
@@ -28,7 +26,7 @@ from urllib.parse import unquote, urljoin, urlparse
 from fastapi import FastAPI, Request, Query, Body, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import json
@@ -39,13 +37,23 @@ from dataclasses import asdict
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from hotnews.web.news_viewer import NewsViewerService, generate_news_id
+from hotnews.web.news_viewer import NewsViewerService, generate_news_id, get_category_snapshot
 from mcp_server.services.data_service import DataService
 from mcp_server.services.cache_service import get_cache
 from hotnews.crawler import DataFetcher
 from hotnews.core import load_config
 from hotnews.storage import convert_crawl_results_to_news_data
-from hotnews.web.db_online import get_online_db_conn
+from hotnews.web.db_online import fetch_rss_entries_top_n, get_online_db_conn
+from hotnews.web.json_response import UnicodeJSONResponse
+from hotnews.web.http_cache import conditional_json, make_etag
+from hotnews.web.config_registry import system_settings
+from hotnews.web.click_ingest import get_click_ingestor, shutdown_click_ingestor
+from hotnews.web.db_retention import get_retention_job, start_retention_job, stop_retention_job
+from hotnews.web.fetch_metrics_store import FetchMetricsStore
+from hotnews.web.data_versions import get_data_version_watcher, version_token
+from hotnews.web.live_updates import get_live_hub, news_snapshot_delta
+from hotnews.web.live_routes import router as _live_router, start_live_updates
+from hotnews.web.rate_limit import RateLimitMiddleware, rate_limit_enabled
 from hotnews.kernel.ai.manager import AIModelManager
 
 # [KERNEL] Dynamic Loading of Admin Modules
@@ -130,7 +138,7 @@ except ImportError as e:
 
 # Always public modules
 from hotnews.web.rss_proxy import router as _rss_proxy_router
-from hotnews.web.rss_proxy import rss_proxy_fetch_cached, rss_proxy_fetch_warmup, validate_http_url
+from hotnews.web.rss_proxy import rss_proxy_fetch_cached_async, rss_proxy_fetch_warmup, validate_http_url
 from hotnews.web import page_rendering
 from hotnews.web.misc_routes import router as _misc_router
 from hotnews.web.timeline_cache import brief_timeline_cache, explore_timeline_cache, clear_all_timeline_caches, get_cache_status
@@ -138,6 +146,7 @@ from hotnews.web.online_routes import router as _online_router
 from hotnews.web.viewer_controls_routes import router as _viewer_controls_router
 from hotnews.web.fetch_metrics_routes import router as _fetch_metrics_router
 from hotnews.web.system_routes import router as _system_router
+from hotnews.web.story_routes import router as _story_router
 from hotnews.kernel.admin.platform_admin import router as platform_admin_router
 from hotnews.kernel.admin.settings_admin import router as settings_admin_router, get_system_settings
 from hotnews.kernel.admin.rss_admin import router as rss_admin_router
@@ -283,17 +292,27 @@ def _build_rss_categories_from_subscriptions_db(
     if not subs:
         return {}
 
-    conn = _get_online_db_conn()
-    categories: Dict[str, Any] = {}
-
-    for sub in subs:
+    def _sub_source_id(sub: Dict[str, Any]) -> str:
         source_id = (sub.get("source_id") or sub.get("rss_source_id") or "").strip()
         if source_id.startswith("rss-"):
             source_id = source_id[len("rss-") :].strip()
+        return source_id
+
+    # One query for the sources and one for their entries instead of two per subscription
+    sources = _db_get_rss_sources([_sub_source_id(sub) for sub in subs])
+    enabled_ids = [sid for sid, src in sources.items() if src.get("enabled")]
+    try:
+        entries = fetch_rss_entries_top_n(_get_online_db_conn(), enabled_ids, min(50, max(0, int(per_feed_limit))))
+    except Exception:
+        entries = {}
+    categories: Dict[str, Any] = {}
+
+    for sub in subs:
+        source_id = _sub_source_id(sub)
         if not source_id:
             continue
 
-        source = _db_get_rss_source(source_id)
+        source = sources.get(source_id)
         if not source or not source.get("enabled"):
             continue
 
@@ -324,22 +343,7 @@ def _build_rss_categories_from_subscriptions_db(
             platform = {"id": platform_id, "name": platform_name, "news": [], "is_new": False}
             platforms[platform_id] = platform
 
-        try:
-            cur = conn.execute(
-                """
-                SELECT title, url, published_at, published_raw, created_at
-                FROM rss_entries
-                WHERE source_id = ?
-                ORDER BY (CASE WHEN published_at > 0 THEN published_at ELSE created_at END) DESC, id DESC
-                LIMIT 50
-                """,
-                (source_id,),
-            )
-            rows = cur.fetchall() or []
-        except Exception:
-            rows = []
-
-        for r in rows[: max(0, int(per_feed_limit))]:
+        for r in entries.get(source_id) or []:
             title = (r[0] or "").strip()
             link = (r[1] or "").strip()
             published_at = int(r[2] or 0)
@@ -412,6 +416,10 @@ app.state.project_root = project_root
 # 启用 Gzip 压缩（响应大于 500 字节时压缩）
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
+# 请求限流（HOTNEWS_RATE_LIMIT=1 启用，限额见 HOTNEWS_RATE_LIMIT_RULES）
+if rate_limit_enabled():
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS 配置 - 通过环境变量控制允许的域名
 # 格式: HOTNEWS_CORS_ORIGINS=https://example.com,https://app.example.com
 # 留空则只允许同源请求
@@ -435,6 +443,8 @@ app.include_router(_online_router)
 app.include_router(_viewer_controls_router)
 app.include_router(_fetch_metrics_router)
 app.include_router(_system_router)
+app.include_router(_story_router)
+app.include_router(_live_router)
 if _custom_source_router: app.include_router(_custom_source_router)
 if _newsnow_router: app.include_router(_newsnow_router)
 if _platform_admin_router: app.include_router(_platform_admin_router)
@@ -483,8 +493,7 @@ async def add_cache_headers(request: Request, call_next):
     
     return response
 
-_FETCH_METRICS_MAX = 5000
-_fetch_metrics = deque(maxlen=_FETCH_METRICS_MAX)
+_fetch_metrics_store: Optional[FetchMetricsStore] = None
 _fetch_metrics_lock = Lock()
 
 _last_platform_content_keys = {}
@@ -494,58 +503,32 @@ def _metrics_file_path() -> Path:
     return project_root / "output" / "metrics" / "fetch_metrics.jsonl"
 
 
-def _append_fetch_metrics_batch(metrics):
-    if not metrics:
-        return
-
-    try:
-        fp = _metrics_file_path()
-        fp.parent.mkdir(parents=True, exist_ok=True)
-        with fp.open("a", encoding="utf-8") as f:
-            for m in metrics:
-                f.write(json.dumps(m, ensure_ascii=False) + "\n")
-
-        try:
-            lines = fp.read_text(encoding="utf-8").splitlines()
-        except Exception:
-            lines = []
-        if len(lines) > _FETCH_METRICS_MAX:
-            fp.write_text("\n".join(lines[-_FETCH_METRICS_MAX:]) + "\n", encoding="utf-8")
-    except Exception:
-        return
+def _get_fetch_metrics_store() -> FetchMetricsStore:
+    global _fetch_metrics_store
+    if _fetch_metrics_store is None:
+        with _fetch_metrics_lock:
+            if _fetch_metrics_store is None:
+                _fetch_metrics_store = FetchMetricsStore(
+                    project_root / "output" / "metrics" / "fetch_metrics.db",
+                    legacy_jsonl=_metrics_file_path(),
+                )
+    return _fetch_metrics_store
 
 
 def _record_fetch_metrics(metrics):
     if not metrics:
         return
 
-    with _fetch_metrics_lock:
-        for m in metrics:
-            _fetch_metrics.append(m)
-
-
-def _fetch_metrics_get_items_snapshot():
-    with _fetch_metrics_lock:
-        return list(_fetch_metrics)
+    try:
+        _get_fetch_metrics_store().append(metrics)
+    except Exception as e:
+        print(f"⚠️ Fetch metrics write failed: {e}")
 
 
-app.state.fetch_metrics_get_items = _fetch_metrics_get_items_snapshot
-app.state.fetch_metrics_max = _FETCH_METRICS_MAX
+app.state.get_fetch_metrics_store = _get_fetch_metrics_store
 
 
 # 自定义 JSONResponse 类，确保中文正确显示
-class UnicodeJSONResponse(Response):
-    media_type = "application/json"
-    
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
-
 # 配置模板目录
 # 配置模板目录
 template_paths = [str(Path(__file__).parent / "templates")]
@@ -731,6 +714,27 @@ def _db_get_rss_source(source_id: str) -> Optional[Dict[str, Any]]:
     return _row_to_rss_source(row)
 
 
+def _db_get_rss_sources(source_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    ids = list(dict.fromkeys((s or "").strip() for s in source_ids if (s or "").strip()))
+    out: Dict[str, Dict[str, Any]] = {}
+    if not ids:
+        return out
+    conn = _get_online_db_conn()
+    # Stay well below SQLITE_MAX_VARIABLE_NUMBER on older builds
+    for i in range(0, len(ids), 500):
+        chunk = ids[i : i + 500]
+        cur = conn.execute(
+            "SELECT id, name, url, host, category, feed_type, country, language, source, seed_last_updated, enabled, created_at, updated_at, added_at FROM rss_sources WHERE id IN ({})".format(
+                ",".join("?" * len(chunk))
+            ),
+            chunk,
+        )
+        for row in cur.fetchall() or []:
+            src = _row_to_rss_source(row)
+            out[src["id"]] = src
+    return out
+
+
 def _db_find_enabled_source_by_url(url: str) -> Optional[Dict[str, Any]]:
     u = (url or "").strip()
     if not u:
@@ -864,6 +868,19 @@ def get_services():
 app.state.get_services = get_services
 
 
+def _publish_news_delta(viewer: NewsViewerService, old, new) -> None:
+    """Push new hot-list item ids (per platform / category) to live-update subscribers."""
+    if new is None or new is old:
+        return
+    mode = viewer.content_filter.filter_mode
+    old_platforms = old.view(viewer, mode)[0] if old is not None else None
+    old_layout = old.layout(viewer, mode) if old is not None else None
+    get_live_hub().publish(
+        "delta",
+        news_snapshot_delta(old_platforms, old_layout, new.view(viewer, mode)[0], new.layout(viewer, mode)),
+    )
+
+
 async def fetch_news_data():
     """执行一次数据获取"""
     def _run_blocking_fetch():
@@ -924,7 +941,6 @@ async def fetch_news_data():
                 mm["changed_count"] = changed_count
                 batch_metrics.append(mm)
             _record_fetch_metrics(batch_metrics)
-            _append_fetch_metrics_batch(batch_metrics)
 
             if not crawl_results:
                 print("⚠️ 未获取到任何数据")
@@ -978,6 +994,19 @@ async def fetch_news_data():
             except Exception as e:
                 print(f"[{now.strftime('%H:%M:%S')}] ⚠️ Provider Ingestion 失败: {e}")
 
+            try:
+                from hotnews.core.story_cluster import cluster_news_data, cluster_new_rss_entries
+
+                online_conn = _get_online_db_conn()
+                news_stats = cluster_news_data(online_conn, news_data)
+                rss_stats = cluster_new_rss_entries(online_conn)
+                print(
+                    f"[{now.strftime('%H:%M:%S')}] 🧩 故事聚类: 热榜新增 {news_stats['new']} 条, "
+                    f"RSS 新增 {rss_stats['new']} 条, 新故事 {news_stats['new_clusters'] + rss_stats['new_clusters']} 个"
+                )
+            except Exception as e:
+                print(f"[{now.strftime('%H:%M:%S')}] ⚠️ 故事聚类失败: {e}")
+
             global _viewer_service, _data_service
             auto_fetch_scheduler.record_last_fetch_time(datetime.now())
 
@@ -993,6 +1022,21 @@ async def fetch_news_data():
             _viewer_service = None
             _data_service = None
 
+            # 在抓取线程里构建新的分类快照，构建完成后原子替换
+            previous_snapshot = get_category_snapshot()
+            try:
+                viewer = get_services()[0]
+                snapshot = viewer.refresh_category_snapshot()
+                _publish_news_delta(viewer, previous_snapshot, snapshot)
+            except Exception as e:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ 分类快照构建失败: {e}")
+
+            # 缓存与快照已更新，再通知轮询/长轮询客户端
+            try:
+                get_data_version_watcher(project_root).bump("news")
+            except Exception as e:
+                print(f"[{now.strftime('%H:%M:%S')}] ⚠️ 数据版本更新失败: {e}")
+
             total_news = sum(len(items) for items in crawl_results.values())
             print(f"[{datetime.now().strftime('%H:%M:%S')}] ✅ 数据获取完成: {len(crawl_results)} 个平台, {total_news} 条新闻")
 
@@ -1418,6 +1462,7 @@ def _mb_eval(
 
 @app.get("/api/rss/brief/latest")
 async def api_rss_brief_latest(
+    request: Request,
     since: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
 ):
@@ -1469,8 +1514,9 @@ async def api_rss_brief_latest(
         if created_at > next_since:
             next_since = created_at
 
-    return UnicodeJSONResponse(
-        content={
+    return conditional_json(
+        request,
+        {
             "since": s,
             "next_since": next_since,
             "items": items,
@@ -1481,6 +1527,7 @@ async def api_rss_brief_latest(
 
 @app.get("/api/rss/brief/curated")
 async def api_rss_brief_curated(
+    request: Request,
     hours: int = Query(48, ge=1, le=24 * 7),
     limit: int = Query(20, ge=1, le=200),
 ):
@@ -1583,8 +1630,9 @@ async def api_rss_brief_curated(
             pass
         items.append(row_item)
 
-    return UnicodeJSONResponse(
-        content={
+    return conditional_json(
+        request,
+        {
             "hours": int(hours),
             "items": items,
             "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -1594,6 +1642,7 @@ async def api_rss_brief_curated(
 
 @app.get("/api/rss/brief/timeline")
 async def api_rss_brief_timeline(
+    request: Request,
     limit: int = Query(150, ge=1, le=500),
     offset: int = Query(0, ge=0, le=5000),
     drop_published_at_zero: Optional[int] = Query(None),
@@ -1630,7 +1679,8 @@ async def api_rss_brief_timeline(
     cache_config = {
         "drop_zero": drop_zero,
         "ai_mode": ai_mode,
-        "rules_hash": hash(str(sorted(rules.items()))),
+        # str() rather than hash(): string hashes differ per worker process
+        "rules_hash": str(sorted(rules.items())),
         "category_whitelist": tuple(sorted(category_whitelist)),
         "tag_whitelist": tuple(sorted(tag_whitelist)),
     }
@@ -1638,23 +1688,29 @@ async def api_rss_brief_timeline(
     # Try to get from cache
     cached_items = brief_timeline_cache.get(cache_config)
     if cached_items is not None:
-        # Cache hit - slice and return
-        sliced = cached_items[off:off + lim]
-        return UnicodeJSONResponse(
-            content={
+        # Cache hit - ETag from the cache version; items are served as pre-encoded JSON fragments
+        built_at = brief_timeline_cache.created_at
+        return conditional_json(
+            request,
+            lambda: {
                 "offset": int(off),
                 "limit": int(lim),
                 "drop_published_at_zero": bool(drop_zero),
                 "ai_enabled": bool(ai_mode),
                 "category_whitelist_enabled": bool(category_whitelist_enabled),
-                "category_whitelist": list(category_whitelist),
+                "category_whitelist": sorted(category_whitelist),
                 "tag_whitelist_enabled": bool(tag_whitelist_enabled),
-                "tag_whitelist": list(tag_whitelist),
-                "items": sliced,
+                "tag_whitelist": sorted(tag_whitelist),
+                "items": cached_items.window(off, off + lim),
                 "total_candidates": int(len(cached_items)),
-                "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "updated_at": datetime.fromtimestamp(built_at).strftime("%Y-%m-%d %H:%M:%S"),
                 "cached": True,
-            }
+            },
+            etag=make_etag(
+                "brief-timeline", brief_timeline_cache.version, off, lim,
+                category_whitelist_enabled, tag_whitelist_enabled, True,
+            ),
+            last_modified=built_at,
         )
 
     # Cache miss - fetch from database
@@ -1838,20 +1894,27 @@ async def api_rss_brief_timeline(
     brief_timeline_cache.set(items_all, cache_config)
 
     sliced = items_all[off : off + lim]
-    return UnicodeJSONResponse(
-        content={
+    built_at = brief_timeline_cache.created_at
+    return conditional_json(
+        request,
+        {
             "offset": int(off),
             "limit": int(lim),
             "drop_published_at_zero": bool(drop_zero),
             "ai_enabled": bool(ai_mode),
             "category_whitelist_enabled": bool(category_whitelist_enabled),
-            "category_whitelist": list(category_whitelist),
+            "category_whitelist": sorted(category_whitelist),
             "tag_whitelist_enabled": bool(tag_whitelist_enabled),
-            "tag_whitelist": list(tag_whitelist),
+            "tag_whitelist": sorted(tag_whitelist),
             "items": sliced,
             "total_candidates": int(len(items_all)),
-            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
+            "updated_at": datetime.fromtimestamp(built_at).strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        etag=make_etag(
+            "brief-timeline", brief_timeline_cache.version, off, lim,
+            category_whitelist_enabled, tag_whitelist_enabled, False,
+        ),
+        last_modified=built_at,
     )
 
 
@@ -1871,8 +1934,8 @@ async def api_rss_explore_timeline(
     # Try to get from cache first (no config check needed for explore)
     cached_items = explore_timeline_cache.get()
     if cached_items is not None and off + lim <= len(cached_items):
-        # Cache hit - slice and return
-        sliced = cached_items[off:off + lim]
+        # Cache hit - slice and return (items are served as pre-encoded JSON fragments)
+        sliced = cached_items.window(off, off + lim)
         return UnicodeJSONResponse(
             content={
                 "offset": off,
@@ -1979,6 +2042,7 @@ async def api_rss_explore_timeline(
 
 @app.get("/api/rss/brief/recent")
 async def api_rss_brief_recent(
+    request: Request,
     hours: int = Query(48, ge=1, le=24 * 7),
     limit: int = Query(20, ge=1, le=200),
 ):
@@ -2031,8 +2095,9 @@ async def api_rss_brief_recent(
             )
         )
 
-    return UnicodeJSONResponse(
-        content={
+    return conditional_json(
+        request,
+        {
             "hours": int(hours),
             "items": items,
             "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -2042,6 +2107,7 @@ async def api_rss_brief_recent(
 
 @app.get("/api/rss/brief/sources")
 async def api_rss_brief_sources(
+    request: Request,
     hours: int = Query(24, ge=1, le=24 * 7),
     limit: int = Query(20, ge=1, le=200),
 ):
@@ -2089,8 +2155,9 @@ async def api_rss_brief_sources(
             }
         )
 
-    return UnicodeJSONResponse(
-        content={
+    return conditional_json(
+        request,
+        {
             "hours": int(hours),
             "sources": out,
             "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -2175,6 +2242,7 @@ async def api_rss_ai_classification_test(
 @app.get("/api/rss/brief/source")
 
 async def api_rss_brief_source(
+    request: Request,
     source_id: str = Query(...),
     hours: int = Query(24, ge=1, le=24 * 7),
     limit: int = Query(50, ge=1, le=200),
@@ -2222,8 +2290,9 @@ async def api_rss_brief_source(
             )
         )
 
-    return UnicodeJSONResponse(
-        content={
+    return conditional_json(
+        request,
+        {
             "source_id": sid,
             "hours": int(hours),
             "items": items,
@@ -2293,61 +2362,44 @@ async def viewer(
 
 
 @app.get("/api/news/check-updates")
-async def api_news_check_updates():
+async def api_news_check_updates(
+    request: Request,
+    since: Optional[str] = Query(None, description="Version token from a previous response"),
+    wait: int = Query(0, ge=0, le=60, description="Long-poll: hold up to N seconds until the version changes"),
+):
     """
     API: Check if there are new updates in each category.
-    Returns a map of category_id -> has_new (boolean).
+    Returns a map of category_id -> has_new (boolean), plus a version token.
     
     Uses a simple heuristic: check if the latest item's timestamp
     is newer than 5 minutes ago (meaning fresh content was added).
+    Timestamps come from the data_versions snapshot, not from scanning
+    the entry tables. With ``since`` and ``wait`` the request is held
+    until the version differs from ``since`` (or ``wait`` expires).
     """
     import time
-    conn = _get_online_db_conn()
+    watcher = get_data_version_watcher(project_root)
+    if since and wait > 0:
+        versions = await watcher.wait_for_change(since, float(wait))
+    else:
+        versions = watcher.snapshot()
     
-    # Get all categories
-    categories_result = {}
     five_minutes_ago = int(time.time()) - 300
+    latest_rss = versions.get("rss", (0, 0))[1]
+    latest_news = versions.get("news", (0, 0))[1]
+    
+    categories_result = {
+        # RSS/knowledge category (morning brief), explore and RSS subscriptions share rss_entries
+        "knowledge": latest_rss > five_minutes_ago,
+        "explore": latest_rss > five_minutes_ago,
+        "rss": latest_rss > five_minutes_ago,
+        # Hot-list platforms ("all")
+        "all": latest_news > five_minutes_ago,
+    }
     
-    try:
-        # Check RSS/knowledge category (morning brief)
-        cur = conn.execute(
-            """
-            SELECT MAX(created_at) FROM rss_entries
-            """
-        )
-        row = cur.fetchone()
-        latest_rss = int(row[0] or 0) if row else 0
-        categories_result["knowledge"] = latest_rss > five_minutes_ago
-        
-        # Check explore category (same data source)
-        categories_result["explore"] = latest_rss > five_minutes_ago
-        
-        # Check RSS subscriptions
-        categories_result["rss"] = latest_rss > five_minutes_ago
-        
-    except Exception:
-        pass
-    
-    # Check news_items table for other platforms
-    try:
-        cur = conn.execute(
-            """
-            SELECT MAX(created_at) FROM news_items
-            """
-        )
-        row = cur.fetchone()
-        latest_news = int(row[0] or 0) if row else 0
-        
-        # For "all" category
-        categories_result["all"] = latest_news > five_minutes_ago
-        
-    except Exception:
-        pass
-    
-    return UnicodeJSONResponse(
-        content={
-            "categories": categories_result
-        }
+    return conditional_json(
+        request,
+        {"categories": categories_result, "version": version_token(versions)},
     )
 
 
@@ -2355,9 +2407,11 @@ async def api_news_check_updates():
 async def api_news_click(request: Request):
     """
     API: Record a news item click for analytics and preference tracking.
+
+    The click is queued and acknowledged immediately; tag lookup, session
+    validation and the writes happen in batches (see click_ingest).
     """
     import time
-    import json as _json
     try:
         data = await request.json()
         news_id = str(data.get("news_id") or "").strip()
@@ -2372,95 +2426,51 @@ async def api_news_click(request: Request):
         if not news_id:
             return UnicodeJSONResponse(content={"success": False, "error": "missing news_id"}, status_code=400)
         
-        conn = _get_online_db_conn()
-        
-        # Get user_id from session (if authenticated)
-        user_id = 0
+        # Session is only read here; it is validated by the flusher
+        session_token = ""
         try:
             from hotnews.kernel.auth.auth_api import _get_session_token
-            from hotnews.kernel.auth.auth_service import validate_session
-            from hotnews.web.user_db import get_user_db_conn
-            session_token = _get_session_token(request)
-            if session_token:
-                user_conn = get_user_db_conn(request.app.state.project_root)
-                is_valid, user_info = validate_session(user_conn, session_token)
-                if is_valid and user_info:
-                    user_id = int(user_info.get("id") or 0)
+            session_token = str(_get_session_token(request) or "")
         except Exception:
             pass
         
-        # Get tags for this entry
-        tags_json = "[]"
-        # First try with source_id and dedup_key if provided
-        if source_id and dedup_key:
-            try:
-                cur = conn.execute(
-                    "SELECT tag_id FROM rss_entry_tags WHERE source_id = ? AND dedup_key = ?",
-                    (source_id, dedup_key)
-                )
-                tags = [r[0] for r in cur.fetchall() or []]
-                tags_json = _json.dumps(tags)
-            except Exception:
-                pass
-        
-        # If no tags found and we have news_id, try to look up by news_id
-        if tags_json == "[]" and news_id:
-            try:
-                # Get source_id and dedup_key from rss_entries using news_id
-                cur = conn.execute(
-                    "SELECT source_id, dedup_key FROM rss_entries WHERE id = ?",
-                    (news_id,)
-                )
-                row = cur.fetchone()
-                if row:
-                    source_id = row[0]
-                    dedup_key = row[1]
-                    # Now get tags
-                    cur = conn.execute(
-                        "SELECT tag_id FROM rss_entry_tags WHERE source_id = ? AND dedup_key = ?",
-                        (source_id, dedup_key)
-                    )
-                    tags = [r[0] for r in cur.fetchall() or []]
-                    tags_json = _json.dumps(tags)
-            except Exception:
-                pass
-        
-        conn.execute(
-            """
-            INSERT INTO news_clicks (news_id, url, title, source_name, category, clicked_at, user_agent, user_id, tags_json, source_id, dedup_key)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (news_id, url, title, source_name, category, int(time.time()), user_agent, user_id, tags_json, source_id, dedup_key)
-        )
-        conn.commit()
-        
-        # Update user tag preferences (async-friendly, quick update)
-        if user_id > 0 and tags_json != "[]":
-            try:
-                tags = _json.loads(tags_json)
-                now = int(time.time())
-                user_conn = get_user_db_conn(request.app.state.project_root)
-                for tag_id in tags:
-                    user_conn.execute(
-                        """
-                        INSERT INTO user_tag_preferences (user_id, tag_id, click_count, last_interaction_at, updated_at)
-                        VALUES (?, ?, 1, ?, ?)
-                        ON CONFLICT(user_id, tag_id) DO UPDATE SET
-                            click_count = click_count + 1,
-                            last_interaction_at = ?,
-                            updated_at = ?
-                        """,
-                        (user_id, tag_id, now, now, now, now)
-                    )
-                user_conn.commit()
-            except Exception:
-                pass
-        
+        get_click_ingestor(request.app.state.project_root).submit((
+            news_id, url, title, source_name, category, int(time.time()),
+            user_agent, source_id, dedup_key, session_token,
+        ))
         return UnicodeJSONResponse(content={"success": True})
     except Exception as e:
         return UnicodeJSONResponse(content={"success": False, "error": str(e)}, status_code=500)
 
 
+@app.get("/api/admin/rss-fetch/stats")
+async def api_admin_rss_fetch_stats(request: Request):
+    """
+    API: Outbound RSS fetch internals (pooled sessions per route, per-host scheduler, parse backend).
+    """
+    _require_admin(request)
+    from hotnews.web.host_scheduler import get_host_scheduler
+    from hotnews.web.http_sessions import get_http_session_stats
+    from hotnews.web.parse_pool import get_parse_pool_stats
+    from hotnews.web.rss_proxy import get_rss_proxy_inflight_stats
+
+    return UnicodeJSONResponse(content={
+        "sessions": get_http_session_stats(),
+        "hosts": get_host_scheduler().stats(),
+        "single_flight": get_rss_proxy_inflight_stats(),
+        "parse_pool": get_parse_pool_stats(),
+    })
+
+
+@app.get("/api/admin/retention/stats")
+async def api_admin_retention_stats(request: Request):
+    """
+    API: Result of the last online.db retention run (rows deleted, lock hold times, pages reclaimed).
+    """
+    _require_admin(request)
+    return UnicodeJSONResponse(content={"last_run": get_retention_job(project_root).last_stats})
+
+
 @app.get("/api/admin/news/clicks")
 async def api_admin_news_clicks(
     days: int = Query(7, ge=1, le=30),
@@ -2501,7 +2511,7 @@ async def api_admin_news_clicks(
     cur2 = conn.execute("SELECT COUNT(*) FROM news_clicks WHERE clicked_at >= ?", (since_ts,))
     total = cur2.fetchone()[0] or 0
     
-    return UnicodeJSONResponse(content={"items": items, "total": total, "days": days})
+    return UnicodeJSONResponse(content={"items": items, "total": total, "days": days, "ingest": get_click_ingestor(project_root).stats()})
 
 
 @app.get("/api/news")
@@ -2519,7 +2529,7 @@ async def api_news(
         platform_list = [p.strip() for p in platforms.split(",") if p.strip()]
     
     # Load system settings for per_platform_limit
-    sys_settings = get_system_settings(project_root)
+    sys_settings = system_settings(project_root, get_system_settings)
     items_per_card = sys_settings.get("display", {}).get("items_per_card", 50)
 
     data = viewer_service.get_categorized_news(
@@ -2558,7 +2568,7 @@ async def api_news(
     except Exception:
         pass
 
-    return UnicodeJSONResponse(content=data)
+    return conditional_json(request, data, private=True)
 
 
 @app.get("/api/search")
@@ -2706,28 +2716,12 @@ async def api_news_page(
             }
         )
 
-    safe_limit = min(max(offset + page_size + 1, page_size + 1), 10000)
-
-    data = viewer_service.get_categorized_news(
-        platforms=[pid],
-        limit=safe_limit,
-        apply_filter=True,
-        filter_mode=filter_mode,
-    )
-
-    platform = None
-    categories = (data or {}).get("categories") or {}
-    for cat in categories.values():
-        platforms_obj = (cat or {}).get("platforms") or {}
-        if pid in platforms_obj:
-            platform = platforms_obj.get(pid)
-            break
-
-    if not platform:
+    # Slice the per-crawl category snapshot instead of re-categorising per request
+    news_items, snapshot_updated_at = viewer_service.get_platform_news(pid, filter_mode=filter_mode)
+    if news_items is None:
         raise HTTPException(status_code=404, detail="Platform not found")
 
-    news_items = platform.get("news") or []
-    sliced = news_items[offset : offset + page_size]
+    sliced = news_items.window(offset, offset + page_size)
     has_more = (offset + page_size) < len(news_items)
     next_offset = (offset + page_size) if has_more else None
 
@@ -2739,7 +2733,7 @@ async def api_news_page(
             "next_offset": next_offset,
             "has_more": has_more,
             "items": sliced,
-            "updated_at": (data or {}).get("updated_at"),
+            "updated_at": snapshot_updated_at,
         }
     )
 
@@ -2778,29 +2772,20 @@ async def api_news_pages(
     if len(cleaned) > 120:
         raise HTTPException(status_code=400, detail="Too many platform_ids")
 
-    safe_limit = min(max(page_size + 1, 2), 10000)
-
     results: Dict[str, Any] = {}
     updated_at = None
 
+    # All rss- platforms in one query (page_size + 1 rows each to detect has_more)
+    rss_sids = [pid[len("rss-") :].strip() for pid in cleaned if pid.startswith("rss-")]
+    try:
+        rss_rows = fetch_rss_entries_top_n(_get_online_db_conn(), rss_sids, int(page_size) + 1)
+    except Exception:
+        rss_rows = {}
+
     for pid in cleaned:
         if pid.startswith("rss-"):
             sid = pid[len("rss-") :].strip()
-            conn = _get_online_db_conn()
-            try:
-                cur = conn.execute(
-                    """
-                    SELECT title, url, published_at, published_raw, created_at
-                    FROM rss_entries
-                    WHERE source_id = ?
-                    ORDER BY (CASE WHEN published_at > 0 THEN published_at ELSE created_at END) DESC, id DESC
-                    LIMIT ?
-                    """,
-                    (sid, int(page_size) + 1),
-                )
-                rows = cur.fetchall() or []
-            except Exception:
-                rows = []
+            rows = rss_rows.get(sid) or []
 
             has_more = len(rows) > int(page_size)
             rows = rows[: int(page_size)]
@@ -2837,30 +2822,16 @@ async def api_news_pages(
             }
             continue
 
-        data = viewer_service.get_categorized_news(
-            platforms=[pid],
-            limit=safe_limit,
-            apply_filter=True,
-            filter_mode=filter_mode,
-        )
+        news_items, snapshot_updated_at = viewer_service.get_platform_news(pid, filter_mode=filter_mode)
 
         if updated_at is None:
-            updated_at = (data or {}).get("updated_at")
+            updated_at = snapshot_updated_at
 
-        platform = None
-        categories = (data or {}).get("categories") or {}
-        for cat in categories.values():
-            platforms_obj = (cat or {}).get("platforms") or {}
-            if pid in platforms_obj:
-                platform = platforms_obj.get(pid)
-                break
-
-        if not platform:
+        if news_items is None:
             results[pid] = {"platform_id": pid, "offset": 0, "page_size": page_size, "next_offset": None, "has_more": False, "items": []}
             continue
 
-        news_items = platform.get("news") or []
-        sliced = news_items[0:page_size]
+        sliced = news_items.window(0, page_size)
         has_more = page_size < len(news_items)
         next_offset = page_size if has_more else None
 
@@ -2932,8 +2903,11 @@ async def api_subscriptions_rss_news(request: Request):
     if read_mode == "db":
         categories: Dict[str, Any] = {}
 
-        conn = _get_online_db_conn()
-
+        # Resolve every subscription's source first so sources and entries are each one query
+        sources_by_id = _db_get_rss_sources(
+            [(sub.get("source_id") or sub.get("rss_source_id") or "") for sub in subscriptions if isinstance(sub, dict)]
+        )
+        resolved: List[Tuple[Dict[str, Any], Dict[str, Any], str, str]] = []
         for sub in subscriptions:
             if not isinstance(sub, dict):
                 continue
@@ -2943,7 +2917,7 @@ async def api_subscriptions_rss_news(request: Request):
 
             source = None
             if source_id:
-                source = _db_get_rss_source(source_id)
+                source = sources_by_id.get(source_id)
                 if not source or not source.get("enabled"):
                     continue
                 url = (source.get("url") or "").strip()
@@ -2955,7 +2929,14 @@ async def api_subscriptions_rss_news(request: Request):
             sid = (source.get("id") or "").strip() if isinstance(source, dict) else ""
             if not sid:
                 continue
+            resolved.append((sub, source, sid, url))
+
+        try:
+            entries = fetch_rss_entries_top_n(_get_online_db_conn(), [r[2] for r in resolved], 30)
+        except Exception:
+            entries = {}
 
+        for sub, source, sid, url in resolved:
             column = (sub.get("column") or "RSS").strip() or "RSS"
             cat_id = _normalize_rss_column_to_cat_id(column)
             cat = categories.get(cat_id)
@@ -2983,22 +2964,7 @@ async def api_subscriptions_rss_news(request: Request):
                 platform = {"name": platform_name, "news": []}
                 platforms[platform_id] = platform
 
-            try:
-                cur = conn.execute(
-                    """
-                    SELECT title, url, published_at, published_raw, created_at
-                    FROM rss_entries
-                    WHERE source_id = ?
-                    ORDER BY (CASE WHEN published_at > 0 THEN published_at ELSE created_at END) DESC, id DESC
-                    LIMIT 50
-                    """,
-                    (sid,),
-                )
-                rows = cur.fetchall() or []
-            except Exception:
-                rows = []
-
-            for r in rows[:30]:
+            for r in entries.get(sid) or []:
                 title = (r[0] or "").strip()
                 link = (r[1] or "").strip()
                 if not title:
@@ -3047,7 +3013,7 @@ async def api_subscriptions_rss_news(request: Request):
             return {"ok": False, "sub": sub, "error": "Missing url"}
         async with sem:
             try:
-                proxied = await asyncio.to_thread(rss_proxy_fetch_cached, url)
+                proxied = await rss_proxy_fetch_cached_async(url)
                 return {"ok": True, "sub": sub, "proxied": proxied, "source": source}
             except Exception as e:
                 return {"ok": False, "sub": sub, "error": str(e)}
@@ -3210,6 +3176,21 @@ async def on_startup():
     except Exception as e:
         print(f"⚠️ RSS scheduler start failed: {e}")
 
+    try:
+        get_click_ingestor(project_root)
+    except Exception as e:
+        print(f"⚠️ Click ingestor start failed: {e}")
+
+    try:
+        start_live_updates(project_root)
+    except Exception as e:
+        print(f"⚠️ Live updates start failed: {e}")
+
+    try:
+        start_retention_job(project_root)
+    except Exception as e:
+        print(f"⚠️ Retention job start failed: {e}")
+
     # Start tag auto-promotion task
     try:
         rss_scheduler.start_tag_promotion_task()
@@ -3257,6 +3238,33 @@ async def on_shutdown():
     except Exception as e:
         print(f"⚠️ WeChat scheduler stop failed: {e}")
 
+    try:
+        get_live_hub().close()
+    except Exception:
+        pass
+
+    try:
+        stop_retention_job()
+    except Exception:
+        pass
+
+    try:
+        shutdown_click_ingestor()
+    except Exception as e:
+        print(f"⚠️ Click ingestor flush failed: {e}")
+
+    try:
+        from hotnews.web.parse_pool import shutdown_parse_pool
+        shutdown_parse_pool()
+    except Exception as e:
+        print(f"⚠️ RSS parse pool shutdown failed: {e}")
+
+    try:
+        from hotnews.web.http_sessions import close_http_sessions
+        await close_http_sessions()
+    except Exception as e:
+        print(f"⚠️ RSS HTTP sessions close failed: {e}")
+
 
 def run_server(host: str = "0.0.0.0", port: int = 8080, auto_fetch: bool = False, interval: int = 30):
     """运行 Web 服务器"""
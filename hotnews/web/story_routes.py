@@ -0,0 +1,55 @@
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+
+from hotnews.core.story_cluster import get_story_representatives
+from hotnews.web.json_response import UnicodeJSONResponse
+from hotnews.web.db_online import get_online_db_conn
+
+
+router = APIRouter()
+
+
+def _conn_from_request(request: Request):
+    return get_online_db_conn(project_root=request.app.state.project_root)
+
+
+@router.get("/api/news/stories")
+async def api_news_stories(
+    request: Request,
+    hours: int = Query(24, ge=1, le=336),
+    limit: int = Query(100, ge=1, le=500),
+    min_platforms: int = Query(1, ge=1),
+    cluster_id: Optional[int] = Query(None),
+):
+    """API: 每个故事返回一条代表条目，按跨平台热度（platform_count / item_count）排序。"""
+    conn = _conn_from_request(request)
+
+    if cluster_id is not None:
+        cur = conn.execute(
+            """
+            SELECT item_type, platform_id, title, url, rank, seen_at
+            FROM story_cluster_members
+            WHERE cluster_id = ?
+            ORDER BY seen_at DESC
+            LIMIT ?
+            """,
+            (int(cluster_id), int(limit)),
+        )
+        members = [
+            {
+                "item_type": r[0],
+                "platform_id": r[1],
+                "title": r[2],
+                "url": r[3],
+                "rank": int(r[4] or 0),
+                "seen_at": int(r[5] or 0),
+            }
+            for r in cur.fetchall()
+        ]
+        return UnicodeJSONResponse(content={"cluster_id": int(cluster_id), "members": members})
+
+    since_ts = int(time.time()) - int(hours) * 3600
+    stories = get_story_representatives(conn, since_ts=since_ts, limit=limit, min_platforms=min_platforms)
+    return UnicodeJSONResponse(content={"hours": hours, "count": len(stories), "stories": stories})
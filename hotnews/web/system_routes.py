@@ -1,11 +1,10 @@
-import json
 import os
 from typing import Any, Awaitable, Callable
 
 from fastapi import APIRouter, Query, Request
-from fastapi.responses import Response
 
 from mcp_server.services.cache_service import get_cache
+from hotnews.web.json_response import UnicodeJSONResponse
 
 # [KERNEL] Dynamic Scheduler
 auto_fetch_scheduler = None
@@ -17,19 +16,6 @@ except ImportError:
 router = APIRouter()
 
 
-class UnicodeJSONResponse(Response):
-    media_type = "application/json"
-
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
-
-
 def _get_fetch_news_data(request: Request) -> Callable[[], Awaitable[Any]]:
     fn = getattr(request.app.state, "fetch_news_data", None)
     if not callable(fn):
@@ -4,27 +4,36 @@ Timeline Cache Service
 Provides caching for Morning Brief and Explore timeline APIs.
 Cache TTL: 5 minutes (300 seconds)
 Max items: 1000 per cache (20 cards × 50 items)
+
+Named caches are also written to the optional host-wide shared cache
+(HOTNEWS_SHARED_CACHE=1), so a timeline built by one uvicorn worker is
+reused by the others instead of being rebuilt per worker.
 """
 
 import time
 import hashlib
 from typing import Any, Dict, List, Optional
 
+from hotnews.web.json_response import PreEncodedList
+from mcp_server.services.shared_cache import get_shared_cache
+
 
 class TimelineCache:
     """Simple in-memory cache for timeline data."""
     
-    def __init__(self, ttl_seconds: int = 300, max_items: int = 1000):
+    def __init__(self, ttl_seconds: int = 300, max_items: int = 1000, name: Optional[str] = None):
         """
         Initialize cache.
         
         Args:
             ttl_seconds: Cache time-to-live in seconds (default 5 minutes)
             max_items: Maximum items to cache (default 1000)
+            name: Key in the shared cache; unnamed caches stay process-local
         """
         self._ttl = ttl_seconds
         self._max_items = max_items
-        self._items: Optional[List[Dict[str, Any]]] = None
+        self._shared_key = f"timeline:{name}" if name else ""
+        self._items: Optional[PreEncodedList] = None
         self._created_at: float = 0
         self._config_hash: str = ""
     
@@ -37,7 +46,7 @@ class TimelineCache:
         except Exception:
             return ""
     
-    def get(self, config: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+    def get(self, config: Optional[Dict[str, Any]] = None) -> Optional[PreEncodedList]:
         """
         Get cached items if valid.
         
@@ -45,23 +54,51 @@ class TimelineCache:
             config: Optional config dict to check for changes
             
         Returns:
-            Cached items list or None if cache is invalid
+            Cached items (a list that keeps each item's JSON encoding for
+            reuse, see ``PreEncodedList.window``) or None if cache is invalid
         """
+        current_hash = self._compute_config_hash(config) if config is not None else None
+        if self._is_fresh(current_hash):
+            return self._items
+
+        # Another worker may already have built it
+        if self._load_shared() and self._is_fresh(current_hash):
+            return self._items
+        return None
+
+    def _is_fresh(self, current_hash: Optional[str]) -> bool:
         # Check if cache exists
         if self._items is None:
-            return None
+            return False
         
         # Check TTL
         if (time.time() - self._created_at) >= self._ttl:
-            return None
+            return False
         
         # Check config hash if provided
-        if config is not None:
-            current_hash = self._compute_config_hash(config)
-            if current_hash != self._config_hash:
-                return None
+        if current_hash is not None and current_hash != self._config_hash:
+            return False
         
-        return self._items
+        return True
+
+    def _load_shared(self) -> bool:
+        """Adopt a newer copy from the shared cache; returns True if one was loaded."""
+        shared = get_shared_cache() if self._shared_key else None
+        if shared is None:
+            return False
+        try:
+            found = shared.get(self._shared_key)
+        except Exception:
+            return False
+        if found is None:
+            return False
+        payload, stored_at, _ = found
+        if stored_at <= self._created_at or not isinstance(payload, dict):
+            return False
+        self._items = PreEncodedList(payload.get("items") or [])
+        self._config_hash = payload.get("config_hash") or ""
+        self._created_at = stored_at
+        return True
     
     def set(self, items: List[Dict[str, Any]], config: Optional[Dict[str, Any]] = None) -> None:
         """
@@ -72,19 +109,39 @@ class TimelineCache:
             config: Optional config dict for invalidation tracking
         """
         # Truncate to max items
-        self._items = items[:self._max_items] if len(items) > self._max_items else items
+        items = items[:self._max_items] if len(items) > self._max_items else list(items)
+        self._items = PreEncodedList(items)
         self._created_at = time.time()
         
         if config is not None:
             self._config_hash = self._compute_config_hash(config)
         else:
             self._config_hash = ""
+
+        shared = get_shared_cache() if self._shared_key else None
+        if shared is not None:
+            try:
+                shared.set(
+                    self._shared_key,
+                    {"items": items, "config_hash": self._config_hash},
+                    self._created_at,
+                    self._created_at + self._ttl,
+                )
+            except Exception:
+                pass
     
     def invalidate(self) -> None:
-        """Clear the cache."""
+        """Clear the cache (including the shared copy)."""
         self._items = None
         self._created_at = 0
         self._config_hash = ""
+
+        shared = get_shared_cache() if self._shared_key else None
+        if shared is not None:
+            try:
+                shared.delete(self._shared_key)
+            except Exception:
+                pass
     
     def get_slice(self, offset: int, limit: int, config: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
         """
@@ -115,6 +172,16 @@ class TimelineCache:
         """Get number of cached items."""
         return len(self._items) if self._items else 0
     
+    @property
+    def created_at(self) -> float:
+        """Unix time the cached items were built (0 when empty)."""
+        return self._created_at
+
+    @property
+    def version(self) -> str:
+        """Build time + config hash; changes whenever the cached items do."""
+        return f"{self._created_at:.6f}:{self._config_hash}"
+
     @property
     def age_seconds(self) -> float:
         """Get cache age in seconds."""
@@ -124,8 +191,8 @@ class TimelineCache:
 
 
 # Global cache instances
-brief_timeline_cache = TimelineCache(ttl_seconds=300, max_items=1000)
-explore_timeline_cache = TimelineCache(ttl_seconds=300, max_items=1000)
+brief_timeline_cache = TimelineCache(ttl_seconds=300, max_items=1000, name="brief")
+explore_timeline_cache = TimelineCache(ttl_seconds=300, max_items=1000, name="explore")
 my_tags_cache = TimelineCache(ttl_seconds=300, max_items=500)  # Cache for user's followed tags news
 
 
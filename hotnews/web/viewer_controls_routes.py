@@ -1,22 +1,9 @@
-import json
 from fastapi import APIRouter, Request
-from fastapi.responses import Response
 
-
-router = APIRouter()
+from hotnews.web.json_response import UnicodeJSONResponse
 
 
-class UnicodeJSONResponse(Response):
-    media_type = "application/json"
-
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-        ).encode("utf-8")
+router = APIRouter()
 
 
 def _get_services(request: Request):
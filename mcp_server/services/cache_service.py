@@ -1,22 +1,208 @@
 """
 缓存服务
 
-实现TTL缓存机制，提升数据访问性能。
+实现有界的 TTL + LRU 缓存，提升数据访问性能。
+
+- 条目数与近似字节数双重上限（HOTNEWS_CACHE_MAX_ENTRIES / HOTNEWS_CACHE_MAX_BYTES），
+  超出时按 LRU 淘汰，get/set 均为 O(1)
+- 过期时间在写入时确定（set 的 ttl 参数，默认 HOTNEWS_CACHE_DEFAULT_TTL），
+  后台线程定期清理已过期条目，不再依赖"读到过期键才删除"
+- 读取方仍可传入 ttl：超过该时长视为未命中，但条目保留给使用更长 TTL 的读取方
+- 按键前缀（第一个 ":" 之前）统计命名空间的命中、淘汰与占用
+- 可选的本机共享二级缓存（见 shared_cache.py）：L1 未命中时回源 L2，
+  写入同时写 L2，多个 worker 共享同一份缓存结果
 """
 
+import os
+import sys
+import threading
 import time
-from typing import Any, Optional
-from threading import Lock
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from mcp_server.services.shared_cache import SharedCache, get_shared_cache
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        v = int((os.environ.get(name, "") or "").strip() or str(default))
+    except Exception:
+        v = default
+    if v <= 0:
+        v = default
+    return int(max(lo, min(hi, v)))
+
+
+def _approx_size(value: Any, max_nodes: int = 20000) -> int:
+    """
+    估算对象占用的字节数
+
+    遍历容器（dict/list/tuple/set）累加 sys.getsizeof；节点数超过 max_nodes 时
+    按已遍历部分的平均大小外推，避免大对象估算本身过慢。
+    """
+    total = 0
+    nodes = 0
+    pending = 0
+    stack = [value]
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        oid = id(obj)
+        if oid in seen:
+            continue
+        seen.add(oid)
+        nodes += 1
+        try:
+            total += sys.getsizeof(obj)
+        except Exception:
+            total += 64
+        if nodes >= max_nodes:
+            pending = len(stack)
+            break
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    if pending:
+        total += int(total / nodes * pending)
+    return total
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0] if ":" in key else "_"
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "expires_at", "size", "ns")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float, size: int, ns: str):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.size = size
+        self.ns = ns
 
 
 class CacheService:
     """缓存服务类"""
 
-    def __init__(self):
-        """初始化缓存服务"""
-        self._cache = {}
-        self._timestamps = {}
-        self._lock = Lock()
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[int] = None,
+        sweep_interval: Optional[int] = None,
+        shared: Optional[SharedCache] = None,
+    ):
+        """
+        初始化缓存服务
+
+        Args:
+            max_entries: 最大条目数，默认 HOTNEWS_CACHE_MAX_ENTRIES（5000）
+            max_bytes: 近似字节上限，默认 HOTNEWS_CACHE_MAX_BYTES（256MB）
+            default_ttl: set 未指定 ttl 时的过期秒数，默认 HOTNEWS_CACHE_DEFAULT_TTL（1 天）
+            sweep_interval: 后台清理间隔秒数，默认 HOTNEWS_CACHE_SWEEP_INTERVAL（60）
+            shared: 可选的本机共享二级缓存
+        """
+        self.max_entries = int(max_entries or _env_int("HOTNEWS_CACHE_MAX_ENTRIES", 5000, 10, 10_000_000))
+        self.max_bytes = int(max_bytes or _env_int("HOTNEWS_CACHE_MAX_BYTES", 256 * 1024 * 1024, 1024 * 1024, 1 << 40))
+        self.default_ttl = int(default_ttl or _env_int("HOTNEWS_CACHE_DEFAULT_TTL", 86400, 1, 365 * 86400))
+        self.sweep_interval = int(sweep_interval or _env_int("HOTNEWS_CACHE_SWEEP_INTERVAL", 60, 1, 3600))
+
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._ns_stats: Dict[str, Dict[str, int]] = {}
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._l2 = shared
+        self._l2_generation = 0
+        self._l2_checked_at = 0.0
+        self._l2_stats = {"hits": 0, "misses": 0, "errors": 0}
+        if self._l2 is not None:
+            try:
+                self._l2_generation = self._l2.generation()
+            except Exception:
+                self._l2 = None
+
+    # === 内部工具 ===
+
+    def _ns(self, ns: str) -> Dict[str, int]:
+        st = self._ns_stats.get(ns)
+        if st is None:
+            st = {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0}
+            self._ns_stats[ns] = st
+        return st
+
+    def _remove(self, key: str, reason: Optional[str] = None) -> None:
+        """删除条目并更新统计（调用方需持有锁）"""
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        st = self._ns(entry.ns)
+        st["entries"] -= 1
+        st["bytes"] -= entry.size
+        if reason:
+            st[reason] += 1
+
+    def _enforce_budget(self) -> None:
+        """按 LRU 顺序淘汰，直到条目数与字节数都回到上限以内（调用方需持有锁）"""
+        while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._cache))
+            self._remove(oldest, "evictions")
+
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="hotnews-cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[缓存] 后台清理失败: {e}")
+
+    # === 共享二级缓存 ===
+
+    def _l2_sync_generation(self, now: float) -> None:
+        """其他进程 clear() 过共享缓存时，清空本进程的 L1（每秒最多检查一次）"""
+        if self._l2 is None or now - self._l2_checked_at < 1.0:
+            return
+        self._l2_checked_at = now
+        try:
+            gen = self._l2.generation()
+        except Exception:
+            self._l2_stats["errors"] += 1
+            return
+        if gen != self._l2_generation:
+            self._l2_generation = gen
+            self._clear_local()
+
+    def _l2_get(self, key: str, max_age: float, now: float) -> Tuple[Optional[Any], float]:
+        """L1 未命中时回源 L2，命中则按原写入/过期时间回填 L1"""
+        if self._l2 is None:
+            return None, 0.0
+        try:
+            found = self._l2.get(key)
+        except Exception:
+            self._l2_stats["errors"] += 1
+            return None, 0.0
+        if found is None or now - found[1] >= max_age:
+            self._l2_stats["misses"] += 1
+            return None, 0.0
+        value, stored_at, expires_at = found
+        self._l2_stats["hits"] += 1
+        self._store_local(key, value, stored_at, expires_at)
+        return value, now - stored_at
+
+    # === 公共接口 ===
 
     def get(self, key: str, ttl: int = 900) -> Optional[Any]:
         """
@@ -24,33 +210,92 @@ class CacheService:
 
         Args:
             key: 缓存键
-            ttl: 存活时间（秒），默认15分钟
+            ttl: 读取方可接受的最大缓存时长（秒），默认15分钟
 
         Returns:
             缓存的值，如果不存在或已过期则返回None
         """
+        now = time.time()
+        self._l2_sync_generation(now)
         with self._lock:
-            if key in self._cache:
-                # 检查是否过期
-                if time.time() - self._timestamps[key] < ttl:
-                    return self._cache[key]
-                else:
-                    # 已过期，删除缓存
-                    del self._cache[key]
-                    del self._timestamps[key]
-        return None
+            entry = self._cache.get(key)
+            if entry is not None and now >= entry.expires_at:
+                self._remove(key, "expirations")
+                entry = None
+            if entry is not None and now - entry.stored_at < ttl:
+                self._cache.move_to_end(key)
+                self._ns(entry.ns)["hits"] += 1
+                return entry.value
+            # 未命中，或对该读取方已过期（条目保留到写入时的过期时间，供更长 TTL 的读取方使用）
+            self._ns(_namespace(key))["misses"] += 1
+        # 其他 worker 可能已写入更新的结果
+        value, _ = self._l2_get(key, ttl, now)
+        return value
 
-    def set(self, key: str, value: Any) -> None:
+    def get_with_age(self, key: str, max_age: int) -> Tuple[Optional[Any], float]:
+        """
+        获取缓存数据及其已缓存时长（用于 stale-while-revalidate）
+
+        Args:
+            key: 缓存键
+            max_age: 可接受的最大缓存时长（秒）
+
+        Returns:
+            (缓存的值, 已缓存秒数)；不存在或超过 max_age 时返回 (None, 0.0)
+        """
+        now = time.time()
+        self._l2_sync_generation(now)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now >= entry.expires_at:
+                self._remove(key, "expirations")
+                entry = None
+            if entry is not None and now - entry.stored_at < max_age:
+                self._cache.move_to_end(key)
+                self._ns(entry.ns)["hits"] += 1
+                return entry.value, now - entry.stored_at
+            self._ns(_namespace(key))["misses"] += 1
+        local_age = (now - entry.stored_at) if entry is not None else None
+        value, age = self._l2_get(key, max_age, now)
+        if value is not None and (local_age is None or age < local_age):
+            return value, age
+        return None, 0.0
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """
         设置缓存数据
 
         Args:
             key: 缓存键
             value: 缓存值
+            ttl: 过期秒数，默认 default_ttl
         """
+        now = time.time()
+        expires_at = now + (ttl if ttl and ttl > 0 else self.default_ttl)
+        self._store_local(key, value, now, expires_at)
+        if self._l2 is not None:
+            try:
+                self._l2.set(key, value, now, expires_at)
+            except Exception:
+                self._l2_stats["errors"] += 1
+        self._ensure_sweeper()
+
+    def _store_local(self, key: str, value: Any, stored_at: float, expires_at: float) -> None:
+        size = _approx_size(value) + sys.getsizeof(key)
+        ns = _namespace(key)
         with self._lock:
-            self._cache[key] = value
-            self._timestamps[key] = time.time()
+            self._remove(key)
+            if size > self.max_bytes:
+                # 单个值超过整体预算，不缓存
+                self._ns(ns)["evictions"] += 1
+                return
+            self._cache[key] = _Entry(value, stored_at, expires_at, size, ns)
+            self._bytes += size
+            st = self._ns(ns)
+            st["entries"] += 1
+            st["bytes"] += size
+            st["sets"] += 1
+            self._enforce_budget()
 
     def delete(self, key: str) -> bool:
         """
@@ -62,65 +307,122 @@ class CacheService:
         Returns:
             是否成功删除
         """
+        if self._l2 is not None:
+            try:
+                self._l2.delete(key)
+            except Exception:
+                self._l2_stats["errors"] += 1
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
-                del self._timestamps[key]
+                self._remove(key)
                 return True
         return False
 
     def clear(self) -> None:
-        """清空所有缓存"""
+        """清空所有缓存（启用共享缓存时，所有 worker 的缓存都会被清空）"""
+        if self._l2 is not None:
+            try:
+                self._l2.clear()
+                self._l2_generation = self._l2.generation()
+            except Exception:
+                self._l2_stats["errors"] += 1
+        self._clear_local()
+
+    def _clear_local(self) -> None:
         with self._lock:
             self._cache.clear()
-            self._timestamps.clear()
+            self._bytes = 0
+            for st in self._ns_stats.values():
+                st["entries"] = 0
+                st["bytes"] = 0
+
+    def sweep(self) -> int:
+        """
+        清理所有已到写入过期时间的条目（后台线程定期调用）
+
+        Returns:
+            清理的条目数量
+        """
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._cache.items() if now >= e.expires_at]
+            for k in expired:
+                self._remove(k, "expirations")
+        if self._l2 is not None:
+            try:
+                self._l2.sweep()
+            except Exception:
+                self._l2_stats["errors"] += 1
+        return len(expired)
 
     def cleanup_expired(self, ttl: int = 900) -> int:
         """
         清理过期缓存
 
         Args:
-            ttl: 存活时间（秒）
+            ttl: 存活时间（秒），缓存时长超过它的条目也会被清理
 
         Returns:
             清理的条目数量
         """
+        now = time.time()
         with self._lock:
-            current_time = time.time()
-            expired_keys = [
-                key for key, timestamp in self._timestamps.items()
-                if current_time - timestamp >= ttl
+            expired = [
+                k for k, e in self._cache.items()
+                if now >= e.expires_at or now - e.stored_at >= ttl
             ]
+            for k in expired:
+                self._remove(k, "expirations")
+        return len(expired)
 
-            for key in expired_keys:
-                del self._cache[key]
-                del self._timestamps[key]
-
-            return len(expired_keys)
+    def close(self) -> None:
+        """停止后台清理线程"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=2)
 
     def get_stats(self) -> dict:
         """
         获取缓存统计信息
 
         Returns:
-            统计信息字典
+            统计信息字典（含按键前缀划分的命名空间统计）
         """
+        now = time.time()
         with self._lock:
-            return {
-                "total_entries": len(self._cache),
-                "oldest_entry_age": (
-                    time.time() - min(self._timestamps.values())
-                    if self._timestamps else 0
-                ),
-                "newest_entry_age": (
-                    time.time() - max(self._timestamps.values())
-                    if self._timestamps else 0
-                )
+            stored = [e.stored_at for e in self._cache.values()]
+            namespaces = {
+                ns: dict(st) for ns, st in self._ns_stats.items()
+                if st["entries"] or st["hits"] or st["misses"] or st["sets"]
             }
+            total_bytes = self._bytes
+            total_entries = len(self._cache)
+        hits = sum(st["hits"] for st in namespaces.values())
+        misses = sum(st["misses"] for st in namespaces.values())
+        shared = None
+        if self._l2 is not None:
+            try:
+                shared = {**self._l2.stats(), **self._l2_stats}
+            except Exception:
+                shared = dict(self._l2_stats)
+        return {
+            "total_entries": total_entries,
+            "oldest_entry_age": (now - min(stored)) if stored else 0,
+            "newest_entry_age": (now - max(stored)) if stored else 0,
+            "max_entries": self.max_entries,
+            "approx_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(hits / (hits + misses), 4) if (hits + misses) else None,
+            "evictions": sum(st["evictions"] for st in namespaces.values()),
+            "expirations": sum(st["expirations"] for st in namespaces.values()),
+            "namespaces": namespaces,
+            "shared": shared,
+        }
 
 
 # 全局缓存实例
 _global_cache = None
+_global_cache_lock = threading.Lock()
 
 
 def get_cache() -> CacheService:
@@ -132,5 +434,7 @@ def get_cache() -> CacheService:
     """
     global _global_cache
     if _global_cache is None:
-        _global_cache = CacheService()
+        with _global_cache_lock:
+            if _global_cache is None:
+                _global_cache = CacheService(shared=get_shared_cache())
     return _global_cache
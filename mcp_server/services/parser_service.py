@@ -515,13 +515,13 @@ class ParserService:
         # 优先从 SQLite 读取
         sqlite_result = self._read_from_sqlite(date, platform_ids)
         if sqlite_result:
-            self.cache.set(cache_key, sqlite_result)
+            self.cache.set(cache_key, sqlite_result, ttl=ttl)
             return sqlite_result
 
         # SQLite 不存在，尝试从 TXT 读取
         txt_result = self._read_from_txt(date, platform_ids)
         if txt_result:
-            self.cache.set(cache_key, txt_result)
+            self.cache.set(cache_key, txt_result, ttl=ttl)
             return txt_result
 
         # 两种数据源都不存在
@@ -0,0 +1,271 @@
+"""
+本机共享缓存（L2）
+
+多个 uvicorn worker 各自持有进程内缓存，命中率被 worker 数摊薄，
+同样昂贵的时间线 / 分类结果会被每个 worker 各算一遍。
+这里提供一个同机共享的二级缓存，放在进程内缓存（L1）之后：
+
+- 存储：SQLite（WAL 模式）单文件，无需任何外部服务，多进程并发读写安全
+- 序列化：只接受纯 JSON 结构的值，优先用 orjson，其次 msgpack，最后标准库 json；
+  不使用 pickle（缓存文件被改写即可执行任意代码）。tuple / dataclass 等无法无损
+  表示的值不写入 L2，调用方需先转换（如 dataclasses.asdict），否则只留在 L1
+- 过期：写入时确定过期时间，读取时校验，后台由 L1 的清理线程顺带清理
+- 失效：clear() 会递增全局 generation，其他 worker 的 L1 检测到后自行清空
+
+默认关闭，设置 HOTNEWS_SHARED_CACHE=1 启用；
+数据库路径 HOTNEWS_SHARED_CACHE_PATH（默认 output/cache/shared_cache.db）。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+_PLAIN_SCALARS = (str, int, float, bool, type(None))
+
+
+def _is_plain(value: Any, max_nodes: int = 50000) -> bool:
+    """值是否只由 dict(str 键) / list / 标量组成，可被 JSON 类格式无损往返"""
+    stack = [value]
+    nodes = 0
+    while stack:
+        obj = stack.pop()
+        nodes += 1
+        if nodes > max_nodes:
+            return False
+        if isinstance(obj, _PLAIN_SCALARS):
+            if isinstance(obj, float) and obj != obj:
+                return False
+            continue
+        if type(obj) is dict:
+            for k, v in obj.items():
+                if type(k) is not str:
+                    return False
+                stack.append(v)
+            continue
+        if type(obj) is list:
+            stack.extend(obj)
+            continue
+        return False
+    return True
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    序列化为带 1 字节格式标记的 bytes
+
+    Raises:
+        TypeError: 值不是纯 JSON 结构
+    """
+    if not _is_plain(value):
+        raise TypeError(f"共享缓存只接受 dict/list/标量组成的值，收到 {type(value).__name__}")
+    if orjson is not None:
+        return b"o" + orjson.dumps(value)
+    if msgpack is not None:
+        return b"m" + msgpack.packb(value, use_bin_type=True)
+    return b"j" + json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_value(blob: bytes) -> Any:
+    tag, body = blob[:1], blob[1:]
+    if tag == b"o":
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    if tag == b"m":
+        if msgpack is None:
+            raise ValueError("msgpack not installed")
+        return msgpack.unpackb(body, raw=False)
+    if tag == b"j":
+        return json.loads(body)
+    raise ValueError(f"未知的缓存格式标记: {tag!r}")
+
+
+class SharedCache:
+    """基于 SQLite 的同机多进程共享缓存"""
+
+    def __init__(self, path: str, max_entries: int = 20000):
+        """
+        初始化共享缓存
+
+        Args:
+            path: SQLite 数据库文件路径
+            max_entries: 最大条目数，清理时按写入时间淘汰最旧条目
+        """
+        self.path = str(path)
+        self.max_entries = max(100, int(max_entries))
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.skipped = 0  # 因无法编码而未写入的次数
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 连接不跨线程共享，每个线程一个连接
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=2000")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries(expires_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO cache_meta(name, value) VALUES('generation', 0)")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        读取条目
+
+        Returns:
+            (值, 写入时间, 过期时间)；不存在、已过期或无法解码时返回 None
+        """
+        row = self._conn().execute(
+            "SELECT value, stored_at, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() >= row[2]:
+            return None
+        try:
+            return decode_value(row[0]), float(row[1]), float(row[2])
+        except Exception:
+            return None
+
+    def set(self, key: str, value: Any, stored_at: float, expires_at: float) -> bool:
+        """
+        写入条目
+
+        Returns:
+            是否写入；值无法编码时跳过（只留在调用方的 L1）并返回 False
+        """
+        try:
+            blob = encode_value(value)
+        except Exception:
+            self.skipped += 1
+            return False
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries(key, value, stored_at, expires_at) VALUES(?, ?, ?, ?)",
+            (key, sqlite3.Binary(blob), float(stored_at), float(expires_at)),
+        )
+        return True
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> None:
+        """删除某个键前缀下的全部条目"""
+        # 用范围条件代替 LIKE，避免前缀中的 % / _ 被当作通配符
+        self._conn().execute(
+            "DELETE FROM cache_entries WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+        )
+
+    def clear(self) -> None:
+        """清空全部条目并递增 generation，通知其他进程清空各自的 L1"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def generation(self) -> int:
+        row = self._conn().execute("SELECT value FROM cache_meta WHERE name = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def sweep(self) -> int:
+        """删除已过期条目，并把条目数压回 max_entries 以内"""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        if total > self.max_entries:
+            removed += conn.execute(
+                """
+                DELETE FROM cache_entries WHERE key IN (
+                    SELECT key FROM cache_entries ORDER BY stored_at ASC LIMIT ?
+                )
+                """,
+                (int(total - self.max_entries),),
+            ).rowcount
+        return max(0, removed)
+
+    def stats(self) -> dict:
+        row = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache_entries"
+        ).fetchone()
+        return {
+            "path": self.path,
+            "entries": int(row[0]),
+            "bytes": int(row[1]),
+            "max_entries": self.max_entries,
+            "generation": self.generation(),
+            "skipped": self.skipped,
+            "codec": "orjson" if orjson is not None else ("msgpack" if msgpack is not None else "json"),
+        }
+
+
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_checked = False
+_shared_cache_lock = threading.Lock()
+
+
+def _shared_cache_enabled() -> bool:
+    v = (os.environ.get("HOTNEWS_SHARED_CACHE", "") or "").strip().lower()
+    return v in {"1", "true", "yes", "on"}
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """
+    获取共享缓存实例
+
+    Returns:
+        未启用或初始化失败时返回 None（调用方退化为纯进程内缓存）
+    """
+    global _shared_cache, _shared_cache_checked
+    if _shared_cache_checked:
+        return _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache_checked:
+            return _shared_cache
+        if _shared_cache_enabled():
+            path = (os.environ.get("HOTNEWS_SHARED_CACHE_PATH", "") or "").strip() or "output/cache/shared_cache.db"
+            try:
+                max_entries = int((os.environ.get("HOTNEWS_SHARED_CACHE_MAX_ENTRIES", "") or "").strip() or "20000")
+            except ValueError:
+                max_entries = 20000
+            try:
+                _shared_cache = SharedCache(path, max_entries=max_entries)
+                print(f"[共享缓存] 已启用: {path}")
+            except Exception as e:
+                print(f"[共享缓存] 初始化失败，仅使用进程内缓存: {e}")
+                _shared_cache = None
+        _shared_cache_checked = True
+        return _shared_cache
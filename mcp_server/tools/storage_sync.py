@@ -64,6 +64,7 @@ class StorageSyncTools:
             "access_key_id": remote_config.get("access_key_id") or os.environ.get("S3_ACCESS_KEY_ID", ""),
             "secret_access_key": remote_config.get("secret_access_key") or os.environ.get("S3_SECRET_ACCESS_KEY", ""),
             "region": remote_config.get("region") or os.environ.get("S3_REGION", ""),
+            "transfer_workers": int(os.environ.get("S3_TRANSFER_WORKERS", "") or remote_config.get("transfer_workers", 4)),
         }
 
     def _has_remote_config(self) -> bool:
@@ -98,6 +99,8 @@ class StorageSyncTools:
                 endpoint_url=remote_config["endpoint_url"],
                 region=remote_config.get("region", ""),
                 timezone=timezone,
+                transfer_workers=remote_config.get("transfer_workers", 4),
+                async_upload=False,  # 仅用于拉取/查询，不需要上传队列
             )
             return self._remote_backend
         except ImportError:
@@ -214,9 +217,6 @@ class StorageSyncTools:
             # 获取远程可用日期
             remote_dates = remote_backend.list_remote_dates()
 
-            # 获取本地已有日期
-            local_dates = set(self._get_local_dates())
-
             # 计算需要拉取的日期（最近 N 天）
             from hotnews.utils.time import get_configured_time
             config = self._load_config()
@@ -230,34 +230,23 @@ class StorageSyncTools:
                 if date_str in remote_dates:
                     target_dates.append(date_str)
 
-            # 执行拉取
+            # 执行拉取（并发下载，本地已是最新的日期按 ETag/大小跳过）
             synced_dates = []
             skipped_dates = []
             failed_dates = []
 
+            pull_results = remote_backend.pull_dates(target_dates, str(local_dir))
             for date_str in target_dates:
-                # 检查本地是否已存在
-                if date_str in local_dates:
-                    skipped_dates.append(date_str)
-                    continue
-
-                # 拉取单个日期
-                try:
-                    local_date_dir = local_dir / date_str
-                    local_db_path = local_date_dir / "news.db"
-                    remote_key = f"news/{date_str}.db"
-
-                    local_date_dir.mkdir(parents=True, exist_ok=True)
-                    remote_backend.s3_client.download_file(
-                        remote_backend.bucket_name,
-                        remote_key,
-                        str(local_db_path)
-                    )
+                status = pull_results.get(date_str, "")
+                if status == "pulled":
                     synced_dates.append(date_str)
                     print(f"[存储同步] 已拉取: {date_str}")
-                except Exception as e:
-                    failed_dates.append({"date": date_str, "error": str(e)})
-                    print(f"[存储同步] 拉取失败 ({date_str}): {e}")
+                elif status in ("skipped", "missing"):
+                    skipped_dates.append(date_str)
+                else:
+                    error = status[len("failed: "):] if status.startswith("failed: ") else status
+                    failed_dates.append({"date": date_str, "error": error})
+                    print(f"[存储同步] 拉取失败 ({date_str}): {error}")
 
             return {
                 "success": True,
@@ -266,7 +255,7 @@ class StorageSyncTools:
                 "skipped_dates": skipped_dates,
                 "failed_dates": failed_dates,
                 "message": f"成功同步 {len(synced_dates)} 天数据" + (
-                    f"，跳过 {len(skipped_dates)} 天（本地已存在）" if skipped_dates else ""
+                    f"，跳过 {len(skipped_dates)} 天（本地已是最新）" if skipped_dates else ""
                 ) + (
                     f"，失败 {len(failed_dates)} 天" if failed_dates else ""
                 )
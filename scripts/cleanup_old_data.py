@@ -5,63 +5,36 @@
 
 用法:
     python scripts/cleanup_old_data.py
+    python scripts/cleanup_old_data.py --convert-auto-vacuum   # 一次性转换为 auto_vacuum=INCREMENTAL（全量 VACUUM，需维护窗口）
     
 环境变量:
     ONLINE_DB_PATH: online.db 路径 (默认: /app/output/online.db)
 """
 import sqlite3
 import os
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from hotnews.web.db_retention import RetentionJob, convert_to_incremental, format_retention_stats  # noqa: E402
+
 
 def cleanup_old_data(db_path: str, retention_config: dict) -> dict:
     """
-    清理过期数据
+    清理过期数据（分批删除 + 增量 VACUUM，见 hotnews.web.db_retention）
     
     Args:
         db_path: 数据库路径
         retention_config: 保留天数配置
         
     Returns:
-        清理统计
+        清理统计（删除行数、锁持有时间、回收页数）
     """
-    conn = sqlite3.connect(db_path)
-    now_ts = int(time.time())
-    stats = {}
-    
-    # rss_entries: 保留 60 天
-    cutoff_entries = now_ts - retention_config.get("rss_entries", 60) * 86400
-    conn.execute("DELETE FROM rss_entries WHERE fetched_at < ?", (cutoff_entries,))
-    stats["rss_entries_deleted"] = conn.total_changes
-    
-    # rss_entry_ai_labels: 保留 30 天
-    cutoff_labels = now_ts - retention_config.get("rss_entry_ai_labels", 30) * 86400
-    try:
-        conn.execute("DELETE FROM rss_entry_ai_labels WHERE labeled_at < ?", (cutoff_labels,))
-        stats["ai_labels_deleted"] = conn.total_changes
-    except Exception:
-        stats["ai_labels_deleted"] = 0
-    
-    # rss_usage_events: 保留 90 天
-    cutoff_events = now_ts - retention_config.get("rss_usage_events", 90) * 86400
-    try:
-        conn.execute("DELETE FROM rss_usage_events WHERE ts < ?", (cutoff_events,))
-        stats["usage_events_deleted"] = conn.total_changes
-    except Exception:
-        stats["usage_events_deleted"] = 0
-    
-    conn.commit()
-    
-    # VACUUM 回收空间
-    try:
-        conn.execute("VACUUM")
-    except Exception:
-        pass
-    
-    conn.close()
-    return stats
+    job = RetentionJob(Path(db_path), retention_days=retention_config)
+    return job.run()
 
 
 def auto_adjust_cadence(db_path: str) -> dict:
@@ -145,10 +118,12 @@ def main():
         "rss_entry_ai_labels": 30,
         "rss_usage_events": 90,
     }
+    if "--convert-auto-vacuum" in sys.argv[1:]:
+        print("[Cleanup] Converting to auto_vacuum=INCREMENTAL (full VACUUM)...")
+        print(f"[Cleanup] auto_vacuum={convert_to_incremental(Path(db_path))}")
+
     cleanup_stats = cleanup_old_data(db_path, retention_config)
-    print(f"[Cleanup] Deleted: entries={cleanup_stats.get('rss_entries_deleted', 0)}, "
-          f"labels={cleanup_stats.get('ai_labels_deleted', 0)}, "
-          f"events={cleanup_stats.get('usage_events_deleted', 0)}")
+    print(f"[Cleanup] {format_retention_stats(cleanup_stats)}")
     
     # 2. 自动调整 Cadence
     cadence_stats = auto_adjust_cadence(db_path)